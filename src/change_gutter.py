@@ -0,0 +1,406 @@
+# change_gutter.py
+import queue
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+from line_diff import diff_lines
+
+# A difference between the buffer and the saved text. start/end are buffer
+# lines, base_start/base_end saved lines, both end-exclusive. kind is
+# 'added' (no saved lines), 'deleted' (no buffer lines; shown above line
+# start) or 'modified'.
+Hunk = namedtuple('Hunk', 'kind start end base_start base_end')
+
+
+def hunks_from_opcodes(opcodes):
+    """
+    Turn diff opcodes into hunks.
+
+    Args:
+        opcodes: Non-equal (tag, i1, i2, j1, j2) opcodes, saved text to buffer
+
+    Returns:
+        list: Hunk tuples in buffer order
+    """
+    kinds = {'insert': 'added', 'delete': 'deleted', 'replace': 'modified'}
+    return [Hunk(kinds[tag], j1, j2, i1, i2) for tag, i1, i2, j1, j2 in opcodes]
+
+
+def rediff(base, lines, hunks, first, old_end, new_end):
+    """
+    Update the hunks of a buffer after lines in one region changed, diffing
+    only that region. The region is widened to the hunks it touches, so its
+    edges lie on lines that are equal in both versions; hunks above it are
+    kept and hunks below it are shifted.
+
+    Args:
+        base: Saved lines
+        lines: Buffer lines after the change
+        hunks: Hunks of the buffer before the change, or None to diff everything
+        first: First changed line
+        old_end: End of the changed region before the change
+        new_end: End of the changed region after the change
+
+    Returns:
+        list: Hunk tuples of the new buffer
+    """
+    if hunks is None:
+        return hunks_from_opcodes(diff_lines(base, lines))
+    delta = new_end - old_end
+    # Hunks overlapping or touching the region join it
+    starts = [hunk.start for hunk in hunks]
+    low = bisect_left([hunk.end for hunk in hunks], first)
+    high = bisect_right(starts, old_end)
+    if low < high:
+        first = min(first, hunks[low].start)
+        end = max(old_end, hunks[high - 1].end)
+        new_end += end - old_end
+        old_end = end
+    # Lines outside hunks map to saved lines at a constant offset
+    offset = 0
+    if low:
+        offset = hunks[low - 1].base_end - hunks[low - 1].end
+    base_first = first + offset
+    base_end = old_end + offset + sum(hunk.base_end - hunk.base_start - (hunk.end - hunk.start)
+                                      for hunk in hunks[low:high])
+    middle = [Hunk(hunk.kind, hunk.start + first, hunk.end + first,
+                   hunk.base_start + base_first, hunk.base_end + base_first)
+              for hunk in hunks_from_opcodes(diff_lines(base[base_first:base_end], lines[first:new_end]))]
+    after = [hunk._replace(start=hunk.start + delta, end=hunk.end + delta) for hunk in hunks[high:]]
+    return hunks[:low] + middle + after
+
+
+class DiffWorker(QThread):
+    """
+    Background thread that diffs buffers against their saved text for the
+    change gutters of all editors. Each tracker has at most one request
+    queued.
+    """
+
+    diffed = pyqtSignal(object, int, object)  # (tracker, request number, hunks)
+
+    def __init__(self, parent=None):
+        """
+        Initialize the worker; call start() to run it.
+
+        Args:
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.requests = queue.Queue()
+
+    def request(self, tracker, number, job):
+        """
+        Queue a diff.
+
+        Args:
+            tracker: ChangeTracker that receives the result
+            number: Request number, returned with the result
+            job: Arguments of rediff()
+        """
+        self.requests.put((tracker, number, job))
+
+    def stop(self):
+        """
+        Stop the thread and wait for it.
+        """
+        self.requests.put(None)
+        self.wait()
+
+    def run(self):
+        """
+        Serve requests until stopped.
+        """
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            tracker, number, job = request
+            self.diffed.emit(tracker, number, rediff(*job))
+
+
+_worker = None
+
+
+def shared_diff_worker():
+    """
+    Return the diff thread shared by all trackers, starting it on first use.
+
+    Returns:
+        DiffWorker: Running worker
+    """
+    global _worker
+    if _worker is None:
+        _worker = DiffWorker()
+        _worker.diffed.connect(lambda tracker, number, hunks: tracker.on_diffed(number, hunks))
+        _worker.start()
+    return _worker
+
+
+def stop_diff_worker():
+    """
+    Stop the shared diff thread, if it was started.
+    """
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+class ChangeTracker(QObject):
+    """
+    Differences between an editor's buffer and the text last loaded or
+    saved, for the change markers in the gutter, change navigation and
+    reverting a change.
+
+    The tracker keeps a copy of the buffer lines as of its last diff and
+    the range of lines edited since. When typing pauses it patches the copy
+    with the edited lines only, and the worker diffs just that region
+    against the saved lines, reusing the hunks found before elsewhere, so a
+    large file is neither copied out of the document nor diffed whole for
+    each edit. One diff runs at a time per tracker; edits made meanwhile are
+    picked up by the next one.
+    """
+
+    def __init__(self, editor, delay=300):
+        """
+        Attach a tracker to an editor. It shows nothing until set_base() is called.
+
+        Args:
+            editor: VerilogEditor whose gutter shows the changes
+            delay: Milliseconds without edits before diffing
+        """
+        super().__init__(editor)
+        self.editor = editor
+        self.document = editor.document()
+        self.base = None  # Saved lines, or None when there is nothing to compare with
+        self.lines = None  # Buffer lines as of the last snapshot
+        self.hunks = []  # Hunks of that snapshot
+        self.revision = -1  # TokenCache.edits of the snapshot
+        self.dirty = None  # (first line, lines after the region) edited since the snapshot, or None
+        self.pending = None  # (request number, rediff() arguments) of the diff on the worker
+        self.requests = 0  # Requests sent, numbering them
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.request)
+        self.document.contentsChange.connect(self.on_contents_change)
+
+    def set_base(self, text):
+        """
+        Compare the buffer with new saved text.
+
+        Args:
+            text: Text last loaded or saved, or None to show no changes
+        """
+        self.base = text.split('\n') if text is not None else None
+        self.lines = None
+        self.hunks = []
+        self.dirty = None
+        self.revision = -1
+        self.pending = None
+        self.editor.line_number_area.update()
+        if self.base is not None:
+            self.timer.start()
+
+    def on_contents_change(self, position, removed, added):
+        """
+        Widen the edited region and diff again once typing pauses.
+
+        Args:
+            position: Position of the edit
+            removed: Characters removed
+            added: Characters added
+        """
+        if self.base is None:
+            return
+        first = self.document.findBlock(position).blockNumber()
+        after = self.document.blockCount() - 1 - self.document.findBlock(position + added).blockNumber()
+        if self.dirty is None:
+            self.dirty = (first, after)
+        else:
+            self.dirty = (min(first, self.dirty[0]), min(after, self.dirty[1]))
+        self.timer.start()
+
+    def snapshot(self):
+        """
+        Bring the copy of the buffer lines up to date.
+
+        Returns:
+            tuple: Arguments of rediff() for the new copy
+        """
+        if self.lines is None:
+            self.lines = self.editor.toPlainText().split('\n')
+            self.dirty = None
+            self.revision = self.editor.token_cache.edits
+            return self.base, self.lines, None, 0, 0, 0
+        first, after = self.dirty if self.dirty is not None else (len(self.lines), 0)
+        old_end = len(self.lines) - after
+        new_end = self.document.blockCount() - after
+        middle = []
+        block = self.document.findBlockByNumber(first)
+        for _ in range(first, new_end):
+            middle.append(block.text())
+            block = block.next()
+        self.lines = self.lines[:first] + middle + self.lines[old_end:]
+        self.dirty = None
+        self.revision = self.editor.token_cache.edits
+        return self.base, self.lines, self.hunks, first, old_end, new_end
+
+    def request(self):
+        """
+        Send the edits since the last diff to the worker.
+        """
+        if self.base is None or self.pending is not None:
+            return
+        if self.lines is not None and self.revision == self.editor.token_cache.edits:
+            return
+        job = self.snapshot()
+        self.requests += 1
+        self.pending = (self.requests, job)
+        shared_diff_worker().request(self, self.requests, job)
+
+    def on_diffed(self, number, hunks):
+        """
+        Take the worker's hunks and repaint the gutter.
+
+        Args:
+            number: Request number
+            hunks: Hunk tuples
+        """
+        if self.pending is None or number != self.pending[0]:
+            return  # Base replaced, or the diff was redone on the spot
+        self.pending = None
+        self.hunks = hunks
+        try:
+            self.editor.line_number_area.update()
+        except RuntimeError:
+            return  # Editor closed meanwhile
+        if self.dirty is not None:
+            self.timer.start()
+
+    def update_now(self):
+        """
+        Diff on the spot, so the hunks match the buffer before acting on them.
+
+        Returns:
+            bool: True if there is saved text to compare with
+        """
+        if self.base is None:
+            return False
+        if self.pending is not None:
+            # The edits since were tracked against the snapshot on the worker
+            self.hunks = rediff(*self.pending[1])
+            self.pending = None
+        if self.lines is None or self.revision != self.editor.token_cache.edits:
+            self.timer.stop()
+            self.hunks = rediff(*self.snapshot())
+            self.editor.line_number_area.update()
+        return True
+
+    def markers(self, first, last):
+        """
+        Get the change kind of each line in a range.
+
+        Args:
+            first: First line
+            last: Last line, inclusive
+
+        Returns:
+            dict: Line -> 'added', 'modified' or 'deleted' (a deletion above the line)
+        """
+        markers = {}
+        if self.base is None:
+            return markers
+        index = bisect_left([hunk.end for hunk in self.hunks], first)
+        while index < len(self.hunks) and self.hunks[index].start <= last:
+            hunk = self.hunks[index]
+            if hunk.kind == 'deleted':
+                markers.setdefault(min(hunk.start, self.document.blockCount() - 1), 'deleted')
+            else:
+                for line in range(max(first, hunk.start), min(last + 1, hunk.end)):
+                    markers[line] = hunk.kind
+            index += 1
+        return markers
+
+    def hunk_at(self, line):
+        """
+        Find the change on or just above a line.
+
+        Args:
+            line: Buffer line
+
+        Returns:
+            Hunk: The change, or None
+        """
+        for hunk in self.hunks:
+            if hunk.start <= line < hunk.end or (hunk.kind == 'deleted' and hunk.start == line):
+                return hunk
+            if hunk.start > line:
+                break
+        return None
+
+    def next_change(self, line, forward=True):
+        """
+        Find the first line of the next or previous change, wrapping around.
+
+        Args:
+            line: Current line
+            forward: Search downwards rather than upwards
+
+        Returns:
+            int: Line number, or None without changes
+        """
+        if not self.update_now() or not self.hunks:
+            return None
+        if forward:
+            for hunk in self.hunks:
+                if hunk.start > line:
+                    return hunk.start
+            return self.hunks[0].start
+        for hunk in reversed(self.hunks):
+            if hunk.start < line and not hunk.start <= line < hunk.end:
+                return hunk.start
+        return self.hunks[-1].start
+
+    def revert(self, line):
+        """
+        Restore the saved lines of the change at a line, as one undo step.
+
+        Args:
+            line: Buffer line inside the change
+
+        Returns:
+            bool: True if a change was reverted
+        """
+        if not self.update_now():
+            return False
+        hunk = self.hunk_at(line)
+        if hunk is None:
+            return False
+        saved = self.base[hunk.base_start:hunk.base_end]
+        document = self.document
+        cursor = QTextCursor(document)
+        if hunk.end < document.blockCount():
+            # Replace whole lines, up to the start of the line after the change
+            start = document.findBlockByNumber(hunk.start).position()
+            end = document.findBlockByNumber(hunk.end).position()
+            text = ''.join(saved_line + '\n' for saved_line in saved)
+        elif hunk.start > 0:
+            # The change reaches the end: replace from the end of the line above it
+            above = document.findBlockByNumber(hunk.start - 1)
+            start = above.position() + above.length() - 1
+            end = document.characterCount() - 1
+            text = ''.join('\n' + saved_line for saved_line in saved)
+        else:
+            start, end, text = 0, document.characterCount() - 1, '\n'.join(saved)
+        cursor.beginEditBlock()
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.insertText(text)
+        cursor.endEditBlock()
+        self.update_now()
+        return True
@@ -0,0 +1,487 @@
+# code_navigation.py
+import os
+import re
+
+from PyQt5.QtWidgets import QTreeWidget, QTreeWidgetItem
+from PyQt5.QtCore import Qt, pyqtSignal
+from verilog_parser import (KEYWORDS, COMPILER_DIRECTIVES, Symbol, identifier_names, parse_verilog,
+                            tokenize)
+
+LOCATION_ROLE = Qt.UserRole + 1  # (path, line, column) of a reference row
+
+MODULE_START = re.compile(r'^[ \t]*(?:module|macromodule|interface|program)\b', re.M)
+MODULE_END = re.compile(r'\b(?:endmodule|endinterface|endprogram)\b')
+
+# Symbol kinds that are only visible inside their module
+LOCAL_KINDS = frozenset(['port', 'parameter', 'net', 'instance', 'function', 'task'])
+
+
+def name_at(line_text, column):
+    """
+    Find the identifier or macro name at a column of a line.
+    A cursor just after a name counts as being on it.
+
+    Args:
+        line_text: Text of the line
+        column: 0-based cursor column
+
+    Returns:
+        tuple or None: (name, column where the name starts, True for macro uses)
+    """
+    for token in tokenize(line_text):
+        if token.column > column:
+            break
+        if column > token.column + len(token.text):
+            continue
+        if token.kind == 'identifier' and token.text not in KEYWORDS:
+            return token.text, token.column, False
+        if token.kind == 'directive' and token.text[1:] not in COMPILER_DIRECTIVES:
+            return token.text[1:], token.column + 1, True
+    return None
+
+
+def enclosing_module(text, position):
+    """
+    Find the module declaration around a position without parsing the file.
+
+    Args:
+        text: Source text
+        position: Character offset
+
+    Returns:
+        tuple or None: (start offset, end offset, line of the start), or None
+                       if the position is outside any module
+    """
+    start = None
+    for match in MODULE_START.finditer(text):
+        if match.start() > position:
+            break
+        start = match.start()
+    if start is None:
+        return None
+    end = MODULE_END.search(text, start)
+    if end is not None and end.end() < position:
+        return None  # Between modules
+    return start, end.end() if end is not None else len(text), text.count('\n', 0, start)
+
+
+def group_start(tokens, index):
+    """
+    Find the opening bracket of a group, searching back from its closing bracket.
+
+    Args:
+        tokens: Token list
+        index: Index of ')', ']' or '}'
+
+    Returns:
+        int: Index of the matching opening bracket, or -1
+    """
+    depth = 0
+    while index >= 0:
+        text = tokens[index].text
+        if text in (')', ']', '}'):
+            depth += 1
+        elif text in ('(', '[', '{', "'{"):
+            depth -= 1
+            if depth == 0:
+                return index
+        index -= 1
+    return -1
+
+
+def connection_target(tokens, index):
+    """
+    Work out which module a named connection such as .clk(clk) or #(.W(8))
+    refers to.
+
+    Args:
+        tokens: Tokens of the enclosing module
+        index: Index of the name after the '.'
+
+    Returns:
+        tuple or None: (module name, symbol kind) for a port or parameter
+                       connection, or None if the name is not one
+    """
+    if index < 1 or tokens[index - 1].text != '.':
+        return None
+    # Walk back to the unclosed '(' of the connection list
+    depth = 0
+    i = index - 2
+    while i >= 0:
+        text = tokens[i].text
+        if text in (')', ']', '}'):
+            depth += 1
+        elif text in ('(', '[', '{', "'{"):
+            if depth == 0:
+                break
+            depth -= 1
+        elif text == ';':
+            return None
+        i -= 1
+    if i < 1 or tokens[i].text != '(':
+        return None
+
+    i -= 1
+    if tokens[i].text == '#':  # Parameter overrides follow the module name
+        module = tokens[i - 1] if i > 0 else None
+        kind = 'parameter'
+    else:
+        if tokens[i].text == ']':  # Instance array range
+            i = group_start(tokens, i) - 1
+        if i < 0 or tokens[i].kind != 'identifier':
+            return None
+        i -= 1  # Before the instance name
+        if i >= 0 and tokens[i].text == ')':  # Parameter overrides
+            i = group_start(tokens, i) - 1
+            if i >= 0 and tokens[i].text == '#':
+                i -= 1
+        module = tokens[i] if i >= 0 else None
+        kind = 'port'
+    if module is None or module.kind != 'identifier' or module.text in KEYWORDS:
+        return None
+    return module.text, kind
+
+
+def line_of(text, position):
+    """
+    Return the line number, column and line text of a position.
+
+    Args:
+        text: Source text
+        position: Character offset
+
+    Returns:
+        tuple: (0-based line, 0-based column, text of the line)
+    """
+    start = text.rfind('\n', 0, position) + 1
+    end = text.find('\n', position)
+    return text.count('\n', 0, start), position - start, text[start:end if end >= 0 else len(text)]
+
+
+class CodeNavigator:
+    """
+    Go-to-definition and find-references on top of the project SymbolIndex.
+    Only the module around the cursor is parsed, so lookups stay fast in
+    large files; everything else comes from the prebuilt index. Documents
+    with unsaved changes are passed in as text and take precedence over the
+    index, which only knows the saved files.
+    """
+
+    def __init__(self, symbol_index):
+        """
+        Initialize the navigator.
+
+        Args:
+            symbol_index: SymbolIndex of the project
+        """
+        self.index = symbol_index
+
+    def definitions(self, path, text, position):
+        """
+        Find the declarations of the name at a position.
+        Names declared in the enclosing module win; named port and parameter
+        connections resolve to the instantiated module; other names are
+        looked up project-wide, modules first.
+
+        Args:
+            path: Path of the document, or None if untitled
+            text: Document text
+            position: Cursor offset
+
+        Returns:
+            tuple: (name or None, list of (path, Symbol))
+        """
+        line, column, line_text = line_of(text, position)
+        found = name_at(line_text, column)
+        if found is None:
+            return None, []
+        name, start_column, is_macro = found
+
+        if is_macro:
+            local = self.local_defines(path, text, name)
+            return name, local + [(p, s) for p, s in self.index.find(name, ['define'])
+                                  if not local or p != path]
+
+        region = enclosing_module(text, position)
+        if region is not None:
+            start, end, first_line = region
+            result = parse_verilog(text[start:end], first_line)
+            for index, token in enumerate(result.tokens):
+                if token.line == line and token.column == start_column:
+                    target = connection_target(result.tokens, index)
+                    if target is not None:
+                        return name, self.index.find(name, [target[1]], target[0])
+                    break
+            local = [(path, s) for s in result.symbols
+                     if s.name == name and (s.kind in LOCAL_KINDS or s.kind == 'module')]
+            if local:
+                return name, local
+
+        modules = self.index.find(name, ['module'])
+        if modules:
+            return name, modules
+        return name, [(p, s) for p, s in self.index.find(name) if s.kind != 'module']
+
+    def local_defines(self, path, text, name):
+        """
+        Find `define lines for a macro in the document itself.
+
+        Args:
+            path: Path of the document
+            text: Document text
+            name: Macro name
+
+        Returns:
+            list: (path, Symbol) tuples
+        """
+        found = []
+        for match in re.finditer(r'`define[ \t]+(' + re.escape(name) + r')\b', text):
+            line, column, _ = line_of(text, match.start(1))
+            found.append((path, Symbol('define', name, line, column)))
+        return found
+
+    def references(self, path, text, position, open_texts=None):
+        """
+        Find every occurrence of the name at a position.
+        Names declared inside a module are searched only in that module, plus
+        the named connections (.name) of instances of it for ports and
+        parameters; other names are searched in the whole project.
+
+        Args:
+            path: Path of the document, or None if untitled
+            text: Document text
+            position: Cursor offset
+            open_texts: Dict of path -> text for open documents whose text
+                        differs from the saved file
+
+        Returns:
+            tuple: (name or None, sorted list of (path, line, column))
+        """
+        open_texts = dict(open_texts or {})
+        open_texts[path] = text
+        name, definitions = self.definitions(path, text, position)
+        if name is None:
+            return None, []
+
+        if definitions and all(s.kind in LOCAL_KINDS and s.scope for _, s in definitions):
+            locations = set()
+            for def_path, symbol in definitions:
+                locations.update(self.scoped_references(def_path, symbol, open_texts))
+        else:
+            locations = {(p, line, column) for p, positions in self.occurrences(name, open_texts).items()
+                         for line, column in positions}
+        return name, sorted(locations, key=lambda location: (location[0] or '', location[1], location[2]))
+
+    def occurrences(self, name, open_texts, paths=None):
+        """
+        Return the occurrences of a name, preferring open document text over the index.
+
+        Args:
+            name: Identifier or macro name
+            open_texts: Dict of path -> text of open documents
+            paths: Optional set of paths to restrict to
+
+        Returns:
+            dict: Path -> list of (line, column)
+        """
+        found = self.index.occurrences(name)
+        for path, text in open_texts.items():
+            if paths is not None and path not in paths:
+                continue
+            if name in text:
+                found[path] = identifier_names(tokenize(text)).get(name, [])
+            else:
+                found.pop(path, None)
+        if paths is not None:
+            found = {p: positions for p, positions in found.items() if p in paths}
+        return found
+
+    def scoped_references(self, path, symbol, open_texts):
+        """
+        Find the references of a symbol declared inside a module.
+
+        Args:
+            path: File declaring the symbol
+            symbol: Port, parameter, net, instance, function or task Symbol
+            open_texts: Dict of path -> text of open documents
+
+        Returns:
+            set: (path, line, column) tuples
+        """
+        first, last = self.module_span(path, symbol, open_texts)
+        lines = self.file_lines(path, open_texts)
+        # .name inside the module is a connection to another module's port
+        locations = {(path, line, column)
+                     for line, column in self.occurrences(symbol.name, open_texts, {path}).get(path, [])
+                     if first <= line <= last and line < len(lines)
+                     and not lines[line][:column].rstrip().endswith('.')}
+        if symbol.kind not in ('port', 'parameter'):
+            return locations
+
+        # Named connections in the instances of the module
+        instances = self.index.instances_of(symbol.scope)
+        files = {p for p, _ in instances}
+        for instance_path, positions in self.occurrences(symbol.name, open_texts, files).items():
+            lines = self.file_lines(instance_path, open_texts)
+            # The statement around a .name, from the module type through ';',
+            # tells whose connection list it is in, however the header is split
+            tokens = tokenize('\n'.join(lines))
+            token_index = {(token.line, token.column): index for index, token in enumerate(tokens)}
+            for line, column in positions:
+                index = token_index.get((line, column))
+                if index is not None and connection_target(tokens, index) == (symbol.scope, symbol.kind):
+                    locations.add((instance_path, line, column))
+        return locations
+
+    def module_span(self, path, symbol, open_texts):
+        """
+        Return the line range of the module declaring a symbol.
+
+        Args:
+            path: File declaring the symbol
+            symbol: Symbol with a scope
+            open_texts: Dict of path -> text of open documents
+
+        Returns:
+            tuple: (first line, last line)
+        """
+        text = open_texts.get(path)
+        if text is not None:
+            start = 0
+            for _ in range(symbol.line):
+                start = text.find('\n', start) + 1
+            region = enclosing_module(text, start + symbol.column)
+            if region is not None:
+                return region[2], region[2] + text.count('\n', region[0], region[1])
+        for module_path, module in self.index.find(symbol.scope, ['module']):
+            if module_path == path and module.line <= symbol.line <= (module.end_line or symbol.line):
+                return module.line, module.end_line or symbol.line
+        return symbol.line, symbol.line
+
+    def file_lines(self, path, open_texts):
+        """
+        Return the lines of a file, from the open document if there is one.
+
+        Args:
+            path: File path
+            open_texts: Dict of path -> text of open documents
+
+        Returns:
+            list: Lines of text, empty if the file cannot be read
+        """
+        text = open_texts.get(path)
+        if text is None:
+            try:
+                with open(path, 'r', errors='replace') as f:
+                    text = f.read()
+            except OSError:
+                return []
+        return text.split('\n')
+
+    def with_previews(self, locations, open_texts=None):
+        """
+        Attach the text of each location's line, reading every file once.
+
+        Args:
+            locations: List of (path, line, column)
+            open_texts: Dict of path -> text of open documents
+
+        Returns:
+            list: (path, line, column, line text) tuples
+        """
+        open_texts = open_texts or {}
+        cache = {}
+        previews = []
+        for path, line, column in locations:
+            if path not in cache:
+                cache[path] = self.file_lines(path, open_texts)
+            lines = cache[path]
+            previews.append((path, line, column, lines[line] if line < len(lines) else ''))
+        return previews
+
+
+class ReferencesPanel(QTreeWidget):
+    """
+    Result list for go-to-definition and find-references.
+    Locations are grouped by file and show the line they are on; activating
+    a row asks the window to open that location.
+    """
+
+    locationActivated = pyqtSignal(object, int, int)  # Emitted with (path or None, line, column)
+
+    def __init__(self, parent=None):
+        """
+        Initialize an empty panel.
+
+        Args:
+            parent: Parent widget
+        """
+        super().__init__(parent)
+        self.root = None  # Project root that paths are shown relative to
+        self.groups = {}  # Path -> (file row, label without the count)
+        self.setHeaderHidden(True)
+        self.setUniformRowHeights(True)
+        self.itemActivated.connect(self.on_item_activated)
+        self.itemClicked.connect(self.on_item_activated)
+
+    def show_locations(self, locations, root=None):
+        """
+        Replace the panel's content.
+
+        Args:
+            locations: List of (path, line, column, line text) tuples in display order
+            root: Optional project root that paths are shown relative to
+        """
+        self.clear_locations()
+        self.add_locations(locations, root)
+
+    def clear_locations(self):
+        """
+        Remove all rows.
+        """
+        self.clear()
+        self.groups = {}
+
+    def add_locations(self, locations, root=None):
+        """
+        Append locations, e.g. results that arrive while a search runs.
+        Locations of a file already shown join its group.
+
+        Args:
+            locations: List of (path, line, column, line text) tuples in display order
+            root: Optional project root that paths are shown relative to
+        """
+        touched = {}
+        created = []
+        for path, line, column, text in locations:
+            group, label = self.groups.get(path, (None, None))
+            if group is None:
+                if path is None:
+                    label = 'Untitled'
+                elif root and path.startswith(os.path.join(root, '')):
+                    label = os.path.relpath(path, root)
+                else:
+                    label = path
+                group = QTreeWidgetItem(self, [label])
+                group.setToolTip(0, path or '')
+                self.groups[path] = (group, label)
+                created.append(group)
+            item = QTreeWidgetItem(group, [f'{line + 1}:{column + 1}    {text.strip()}'])
+            item.setData(0, LOCATION_ROLE, (path, line, column))
+            touched[path] = (group, label)
+        for group, label in touched.values():
+            group.setText(0, f'{label} ({group.childCount()})')
+        for group in created:
+            group.setExpanded(True)
+
+    def on_item_activated(self, item, column=0):
+        """
+        Open the location of a result row.
+
+        Args:
+            item: Activated QTreeWidgetItem
+            column: Activated column
+        """
+        location = item.data(0, LOCATION_ROLE)
+        if location is not None:
+            self.locationActivated.emit(*location)
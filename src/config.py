@@ -17,7 +17,13 @@ class EditorConfig:
             'highlight_current_line': True,  # Highlight the line where cursor is
             'show_whitespace': False,  # Show whitespace characters
             'word_wrap': False,  # Wrap long lines to window width
-            'auto_brackets': True  # Automatically complete brackets/parentheses
+            'auto_brackets': True,  # Automatically complete brackets/parentheses
+            'semantic_highlighting': True,  # Color names by their declarations, computed in the background
+            'highlight_occurrences': True,  # Highlight the name under the cursor everywhere in the file
+            'indent_guides': True,  # Draw a vertical line at each indentation level
+            'minimap': True,  # Show a miniature of the document beside the editor
+            'minimap_width': 100,  # Width of the minimap in pixels
+            'diff_context_lines': 3  # Unchanged lines shown around each difference in the compare view
         }
 
         # Theme colors - VSCode-like dark theme for syntax highlighting and UI elements
@@ -42,6 +48,8 @@ class EditorConfig:
             'strings': "#CE9178",  # Color for string literals
             'comments': "#608B4E",  # Color for all types of comments
             'ports': "#9CDCFE",  # Color for port declarations
+            'nets': "#B8D7A3",  # Color for wires and other nets (semantic highlighting)
+            'variables': "#DCDCAA",  # Color for regs, logic and other variables (semantic highlighting)
 
             # UI element colors for editor components
             'line_numbers': "#858585",  # Color of line number text
@@ -51,6 +59,7 @@ class EditorConfig:
             'scrollbar': "#424242",  # Color of scrollbar
             'scrollbar_hover': "#4E4E4E",  # Color of scrollbar when hovered
             'matching_bracket': "#646464",  # Color for matching bracket highlights
+            'inactive_code': "#6B6B6B",  # Color for `ifdef branches that are not compiled
 
             # Status and diagnostic colors
             'error': "#F14C4C",  # Color for error indicators
@@ -64,7 +73,9 @@ class EditorConfig:
 
             # Search highlighting colors
             'find_match': "#515C6A",  # Color for found search matches
-            'find_match_active': "#613214"  # Color for currently selected match
+            'find_match_active': "#613214",  # Color for currently selected match
+            'occurrence': "#3A3D41",  # Background of the occurrences of the name under the cursor
+            'occurrence_marker': "#A0A0A0"  # Scroll bar marker of an occurrence
         }
 
         # Formatter settings - Code formatting and style preferences
@@ -87,11 +98,26 @@ class EditorConfig:
             'format': 'Ctrl+Shift+F',  # Format current document
             'save': 'Ctrl+S',  # Save current file
             'save_as': 'Ctrl+Shift+S',  # Save file with new name
+            'close': 'Ctrl+W',  # Close current tab
             'new': 'Ctrl+N',  # Create new file
             'open': 'Ctrl+O',  # Open existing file
+            'open_folder': 'Ctrl+K, Ctrl+O',  # Open a project folder
+            'quick_open': 'Ctrl+P',  # Fuzzy-open a project file by name
             'find': 'Ctrl+F',  # Open find dialog
             'replace': 'Ctrl+H',  # Open find and replace dialog
             'goto_line': 'Ctrl+G',  # Jump to specific line
+            'goto_definition': 'F12',  # Jump to the declaration of the name under the cursor
+            'find_references': 'Shift+F12',  # List all uses of the name under the cursor
+            'structural_search': 'Ctrl+Alt+F',  # Search the project by code structure
+            'rename_symbol': 'F2',  # Rename the name under the cursor across the project
+            'next_change': 'Alt+F5',  # Go to the next change from the saved file
+            'previous_change': 'Shift+Alt+F5',  # Go to the previous change from the saved file
+            'revert_change': 'Ctrl+Alt+Z',  # Restore the saved lines of the change at the cursor
+            'compare_files': 'Ctrl+K, Ctrl+D',  # Compare two files side by side
+            'compare_with_saved': 'Ctrl+K, D',  # Compare the document with the file on disk
+            'local_history': 'Ctrl+K, H',  # Browse saved versions of the file
+            'next_difference': 'F7',  # Go to the next difference in the compare view
+            'previous_difference': 'Shift+F7',  # Go to the previous difference in the compare view
             'comment': 'Ctrl+/',  # Toggle line comment
             'fold': 'Ctrl+Shift+[',  # Collapse code region
             'unfold': 'Ctrl+Shift+]',  # Expand code region
@@ -142,10 +168,48 @@ class EditorConfig:
             'default_extension': '.v',  # Default file extension
             'backup_enabled': True,  # Enable automatic backups
             'backup_directory': '.backup',  # Directory for backup files
+            'fsync_on_save': True,  # Flush saved files to disk before replacing the original
             'auto_save': True,  # Enable automatic saving
             'auto_save_interval': 300,  # Time between auto-saves (seconds)
+            'journal_directory': None,  # Where edit journals live (None: per-user app data)
+            'suspend_after': 600,  # Seconds before an unfocused tab is suspended (0 disables)
+            'session_preload': 5,  # Session tabs next to the focused one loaded in idle time
+            'large_file_threshold': 64 * 1024 * 1024,  # Files this size (bytes) or larger open read-only
+            'local_history': True,  # Keep saved versions in .matcha/history under the project
+            'history_max_versions': 50,  # Versions kept per file (0: no limit)
+            'history_max_age': 30,  # Days a version is kept (0: no limit)
             'file_associations': {  # Map file extensions to languages
                 '.v': 'Verilog',
                 '.sv': 'SystemVerilog'
             }
-        }
\ No newline at end of file
+        }
+
+        # Diagnostics settings - Background syntax and lint checks
+        self.diagnostics = {
+            'enabled': True,  # Check the current document in the background
+            'delay': 500,  # Milliseconds after the last edit before checking
+            'workers': 1,  # Worker processes running the checks
+            'undeclared_identifiers': True,  # Warn about names used but not declared
+            'external_linters': ['verilator', 'iverilog', 'slang'],  # Also run these when installed
+            'max_markers': 1000  # Most problems underlined in one document
+        }
+
+        # Structural search - Queries over the parsed structure of all project files
+        self.structural_search = {
+            'workers': 2,  # Worker processes parsing files that are not cached yet
+            'batch_size': 16,  # Files parsed per worker task
+            'max_results': 5000  # Search stops after this many matches
+        }
+
+        # Project settings - Project explorer and project-wide indexing
+        self.project = {
+            'root': None,  # Project root directory (None: current working directory)
+            'name_filters': ['*.v', '*.sv', '*.vh', '*.svh'],  # Files shown in the project explorer
+            'index_directory': None,  # Where symbol databases live (None: per-user app data)
+            'include_dirs': [],  # `include search path, relative to the project root
+            'defines': {},  # Macros defined for every file, as with +define+ (name: value)
+            'ignore_patterns': [  # File and directory names never scanned or watched
+                '.git', '.svn', '.hg', '.backup', '.matcha', '__pycache__',
+                'build', 'sim', 'work', 'xsim.dir', '*.vcd', '*.fst', '*.o'
+            ]
+        }
@@ -0,0 +1,167 @@
+# diagnostics.py
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from lint_checks import available_linters, run_checks
+
+
+class DiagnosticsManager(QObject):
+    """
+    Runs syntax and lint checks on the current editor in the background.
+    Edits restart a debounce timer; when it fires, a snapshot of the text is
+    checked in a worker process so typing never waits for the checks. Each
+    snapshot is tagged with the document's edit count, and results that
+    arrive after the document has changed again are dropped and the check
+    rerun.
+    """
+
+    # (editor, revision, diagnostics or None on failure); emitted from the
+    # pool's callback thread and delivered to the GUI thread
+    checkFinished = pyqtSignal(object, int, object)
+    summaryChanged = pyqtSignal(str)  # Problem count text for the status bar
+
+    def __init__(self, config, symbol_index, parent=None):
+        """
+        Initialize the manager. The worker pool is started on the first check.
+
+        Args:
+            config: EditorConfig with the diagnostics section
+            symbol_index: SymbolIndex whose database resolves instantiated modules
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        settings = getattr(config, 'diagnostics', {})
+        self.enabled = settings.get('enabled', True)
+        self.workers = max(1, settings.get('workers', 1))
+        self.undeclared = settings.get('undeclared_identifiers', True)
+        self.linters = available_linters(settings.get('external_linters', []))
+        self.symbol_index = symbol_index
+
+        self.pool = None
+        self.editor = None
+        self.path = None
+        self.running = None  # (editor, revision) of the check in flight
+        self.rerun = False  # The document changed while a check was running
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(settings.get('delay', 500))
+        self.timer.timeout.connect(self.run_check)
+        self.checkFinished.connect(self.on_check_finished)
+
+    def set_editor(self, editor, path=None):
+        """
+        Check a different editor, or the same one under a new file name.
+
+        Args:
+            editor: VerilogEditor to check, or None
+            path: File path of the editor's document, or None if untitled
+        """
+        if self.editor is not None and editor is not self.editor:
+            try:
+                self.editor.token_cache.edited.disconnect(self.schedule)
+            except (RuntimeError, TypeError):
+                pass  # Editor already deleted, or never connected
+        changed = editor is not self.editor or path != self.path
+        self.editor = editor
+        self.path = path
+        if editor is None or not self.enabled:
+            self.timer.stop()
+            self.summaryChanged.emit('')
+            return
+        if changed:
+            editor.token_cache.edited.connect(self.schedule)  # Not contentsChanged: rehighlighting emits it
+            self.show_summary(editor.diagnostics)
+            self.schedule()
+
+    def schedule(self):
+        """
+        Restart the debounce timer after an edit.
+        """
+        self.timer.start()
+
+    def run_check(self):
+        """
+        Submit a snapshot of the current document to the worker pool.
+        """
+        if self.editor is None:
+            return
+        if self.running is not None:
+            self.rerun = True  # Checked again when the running check returns
+            return
+        revision = self.editor.token_cache.edits
+        if self.editor.diagnostics_revision == revision and self.editor.diagnostics_path == self.path:
+            return  # Results for this exact text are already shown
+        if self.pool is None:
+            # Spawned rather than forked: the GUI process runs threads
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        editor = self.editor
+        try:
+            future = self.pool.submit(run_checks, editor.toPlainText(), self.path, self.symbol_index.database,
+                                      self.linters, self.undeclared, editor.highlighter.current_inactive_lines())
+        except (BrokenProcessPool, RuntimeError):
+            self.pool = None  # A worker died; start a new pool on the next check
+            return
+        self.running = (editor, revision)
+        future.add_done_callback(lambda f: self.checkFinished.emit(editor, revision, self.result_of(f)))
+
+    @staticmethod
+    def result_of(future):
+        """
+        Get the diagnostics of a finished check.
+
+        Args:
+            future: Future returned by the pool
+
+        Returns:
+            list: Diagnostic tuples, or None if the check failed
+        """
+        if future.cancelled() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def on_check_finished(self, editor, revision, diagnostics):
+        """
+        Show the results of a check unless they are stale.
+
+        Args:
+            editor: Editor whose text was checked
+            revision: TokenCache.edits of the checked snapshot
+            diagnostics: Diagnostic tuples, or None if the check failed
+        """
+        self.running = None
+        if diagnostics is None:
+            # The check raised or a worker died: start over with a fresh pool
+            if self.pool is not None:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = None
+        elif editor is self.editor and editor.token_cache.edits == revision:
+            editor.set_diagnostics(diagnostics, revision, self.path)
+            self.show_summary(diagnostics)
+        if self.rerun or (self.editor is not None and self.editor.token_cache.edits != revision):
+            self.rerun = False
+            self.schedule()
+
+    def show_summary(self, diagnostics):
+        """
+        Emit the problem counts for the status bar.
+
+        Args:
+            diagnostics: Diagnostic tuples shown in the current editor
+        """
+        errors = sum(1 for d in diagnostics if d.severity == 'error')
+        warnings = sum(1 for d in diagnostics if d.severity == 'warning')
+        self.summaryChanged.emit(f'Errors: {errors}, Warnings: {warnings}' if diagnostics else '')
+
+    def shutdown(self):
+        """
+        Stop the worker processes without waiting for running checks.
+        """
+        self.timer.stop()
+        self.editor = None
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
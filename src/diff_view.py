@@ -0,0 +1,390 @@
+# diff_view.py
+from collections import namedtuple
+
+from PyQt5.QtCore import Qt, QEvent, QFileInfo, QThread
+from PyQt5.QtGui import QBrush, QColor, QKeySequence, QTextCursor, QTextFormat
+from PyQt5.QtWidgets import (QHBoxLayout, QLabel, QPushButton, QShortcut, QSplitter, QTextEdit,
+                             QVBoxLayout, QWidget)
+from line_diff import diff_lines
+from verilog_editor import VerilogEditor
+
+EXPAND_LINES = 500  # Unchanged lines a double-click on a folded region reveals
+ROW_ALPHA = 70  # Opacity of the backgrounds of changed lines
+
+# A stretch of the comparison, in order: left lines [left, left_end) against
+# right lines [right, right_end). kind is 'equal', 'fold' (unchanged lines
+# shown as one row) or the diff tag 'replace', 'delete' or 'insert'.
+Segment = namedtuple('Segment', 'kind left left_end right right_end')
+
+# Row kind shown for each side of a difference: (left, right)
+SIDE_KINDS = {'replace': ('modified', 'modified'), 'delete': ('deleted', 'filler'), 'insert': ('filler', 'added')}
+
+
+def fold_segments(opcodes, left_count, right_count, context=3):
+    """
+    Split a comparison into segments, folding the unchanged lines that are
+    more than a few lines away from any difference.
+
+    Args:
+        opcodes: Non-equal (tag, i1, i2, j1, j2) opcodes, left to right
+        left_count: Number of left lines
+        right_count: Number of right lines
+        context: Unchanged lines kept around each difference
+
+    Returns:
+        list: Segment tuples covering both sides
+    """
+    segments = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in list(opcodes) + [(None, left_count, left_count, right_count, right_count)]:
+        count = i1 - i
+        if count > 0:
+            head = context if segments else 0  # After the previous difference
+            tail = context if tag is not None else 0  # Before the next one
+            if head + tail + 1 >= count:
+                segments.append(Segment('equal', i, i1, j, j1))  # Folding would hide a line at most
+            else:
+                if head:
+                    segments.append(Segment('equal', i, i + head, j, j + head))
+                segments.append(Segment('fold', i + head, i1 - tail, j + head, j1 - tail))
+                if tail:
+                    segments.append(Segment('equal', i1 - tail, i1, j1 - tail, j1))
+        if tag is not None:
+            segments.append(Segment(tag, i1, i2, j1, j2))
+        i, j = i2, j2
+    return segments
+
+
+def expand_fold(segments, index, lines=EXPAND_LINES):
+    """
+    Show the lines of a folded segment, or its first and last lines when
+    there are many.
+
+    Args:
+        segments: Segment list
+        index: Index of a 'fold' segment
+        lines: Most lines to reveal
+
+    Returns:
+        list: New segment list
+    """
+    fold = segments[index]
+    if fold.left_end - fold.left <= lines:
+        replacement = [fold._replace(kind='equal')]
+    else:
+        half = lines // 2
+        replacement = [Segment('equal', fold.left, fold.left + half, fold.right, fold.right + half),
+                       Segment('fold', fold.left + half, fold.left_end - half,
+                               fold.right + half, fold.right_end - half),
+                       Segment('equal', fold.left_end - half, fold.left_end,
+                               fold.right_end - half, fold.right_end)]
+    return segments[:index] + replacement + segments[index + 1:]
+
+
+class CompareWorker(QThread):
+    """
+    Background thread that reads the two sides of a comparison and diffs
+    them, so comparing large files leaves the GUI responsive.
+    """
+
+    def __init__(self, left_path, left_text, right_path, right_text, parent=None):
+        """
+        Initialize the worker. A side given as text is not read from disk.
+
+        Args:
+            left_path: File of the left side
+            left_text: Text of the left side, or None to read left_path
+            right_path: File of the right side
+            right_text: Text of the right side, or None to read right_path
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.left_path = left_path
+        self.left_text = left_text
+        self.right_path = right_path
+        self.right_text = right_text
+        self.left_lines = None
+        self.right_lines = None
+        self.opcodes = None  # Left -> right line diff
+        self.error = None
+
+    def run(self):
+        """
+        Read the files and compute the diff.
+        """
+        try:
+            if self.left_text is None:
+                with open(self.left_path, 'r', errors='replace') as f:
+                    self.left_text = f.read()
+            if self.right_text is None:
+                with open(self.right_path, 'r', errors='replace') as f:
+                    self.right_text = f.read()
+        except OSError as e:
+            self.error = str(e)
+            return
+        self.left_lines = self.left_text.split('\n')
+        self.right_lines = self.right_text.split('\n')
+        self.left_text = self.right_text = None  # Keep the lines only
+        self.opcodes = diff_lines(self.left_lines, self.right_lines)
+
+
+class DiffView(QWidget):
+    """
+    Window comparing two versions of a Verilog file side by side in
+    read-only editors, with deleted, added and modified lines highlighted
+    and the two panes scrolled together.
+
+    The diff runs on a CompareWorker. Only the differences and a few lines
+    around them are put into the panes: longer unchanged stretches are
+    folded into one row each, which a double-click reveals, so two huge
+    files with a few differences show as a few dozen lines. Blank filler
+    rows on the other side keep the panes aligned, and the gutters show the
+    lines' numbers in the compared files.
+    """
+
+    def __init__(self, config, parent=None):
+        """
+        Create an empty comparison window; call compare() to fill it.
+
+        Args:
+            config: EditorConfig for the panes
+            parent: Parent widget (the main window)
+        """
+        super().__init__(parent, Qt.Window)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.config = config
+        self.context = config.editor.get('diff_context_lines', 3)
+        self.worker = None
+        self.left_lines = []
+        self.right_lines = []
+        self.opcodes = []
+        self.segments = []
+        self.rows = []  # Segment index of each row of the panes
+        self.setWindowTitle('Compare')
+        self.resize(1200, 800)
+
+        layout = QVBoxLayout(self)
+        header = QHBoxLayout()
+        self.summary = QLabel('Comparing...')
+        header.addWidget(self.summary, 1)
+        previous_button = QPushButton('Previous Difference')
+        previous_button.clicked.connect(lambda: self.goto_difference(False))
+        next_button = QPushButton('Next Difference')
+        next_button.clicked.connect(lambda: self.goto_difference(True))
+        header.addWidget(previous_button)
+        header.addWidget(next_button)
+        layout.addLayout(header)
+
+        splitter = QSplitter(Qt.Horizontal)
+        self.titles = []
+        self.panes = []
+        for _ in range(2):
+            side = QWidget()
+            side_layout = QVBoxLayout(side)
+            side_layout.setContentsMargins(0, 0, 0, 0)
+            title = QLabel()
+            pane = VerilogEditor(side, config)
+            pane.setReadOnly(True)
+            pane.viewport().installEventFilter(self)
+            side_layout.addWidget(title)
+            side_layout.addWidget(pane)
+            splitter.addWidget(side)
+            self.titles.append(title)
+            self.panes.append(pane)
+        layout.addWidget(splitter, 1)
+
+        # Scroll the panes together; their rows line up
+        left, right = self.panes
+        left.verticalScrollBar().valueChanged.connect(right.verticalScrollBar().setValue)
+        right.verticalScrollBar().valueChanged.connect(left.verticalScrollBar().setValue)
+        left.horizontalScrollBar().valueChanged.connect(right.horizontalScrollBar().setValue)
+        right.horizontalScrollBar().valueChanged.connect(left.horizontalScrollBar().setValue)
+
+        QShortcut(QKeySequence(config.keybindings.get('next_difference', 'F7')), self,
+                  lambda: self.goto_difference(True))
+        QShortcut(QKeySequence(config.keybindings.get('previous_difference', 'Shift+F7')), self,
+                  lambda: self.goto_difference(False))
+
+    def compare(self, left, right):
+        """
+        Start comparing two versions.
+
+        Args:
+            left: (title, file path, text or None to read the file) of the old version
+            right: (title, file path, text or None to read the file) of the new version
+        """
+        self.titles[0].setText(left[0])
+        self.titles[1].setText(right[0])
+        self.setWindowTitle(f'Compare {left[0]} ↔ {right[0]}')
+        self.worker = CompareWorker(left[1], left[2], right[1], right[2], self)
+        self.worker.finished.connect(self.on_compared)
+        self.worker.start()
+
+    def on_compared(self):
+        """
+        Show the result of the CompareWorker.
+        """
+        worker, self.worker = self.worker, None
+        worker.deleteLater()
+        if worker.error is not None:
+            self.summary.setText(f'Could not compare: {worker.error}')
+            return
+        self.left_lines, self.right_lines, self.opcodes = worker.left_lines, worker.right_lines, worker.opcodes
+        self.segments = fold_segments(self.opcodes, len(self.left_lines), len(self.right_lines), self.context)
+        if not self.opcodes:
+            self.summary.setText('The versions are identical')
+        else:
+            removed = sum(i2 - i1 for _, i1, i2, _, _ in self.opcodes)
+            added = sum(j2 - j1 for _, _, _, j1, j2 in self.opcodes)
+            self.summary.setText(f'{len(self.opcodes)} difference(s): '
+                                 f'{removed} line(s) removed, {added} line(s) added')
+        self.render()
+        self.goto_difference(True)
+
+    def render(self):
+        """
+        Fill the panes with the rows of the segments and highlight them,
+        keeping the scroll position.
+        """
+        texts = ([], [])
+        numbers = ([], [])
+        runs = ([], [])  # (kind, first row, end row) of the highlighted rows of each side
+        self.rows = []
+        for index, segment in enumerate(self.segments):
+            row = len(self.rows)
+            if segment.kind == 'fold':
+                label = f'⋯ {segment.left_end - segment.left} unchanged lines ⋯'
+                for side in (0, 1):
+                    texts[side].append(label)
+                    numbers[side].append(None)
+                    runs[side].append(('fold', row, row + 1))
+                self.rows.append(index)
+                continue
+            sides = ((self.left_lines, segment.left, segment.left_end),
+                     (self.right_lines, segment.right, segment.right_end))
+            height = max(segment.left_end - segment.left, segment.right_end - segment.right)
+            for side, (lines, start, end) in enumerate(sides):
+                texts[side].extend(lines[start:end])
+                texts[side].extend([''] * (height - (end - start)))
+                numbers[side].extend(range(start, end))
+                numbers[side].extend([None] * (height - (end - start)))
+                if segment.kind != 'equal':
+                    kind = SIDE_KINDS[segment.kind][side]
+                    if end > start:
+                        runs[side].append((kind, row, row + end - start))
+                    if height > end - start:
+                        runs[side].append(('filler', row + end - start, row + height))
+            self.rows.extend([index] * height)
+
+        scroll = self.panes[0].verticalScrollBar().value()
+        for side, pane in enumerate(self.panes):
+            pane.setPlainText('\n'.join(texts[side]))
+            pane.setLineLabels(numbers[side])
+            pane.set_extra_selections('diff', [self.run_selection(pane, *run) for run in runs[side]])
+            scrollbar = pane.verticalScrollBar()
+            for kind in ('added', 'deleted', 'modified'):
+                scrollbar.set_markers(kind, [first for run_kind, first, _ in runs[side] if run_kind == kind],
+                                      self.config.theme.get(kind, '#1B81A8'))
+        self.panes[0].verticalScrollBar().setValue(scroll)
+
+    def run_selection(self, pane, kind, first, end):
+        """
+        Build the full-width background of a run of rows.
+
+        Args:
+            pane: VerilogEditor holding the rows
+            kind: 'added', 'deleted', 'modified', 'filler' or 'fold'
+            first: First row
+            end: Row after the run
+
+        Returns:
+            QTextEdit.ExtraSelection: Selection covering the rows
+        """
+        document = pane.document()
+        last = document.findBlockByNumber(end - 1)
+        cursor = QTextCursor(document.findBlockByNumber(first))
+        # Up to the start of the next row: the background fills a line's width only if its line break is selected
+        cursor.setPosition(min(last.position() + last.length(), document.characterCount() - 1), QTextCursor.KeepAnchor)
+        selection = QTextEdit.ExtraSelection()
+        selection.cursor = cursor
+        selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+        if kind == 'fold':
+            selection.format.setBackground(QColor(self.config.theme.get('line_number_bg', '#1E1E1E')))
+            selection.format.setForeground(QColor(self.config.theme.get('line_numbers', '#858585')))
+        elif kind == 'filler':
+            color = QColor(self.config.theme.get('foreground', '#D4D4D4'))
+            color.setAlpha(24)
+            selection.format.setBackground(QBrush(color, Qt.BDiagPattern))
+        else:
+            color = QColor(self.config.theme.get(kind, '#1B81A8'))
+            color.setAlpha(ROW_ALPHA)
+            selection.format.setBackground(color)
+        return selection
+
+    def goto_difference(self, forward):
+        """
+        Scroll to the next or previous difference below or above the cursor,
+        wrapping around.
+
+        Args:
+            forward: Search downwards rather than upwards
+        """
+        starts = [row for row, index in enumerate(self.rows)
+                  if self.segments[index].kind not in ('equal', 'fold') and (row == 0 or self.rows[row - 1] != index)]
+        if not starts:
+            return
+        pane = self.panes[0]
+        current = pane.textCursor().blockNumber()
+        if forward:
+            target = next((row for row in starts if row > current), starts[0])
+        else:
+            target = next((row for row in reversed(starts) if row < current), starts[-1])
+        for each in self.panes:
+            each.setTextCursor(QTextCursor(each.document().findBlockByNumber(target)))
+        pane.centerCursor()
+
+    def eventFilter(self, watched, event):
+        """
+        Reveal a folded region when its row is double-clicked.
+
+        Args:
+            watched: Viewport of a pane
+            event: Event sent to it
+
+        Returns:
+            bool: True if the event was handled
+        """
+        if event.type() == QEvent.MouseButtonDblClick and self.rows:
+            pane = next(pane for pane in self.panes if pane.viewport() is watched)
+            row = pane.cursorForPosition(event.pos()).blockNumber()
+            if row < len(self.rows) and self.segments[self.rows[row]].kind == 'fold':
+                self.segments = expand_fold(self.segments, self.rows[row])
+                self.render()
+                return True
+        return super().eventFilter(watched, event)
+
+    def closeEvent(self, event):
+        """
+        Wait for a running diff before the window goes away.
+
+        Args:
+            event: Close event
+        """
+        if self.worker is not None:
+            self.worker.finished.disconnect(self.on_compared)
+            self.worker.wait()
+        super().closeEvent(event)
+
+
+def compare_title(path, suffix=''):
+    """
+    Build the title of one side of a comparison.
+
+    Args:
+        path: File path, or None for an untitled document
+        suffix: Text appended, e.g. ' (saved)'
+
+    Returns:
+        str: File name with the suffix
+    """
+    return (QFileInfo(path).fileName() if path else 'Untitled') + suffix
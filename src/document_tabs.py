@@ -0,0 +1,475 @@
+# document_tabs.py
+import os
+import time
+import zlib
+
+from PyQt5.QtWidgets import QTabWidget, QWidget, QVBoxLayout
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtCore import QFileInfo, QTimer, pyqtSignal
+from verilog_editor import VerilogEditor
+from large_file_viewer import LargeFileViewer
+from edit_journal import EditJournal
+from file_watcher import file_signature
+
+
+class DocumentTab:
+    """
+    One open document in the tab bar.
+    While active the tab owns a VerilogEditor (and its QTextDocument), or a
+    LargeFileViewer for read-only large files. When suspended the editor is
+    destroyed and only a small snapshot is kept: compressed text for modified
+    documents, a file signature for unmodified ones, plus cursor, scroll and
+    modification state. Tabs with undo history are never suspended.
+    """
+
+    def __init__(self, tabs, file_path=None):
+        """
+        Initialize an empty tab.
+
+        Args:
+            tabs: DocumentTabs widget the tab belongs to
+            file_path: Path of the file shown in the tab, or None if untitled
+        """
+        self.tabs = tabs
+        self.config = tabs.config
+        self.file_path = file_path
+        self.editor = None  # VerilogEditor while the tab is loaded
+        self.viewer = None  # LargeFileViewer for read-only large files
+        self.journal = None  # EditJournal recording unsaved edits
+        self.suspended = None  # Snapshot dict while the tab is suspended
+        self.pending_saves = []  # SaveWorker threads writing this document
+        self.saved_text = None  # Text as last loaded or saved; base for merging external changes
+        self.disk_signature = None  # (size, mtime_ns) of the file as last loaded or saved
+        self.reload_worker = None  # ReloadWorker checking an external change
+        self.last_used = time.monotonic()
+
+        # Page widget stays in the tab bar; editors come and go inside it
+        self.page = QWidget()
+        self.page.document_tab = self
+        self.layout = QVBoxLayout(self.page)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+
+    @property
+    def saved_text(self):
+        """
+        Text as last loaded or saved: the base for merging external changes
+        and for the change markers of the editor.
+        """
+        return self._saved_text
+
+    @saved_text.setter
+    def saved_text(self, text):
+        self._saved_text = text
+        if self.editor is not None:
+            self.editor.changes.set_base(text)
+
+    def title(self):
+        """
+        Return the text shown on the tab.
+
+        Returns:
+            str: File name, or "Untitled", with "*" when modified
+        """
+        title = QFileInfo(self.file_path).fileName() if self.file_path else 'Untitled'
+        return title + ('*' if self.is_modified() else '')
+
+    def is_modified(self):
+        """
+        Check whether the document has unsaved changes.
+
+        Returns:
+            bool: True if modified, including while suspended
+        """
+        if self.suspended is not None:
+            return self.suspended['modified']
+        if self.editor is not None:
+            return self.editor.document().isModified()
+        return False
+
+    def is_suspended(self):
+        """
+        Check whether the tab currently holds only a snapshot.
+
+        Returns:
+            bool: True if suspended
+        """
+        return self.suspended is not None
+
+    def create_editor(self):
+        """
+        Create the tab's editor and journal if they do not exist yet.
+
+        Returns:
+            VerilogEditor: The tab's editor
+        """
+        if self.editor is None:
+            self.editor = VerilogEditor(self.page, self.config)
+            self.layout.addWidget(self.editor)
+            self.editor.document().modificationChanged.connect(
+                lambda _: self.tabs.update_tab_title(self))
+            self.editor.changes.set_base(self.saved_text)
+            self.tabs.editorCreated.emit(self)
+        if self.journal is None:
+            self.journal = EditJournal(self.editor.document(), self.config.file.get('journal_directory'))
+        return self.editor
+
+    def load_text(self, text, file_path):
+        """
+        Replace the tab's content with text loaded from a file.
+
+        Args:
+            text: File content
+            file_path: Path the text came from, or None for an empty document
+        """
+        editor = self.create_editor()
+        self.journal.end()
+        editor.setPlainText(text)
+        self.file_path = file_path
+        editor.document().setModified(False)
+        editor.document().clearUndoRedoStacks()
+        self.journal.begin(file_path)
+        self.saved_text = text if file_path else None
+        self.disk_signature = file_signature(file_path) if file_path else None
+
+    def adopt_disk_version(self, text, signature):
+        """
+        Accept a version of the file read from disk as the new saved state.
+        The journal is rebased on it; if the buffer still differs (merged or
+        kept local edits), the difference is journaled as a single edit.
+
+        Args:
+            text: File content read from disk
+            signature: (size, mtime_ns) of that content
+        """
+        self.saved_text = text
+        self.disk_signature = signature
+        document = self.editor.document()
+        self.journal.begin(self.file_path)
+        if document.isModified():
+            self.journal.record(0, len(text), document.characterCount() - 1)
+
+    def open_viewer(self, file_path):
+        """
+        Show a large file in a read-only memory-mapped viewer.
+
+        Args:
+            file_path: Path of the file to view
+        """
+        self.viewer = LargeFileViewer(self.page, self.config)
+        self.layout.addWidget(self.viewer)
+        self.viewer.open_file(file_path)
+        self.file_path = file_path
+        self.disk_signature = file_signature(file_path)
+        self.tabs.viewerCreated.emit(self)
+
+    def is_large_file(self):
+        """
+        Check whether the tab's file should open in the read-only viewer.
+
+        Returns:
+            bool: True if the file is at or above the large file threshold
+        """
+        threshold = self.config.file.get('large_file_threshold')
+        try:
+            return bool(self.file_path and threshold and os.path.getsize(self.file_path) >= threshold)
+        except OSError:
+            return False
+
+    def make_placeholder(self, cursor=(0, 0), scroll=(0, 0)):
+        """
+        Mark the tab as not loaded yet. The file is read from disk the first
+        time the tab is restored, e.g. for lazily restored sessions.
+
+        Args:
+            cursor: (anchor, position) to restore once loaded
+            scroll: (vertical, horizontal) scroll bar values to restore
+        """
+        self.suspended = {
+            'modified': False,
+            'cursor': tuple(cursor),
+            'scroll': tuple(scroll),
+            'text': None,
+            'signature': None,  # Unknown: trust the saved positions
+        }
+
+    def view_state(self):
+        """
+        Return the cursor and scroll position of the tab, loaded or not.
+
+        Returns:
+            tuple: ((anchor, position), (vertical, horizontal))
+        """
+        if self.suspended is not None:
+            return self.suspended['cursor'], self.suspended['scroll']
+        if self.editor is not None:
+            cursor = self.editor.textCursor()
+            return ((cursor.anchor(), cursor.position()),
+                    (self.editor.verticalScrollBar().value(), self.editor.horizontalScrollBar().value()))
+        if self.viewer is not None:
+            return (0, 0), (self.viewer.current_line, 0)
+        return (0, 0), (0, 0)
+
+    def suspend(self):
+        """
+        Release the editor, its document, highlight formats and layouts.
+        Documents whose text equals the saved text keep only the file
+        signature and are re-read from disk on restore; others keep
+        zlib-compressed text, even if their modified flag was cleared.
+        Tabs with undo or redo history are left loaded, since the snapshot
+        cannot hold it.
+        """
+        if self.editor is None or self.suspended is not None:
+            return
+
+        document = self.editor.document()
+        if document.isUndoAvailable() or document.isRedoAvailable():
+            return  # Suspending would throw the undo history away
+        cursor = self.editor.textCursor()
+        text = self.editor.toPlainText()
+        # setPlainText() (e.g. Format Code) clears the modified flag, so the
+        # text itself decides whether there are unsaved edits
+        modified = document.isModified() or (self.saved_text is not None and text != self.saved_text)
+        snapshot = {
+            'modified': modified,
+            'cursor': (cursor.anchor(), cursor.position()),
+            'scroll': (self.editor.verticalScrollBar().value(),
+                       self.editor.horizontalScrollBar().value()),
+            'text': None,
+            'saved_text': None,
+            'signature': None,
+        }
+        if snapshot['modified'] or not self.file_path or not os.path.exists(self.file_path):
+            snapshot['text'] = zlib.compress(text.encode('utf-8'), 1)
+            if self.saved_text is not None:
+                snapshot['saved_text'] = zlib.compress(self.saved_text.encode('utf-8'), 1)
+        else:
+            snapshot['signature'] = file_signature(self.file_path)
+        self.saved_text = None
+
+        # Keep unsaved edits durable while the document does not exist
+        self.journal.flush()
+        self.journal.detach()
+
+        self.layout.removeWidget(self.editor)
+        self.editor.deleteLater()
+        self.editor = None
+        self.suspended = snapshot
+
+    def restore(self):
+        """
+        Recreate the editor from the suspended snapshot.
+        Files that changed on disk while suspended are reloaded from disk.
+        """
+        snapshot = self.suspended
+        if snapshot is None:
+            return
+        self.suspended = None
+
+        # Placeholders for large files become viewers instead of editors
+        if snapshot['text'] is None and self.is_large_file():
+            self.open_viewer(self.file_path)
+            return
+
+        editor = self.create_editor()
+        changed = False
+        if snapshot['text'] is not None:
+            text = zlib.decompress(snapshot['text']).decode('utf-8')
+            if snapshot.get('saved_text') is not None:
+                self.saved_text = zlib.decompress(snapshot['saved_text']).decode('utf-8')
+        else:
+            try:
+                signature = file_signature(self.file_path)
+                with open(self.file_path, 'r') as f:
+                    text = f.read()
+                changed = snapshot['signature'] is not None and signature != snapshot['signature']
+                self.saved_text = text
+                self.disk_signature = signature
+            except OSError:
+                text, changed = '', True  # File removed while the tab was suspended
+            if changed:
+                snapshot['cursor'] = (0, 0)  # Saved positions no longer apply
+
+        self.journal.detach()
+        editor.setPlainText(text)
+        editor.document().clearUndoRedoStacks()
+        editor.document().setModified(snapshot['modified'])
+        if changed or not self.journal.journal_path:
+            self.journal.begin(self.file_path)  # New base on disk, or first load
+        else:
+            self.journal.attach(editor.document())
+
+        anchor, position = (min(p, editor.document().characterCount() - 1) for p in snapshot['cursor'])
+        cursor = editor.textCursor()
+        cursor.setPosition(anchor)
+        cursor.setPosition(position, QTextCursor.KeepAnchor)
+        editor.setTextCursor(cursor)
+
+        # Scroll ranges are only final after the layout has run
+        vertical, horizontal = snapshot['scroll']
+
+        def apply_scroll():
+            if self.editor is editor:
+                editor.verticalScrollBar().setValue(vertical)
+                editor.horizontalScrollBar().setValue(horizontal)
+
+        apply_scroll()
+        QTimer.singleShot(0, apply_scroll)
+
+    def close(self):
+        """
+        Release all resources of the tab. Unsaved edits are discarded.
+        """
+        if self.journal is not None:
+            self.journal.end()
+        if self.viewer is not None:
+            self.viewer.close_file()
+        self.page.deleteLater()
+
+
+class DocumentTabs(QTabWidget):
+    """
+    Tab widget holding all open documents.
+    Tabs that have not been focused for config.file['suspend_after'] seconds
+    are suspended so that many open files do not keep their full documents,
+    highlighting and layouts in memory, unless they have undo history.
+    Suspended tabs restore when focused.
+    """
+
+    currentDocumentChanged = pyqtSignal(object)  # Emitted with the new current DocumentTab
+    editorCreated = pyqtSignal(object)  # Emitted with a DocumentTab whenever it (re)creates its editor
+    viewerCreated = pyqtSignal(object)  # Emitted with a DocumentTab that opened a large file viewer
+
+    SUSPEND_CHECK_INTERVAL = 30 * 1000  # How often idle tabs are looked for (ms)
+
+    def __init__(self, config, parent=None):
+        """
+        Initialize the tab widget.
+
+        Args:
+            config: Configuration object shared by all editors
+            parent: Parent widget
+        """
+        super().__init__(parent)
+        self.config = config
+        self.setTabsClosable(True)
+        self.setMovable(True)
+        self.setDocumentMode(True)
+        self.currentChanged.connect(self.on_current_changed)
+
+        # Periodically suspend tabs that have been idle for a while
+        self.suspend_timer = QTimer(self)
+        self.suspend_timer.timeout.connect(self.suspend_idle_tabs)
+        if self.config.file.get('suspend_after'):
+            self.suspend_timer.start(self.SUSPEND_CHECK_INTERVAL)
+
+    def tab_at(self, index):
+        """
+        Return the DocumentTab at a tab index.
+
+        Args:
+            index: Tab index
+
+        Returns:
+            DocumentTab or None
+        """
+        page = self.widget(index)
+        return page.document_tab if page is not None else None
+
+    def current_tab(self):
+        """
+        Return the focused DocumentTab.
+
+        Returns:
+            DocumentTab or None
+        """
+        return self.tab_at(self.currentIndex())
+
+    def all_tabs(self):
+        """
+        Return all tabs in tab bar order.
+
+        Returns:
+            list: DocumentTab objects
+        """
+        return [self.tab_at(i) for i in range(self.count())]
+
+    def find_tab(self, file_path):
+        """
+        Find the tab showing a file.
+
+        Args:
+            file_path: Path to look for
+
+        Returns:
+            DocumentTab or None
+        """
+        target = os.path.abspath(file_path)
+        for tab in self.all_tabs():
+            if tab.file_path and os.path.abspath(tab.file_path) == target:
+                return tab
+        return None
+
+    def add_tab(self, tab, focus=True):
+        """
+        Add a tab to the tab bar.
+
+        Args:
+            tab: DocumentTab to add
+            focus: Make the new tab current
+        """
+        index = self.addTab(tab.page, tab.title())
+        if tab.file_path:
+            self.setTabToolTip(index, tab.file_path)
+        if focus:
+            self.setCurrentIndex(index)
+
+    def remove_tab(self, tab):
+        """
+        Remove a tab and release its resources.
+
+        Args:
+            tab: DocumentTab to remove
+        """
+        self.removeTab(self.indexOf(tab.page))
+        tab.close()
+
+    def update_tab_title(self, tab):
+        """
+        Refresh a tab's label and tooltip.
+
+        Args:
+            tab: DocumentTab whose label changed
+        """
+        index = self.indexOf(tab.page)
+        if index >= 0:
+            self.setTabText(index, tab.title())
+            self.setTabToolTip(index, tab.file_path or '')
+
+    def on_current_changed(self, index):
+        """
+        Restore a suspended tab when it is focused and notify listeners.
+
+        Args:
+            index: New current tab index
+        """
+        tab = self.tab_at(index)
+        if tab is not None:
+            if tab.is_suspended():
+                tab.restore()
+            tab.last_used = time.monotonic()
+        self.currentDocumentChanged.emit(tab)
+
+    def suspend_idle_tabs(self):
+        """
+        Suspend every background tab that has been idle long enough.
+        """
+        idle_limit = self.config.file.get('suspend_after')
+        if not idle_limit:
+            return
+        current = self.current_tab()
+        now = time.monotonic()
+        for tab in self.all_tabs():
+            if tab is current:
+                tab.last_used = now
+            elif tab.editor is not None and not tab.pending_saves and now - tab.last_used > idle_limit:
+                tab.suspend()
@@ -0,0 +1,363 @@
+# edit_journal.py
+import hashlib
+import json
+import os
+import tempfile
+
+from PyQt5.QtCore import QObject, QStandardPaths
+from PyQt5.QtGui import QTextCursor
+
+
+def default_journal_directory():
+    """
+    Return the per-user directory where edit journals are kept.
+
+    Returns:
+        str: Directory path (not necessarily existing yet)
+    """
+    base = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+    return os.path.join(base or os.path.expanduser('~/.matcha'), 'journal')
+
+
+def _process_alive(pid):
+    """
+    Check whether a process with the given id is still running.
+
+    Args:
+        pid: Process id
+
+    Returns:
+        bool: True if the process exists
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True  # Exists but belongs to someone else, or the check is unsupported
+    return True
+
+
+def _file_signature(path):
+    """
+    Return the (size, mtime) pair used to recognise a journal's base file.
+
+    Args:
+        path: File path, or None for untitled documents
+
+    Returns:
+        list: [size, mtime_ns], or None if there is no base file
+    """
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class EditJournal(QObject):
+    """
+    Append-only journal of the edits made to one QTextDocument.
+    Each contentsChange is recorded as (position, chars removed, text added)
+    relative to the file as last loaded or saved. Flushing appends only the new
+    entries, so auto-saving costs as much as the edit volume rather than the
+    file size. After a crash the journal is replayed on top of the base file.
+
+    Journal file format (JSON lines):
+        {"path": ..., "base": [size, mtime_ns], "pid": ...}   header
+        [position, removed, "added text"]                    one line per edit
+    """
+
+    COMPACT_THRESHOLD = 2000  # Entries on disk before the journal is rewritten
+
+    def __init__(self, document, directory=None, parent=None):
+        """
+        Initialize the journal. Nothing is recorded until begin() is called.
+
+        Args:
+            document: QTextDocument to record
+            directory: Journal directory, defaults to default_journal_directory()
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.document = document
+        self.directory = directory or default_journal_directory()
+        self.file_path = None  # Base file of the document (None if untitled)
+        self.journal_path = None
+        self.entries = []  # Edits since the base, as [position, removed, added]
+        self.flushed = 0  # Number of entries already written to disk
+        self.on_disk = 0  # Number of entry lines in the journal file
+        self.barrier = 0  # Entries before this index are never merged into
+        self.recording = False
+
+    def begin(self, file_path):
+        """
+        Start recording edits relative to the document's current content.
+
+        Args:
+            file_path: File the current content was loaded from, or None
+        """
+        self.end()
+        self.file_path = file_path
+        key = os.path.abspath(file_path) if file_path else f'untitled-{os.getpid()}-{id(self)}'
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.journal'
+        self.journal_path = os.path.join(self.directory, name)
+        self._reset(0)
+        self.document.contentsChange.connect(self.record)
+        self.recording = True
+
+    def end(self):
+        """
+        Stop recording and delete the journal (the document closed cleanly).
+        """
+        if self.recording:
+            self.document.contentsChange.disconnect(self.record)
+            self.recording = False
+        if self.journal_path and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_path = None
+        self.entries = []
+        self.flushed = self.on_disk = self.barrier = 0
+
+    def detach(self):
+        """
+        Stop listening to the document but keep the journal and its entries.
+        Used when the document is released, e.g. while its tab is suspended.
+        """
+        if self.recording:
+            self.document.contentsChange.disconnect(self.record)
+            self.recording = False
+
+    def attach(self, document):
+        """
+        Resume recording on a document recreated with the journaled content.
+
+        Args:
+            document: QTextDocument holding the same text the journal describes
+        """
+        self.detach()
+        self.document = document
+        if self.journal_path:
+            self.document.contentsChange.connect(self.record)
+            self.recording = True
+
+    def mark(self):
+        """
+        Mark the current point in the edit stream, e.g. when a save snapshot is taken.
+        Later edits are not merged into earlier ones across the mark.
+
+        Returns:
+            int: Opaque mark to pass to checkpoint()
+        """
+        self.barrier = len(self.entries)
+        return self.barrier
+
+    def checkpoint(self, file_path, mark=None):
+        """
+        Rebase the journal after a save.
+        Edits up to the mark are now part of the saved file and are dropped;
+        edits made after the save snapshot are kept.
+
+        Args:
+            file_path: Path the document was saved to
+            mark: Value returned by mark() when the snapshot was taken
+        """
+        if not self.journal_path:
+            return
+        if file_path != self.file_path:
+            # Save As: move the journal to the new file's name
+            if self.journal_path and os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self.file_path = file_path
+            name = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest() + '.journal'
+            self.journal_path = os.path.join(self.directory, name)
+        self._reset(len(self.entries) if mark is None else mark)
+
+    def _reset(self, keep_from):
+        """
+        Rewrite the journal with a fresh header and the entries from an index on.
+
+        Args:
+            keep_from: Index of the first entry that is not part of the base
+        """
+        self.entries = self.entries[keep_from:]
+        self.barrier = max(0, self.barrier - keep_from)
+        self._rewrite()
+
+    def _rewrite(self):
+        """
+        Atomically replace the journal file with the header and all entries.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        header = {'path': self.file_path, 'base': _file_signature(self.file_path), 'pid': os.getpid()}
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header) + '\n')
+            for entry in self.entries:
+                f.write(json.dumps(entry) + '\n')
+        os.replace(temp_path, self.journal_path)
+        self.flushed = self.on_disk = len(self.entries)
+
+    def record(self, position, removed, added):
+        """
+        Record a contentsChange delta, merging it into the previous entry when
+        it simply continues typing or deleting at the same place.
+
+        Args:
+            position: Position where the change happened
+            removed: Number of characters removed
+            added: Number of characters added
+        """
+        # Whole-document changes report one character beyond the end; clamp it
+        end = min(position + added, self.document.characterCount() - 1)
+        text = ''
+        if end > position:
+            cursor = QTextCursor(self.document)
+            cursor.setPosition(position)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            text = cursor.selectedText().replace('\u2029', '\n')
+
+        entry = [position, removed, text]
+        if not self._merge(entry):
+            self.entries.append(entry)
+
+    def _merge(self, entry):
+        """
+        Try to merge an edit into the last unflushed entry.
+
+        Args:
+            entry: [position, removed, added] of the new edit
+
+        Returns:
+            bool: True if the edit was merged
+        """
+        if len(self.entries) <= max(self.flushed, self.barrier):
+            return False
+        last = self.entries[-1]
+        position, removed, added = entry
+        last_end = last[0] + len(last[2])
+
+        # Typing: insertion right after the previous insertion
+        if removed == 0 and position == last_end:
+            last[2] += added
+            return True
+        # Backspace over text that was just typed
+        if not added and removed <= len(last[2]) and position + removed == last_end \
+                and position >= last[0]:
+            last[2] = last[2][:position - last[0]]
+            return True
+        # Backspace/delete continuing a pure deletion
+        if not added and not last[2]:
+            if position + removed == last[0]:
+                last[0] = position
+                last[1] += removed
+                return True
+            if position == last[0]:
+                last[1] += removed
+                return True
+        return False
+
+    def flush(self):
+        """
+        Append unflushed entries to the journal file.
+        Compacts the journal first when it has grown too long.
+        """
+        if not self.journal_path or self.flushed == len(self.entries):
+            return
+        if self.on_disk + len(self.entries) - self.flushed > self.COMPACT_THRESHOLD:
+            self.compact()
+            return
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            for entry in self.entries[self.flushed:]:
+                f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.on_disk += len(self.entries) - self.flushed
+        self.flushed = len(self.entries)
+
+    def compact(self):
+        """
+        Merge adjacent entries and rewrite the journal file.
+        """
+        merged = self.entries[:self.barrier]
+        pending = self.entries[self.barrier:]
+        self.entries = merged
+        self.flushed = len(merged)
+        for entry in pending:
+            if not self._merge(entry):
+                self.entries.append(entry)
+        self._rewrite()
+
+    @staticmethod
+    def find_recoverable(directory=None):
+        """
+        List journals left behind by sessions that did not shut down cleanly.
+
+        Args:
+            directory: Journal directory, defaults to default_journal_directory()
+
+        Returns:
+            list: Journal file paths with at least one recorded edit
+        """
+        directory = directory or default_journal_directory()
+        if not os.path.isdir(directory):
+            return []
+        journals = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.journal'):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    header = json.loads(f.readline())
+                    has_edits = bool(f.readline().strip())
+            except (OSError, ValueError):
+                continue
+            if has_edits and not (header.get('pid') != os.getpid() and _process_alive(header.get('pid', 0))):
+                journals.append(path)
+        return journals
+
+    @staticmethod
+    def replay(journal_path):
+        """
+        Rebuild a document's text from its base file and journal.
+
+        Args:
+            journal_path: Path of the journal file
+
+        Returns:
+            tuple: (base file path or None, recovered text)
+
+        Raises:
+            ValueError: If the base file changed since the journal was started
+        """
+        with open(journal_path, encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            file_path = header.get('path')
+            if _file_signature(file_path) != header.get('base'):
+                raise ValueError(f"{file_path} changed on disk since the journal was written")
+
+            text = ''
+            if file_path:
+                with open(file_path, 'r') as base:
+                    text = base.read()
+
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    position, removed, added = json.loads(line)
+                except ValueError:
+                    break  # Torn final line from the crash
+                text = text[:position] + added + text[position + removed:]
+        return file_path, text
+
+    @staticmethod
+    def discard(journal_path):
+        """
+        Delete a journal that the user chose not to recover.
+
+        Args:
+            journal_path: Path of the journal file
+        """
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
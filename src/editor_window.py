@@ -1,10 +1,32 @@
+import json
+import os
 from PyQt5.QtWidgets import (QMainWindow, QAction, QFileDialog, QMessageBox,
                              QDockWidget, QUndoStack, QApplication, QVBoxLayout,
-                             QWidget, QLabel, QStatusBar)
+                             QWidget, QLabel, QStatusBar, QInputDialog)
 from PyQt5.QtGui import QIcon, QKeySequence, QFont
-from PyQt5.QtCore import Qt, QFileInfo, QSettings, QSize
-from verilog_editor import VerilogEditor
+from PyQt5.QtCore import Qt, QFileInfo, QSettings, QSize, QTimer
+from document_tabs import DocumentTab, DocumentTabs
+from file_saver import HistoryWorker, SaveWorker
+from file_watcher import FileWatcher, ReloadWorker, apply_line_diff, file_signature
+from edit_journal import EditJournal
 from search_widget import SearchWidget
+from project_explorer import ProjectExplorer
+from path_index import PathIndex
+from quick_open import QuickOpenDialog
+from symbol_index import SymbolIndex
+from code_navigation import CodeNavigator, ReferencesPanel
+from module_hierarchy import ModuleHierarchy
+from outline_view import OutlineView
+from diagnostics import DiagnosticsManager
+from symbol_rename import RenameWorker, is_valid_name, rename_in_document
+from semantic_highlighting import stop_shared_worker
+from change_gutter import stop_diff_worker
+from diff_view import DiffView, compare_title
+from local_history import LocalHistory
+from history_dialog import HistoryDialog
+from line_diff import diff_lines
+from structural_query import parse_query
+from structural_search import StructuralSearch
 from config import EditorConfig
 
 
@@ -24,10 +46,40 @@ class EditorWindow(QMainWindow):
         """
         super().__init__()
         self.config = config or EditorConfig()
-        self.current_file = None  # Tracks the currently open file
         self.search_widget = None  # Search/Replace widget reference
+        self.pending_saves = []  # SaveWorker threads that have not finished yet
+        self.rename_worker = None  # RenameWorker of a rename in progress
+        self.preload_queue = []  # Session tabs waiting to be loaded in idle time
+        self.histories = {}  # Project root -> LocalHistory of saved versions
+        self.history_worker = None  # HistoryWorker recording saved versions, started on first use
         self.initUI()
         self.load_settings()  # Restore previous window state and geometry
+        self.restore_session()  # Reopen the previous session's files lazily
+        self.setup_auto_save()
+
+    @property
+    def editor(self):
+        """
+        The VerilogEditor of the current tab, or None for read-only viewer tabs.
+        """
+        tab = self.tabs.current_tab()
+        return tab.editor if tab else None
+
+    @property
+    def viewer(self):
+        """
+        The LargeFileViewer of the current tab, or None for editor tabs.
+        """
+        tab = self.tabs.current_tab()
+        return tab.viewer if tab else None
+
+    @property
+    def current_file(self):
+        """
+        Path of the file in the current tab, or None if untitled.
+        """
+        tab = self.tabs.current_tab()
+        return tab.file_path if tab else None
 
     def initUI(self):
         """
@@ -38,12 +90,17 @@ class EditorWindow(QMainWindow):
         self.setWindowTitle('Matcha - Verilog Editor')
         self.setGeometry(100, 100, 1200, 800)  # Default window size and position
 
-        # Create and set up the main editor widget
-        self.editor = VerilogEditor(self, self.config)
-        self.setCentralWidget(self.editor)
+        # Each open document lives in its own tab
+        self.tabs = DocumentTabs(self.config, self)
+        self.tabs.editorCreated.connect(self.on_editor_created)
+        self.tabs.viewerCreated.connect(self.on_viewer_created)
+        self.tabs.currentDocumentChanged.connect(self.on_current_document_changed)
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        self.setCentralWidget(self.tabs)
 
-        # Track document modifications
-        self.editor.document().modificationChanged.connect(self.documentWasModified)
+        # Reload open files when other programs change them
+        self.file_watcher = FileWatcher(self)
+        self.file_watcher.fileChanged.connect(self.on_file_changed)
 
         # Initialize UI components
         self.setup_docks()
@@ -51,18 +108,150 @@ class EditorWindow(QMainWindow):
         self.create_menu_bar()
         self.apply_theme()
 
+        # Start with one empty document
+        self.new_file()
+
     def setup_docks(self):
         """
         Set up dock widgets for additional functionality.
-        Currently includes the search/replace widget in a bottom dock area.
+        Includes the project explorer on the left and the search/replace
+        widget in a bottom dock area.
         """
+        # Create project explorer dock widget
+        self.project_dock = QDockWidget("Project", self)
+        self.project_dock.setObjectName('project_dock')
+        self.project_explorer = ProjectExplorer(self, self.config)
+        self.project_dock.setWidget(self.project_explorer)
+        self.addDockWidget(Qt.LeftDockWidgetArea, self.project_dock)
+
+        # Index of all project files for quick-open, following the explorer's root
+        self.path_index = PathIndex(self.config, self)
+        self.path_index.set_root(self.project_explorer.root_path)
+        self.project_explorer.rootChanged.connect(self.path_index.set_root)
+        self.quick_open_dialog = None  # Created on first use
+
+        # Persistent database of the project's modules, ports, nets and instances
+        self.symbol_index = SymbolIndex(self.config, self)
+        self.symbol_index.progress.connect(self.on_index_progress)
+        self.symbol_index.set_root(self.project_explorer.root_path)
+        self.project_explorer.rootChanged.connect(self.symbol_index.set_root)
+        self.navigator = CodeNavigator(self.symbol_index)
+
+        # Background syntax and lint checks of the current document
+        self.diagnostics = DiagnosticsManager(self.config, self.symbol_index, self)
+
+        # Instantiation tree, built from the symbol index when first shown
+        self.hierarchy_dock = QDockWidget("Hierarchy", self)
+        self.hierarchy_dock.setObjectName('hierarchy_dock')
+        self.module_hierarchy = ModuleHierarchy(self.symbol_index, self)
+        self.hierarchy_dock.setWidget(self.module_hierarchy)
+        self.addDockWidget(Qt.LeftDockWidgetArea, self.hierarchy_dock)
+        self.tabifyDockWidget(self.project_dock, self.hierarchy_dock)
+        self.project_dock.raise_()
+        self.hierarchy_dock.visibilityChanged.connect(
+            lambda visible: visible and self.module_hierarchy.activate())
+
+        # Results of go-to-definition and find-references
+        self.references_dock = QDockWidget("References", self)
+        self.references_dock.setObjectName('references_dock')
+        self.references_panel = ReferencesPanel(self)
+        self.references_panel.locationActivated.connect(self.open_location)
+        self.references_dock.setWidget(self.references_panel)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.references_dock)
+        self.references_dock.hide()
+
+        # Outline of the current document, maintained only while the dock is shown
+        self.outline_dock = QDockWidget("Outline", self)
+        self.outline_dock.setObjectName('outline_dock')
+        self.outline_view = OutlineView(self)
+        self.outline_dock.setWidget(self.outline_view)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.outline_dock)
+        self.outline_dock.visibilityChanged.connect(lambda visible: visible and self.update_outline())
+        self.outline_dock.hide()
+
         # Create search dock widget
         self.search_dock = QDockWidget("Search", self)
-        self.search_widget = SearchWidget(self.editor)
+        self.search_dock.setObjectName('search_dock')
+        self.search_widget = SearchWidget(None)  # Attached to the current tab later
+        self.search_widget.structuralSearchRequested.connect(self.run_structural_search)
         self.search_dock.setWidget(self.search_widget)
         self.addDockWidget(Qt.BottomDockWidgetArea, self.search_dock)
         self.search_dock.hide()  # Initially hidden
 
+        # Results of structural searches, streamed in while the search runs
+        self.structural_search = StructuralSearch(self.config, self.symbol_index, self)
+        self.structural_search.found.connect(
+            lambda batch: self.search_results_panel.add_locations(batch, self.project_explorer.root_path))
+        self.structural_search.progress.connect(self.on_structural_search_progress)
+        self.structural_search.finished.connect(self.on_structural_search_finished)
+        self.search_results_title = "Search Results"  # Dock title without the match count
+        self.search_results_dock = QDockWidget(self.search_results_title, self)
+        self.search_results_dock.setObjectName('search_results_dock')
+        self.search_results_panel = ReferencesPanel(self)
+        self.search_results_panel.locationActivated.connect(self.open_location)
+        self.search_results_dock.setWidget(self.search_results_panel)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.search_results_dock)
+        self.search_results_dock.hide()
+
+    def setup_auto_save(self):
+        """
+        Set up auto-save and crash recovery through the tabs' edit journals.
+        Auto-save flushes only the edits recorded since the last flush.
+        """
+        # Offer recovery once the event loop is running and the window is visible
+        QTimer.singleShot(0, self.recover_journals)
+
+        self.auto_save_timer = QTimer(self)
+        self.auto_save_timer.timeout.connect(self.auto_save)
+        if self.config.file.get('auto_save'):
+            self.auto_save_timer.start(self.config.file.get('auto_save_interval', 300) * 1000)
+
+    def auto_save(self):
+        """
+        Persist recent edits by appending them to each tab's edit journal.
+        """
+        try:
+            for tab in self.tabs.all_tabs():
+                if tab.journal is not None:
+                    tab.journal.flush()
+        except OSError as e:
+            self.statusBar().showMessage(f'Auto-save failed: {e}', 5000)
+
+    def recover_journals(self):
+        """
+        Offer to restore unsaved edits left in journals by a crashed session.
+        Each recovered document opens in its own tab.
+        """
+        open_journals = {tab.journal.journal_path for tab in self.tabs.all_tabs() if tab.journal}
+        for journal_path in EditJournal.find_recoverable(self.config.file.get('journal_directory')):
+            if journal_path in open_journals:
+                continue
+            try:
+                file_path, text = EditJournal.replay(journal_path)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self, "Matcha", f"Could not recover unsaved changes:\n{e}")
+                EditJournal.discard(journal_path)
+                continue
+
+            name = QFileInfo(file_path).fileName() if file_path else "an untitled document"
+            ret = QMessageBox.question(self, "Matcha",
+                                       f"Matcha did not shut down cleanly.\n"
+                                       f"Recover unsaved changes to {name}?",
+                                       QMessageBox.Yes | QMessageBox.No)
+            EditJournal.discard(journal_path)
+            if ret != QMessageBox.Yes:
+                continue
+
+            if file_path:
+                self.load_file(file_path)
+            else:
+                self.new_file()
+            if self.editor is None:
+                continue  # The file could not be opened for editing
+            self.editor.setPlainText(text)  # Recorded by the journal as a single edit
+            self.editor.document().setModified(True)
+            self.tabs.current_tab().journal.flush()
+
     def setup_status_bar(self):
         """
         Set up the status bar with cursor position and file information.
@@ -74,14 +263,14 @@ class EditorWindow(QMainWindow):
         # Create status indicators
         self.cursor_position_label = QLabel("Line: 1, Column: 1")
         self.file_info_label = QLabel("No File")
+        self.problems_label = QLabel()  # Problem counts from the background checks
+        self.diagnostics.summaryChanged.connect(self.problems_label.setText)
 
         # Add permanent widgets to status bar
+        status_bar.addPermanentWidget(self.problems_label)
         status_bar.addPermanentWidget(self.cursor_position_label)
         status_bar.addPermanentWidget(self.file_info_label)
 
-        # Update cursor position when it changes
-        self.editor.cursorPositionChanged.connect(self.update_cursor_position)
-
     def create_menu_bar(self):
         """
         Create the application menu bar with File, Edit, and View menus.
@@ -89,7 +278,7 @@ class EditorWindow(QMainWindow):
         """
         menubar = self.menuBar()
 
-        # File menu - New, Open, Save, Save As, Exit
+        # File menu - New, Open, Save, Save As, Close, Exit
         file_menu = menubar.addMenu('&File')
         new_action = self.create_action('&New',
                                         self.config.keybindings['new'],
@@ -101,6 +290,11 @@ class EditorWindow(QMainWindow):
                                          'Open file',
                                          self.open_file,
                                          'open')
+        open_folder_action = self.create_action('Open &Folder...',
+                                                self.config.keybindings.get('open_folder', 'Ctrl+K, Ctrl+O'),
+                                                'Open project folder',
+                                                self.open_folder,
+                                                'open-folder')
         save_action = self.create_action('&Save',
                                          self.config.keybindings['save'],
                                          'Save file',
@@ -112,7 +306,38 @@ class EditorWindow(QMainWindow):
                                             self.save_file_as,
                                             'save-as')
 
-        file_menu.addActions([new_action, open_action, save_action, save_as_action])
+        close_action = self.create_action('&Close',
+                                          self.config.keybindings.get('close', 'Ctrl+W'),
+                                          'Close file',
+                                          lambda: self.close_tab(self.tabs.currentIndex()),
+                                          'close')
+
+        quick_open_action = self.create_action('&Go to File...',
+                                               self.config.keybindings.get('quick_open', 'Ctrl+P'),
+                                               'Open a project file by name',
+                                               self.quick_open,
+                                               'quick-open')
+
+        compare_files_action = self.create_action('Co&mpare Files...',
+                                                  self.config.keybindings.get('compare_files', 'Ctrl+K, Ctrl+D'),
+                                                  'Compare two files side by side',
+                                                  self.compare_files,
+                                                  'compare-files')
+        compare_saved_action = self.create_action('Compare with Sa&ved',
+                                                  self.config.keybindings.get('compare_with_saved', 'Ctrl+K, D'),
+                                                  'Compare the document with the file on disk',
+                                                  self.compare_with_saved,
+                                                  'compare-saved')
+
+        file_menu.addActions([new_action, open_action, open_folder_action, quick_open_action,
+                              save_action, save_as_action, close_action])
+        file_menu.addSeparator()
+        local_history_action = self.create_action('Local &History...',
+                                                  self.config.keybindings.get('local_history', 'Ctrl+K, H'),
+                                                  'Browse, compare and restore saved versions of the file',
+                                                  self.show_local_history,
+                                                  'local-history')
+        file_menu.addActions([compare_files_action, compare_saved_action, local_history_action])
         file_menu.addSeparator()
         file_menu.addAction(self.create_action('E&xit', 'Alt+F4', 'Exit application', self.close, 'exit'))
 
@@ -122,19 +347,14 @@ class EditorWindow(QMainWindow):
         # Undo/Redo actions
         self.undo_action = QAction('&Undo', self)
         self.undo_action.setShortcut('Ctrl+Z')
-        self.undo_action.triggered.connect(self.editor.undo)
-        self.undo_action.setEnabled(self.editor.document().isUndoAvailable())
+        self.undo_action.triggered.connect(lambda: self.editor and self.editor.undo())
         edit_menu.addAction(self.undo_action)
 
         self.redo_action = QAction('&Redo', self)
         self.redo_action.setShortcut('Ctrl+Shift+Z')
-        self.redo_action.triggered.connect(self.editor.redo)
-        self.redo_action.setEnabled(self.editor.document().isRedoAvailable())
+        self.redo_action.triggered.connect(lambda: self.editor and self.editor.redo())
         edit_menu.addAction(self.redo_action)
-
-        # Connect undo/redo availability signals
-        self.editor.document().undoAvailable.connect(self.undo_action.setEnabled)
-        self.editor.document().redoAvailable.connect(self.redo_action.setEnabled)
+        self.update_undo_redo_actions()
 
         edit_menu.addSeparator()
 
@@ -145,6 +365,56 @@ class EditorWindow(QMainWindow):
                                          self.show_search,
                                          'find')
         edit_menu.addAction(find_action)
+        structural_search_action = self.create_action('&Structural Search...',
+                                                      self.config.keybindings.get('structural_search', 'Ctrl+Alt+F'),
+                                                      'Search the project by code structure',
+                                                      self.show_structural_search,
+                                                      'structural-search')
+        edit_menu.addAction(structural_search_action)
+        goto_line_action = self.create_action('&Go to Line...',
+                                              self.config.keybindings['goto_line'],
+                                              'Jump to a line number',
+                                              self.goto_line,
+                                              'goto-line')
+        edit_menu.addAction(goto_line_action)
+        goto_definition_action = self.create_action('Go to &Definition',
+                                                    self.config.keybindings.get('goto_definition', 'F12'),
+                                                    'Jump to the declaration of the name under the cursor',
+                                                    self.go_to_definition,
+                                                    'goto-definition')
+        edit_menu.addAction(goto_definition_action)
+        find_references_action = self.create_action('Find All &References',
+                                                    self.config.keybindings.get('find_references', 'Shift+F12'),
+                                                    'List all uses of the name under the cursor',
+                                                    self.find_references,
+                                                    'find-references')
+        edit_menu.addAction(find_references_action)
+        rename_action = self.create_action('Re&name Symbol...',
+                                           self.config.keybindings.get('rename_symbol', 'F2'),
+                                           'Rename the name under the cursor in the whole project',
+                                           self.rename_symbol,
+                                           'rename-symbol')
+        edit_menu.addAction(rename_action)
+        edit_menu.addSeparator()
+
+        next_change_action = self.create_action('Next &Change',
+                                                self.config.keybindings.get('next_change', 'Alt+F5'),
+                                                'Go to the next change from the saved file',
+                                                lambda: self.goto_change(True),
+                                                'next-change')
+        edit_menu.addAction(next_change_action)
+        previous_change_action = self.create_action('Pre&vious Change',
+                                                    self.config.keybindings.get('previous_change', 'Shift+Alt+F5'),
+                                                    'Go to the previous change from the saved file',
+                                                    lambda: self.goto_change(False),
+                                                    'previous-change')
+        edit_menu.addAction(previous_change_action)
+        revert_change_action = self.create_action('Rever&t Change',
+                                                  self.config.keybindings.get('revert_change', 'Ctrl+Alt+Z'),
+                                                  'Restore the saved lines of the change at the cursor',
+                                                  self.revert_change,
+                                                  'revert-change')
+        edit_menu.addAction(revert_change_action)
         edit_menu.addSeparator()
 
         format_action = self.create_action('&Format Code',
@@ -156,7 +426,12 @@ class EditorWindow(QMainWindow):
 
         # View menu - Toggle dock widgets
         view_menu = menubar.addMenu('&View')
+        view_menu.addAction(self.project_dock.toggleViewAction())
+        view_menu.addAction(self.hierarchy_dock.toggleViewAction())
+        view_menu.addAction(self.outline_dock.toggleViewAction())
         view_menu.addAction(self.search_dock.toggleViewAction())
+        view_menu.addAction(self.references_dock.toggleViewAction())
+        view_menu.addAction(self.search_results_dock.toggleViewAction())
 
     def create_action(self, text, shortcut, status_tip, callback, icon_name=None):
         """
@@ -207,113 +482,599 @@ class EditorWindow(QMainWindow):
         Updates window title and undo/redo state.
         """
         self.update_title()
-        self.undo_action.setEnabled(self.editor.document().isUndoAvailable())
-        self.redo_action.setEnabled(self.editor.document().isRedoAvailable())
+        self.update_undo_redo_actions()
+
+    def update_undo_redo_actions(self):
+        """
+        Enable the undo/redo actions according to the current document.
+        """
+        document = self.editor.document() if self.editor else None
+        self.undo_action.setEnabled(bool(document and document.isUndoAvailable()))
+        self.redo_action.setEnabled(bool(document and document.isRedoAvailable()))
+
+    def on_editor_created(self, tab):
+        """
+        Connect a newly created tab editor to the window.
+        Editors are recreated when suspended tabs are restored, so the slots
+        always act on whichever editor is current.
+
+        Args:
+            tab: DocumentTab whose editor was created
+        """
+        tab.editor.cursorPositionChanged.connect(self.update_cursor_position)
+        tab.editor.highlighter.set_preprocessor(self.symbol_index.preprocessor, tab.file_path)
+        document = tab.editor.document()
+        document.modificationChanged.connect(self.documentWasModified)
+        document.undoAvailable.connect(self.update_undo_redo_actions)
+        document.redoAvailable.connect(self.update_undo_redo_actions)
+        if tab is self.tabs.current_tab():
+            self.update_outline()
+            self.diagnostics.set_editor(tab.editor, tab.file_path)
+
+    def on_viewer_created(self, tab):
+        """
+        Connect a newly created large file viewer to the status bar.
+
+        Args:
+            tab: DocumentTab whose viewer was created
+        """
+        tab.viewer.lineChanged.connect(self.update_cursor_position)
+        tab.viewer.indexingFinished.connect(self.update_cursor_position)
+
+    def on_current_document_changed(self, tab):
+        """
+        Point the window's widgets at the newly focused tab.
+
+        Args:
+            tab: DocumentTab that became current, or None if no tabs remain
+        """
+        if self.search_widget is not None:
+            self.search_widget.editor = (tab.editor or tab.viewer) if tab else None
+        self.update_title()
+        self.update_file_info()
+        self.update_cursor_position()
+        self.update_undo_redo_actions()
+        self.update_outline()
+        self.diagnostics.set_editor(tab.editor if tab else None, tab.file_path if tab else None)
+        if tab is not None and tab.file_path:
+            self.check_disk_change(tab)  # Changes deferred while the tab was in the background
+
+    def update_outline(self):
+        """
+        Show the current editor's outline, if the outline dock is visible.
+        """
+        if self.outline_dock.isVisible():
+            self.outline_view.set_editor(self.editor)
+        elif self.outline_view.editor is not self.editor:
+            self.outline_view.set_editor(None)  # Do not keep a suspended editor alive
+
+    def on_file_changed(self, path):
+        """
+        Handle a change to an open file made by another program.
+
+        Args:
+            path: Path of the changed file
+        """
+        tab = self.tabs.find_tab(path)
+        if tab is not None:
+            self.check_disk_change(tab)
+        self.symbol_index.update_file(path)
+        self.refresh_includers(path)
+
+    def refresh_includers(self, path):
+        """
+        Re-evaluate the `ifdef branches of open documents that include a
+        changed file.
+
+        Args:
+            path: Path of the saved or changed file
+        """
+        path = os.path.abspath(path)
+        for tab in self.tabs.all_tabs():
+            if tab.editor is not None and path in tab.editor.highlighter.included:
+                tab.editor.highlighter.schedule_preprocess()
+
+    def check_disk_change(self, tab):
+        """
+        Reload a tab if its file differs from the version last loaded or saved.
+        The file is read and diffed on a ReloadWorker thread. Unmodified
+        background tabs reload silently; tabs with local edits are only dealt
+        with once focused, since that needs a decision from the user.
+
+        Args:
+            tab: DocumentTab to check
+        """
+        if tab.pending_saves or tab.reload_worker is not None or not tab.file_path:
+            return  # Our own save, or a check already running
+        signature = file_signature(tab.file_path)
+        if signature is None or signature == tab.disk_signature:
+            return
+
+        if tab.viewer is not None:
+            tab.viewer.open_file(tab.file_path)  # Re-map and re-index the new content
+            tab.disk_signature = signature
+            self.statusBar().showMessage(f'Reloaded {tab.file_path}', 2000)
+            return
+        if tab.is_suspended() or (tab.is_modified() and tab is not self.tabs.current_tab()):
+            return  # Checked again when the tab is restored or focused
+
+        document = tab.editor.document()
+        worker = ReloadWorker(tab.file_path, tab.editor.toPlainText(), tab.saved_text,
+                              tab.editor.token_cache.edits, document.isModified(), self)
+        worker.finished.connect(lambda: self.on_reload_finished(tab, worker))
+        tab.reload_worker = worker
+        worker.start()
+
+    def on_reload_finished(self, tab, worker):
+        """
+        Apply the result of a ReloadWorker.
+        Only the changed line ranges are replaced, as one undoable edit, so the
+        cursor and scroll position survive. With local edits the user chooses
+        between merging, reloading and keeping the buffer.
+
+        Args:
+            tab: DocumentTab the worker was started for
+            worker: The finished ReloadWorker
+        """
+        tab.reload_worker = None
+        worker.deleteLater()
+        if self.tabs.indexOf(tab.page) < 0 or tab.editor is None:
+            return  # Closed or suspended meanwhile; restore() re-reads the file
+        if worker.error is not None:
+            self.statusBar().showMessage(f'Could not reload {tab.file_path}: {worker.error}', 5000)
+            return
+        document = tab.editor.document()
+        if tab.editor.token_cache.edits != worker.revision or document.isModified() != worker.merge:
+            self.check_disk_change(tab)  # Edited while the diff ran; start over
+            return
+
+        if not document.isModified():
+            apply_line_diff(tab.editor, worker.opcodes, worker.disk_lines)
+            document.setModified(False)
+            tab.adopt_disk_version(worker.disk_text, worker.signature)
+            self.statusBar().showMessage(f'Reloaded {tab.file_path}', 2000)
+            return
+
+        name = QFileInfo(tab.file_path).fileName()
+        message = QMessageBox(QMessageBox.Warning, "Matcha",
+                              f"{name} was changed on disk and has unsaved changes in the editor.",
+                              parent=self)
+        merge_button = None
+        if worker.merged_lines is not None:
+            merge_button = message.addButton("Merge", QMessageBox.AcceptRole)
+            if worker.conflicts:
+                message.setInformativeText(f"Merging leaves {worker.conflicts} conflict(s) "
+                                           f"marked with <<<<<<< and >>>>>>>.")
+        reload_button = message.addButton("Reload from Disk", QMessageBox.DestructiveRole)
+        message.addButton("Keep Mine", QMessageBox.RejectRole)
+        message.exec_()
+
+        if message.clickedButton() is merge_button:
+            apply_line_diff(tab.editor, worker.merge_opcodes, worker.merged_lines)
+            document.setModified(True)
+        elif message.clickedButton() is reload_button:
+            apply_line_diff(tab.editor, worker.opcodes, worker.disk_lines)
+            document.setModified(False)
+        # Keep Mine leaves the buffer alone; saving it overwrites the disk version
+        tab.adopt_disk_version(worker.disk_text, worker.signature)
 
     def new_file(self):
         """
-        Create a new empty file.
-        Prompts to save current file if modified.
+        Create a new empty file in its own tab.
         """
-        if self.maybe_save():
-            self.editor.clear()
-            self.current_file = None
-            self.editor.document().setModified(False)
-            self.editor.document().clearUndoRedoStacks()
-            self.update_title()
-            self.update_file_info()
+        tab = DocumentTab(self.tabs)
+        tab.load_text('', None)
+        self.tabs.add_tab(tab)
+        tab.editor.setFocus()
 
     def open_file(self):
         """
         Open an existing file via file dialog.
-        Prompts to save current file if modified.
         """
-        if self.maybe_save():
-            options = QFileDialog.Options()
-            fileName, _ = QFileDialog.getOpenFileName(
-                self, "Open Verilog File", "",
-                "Verilog Files (*.v *.sv);;All Files (*)", options=options)
-            if fileName:
-                self.load_file(fileName)
+        options = QFileDialog.Options()
+        fileName, _ = QFileDialog.getOpenFileName(
+            self, "Open Verilog File", "",
+            "Verilog Files (*.v *.sv);;All Files (*)", options=options)
+        if fileName:
+            self.load_file(fileName)
+
+    def open_folder(self, path=None):
+        """
+        Make a directory the project root shown in the project explorer.
+
+        Args:
+            path: Directory to open. If None, shows a directory dialog.
+        """
+        if not path:
+            path = QFileDialog.getExistingDirectory(self, "Open Project Folder",
+                                                    self.project_explorer.root_path or "")
+        if path:
+            self.project_explorer.set_root_path(path)
+            self.project_dock.show()
+
+    def quick_open(self):
+        """
+        Show the fuzzy "Go to File" dialog for the project.
+        """
+        if self.quick_open_dialog is None:
+            self.quick_open_dialog = QuickOpenDialog(self.path_index, self)
+        self.quick_open_dialog.show_dialog()
+
+    def compare_files(self):
+        """
+        Compare two files chosen in a file dialog side by side. With one
+        file chosen, it is compared with the current document.
+        """
+        fileNames, _ = QFileDialog.getOpenFileNames(
+            self, "Compare Files", os.path.dirname(self.current_file or ''),
+            "Verilog Files (*.v *.sv);;All Files (*)")
+        if len(fileNames) == 2:
+            self.show_comparison((compare_title(fileNames[0]), fileNames[0], None),
+                                 (compare_title(fileNames[1]), fileNames[1], None))
+        elif len(fileNames) == 1 and self.editor is not None:
+            self.show_comparison((compare_title(fileNames[0]), fileNames[0], None),
+                                 (compare_title(self.current_file), self.current_file, self.editor.toPlainText()))
+        elif fileNames:
+            self.statusBar().showMessage('Choose two files to compare', 2000)
+
+    def compare_with_saved(self):
+        """
+        Compare the current document with its file on disk.
+        """
+        if self.editor is None or not self.current_file:
+            self.statusBar().showMessage('No saved file to compare with', 2000)
+            return
+        self.show_comparison((compare_title(self.current_file, ' (on disk)'), self.current_file, None),
+                             (compare_title(self.current_file, ' (buffer)'), None, self.editor.toPlainText()))
+
+    def show_comparison(self, left, right):
+        """
+        Open a side-by-side comparison window.
+
+        Args:
+            left: (title, file path, text or None to read the file) of the old version
+            right: (title, file path, text or None to read the file) of the new version
+        """
+        view = DiffView(self.config, self)
+        view.compare(left, right)
+        view.show()
+
+    def history_for(self, path):
+        """
+        Get the local history that keeps the saved versions of a file: the
+        project's for files inside the project, otherwise one in the file's
+        directory.
+
+        Args:
+            path: File path
+
+        Returns:
+            LocalHistory: The history, or None if local history is disabled
+        """
+        if not self.config.file.get('local_history', True):
+            return None
+        path = os.path.abspath(path)
+        root = self.project_explorer.root_path
+        if not root or os.path.commonpath([path, os.path.abspath(root)]) != os.path.abspath(root):
+            root = os.path.dirname(path)
+        root = os.path.abspath(root)
+        if root not in self.histories:
+            self.histories[root] = LocalHistory(root, self.config.file.get('history_max_versions', 50),
+                                                self.config.file.get('history_max_age', 30))
+        return self.histories[root]
+
+    def record_history(self, path, text):
+        """
+        Add a saved version to the local history on the history thread.
+
+        Args:
+            path: Path of the saved file
+            text: Text that was saved
+        """
+        history = self.history_for(path)
+        if history is None:
+            return
+        if self.history_worker is None:
+            self.history_worker = HistoryWorker(self)
+            self.history_worker.failed.connect(
+                lambda path, error: self.statusBar().showMessage(
+                    f'Saved {path}, but not to the local history: {error}', 5000))
+            self.history_worker.start()
+        self.history_worker.request(history, path, text)
+
+    def show_local_history(self):
+        """
+        Show the saved versions of the current file.
+        """
+        history = self.history_for(self.current_file) if self.current_file and self.editor is not None else None
+        if history is None or not history.versions(self.current_file):
+            self.statusBar().showMessage('No saved versions of this document', 2000)
+            return
+        HistoryDialog(history, self.current_file, self).show()
+
+    def compare_version(self, path, title, text):
+        """
+        Compare a saved version of a file with its document.
+
+        Args:
+            path: File path
+            title: Title of the version
+            text: Text of the version
+        """
+        tab = self.tabs.find_tab(path)
+        if tab is None or tab.editor is None:
+            self.statusBar().showMessage(f'{compare_title(path)} is not open', 2000)
+            return
+        self.show_comparison((title, path, text), (compare_title(path, ' (buffer)'), path, tab.editor.toPlainText()))
+
+    def restore_version(self, path, text):
+        """
+        Replace a document with a saved version, as one undoable edit.
+        Only the lines that differ are replaced.
+
+        Args:
+            path: File path
+            text: Text of the version
+        """
+        tab = self.tabs.find_tab(path)
+        if tab is None or tab.editor is None:
+            self.statusBar().showMessage(f'{compare_title(path)} is not open', 2000)
+            return
+        lines = text.split('\n')
+        apply_line_diff(tab.editor, diff_lines(tab.editor.toPlainText().split('\n'), lines), lines)
+        self.tabs.setCurrentWidget(tab.page)
+        self.statusBar().showMessage(f'Restored a saved version of {path}', 2000)
+
+    def on_index_progress(self, done, total):
+        """
+        Show symbol indexing progress in the status bar.
+
+        Args:
+            done: Files checked so far
+            total: Files found in the project
+        """
+        if done < total:
+            self.statusBar().showMessage(f'Indexing symbols... {done}/{total}')
+        else:
+            self.statusBar().showMessage(f'Indexed {total} files', 2000)
+
+    def pristine_tab(self):
+        """
+        Return the current tab if it is an untouched, empty, untitled document.
+        Such a tab is replaced when a file is opened.
+
+        Returns:
+            DocumentTab or None
+        """
+        tab = self.tabs.current_tab()
+        if (tab is not None and tab.editor is not None and not tab.file_path
+                and not tab.is_modified() and tab.editor.document().isEmpty()):
+            return tab
+        return None
 
     def load_file(self, fileName):
         """
-        Load content from specified file into editor.
+        Load content from specified file into a new tab.
+        Focuses the existing tab if the file is already open.
+        Files at or above the configured size threshold open in the read-only viewer.
 
         Args:
             fileName: Path to file to load
         """
+        existing = self.tabs.find_tab(fileName)
+        if existing is not None:
+            self.tabs.setCurrentWidget(existing.page)
+            return
+
         try:
-            with open(fileName, 'r') as f:
-                self.editor.setPlainText(f.read())
-            self.current_file = fileName
-            self.editor.document().setModified(False)
-            self.editor.document().clearUndoRedoStacks()
-            self.update_title()
-            self.update_file_info()
+            pristine = self.pristine_tab()
+            tab = DocumentTab(self.tabs, fileName)
+            if os.path.getsize(fileName) >= self.config.file.get('large_file_threshold', float('inf')):
+                self.open_in_viewer(tab, fileName)
+            else:
+                with open(fileName, 'r') as f:
+                    tab.load_text(f.read(), fileName)
+
+            self.tabs.add_tab(tab)
+            self.file_watcher.watch(fileName)
+            if pristine is not None:
+                self.tabs.remove_tab(pristine)
+            (tab.editor or tab.viewer).setFocus()
+
             self.statusBar().showMessage(f'Loaded {fileName}', 2000)
             self.add_to_recent_files(fileName)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not load file: {str(e)}")
 
-    def save_file(self):
+    def open_in_viewer(self, tab, fileName):
+        """
+        Show a large file in a tab's memory-mapped read-only viewer.
+
+        Args:
+            tab: DocumentTab that will hold the viewer
+            fileName: Path to file to view
+        """
+        tab.open_viewer(fileName)
+        self.statusBar().showMessage(f'Opened {fileName} read-only (large file)', 2000)
+
+    def is_viewer_active(self):
+        """
+        Check whether the current tab shows the read-only large file viewer.
+
+        Returns:
+            bool: True if the current tab holds a viewer
+        """
+        return self.viewer is not None
+
+    def close_tab(self, index):
+        """
+        Close a tab, prompting to save unsaved changes first.
+        A new empty document is created when the last tab closes.
+
+        Args:
+            index: Index of the tab to close
+
+        Returns:
+            bool: True if the tab was closed
+        """
+        tab = self.tabs.tab_at(index)
+        if tab is None or not self.maybe_save(tab):
+            return False
+        for worker in list(tab.pending_saves):
+            worker.wait()
+            self.on_save_finished(worker)
+        if tab.reload_worker is not None:
+            tab.reload_worker.wait()
+        if tab.file_path:
+            self.file_watcher.unwatch(tab.file_path)
+        self.tabs.remove_tab(tab)
+        if self.tabs.count() == 0:
+            self.new_file()
+        return True
+
+    def save_file(self, wait=False):
         """
         Save the current file.
         If file has no name, prompts for save location.
 
+        Args:
+            wait: Block until the background write has finished
+
         Returns:
-            bool: True if save was successful, False otherwise
+            bool: True if the save was started (or, with wait, succeeded)
         """
         if self.current_file:
-            return self.save_file_as(self.current_file)
-        return self.save_file_as()
+            return self.save_file_as(self.current_file, wait)
+        return self.save_file_as(wait=wait)
 
-    def save_file_as(self, fileName=None):
+    def save_file_as(self, fileName=None, wait=False):
         """
         Save the current file with a new name.
+        Takes a snapshot of the text and hands it to a SaveWorker, which writes
+        a temporary file, optionally fsyncs it and renames it over the target.
+        The modified flag is cleared only once the rename has succeeded.
 
         Args:
             fileName: Optional path to save to. If None, shows save dialog.
+            wait: Block until the background write has finished
 
         Returns:
-            bool: True if save was successful, False otherwise
+            bool: True if the save was started (or, with wait, succeeded)
         """
+        if self.is_viewer_active():
+            self.statusBar().showMessage('Large files are opened read-only and cannot be saved', 2000)
+            return False
+        tab = self.tabs.current_tab()
         if not fileName:
             options = QFileDialog.Options()
             fileName, _ = QFileDialog.getSaveFileName(
                 self, "Save Verilog File", "",
                 "Verilog Files (*.v *.sv);;All Files (*)", options=options)
-        if fileName:
-            try:
-                with open(fileName, 'w') as f:
-                    f.write(self.editor.toPlainText())
-                self.current_file = fileName
-                self.editor.document().setModified(False)
-                self.update_title()
-                self.update_file_info()
-                self.statusBar().showMessage(f'Saved {fileName}', 2000)
-                self.add_to_recent_files(fileName)
-                return True
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Could not save file: {str(e)}")
-        return False
-
-    def maybe_save(self):
-        """
-        Check if current file needs saving and prompt user if needed.
+        if not fileName:
+            return False
+
+        # Saves to the same file are serialized so renames land in order
+        for worker in list(self.pending_saves):
+            if worker.path == fileName:
+                worker.wait()
+                self.on_save_finished(worker)
+
+        backup_directory = None
+        if self.config.file.get('backup_enabled'):
+            backup_directory = self.config.file.get('backup_directory', '.backup')
+
+        worker = SaveWorker(fileName, tab.editor.toPlainText(), tab.editor.token_cache.edits,
+                            self.config.file.get('fsync_on_save', True), backup_directory, self)
+        worker.tab = tab  # Tab the snapshot was taken from
+        worker.source_file = tab.file_path  # File name at snapshot time
+        worker.journal_mark = tab.journal.mark()  # Edits after this are not in the snapshot
+        worker.finished.connect(lambda: self.on_save_finished(worker))
+        self.pending_saves.append(worker)
+        tab.pending_saves.append(worker)
+        self.statusBar().showMessage(f'Saving {fileName}...')
+        worker.start()
+
+        if wait:
+            worker.wait()
+            return self.on_save_finished(worker)
+        return True
+
+    def on_save_finished(self, worker):
+        """
+        Apply the result of a background save.
+        Called from the worker's finished signal, or directly after waiting on it.
+
+        Args:
+            worker: The SaveWorker that finished
+
+        Returns:
+            bool: True if the file was written successfully
+        """
+        if worker not in self.pending_saves:
+            return worker.error is None  # Already handled
+        self.pending_saves.remove(worker)
+        tab = worker.tab
+        tab.pending_saves.remove(worker)
+
+        if worker.error is not None:
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "Error", f"Could not save file: {worker.error}")
+            return False
+
+        # Only adopt the new name if the tab still shows the same file
+        if tab.file_path == worker.source_file:
+            if worker.source_file and worker.source_file != worker.path:
+                self.file_watcher.unwatch(worker.source_file)
+            tab.file_path = worker.path
+        if tab.file_path == worker.path:
+            tab.saved_text = worker.text  # New merge base for external changes
+            tab.disk_signature = worker.signature
+            self.file_watcher.watch(worker.path)
+        self.record_history(worker.path, worker.text)
+        worker.text = None
+        # Edits made while the save was running keep the document modified
+        if tab.editor is not None and tab.editor.token_cache.edits == worker.revision:
+            tab.editor.document().setModified(False)
+        # The journal only needs the edits made after the snapshot
+        if tab.file_path == worker.path and tab.journal is not None:
+            tab.journal.checkpoint(worker.path, worker.journal_mark)
+
+        self.tabs.update_tab_title(tab)
+        self.update_title()
+        self.update_file_info()
+        self.statusBar().showMessage(f'Saved {worker.path}', 2000)
+        self.add_to_recent_files(worker.path)
+        self.symbol_index.update_file(worker.path)
+        self.refresh_includers(worker.path)
+        if tab.editor is not None:
+            tab.editor.highlighter.set_preprocessor(self.symbol_index.preprocessor, tab.file_path)
+        if tab is self.tabs.current_tab():
+            self.diagnostics.set_editor(tab.editor, tab.file_path)  # Save As changes the file name
+        return True
+
+    def maybe_save(self, tab=None):
+        """
+        Check if a tab's file needs saving and prompt user if needed.
+
+        Args:
+            tab: DocumentTab to check, defaults to the current tab
 
         Returns:
             bool: True if operation can proceed, False if cancelled
         """
-        if not self.editor.document().isModified():
+        tab = tab or self.tabs.current_tab()
+        if tab is None or not tab.is_modified():
             return True
 
+        # Show the document being asked about (restores it if suspended)
+        self.tabs.setCurrentWidget(tab.page)
+        name = QFileInfo(tab.file_path).fileName() if tab.file_path else "Untitled"
         ret = QMessageBox.warning(self, "Matcha",
-                                  "The document has been modified.\nDo you want to save your changes?",
+                                  f"{name} has been modified.\nDo you want to save your changes?",
                                   QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel)
 
         if ret == QMessageBox.Save:
-            return self.save_file()
+            return self.save_file(wait=True)
         elif ret == QMessageBox.Cancel:
             return False
         return True
@@ -328,7 +1089,8 @@ class EditorWindow(QMainWindow):
             title += QFileInfo(self.current_file).fileName()
         else:
             title += "Untitled"
-        if self.editor.document().isModified():
+        tab = self.tabs.current_tab()
+        if tab is not None and tab.is_modified():
             title += "*"
         self.setWindowTitle(title)
 
@@ -348,6 +1110,13 @@ class EditorWindow(QMainWindow):
         Update cursor position display in status bar.
         Shows current line and column numbers (1-based).
         """
+        if self.is_viewer_active():
+            total = 'indexing...' if self.viewer.indexing else self.viewer.line_count()
+            self.cursor_position_label.setText(
+                f"Line: {self.viewer.current_line + 1} of {total} (read-only)")
+            return
+        if self.editor is None:
+            return
         cursor = self.editor.textCursor()
         line = cursor.blockNumber() + 1
         column = cursor.columnNumber() + 1
@@ -357,13 +1126,292 @@ class EditorWindow(QMainWindow):
         """
         Show the search/replace dock widget and focus search input.
         """
+        self.search_widget.set_structural(False)
         self.search_dock.show()
         self.search_widget.focusSearchInput()
 
+    def show_structural_search(self):
+        """
+        Show the search dock in structural mode and focus the query input.
+        """
+        self.search_widget.set_structural(True)
+        self.search_dock.show()
+        self.search_widget.focusSearchInput()
+
+    def run_structural_search(self, text):
+        """
+        Start a structural search of the project; results stream into the
+        Search Results dock.
+
+        Args:
+            text: Query text
+        """
+        try:
+            query = parse_query(text)
+        except ValueError as e:
+            self.search_widget.set_status(str(e), "#F48771")
+            return
+        documents = self.modified_texts()
+        if self.editor is not None and self.current_file is None:
+            documents[None] = self.editor.toPlainText()  # Untitled document
+        self.search_results_panel.clear_locations()
+        self.search_results_title = f'Search Results: {" ".join(text.split())}'
+        self.search_results_dock.setWindowTitle(self.search_results_title)
+        self.search_results_dock.show()
+        self.search_results_dock.raise_()
+        self.search_widget.set_status("Searching...")
+        self.structural_search.search(query, documents)
+
+    def on_structural_search_progress(self, done, total):
+        """
+        Show structural search progress.
+
+        Args:
+            done: Files searched so far
+            total: Files to search
+        """
+        self.search_widget.set_status(f"Searching... {done}/{total} files")
+
+    def on_structural_search_finished(self, count, truncated):
+        """
+        Show the result count of a finished structural search.
+
+        Args:
+            count: Matches found
+            truncated: The search stopped at the result limit
+        """
+        limit = ' (result limit reached)' if truncated else ''
+        if count:
+            self.search_widget.set_status(f"{count} match(es){limit}", "#89D185")
+        else:
+            scanning = ' (project index still building)' if self.symbol_index.scanning else ''
+            self.search_widget.set_status(f"No matches found{scanning}", "#F48771")
+        self.search_results_dock.setWindowTitle(f'{self.search_results_title} ({count})')
+
+    def goto_line(self):
+        """
+        Prompt for a line number and move the cursor there.
+        Works for both the editor and the large file viewer.
+        """
+        if self.is_viewer_active():
+            maximum = self.viewer.line_count()
+            current = self.viewer.current_line + 1
+        else:
+            maximum = self.editor.blockCount()
+            current = self.editor.textCursor().blockNumber() + 1
+
+        line, ok = QInputDialog.getInt(self, "Go to Line", f"Line number (1 - {maximum}):",
+                                       current, 1, maximum)
+        if not ok:
+            return
+
+        if self.is_viewer_active():
+            self.viewer.goto_line(line)
+        else:
+            block = self.editor.document().findBlockByNumber(line - 1)
+            cursor = self.editor.textCursor()
+            cursor.setPosition(block.position())
+            self.editor.setTextCursor(cursor)
+            self.editor.centerCursor()
+        (self.viewer or self.editor).setFocus()
+
+    def goto_change(self, forward):
+        """
+        Move to the next or previous change from the saved file.
+
+        Args:
+            forward: Go down rather than up
+        """
+        if self.editor is None:
+            return
+        if not self.editor.gotoChange(forward):
+            self.statusBar().showMessage('No changes from the saved file', 2000)
+
+    def revert_change(self):
+        """
+        Restore the saved lines of the change at the cursor.
+        """
+        if self.editor is None:
+            return
+        if not self.editor.revertChange():
+            self.statusBar().showMessage('No change at the cursor', 2000)
+
+    def modified_texts(self):
+        """
+        Collect the text of open documents with unsaved changes, which the
+        symbol index does not know yet.
+
+        Returns:
+            dict: File path -> document text
+        """
+        return {tab.file_path: tab.editor.toPlainText() for tab in self.tabs.all_tabs()
+                if tab.editor is not None and tab.file_path and tab.is_modified()}
+
+    def go_to_definition(self):
+        """
+        Jump to the declaration of the name under the cursor.
+        Several candidates are listed in the References dock instead.
+        """
+        if self.editor is None:
+            return
+        name, found = self.navigator.definitions(self.current_file, self.editor.toPlainText(),
+                                                 self.editor.textCursor().position())
+        if name is None:
+            self.statusBar().showMessage('No symbol under the cursor', 2000)
+        elif not found:
+            scanning = ' (project index still building)' if self.symbol_index.scanning else ''
+            self.statusBar().showMessage(f'No definition found for {name}{scanning}', 3000)
+        elif len(found) == 1:
+            path, symbol = found[0]
+            self.open_location(path, symbol.line, symbol.column)
+        else:
+            locations = [(path, symbol.line, symbol.column) for path, symbol in found]
+            self.show_locations(f'Definitions of {name}', locations)
+
+    def find_references(self):
+        """
+        List every use of the name under the cursor in the References dock.
+        """
+        if self.editor is None:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            name, locations = self.navigator.references(self.current_file, self.editor.toPlainText(),
+                                                        self.editor.textCursor().position(),
+                                                        self.modified_texts())
+        finally:
+            QApplication.restoreOverrideCursor()
+        if name is None:
+            self.statusBar().showMessage('No symbol under the cursor', 2000)
+            return
+        self.show_locations(f'References to {name}', locations)
+
+    def rename_symbol(self):
+        """
+        Rename the name under the cursor everywhere it is referenced.
+        Files that are not open are changed on a RenameWorker thread in one
+        transaction; open documents are edited afterwards, one undo step each,
+        and left unsaved.
+        """
+        if self.editor is None or self.rename_worker is not None:
+            return
+        # Suspended tabs with unsaved edits must be searched and edited in memory
+        for tab in self.tabs.all_tabs():
+            if tab.is_suspended() and tab.is_modified():
+                tab.restore()
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            name, locations = self.navigator.references(self.current_file, self.editor.toPlainText(),
+                                                        self.editor.textCursor().position(),
+                                                        self.modified_texts())
+        finally:
+            QApplication.restoreOverrideCursor()
+        if name is None:
+            self.statusBar().showMessage('No symbol under the cursor', 2000)
+            return
+
+        files = {}
+        for path, line, column in locations:
+            files.setdefault(path, []).append((line, column))
+        new_name, ok = QInputDialog.getText(
+            self, "Rename Symbol",
+            f"Rename '{name}' ({len(locations)} occurrences in {len(files)} files) to:", text=name)
+        new_name = new_name.strip()
+        if not ok or new_name == name:
+            return
+        if not is_valid_name(new_name):
+            QMessageBox.warning(self, "Rename Symbol", f"'{new_name}' is not a valid identifier.")
+            return
+
+        # Open documents are edited in place; everything else on disk
+        documents = {}
+        for path in list(files):
+            tab = self.tabs.current_tab() if path == self.current_file else self.tabs.find_tab(path)
+            if tab is not None and tab.editor is not None:
+                documents[tab] = files.pop(path)
+        self.rename_worker = RenameWorker(files, name, new_name, self.config.file.get('fsync_on_save', True), self)
+        self.rename_worker.finished.connect(lambda: self.on_rename_finished(documents))
+        if files:
+            self.statusBar().showMessage(f'Renaming {name} in {len(files)} files...')
+        self.rename_worker.start()
+
+    def on_rename_finished(self, documents):
+        """
+        Finish a rename once the closed files were written.
+
+        Args:
+            documents: Dict of DocumentTab -> occurrences in its open document
+        """
+        worker = self.rename_worker
+        self.rename_worker = None
+        if worker.error is not None:
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "Rename Symbol", f"Rename failed, no files were changed: {worker.error}")
+            return
+        count = worker.count
+        changed = len(worker.written)
+        for tab, positions in documents.items():
+            if tab.editor is None:
+                continue  # Suspended meanwhile; its file was not changed
+            replaced = rename_in_document(tab.editor.document(), positions, worker.old_name, worker.new_name)
+            count += replaced
+            changed += bool(replaced)
+        for path in worker.written:
+            self.symbol_index.update_file(path)
+        skipped = worker.skipped + sum(len(positions) for positions in documents.values()) - (count - worker.count)
+        note = f' ({skipped} stale occurrences skipped)' if skipped else ''
+        self.statusBar().showMessage(f'Renamed {worker.old_name} to {worker.new_name}: '
+                                     f'{count} occurrences in {changed} files{note}', 5000)
+
+    def show_locations(self, title, locations):
+        """
+        Show a list of locations in the References dock.
+
+        Args:
+            title: Dock title
+            locations: List of (path, line, column)
+        """
+        open_texts = self.modified_texts()
+        if self.editor is not None:
+            open_texts[self.current_file] = self.editor.toPlainText()
+        self.references_panel.show_locations(self.navigator.with_previews(locations, open_texts),
+                                             self.project_explorer.root_path)
+        self.references_dock.setWindowTitle(f'{title} ({len(locations)})')
+        self.references_dock.show()
+        self.references_dock.raise_()
+
+    def open_location(self, path, line, column):
+        """
+        Open a file and put the cursor on a line and column.
+
+        Args:
+            path: File path, or None for the current document
+            line: 0-based line
+            column: 0-based column
+        """
+        if path and path != self.current_file:
+            self.load_file(path)
+            if self.current_file is None or os.path.abspath(self.current_file) != os.path.abspath(path):
+                return  # Could not be opened
+        if self.is_viewer_active():
+            self.viewer.goto_line(line + 1)
+            self.viewer.setFocus()
+            return
+        block = self.editor.document().findBlockByNumber(line)
+        if not block.isValid():
+            return
+        cursor = self.editor.textCursor()
+        cursor.setPosition(block.position() + min(column, block.length() - 1))
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.editor.setFocus()
+
     def format_code(self):
         """
         Format the current Verilog code using configured formatter.
         """
+        if self.editor is None:
+            return
         try:
             cursor = self.editor.textCursor()
             cursor.beginEditBlock()  # Group formatting as single undo operation
@@ -411,15 +1459,113 @@ class EditorWindow(QMainWindow):
         if state:
             self.restoreState(state)
 
+    def restore_session(self):
+        """
+        Reopen the files of the previous session.
+        Every file gets a placeholder tab immediately, but only the focused one
+        is read before the window is first painted. A few neighbouring tabs are
+        preloaded during idle time; the rest load when they are focused.
+        """
+        settings = QSettings('Matcha', 'Session')
+        try:
+            session = json.loads(settings.value('session', '{}'))
+        except (TypeError, ValueError):
+            return
+        if os.path.isdir(session.get('root') or '') and not self.config.project.get('root'):
+            self.project_explorer.set_root_path(session['root'])
+        entries = [entry for entry in session.get('files', []) if os.path.isfile(entry.get('path', ''))]
+        if not entries:
+            return
+
+        pristine = self.pristine_tab()
+
+        # Placeholders are added silently so that no tab loads until one is focused
+        self.tabs.blockSignals(True)
+        first_index = self.tabs.count()
+        for entry in entries:
+            tab = DocumentTab(self.tabs, entry['path'])
+            tab.make_placeholder(entry.get('cursor', (0, 0)), entry.get('scroll', (0, 0)))
+            self.tabs.add_tab(tab, focus=False)
+            self.file_watcher.watch(entry['path'])
+        current = first_index + min(max(0, session.get('current', 0)), len(entries) - 1)
+        self.tabs.setCurrentIndex(current)
+        self.tabs.blockSignals(False)
+
+        if pristine is not None:
+            self.tabs.remove_tab(pristine)
+        self.tabs.on_current_changed(self.tabs.currentIndex())  # Load the focused file now
+
+        # Warm up the tabs next to the focused one while the UI is idle
+        current = self.tabs.currentIndex()
+        order = sorted(range(self.tabs.count()), key=lambda index: abs(index - current))
+        self.preload_queue = [self.tabs.tab_at(index) for index in order
+                              if index != current][:self.config.file.get('session_preload', 5)]
+        QTimer.singleShot(0, self.preload_next_tab)
+
+    def preload_next_tab(self):
+        """
+        Load one queued session tab, then yield back to the event loop.
+        """
+        while self.preload_queue:
+            tab = self.preload_queue.pop(0)
+            if tab.is_suspended() and self.tabs.indexOf(tab.page) >= 0:
+                tab.restore()
+                break
+        if self.preload_queue:
+            QTimer.singleShot(0, self.preload_next_tab)
+
+    def save_session(self):
+        """
+        Remember open files with their cursor and scroll positions, and the project root.
+        Untitled documents are not part of the session.
+        """
+        files = []
+        current = 0
+        for tab in self.tabs.all_tabs():
+            if not tab.file_path:
+                continue
+            if tab is self.tabs.current_tab():
+                current = len(files)
+            cursor, scroll = tab.view_state()
+            files.append({'path': tab.file_path, 'cursor': list(cursor), 'scroll': list(scroll)})
+
+        settings = QSettings('Matcha', 'Session')
+        settings.setValue('session', json.dumps({'files': files, 'current': current,
+                                                 'root': self.project_explorer.root_path}))
+
     def closeEvent(self, event):
         """
         Handle application close event.
-        Prompts to save unsaved changes and saves window state.
+        Prompts to save unsaved changes in every tab and saves window state.
 
         Args:
             event: QCloseEvent to accept or ignore based on user action
         """
-        if self.maybe_save():
+        if all(self.maybe_save(tab) for tab in self.tabs.all_tabs()):
+            if self.rename_worker is not None:
+                self.rename_worker.wait()  # Never leave a rename half-committed
+            # Let background saves finish before the application exits
+            for worker in list(self.pending_saves):
+                worker.wait()
+                self.on_save_finished(worker)
+            self.save_session()
+            # Clean shutdown: nothing to recover
+            for tab in self.tabs.all_tabs():
+                if tab.reload_worker is not None:
+                    tab.reload_worker.wait()
+                if tab.journal is not None:
+                    tab.journal.end()
+            self.project_explorer.shutdown()
+            self.path_index.shutdown()
+            self.module_hierarchy.shutdown()
+            self.diagnostics.shutdown()
+            self.structural_search.shutdown()
+            stop_shared_worker()
+            stop_diff_worker()
+            if self.history_worker is not None:
+                self.history_worker.stop()
+            self.symbol_index.shutdown()
+
             # Save window state and geometry for next session
             settings = QSettings('Matcha', 'EditorWindow')
             settings.setValue('geometry', self.saveGeometry())
@@ -0,0 +1,188 @@
+# file_saver.py
+import os
+import queue
+import shutil
+import tempfile
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# Read once at import: os.umask() can only be read by setting it, which
+# would race with the save threads
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def backup_path_for(path, backup_directory):
+    """
+    Compute where the backup copy of a file is stored.
+    Relative backup directories are resolved against the file's own directory.
+
+    Args:
+        path: Path of the file being saved
+        backup_directory: Backup directory from the file configuration
+
+    Returns:
+        str: Path of the backup file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    backup_dir = os.path.join(directory, backup_directory)
+    return os.path.join(backup_dir, os.path.basename(path) + '.bak')
+
+
+def write_atomic(path, text, fsync=False, backup_directory=None):
+    """
+    Write text to a file without ever leaving it half-written.
+    The text goes to a temporary file in the same directory, which is then
+    renamed over the target. Readers see either the old or the new content.
+    A symlink is followed, so the file it points to is replaced, and a new
+    file gets the permissions open() would have given it.
+
+    Args:
+        path: Destination file path
+        text: Full text to write
+        fsync: Flush the data (and the rename) to disk before returning
+        backup_directory: If given, keep the previous version of the file there
+
+    Raises:
+        OSError: If the file cannot be written; the target is left untouched
+    """
+    path = os.path.realpath(path)  # Replace the file a symlink points to, not the link
+    directory = os.path.dirname(path)
+    exists = os.path.exists(path)
+
+    # Keep the previous version. The old inode survives the rename below, so a
+    # hard link is enough and avoids copying large files.
+    if backup_directory and exists:
+        backup = backup_path_for(path, backup_directory)
+        os.makedirs(os.path.dirname(backup), exist_ok=True)
+        if os.path.exists(backup):
+            os.remove(backup)
+        try:
+            os.link(path, backup)
+        except OSError:
+            shutil.copy2(path, backup)  # Filesystems without hard links
+
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        if exists:
+            shutil.copymode(path, temp_path)  # Preserve permissions of the original
+        else:
+            os.chmod(temp_path, 0o666 & ~UMASK)  # mkstemp() creates the file owner-only
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # Make the rename itself durable (POSIX only; directories can't be opened on Windows)
+    if fsync and hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class SaveWorker(QThread):
+    """
+    Background thread that writes a snapshot of a document to disk atomically.
+    The GUI thread only takes the text snapshot; encoding, writing, fsync and
+    the final rename all happen here so large saves never freeze the UI.
+    """
+
+    saved = pyqtSignal(str)  # Emitted with the path once the rename succeeded
+    failed = pyqtSignal(str, str)  # Emitted with the path and error message
+
+    def __init__(self, path, text, revision, fsync=False, backup_directory=None, parent=None):
+        """
+        Initialize the save worker.
+
+        Args:
+            path: Destination file path
+            text: Snapshot of the document text
+            revision: TokenCache.edits of the document when the snapshot was taken
+            fsync: Flush data to disk before renaming
+            backup_directory: Directory for the previous version, or None
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.path = path
+        self.text = text
+        self.revision = revision
+        self.fsync = fsync
+        self.backup_directory = backup_directory
+        self.error = None  # Error message if the save failed
+        self.signature = None  # (size, mtime_ns) of the written file
+
+    def run(self):
+        """
+        Write the snapshot and report the outcome.
+        """
+        try:
+            write_atomic(self.path, self.text, self.fsync, self.backup_directory)
+            stat = os.stat(self.path)
+            self.signature = (stat.st_size, stat.st_mtime_ns)
+        except Exception as e:
+            self.error = str(e)
+            self.failed.emit(self.path, self.error)
+        else:
+            # The snapshot is kept: it becomes the base for merging external changes
+            self.saved.emit(self.path)
+
+
+class HistoryWorker(QThread):
+    """
+    Background thread that adds saved versions to the local history, one
+    at a time in the order the saves finished. It is separate from the
+    SaveWorker threads, which the GUI thread may wait on, so a slow history
+    store never holds up a save.
+    """
+
+    failed = pyqtSignal(str, str)  # Emitted with the path and error message
+
+    def __init__(self, parent=None):
+        """
+        Initialize the worker; call start() to run it.
+
+        Args:
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.requests = queue.Queue()
+
+    def request(self, history, path, text):
+        """
+        Queue a saved version.
+
+        Args:
+            history: LocalHistory to record into
+            path: Path of the saved file
+            text: Text that was saved
+        """
+        self.requests.put((history, path, text))
+
+    def stop(self):
+        """
+        Record the queued versions, then stop the thread and wait for it.
+        """
+        self.requests.put(None)
+        self.wait()
+
+    def run(self):
+        """
+        Serve requests until stopped.
+        """
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            history, path, text = request
+            try:
+                history.record(path, text)
+            except (OSError, ValueError) as e:
+                self.failed.emit(path, str(e))  # The file itself was saved
@@ -0,0 +1,210 @@
+# file_watcher.py
+import os
+
+from PyQt5.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+from line_diff import diff_lines, merge3
+
+
+def file_signature(path):
+    """
+    Return the (size, mtime) pair used to tell whether a file changed on disk.
+
+    Args:
+        path: File path
+
+    Returns:
+        tuple or None: (size, mtime_ns), or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FileWatcher(QObject):
+    """
+    Watches open files for changes made by other programs.
+    Wraps QFileSystemWatcher, coalesces bursts of notifications (tools often
+    write a file in several steps) and re-arms the watch when a file is
+    replaced by rename, which QFileSystemWatcher would otherwise drop.
+    """
+
+    fileChanged = pyqtSignal(str)  # Emitted with the path once a change has settled
+
+    SETTLE_DELAY = 300  # Milliseconds without further notifications before reporting
+
+    def __init__(self, parent=None):
+        """
+        Initialize the watcher.
+
+        Args:
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.paths = set()  # Paths the caller asked to watch
+        self.pending = set()  # Paths changed since the last report
+
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.timeout.connect(self.report_changes)
+
+    def watch(self, path):
+        """
+        Start watching a file, or re-arm the watch after the file was replaced.
+        Watches follow the inode, so after a rename over the path (an atomic
+        save, possibly keeping the old inode alive as a backup hard link) the
+        old watch would report nothing further.
+
+        Args:
+            path: File path
+        """
+        path = os.path.abspath(path)
+        self.paths.add(path)
+        if path in self.watcher.files():
+            self.watcher.removePath(path)
+        if os.path.exists(path):
+            self.watcher.addPath(path)
+
+    def unwatch(self, path):
+        """
+        Stop watching a file.
+
+        Args:
+            path: File path
+        """
+        path = os.path.abspath(path)
+        self.paths.discard(path)
+        self.pending.discard(path)
+        if path in self.watcher.files():
+            self.watcher.removePath(path)
+
+    def on_file_changed(self, path):
+        """
+        Record a raw change notification and restart the settle timer.
+
+        Args:
+            path: Path reported by QFileSystemWatcher
+        """
+        if path in self.paths:
+            self.pending.add(path)
+            self.settle_timer.start(self.SETTLE_DELAY)
+
+    def report_changes(self):
+        """
+        Report settled changes and re-arm watches dropped by rename or delete.
+        """
+        for path in sorted(self.pending):
+            if path not in self.paths:
+                continue
+            if os.path.exists(path):
+                self.watch(path)
+                self.fileChanged.emit(path)
+            else:
+                # Replaced in several steps; try again once the new file appears
+                QTimer.singleShot(self.SETTLE_DELAY, lambda p=path: self.on_file_changed(p))
+        self.pending.clear()
+
+
+class ReloadWorker(QThread):
+    """
+    Background thread that reads a changed file and diffs it against the buffer.
+    When the buffer has local edits, a three-way merge against the last saved
+    text is computed as well, so the GUI thread only applies the result.
+    """
+
+    def __init__(self, path, buffer_text, saved_text, revision, merge=False, parent=None):
+        """
+        Initialize the reload worker.
+
+        Args:
+            path: Path of the changed file
+            buffer_text: Snapshot of the editor text
+            saved_text: Text of the file as last loaded or saved (merge base)
+            revision: TokenCache.edits of the document when the snapshot was taken
+            merge: Also compute a three-way merge of buffer and disk
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.path = path
+        self.buffer_text = buffer_text
+        self.saved_text = saved_text
+        self.revision = revision
+        self.merge = merge
+        self.disk_text = None
+        self.signature = None
+        self.opcodes = None  # Buffer -> disk line diff
+        self.disk_lines = None
+        self.merged_lines = None  # Result of the three-way merge
+        self.merge_opcodes = None  # Buffer -> merged line diff
+        self.conflicts = 0
+        self.error = None
+
+    def run(self):
+        """
+        Read the file and compute the diffs.
+        """
+        try:
+            self.signature = file_signature(self.path)
+            with open(self.path, 'r') as f:
+                self.disk_text = f.read()
+        except OSError as e:
+            self.error = str(e)
+            return
+
+        buffer_lines = self.buffer_text.split('\n')
+        self.disk_lines = self.disk_text.split('\n')
+        self.opcodes = diff_lines(buffer_lines, self.disk_lines)
+
+        if self.merge and self.saved_text is not None:
+            self.merged_lines, self.conflicts = merge3(self.saved_text.split('\n'), buffer_lines, self.disk_lines)
+            self.merge_opcodes = diff_lines(buffer_lines, self.merged_lines)
+        self.buffer_text = None  # Release the snapshot
+
+
+def apply_line_diff(editor, opcodes, new_lines):
+    """
+    Apply line diff opcodes to an editor as a single undoable edit.
+    Only the changed line ranges are touched, so the cursor, scroll position
+    and the highlighting of untouched blocks are kept.
+
+    Args:
+        editor: QPlainTextEdit whose document holds the old lines
+        opcodes: Non-equal opcodes (tag, i1, i2, j1, j2) from diff_lines
+        new_lines: Lines the opcodes were computed against
+    """
+    document = editor.document()
+    vertical = editor.verticalScrollBar().value()
+    horizontal = editor.horizontalScrollBar().value()
+
+    cursor = QTextCursor(document)
+    cursor.beginEditBlock()
+    # Work backwards so earlier line numbers stay valid
+    for _, i1, i2, j1, j2 in reversed(opcodes):
+        line_count = document.blockCount()
+        replacement = new_lines[j1:j2]
+        if i2 < line_count:
+            # Replace whole lines [i1, i2), each followed by its newline
+            cursor.setPosition(document.findBlockByNumber(i1).position())
+            cursor.setPosition(document.findBlockByNumber(i2).position(), QTextCursor.KeepAnchor)
+            cursor.insertText(''.join(line + '\n' for line in replacement))
+        elif i1 < line_count:
+            # Range runs to the end of the document (no trailing newline)
+            if replacement or i1 == 0:
+                cursor.setPosition(document.findBlockByNumber(i1).position())
+            else:
+                previous = document.findBlockByNumber(i1 - 1)
+                cursor.setPosition(previous.position() + previous.length() - 1)
+            cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+            cursor.insertText('\n'.join(replacement))
+        else:
+            # Append after the last line
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(''.join('\n' + line for line in replacement))
+    cursor.endEditBlock()
+
+    editor.verticalScrollBar().setValue(vertical)
+    editor.horizontalScrollBar().setValue(horizontal)
@@ -0,0 +1,107 @@
+# history_dialog.py
+import time
+
+from PyQt5.QtWidgets import QDialog, QHBoxLayout, QLabel, QListWidget, QListWidgetItem, QPushButton, QVBoxLayout
+from PyQt5.QtCore import Qt
+from diff_view import compare_title
+
+
+class HistoryDialog(QDialog):
+    """
+    Lists the versions of a file kept in the local history, newest first,
+    to compare one with the document or restore it into the editor.
+    """
+
+    def __init__(self, history, path, parent=None):
+        """
+        Initialize the dialog.
+
+        Args:
+            history: LocalHistory holding the file's versions
+            path: File path
+            parent: Parent widget that shows and restores versions. Must
+                   implement compare_version(path, title, text) and restore_version(path, text).
+        """
+        super().__init__(parent)
+        self.history = history
+        self.path = path
+        self.setWindowTitle(f"Local History of {compare_title(path)}")
+        self.resize(500, 400)
+        self.initUI()
+        self.update_versions()
+
+    def initUI(self):
+        """
+        Create the version list and the buttons.
+        """
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+
+        self.version_list = QListWidget()
+        self.version_list.itemActivated.connect(lambda item: self.compare_version())
+        layout.addWidget(self.version_list)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        buttons = QHBoxLayout()
+        compare_button = QPushButton("Compare with Current")
+        compare_button.clicked.connect(self.compare_version)
+        restore_button = QPushButton("Restore")
+        restore_button.clicked.connect(self.restore_version)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.reject)
+        buttons.addWidget(compare_button)
+        buttons.addWidget(restore_button)
+        buttons.addStretch(1)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+
+    def update_versions(self):
+        """
+        Fill the list with the file's versions.
+        """
+        self.version_list.clear()
+        versions = self.history.versions(self.path)
+        for version in versions:
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(version.time))
+            item = QListWidgetItem(f"{stamp}    {version.size:,} characters")
+            item.setData(Qt.UserRole, version.id)
+            self.version_list.addItem(item)
+        if versions:
+            self.version_list.setCurrentRow(0)
+        self.status_label.setText(f"{len(versions)} saved version(s)")
+
+    def selected_text(self):
+        """
+        Read the selected version from the history.
+
+        Returns:
+            tuple: (title, text) of the version, or None if nothing could be read
+        """
+        item = self.version_list.currentItem()
+        if item is None:
+            return None
+        try:
+            text = self.history.restore(self.path, item.data(Qt.UserRole))
+        except (OSError, ValueError) as e:
+            self.status_label.setText(f"Could not read the version: {e}")
+            return None
+        return compare_title(self.path, f" ({item.text().split('    ')[0]})"), text
+
+    def compare_version(self):
+        """
+        Compare the selected version with the document side by side.
+        """
+        selected = self.selected_text()
+        if selected is not None:
+            self.parent().compare_version(self.path, *selected)
+
+    def restore_version(self):
+        """
+        Put the selected version into the editor and close the dialog.
+        """
+        selected = self.selected_text()
+        if selected is not None:
+            self.accept()
+            self.parent().restore_version(self.path, selected[1])
@@ -0,0 +1,778 @@
+# large_file_viewer.py
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import accumulate
+
+from PyQt5.QtWidgets import QAbstractScrollArea
+from PyQt5.QtGui import QPainter, QColor, QFont, QFontMetrics, QTextDocument
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from verilog_highlighter import VerilogHighlighter
+
+
+class LineIndexer(QThread):
+    """
+    Background thread that builds the line-offset index of a memory-mapped file.
+    The index is an array of byte offsets where each line starts. It is filled
+    chunk by chunk so the viewer can display the first lines while the rest
+    of the file is still being scanned.
+    """
+
+    progress = pyqtSignal(int)  # Number of lines indexed so far
+    done = pyqtSignal(int)  # Total number of lines once indexing completes
+
+    CHUNK_SIZE = 16 * 1024 * 1024  # Bytes scanned per step
+
+    def __init__(self, data, offsets, parent=None):
+        """
+        Initialize the indexer.
+
+        Args:
+            data: mmap object of the file being indexed
+            offsets: array to fill with line start offsets (must contain 0)
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.data = data
+        self.offsets = offsets
+        self._cancelled = False
+
+    def cancel(self):
+        """
+        Request the indexer to stop after the current chunk.
+        """
+        self._cancelled = True
+
+    def run(self):
+        """
+        Scan the file for newlines and append the start offset of every line.
+        Splitting and accumulating happen in C, so each chunk costs one pass
+        over its bytes rather than one Python iteration per line.
+        """
+        size = len(self.data)
+        position = 0
+        while position < size and not self._cancelled:
+            chunk = self.data[position:position + self.CHUNK_SIZE]
+            pieces = chunk.split(b'\n')
+            # Offsets just past each newline in this chunk
+            starts = accumulate(map((1).__add__, map(len, pieces[:-1])), initial=position)
+            next(starts)  # Skip the chunk start itself
+            self.offsets.extend(starts)
+            position += len(chunk)
+            self.progress.emit(len(self.offsets))
+
+        # A trailing newline does not start another visible line
+        if size and self.offsets[-1] == size and len(self.offsets) > 1:
+            self.offsets.pop()
+        self.done.emit(len(self.offsets))
+
+
+def find_in_windows(data, needle, start, end, cancelled):
+    """
+    Find bytes in a memory map a window at a time. A single find() over a
+    multi-GB map would hold the GIL, and with it the GUI thread, until done.
+
+    Args:
+        data: mmap or bytes to search
+        needle: Bytes to find
+        start: Offset to search from
+        end: Offset the needle must end by
+        cancelled: Callable returning True to give up
+
+    Returns:
+        int: Offset of the needle, or -1 if it is not found
+    """
+    while start < end and not cancelled():
+        stop = min(end, start + LineIndexer.CHUNK_SIZE)
+        index = data.find(needle, start, stop)
+        if index >= 0:
+            return index
+        if stop == end:
+            break
+        start = stop - len(needle) + 1  # A needle cut by the window edge is found in the next window
+    return -1
+
+
+class CommentScanner(QThread):
+    """
+    Background thread that finds where /* */ comments spanning lines begin
+    and end in a memory-mapped file, so the viewer can paint from any line
+    with the right comment state. The bounds are sorted byte offsets where
+    the state flips: a line starts inside a comment if an odd number of
+    them lie before it.
+
+    Only the text before each /* on its line is tokenized, to tell a
+    comment from a /* inside a line comment or string, so the scan costs
+    little more than a find() over the file.
+    """
+
+    TOKEN = re.compile(rb'//|"')
+    STRING = re.compile(rb'"(?:[^"\\\n]|\\.)*"?')
+
+    def __init__(self, data, flips, parent=None):
+        """
+        Initialize the scanner.
+
+        Args:
+            data: mmap object of the file being scanned
+            flips: array to fill with the offsets where the comment state flips
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.data = data
+        self.flips = flips
+        self.scanned = 0  # Offset up to which flips is complete
+        self._cancelled = False
+
+    def cancel(self):
+        """
+        Request the scanner to stop after the current step.
+        """
+        self._cancelled = True
+
+    def cancelled(self):
+        """
+        Check whether the scanner was asked to stop.
+
+        Returns:
+            bool: True once cancel() was called
+        """
+        return self._cancelled
+
+    def next_opener(self, position):
+        """
+        Find the next /*, a window at a time, advancing scanned past the
+        windows without one.
+
+        Args:
+            position: Offset in code to search from
+
+        Returns:
+            int: Offset of the /*, or -1
+        """
+        data = self.data
+        size = len(data)
+        while position < size and not self._cancelled:
+            stop = min(size, position + LineIndexer.CHUNK_SIZE)
+            index = data.find(b'/*', position, stop)
+            if index >= 0:
+                return index
+            if stop == size:
+                break
+            position = stop - 1  # A /* cut by the window edge is found in the next window
+            self.scanned = position
+        return -1
+
+    def run(self):
+        """
+        Step from one /* to the next, skipping the ones in line comments and strings.
+        """
+        data = self.data
+        size = len(data)
+        position = 0  # Offset in code, outside any comment or string
+        while not self._cancelled:
+            opener = self.next_opener(position)
+            if opener < 0:
+                break
+            # Tokenize the line up to the /*, from where code is known to start
+            index = max(position, data.rfind(b'\n', position, opener) + 1)
+            resume = None
+            while resume is None:
+                match = self.TOKEN.search(data, index, opener)
+                if match is None:
+                    break
+                if match.group() == b'//':
+                    end = find_in_windows(data, b'\n', opener, size, self.cancelled)
+                    resume = end if end >= 0 else size
+                else:
+                    index = self.STRING.match(data, match.start()).end()
+                    if index > opener:
+                        resume = index  # The /* is inside the string
+            if resume is None:
+                # Most comments close within a window, so try that before searching on
+                end = data.find(b'*/', opener + 2, min(size, opener + LineIndexer.CHUNK_SIZE))
+                if end < 0:
+                    end = find_in_windows(data, b'*/', opener + 2, size, self.cancelled)
+                resume = size if end < 0 else end + 2  # Unterminated: a comment up to the end
+                if resume - opener <= LineIndexer.CHUNK_SIZE:
+                    multiline = data.find(b'\n', opener, resume) >= 0
+                else:
+                    multiline = find_in_windows(data, b'\n', opener, resume, self.cancelled) >= 0
+                if multiline:
+                    self.flips.append(opener)
+                    self.flips.append(resume)
+            position = resume
+            self.scanned = position
+        if not self._cancelled:
+            self.scanned = size
+
+
+class SearchWorker(QThread):
+    """
+    Background thread that searches a memory-mapped file for a pattern,
+    wrapping around at either end. The file is searched a window at a time,
+    so only the bytes scanned are paged in and a newer search can cancel
+    this one between windows.
+    """
+
+    def __init__(self, data, pattern, length, origin, backward=False, parent=None):
+        """
+        Initialize the search.
+
+        Args:
+            data: mmap object of the file
+            pattern: Compiled bytes regular expression
+            length: Length of a match in bytes
+            origin: Offset to search from
+            backward: Search towards the start of the file
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.data = data
+        self.pattern = pattern
+        self.length = length
+        self.origin = origin
+        self.backward = backward
+        self.result = None  # (offset, length) of the match found, or None
+        self._cancelled = False
+
+    def cancel(self):
+        """
+        Request the search to stop after the current window.
+        """
+        self._cancelled = True
+
+    def run(self):
+        """
+        Search from the origin, then wrap around.
+        """
+        size = len(self.data)
+        if self.backward:
+            self.result = self.search_backward(self.origin) or self.search_backward(size)
+        else:
+            self.result = self.search_forward(self.origin, size) or self.search_forward(0, self.origin)
+
+    def search_forward(self, start, end):
+        """
+        Find the first match that starts in a range.
+
+        Args:
+            start: First offset a match may start at
+            end: Offset matches must start before
+
+        Returns:
+            tuple or None: (offset, length) of the match, if any
+        """
+        size = len(self.data)
+        while start < end and not self._cancelled:
+            stop = min(end, start + LineIndexer.CHUNK_SIZE)
+            # Past the window by a match and a byte, so \b sees what follows a match
+            match = self.pattern.search(self.data, start, min(size, stop + self.length + 1))
+            if match is not None and match.start() < stop:
+                return match.start(), match.end() - match.start()
+            start = stop
+        return None
+
+    def search_backward(self, end):
+        """
+        Find the last match that starts before an offset.
+        Scans fixed-size windows backwards so large files are not read whole.
+
+        Args:
+            end: Offset to search before
+
+        Returns:
+            tuple or None: (offset, length) of the match, if any
+        """
+        window = LineIndexer.CHUNK_SIZE
+        stop = end
+        while stop > 0 and not self._cancelled:
+            start = max(0, stop - window)
+            last = None
+            for match in self.pattern.finditer(self.data, start, min(len(self.data), stop + self.length + 1)):
+                if match.start() >= stop:
+                    break
+                last = match
+            if last is not None:
+                return last.start(), last.end() - last.start()
+            stop = start
+        return None
+
+
+class LargeFileViewer(QAbstractScrollArea):
+    """
+    Read-only viewer for files too large to load into a QTextDocument.
+    The file is memory-mapped and only the lines inside the viewport are
+    decoded, highlighted and painted, so memory use stays roughly constant
+    regardless of file size. Supports scrolling, go-to-line and search.
+    Line offsets, comment bounds and searches are worked out on background
+    threads.
+    """
+
+    lineChanged = pyqtSignal(int)  # Emitted with the 0-based current line
+    indexingFinished = pyqtSignal(int)  # Emitted with the total line count
+
+    CACHE_LINES = 512  # Number of highlighted lines kept for smooth scrolling
+    MAX_COLUMNS = 4096  # Characters decoded per line (netlists can be very wide)
+
+    def __init__(self, parent=None, config=None):
+        """
+        Initialize the viewer.
+
+        Args:
+            parent: Parent widget
+            config: Configuration object containing theme and font settings
+        """
+        super().__init__(parent)
+        self.config = config
+        self.file_path = None
+        self._file = None
+        self.data = None  # mmap of the open file
+        self.offsets = array('Q', [0])  # Line start offsets
+        self.indexer = None
+        self.indexing = False
+        self.comment_flips = array('Q')  # Offsets where the /* */ state flips, see CommentScanner
+        self.comment_scanner = None
+        self.searcher = None  # SearchWorker of the search in progress
+        self.current_line = 0  # Line holding the (line-granular) cursor
+        self.match = None  # (offset, length) of the last search match
+        self.line_cache = OrderedDict()  # line number -> (text, runs, ends in comment)
+
+        # Reuse the editor's highlighting rules without attaching to a document
+        self.highlighter = VerilogHighlighter(None, config)
+
+        self.setup_viewer()
+
+    def setup_viewer(self):
+        """
+        Configure fonts, colors and scroll bars to match the editor.
+        """
+        font = QFont(self.config.editor['font_family'], self.config.editor['font_size'])
+        font.setFixedPitch(True)
+        self.setFont(font)
+        self.viewport().setFont(font)
+
+        metrics = QFontMetrics(font)
+        self.line_height = metrics.height()
+        self.char_width = metrics.horizontalAdvance(' ')
+        self.tab_size = self.config.editor.get('tab_size', 4)
+
+        self.background = QColor(self.config.theme['background'])
+        self.foreground = QColor(self.config.theme['foreground'])
+        self.current_line_color = QColor(self.config.theme.get('current_line', '#282828'))
+        self.match_color = QColor(self.config.theme.get('find_match_active', '#613214'))
+        self.line_number_color = QColor(self.config.theme.get('line_numbers', '#858585'))
+
+        self.verticalScrollBar().setSingleStep(1)
+        self.horizontalScrollBar().setSingleStep(1)
+        self.horizontalScrollBar().setRange(0, 0)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+        self.setFocusPolicy(Qt.StrongFocus)
+
+    def open_file(self, path):
+        """
+        Memory-map a file and start indexing its lines in the background.
+
+        Args:
+            path: Path of the file to view
+        """
+        self.close_file()
+        self.file_path = path
+        self._file = open(path, 'rb')
+        if os.path.getsize(path) > 0:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b''
+
+        # 32-bit offsets are enough for files under 4 GB and halve index size
+        self.offsets = array('I' if len(self.data) < 2 ** 32 else 'Q', [0])
+        self.current_line = 0
+        self.match = None
+        self.line_cache.clear()
+
+        self.indexing = True
+        self.indexer = LineIndexer(self.data, self.offsets, self)
+        self.indexer.progress.connect(self.update_line_count)
+        self.indexer.done.connect(self.on_indexing_done)
+        self.indexer.start()
+
+        self.comment_flips = array('Q')
+        self.comment_scanner = CommentScanner(self.data, self.comment_flips, self)
+        self.comment_scanner.finished.connect(self.viewport().update)  # Repaint with the comment state
+        self.comment_scanner.start()
+
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.lineChanged.emit(0)
+
+    def close_file(self):
+        """
+        Stop indexing, scanning and searching, and release the memory map of
+        the current file.
+        """
+        for worker in (self.indexer, self.comment_scanner, self.searcher):
+            if worker is not None:
+                worker.cancel()
+                worker.wait()
+        self.indexer = None
+        self.comment_scanner = None
+        self.searcher = None
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        if self._file is not None:
+            self._file.close()
+        self.data = None
+        self._file = None
+        self.file_path = None
+        self.offsets = array('Q', [0])
+        self.comment_flips = array('Q')
+        self.line_cache.clear()
+
+    def isReadOnly(self):
+        """
+        Report the viewer as read-only, matching QPlainTextEdit's API.
+
+        Returns:
+            bool: Always True
+        """
+        return True
+
+    def line_count(self):
+        """
+        Return the number of lines indexed so far.
+
+        Returns:
+            int: Number of known lines
+        """
+        return len(self.offsets)
+
+    def update_line_count(self, count):
+        """
+        Grow the scroll range as the indexer discovers more lines.
+
+        Args:
+            count: Number of lines indexed so far
+        """
+        self.verticalScrollBar().setRange(0, max(0, count - 1))
+        self.verticalScrollBar().setPageStep(self.visible_line_count())
+        self.viewport().update()
+
+    def on_indexing_done(self, count):
+        """
+        Finalize the scroll range once the whole file has been indexed.
+
+        Args:
+            count: Total number of lines
+        """
+        self.indexing = False
+        self.update_line_count(count)
+        self.indexingFinished.emit(count)
+
+    def visible_line_count(self):
+        """
+        Return the number of lines that fit in the viewport.
+
+        Returns:
+            int: Number of fully or partially visible lines
+        """
+        return max(1, self.viewport().height() // self.line_height + 1)
+
+    def line_text(self, line):
+        """
+        Decode a single line from the memory map.
+
+        Args:
+            line: 0-based line number
+
+        Returns:
+            str: Line text with tabs expanded and line ending removed
+        """
+        start = self.offsets[line]
+        end = self.offsets[line + 1] if line + 1 < len(self.offsets) else len(self.data)
+        end = min(end, start + self.MAX_COLUMNS)
+        text = self.data[start:end].decode('utf-8', errors='replace')
+        return text.rstrip('\r\n').expandtabs(self.tab_size)
+
+    def starts_in_comment(self, line):
+        """
+        Check whether a line starts inside a /* */ comment.
+
+        Args:
+            line: 0-based line number
+
+        Returns:
+            bool: True if it does; False also while the scanner has not got there
+        """
+        offset = self.offsets[line]
+        if self.comment_scanner is None or offset > self.comment_scanner.scanned:
+            return False
+        return bisect_left(self.comment_flips, offset) % 2 == 1  # Flips before the line only
+
+    def highlighted_line(self, line, in_comment):
+        """
+        Return a line's text and highlight runs, using a small LRU cache.
+
+        Args:
+            line: 0-based line number
+            in_comment: True if the previous visible line ended inside a comment
+
+        Returns:
+            tuple: (text, list of (start, length, format) runs, ends in comment)
+        """
+        cached = self.line_cache.get(line)
+        if cached is not None and cached[3] == in_comment:
+            self.line_cache.move_to_end(line)
+            return cached[:3]
+
+        text = self.line_text(line)
+        runs, ends_in_comment = self.highlighter.line_format_ranges(text, in_comment)
+        self.line_cache[line] = (text, runs, ends_in_comment, in_comment)
+        if len(self.line_cache) > self.CACHE_LINES:
+            self.line_cache.popitem(last=False)
+        return text, runs, ends_in_comment
+
+    def paintEvent(self, event):
+        """
+        Paint only the lines that intersect the viewport.
+        The first visible line's comment state comes from the comment bounds
+        found so far; multi-line comments are tracked from there onward.
+
+        Args:
+            event: Paint event for the viewport
+        """
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), self.background)
+        if self.data is None:
+            return
+
+        first = self.verticalScrollBar().value()
+        last = min(self.line_count(), first + self.visible_line_count())
+        column = self.horizontalScrollBar().value()
+        gutter = self.gutter_width()
+        width = self.viewport().width()
+        ascent = painter.fontMetrics().ascent()
+
+        in_comment = self.starts_in_comment(first)
+        longest = 0
+        for row, line in enumerate(range(first, last)):
+            top = row * self.line_height
+            if line == self.current_line:
+                painter.fillRect(0, top, width, self.line_height, self.current_line_color)
+
+            text, runs, in_comment = self.highlighted_line(line, in_comment)
+            longest = max(longest, len(text))
+
+            # Highlight the active search match
+            if self.match and self.line_for_offset(self.match[0]) == line:
+                match_column = self.match_column(line)
+                x = gutter + (match_column - column) * self.char_width
+                painter.fillRect(x, top, self.match[1] * self.char_width, self.line_height, self.match_color)
+
+            # Line number
+            painter.setPen(self.line_number_color)
+            painter.drawText(0, top, gutter - self.char_width, self.line_height,
+                             Qt.AlignRight, str(line + 1))
+
+            # Text runs: highlighted runs in their color, gaps in the default color
+            baseline = top + ascent
+            position = column
+            for start, length, fmt in runs + [(len(text), 0, None)]:
+                end = start + length
+                if end <= position and fmt is not None:
+                    continue
+                if start > position:
+                    painter.setPen(self.foreground)
+                    painter.drawText(gutter + (position - column) * self.char_width, baseline,
+                                     text[position:start])
+                    position = start
+                if fmt is not None:
+                    painter.setPen(fmt.foreground().color())
+                    painter.drawText(gutter + (position - column) * self.char_width, baseline,
+                                     text[position:end])
+                    position = end
+
+        # Let the horizontal range follow the widest line seen on screen
+        hbar = self.horizontalScrollBar()
+        visible_columns = max(1, (width - gutter) // self.char_width)
+        if longest - visible_columns > hbar.maximum():
+            hbar.setRange(0, longest - visible_columns)
+
+    def match_column(self, line):
+        """
+        Return the display column of the current search match on its line.
+        Decodes the bytes before the match so tabs and multi-byte characters
+        are accounted for.
+
+        Args:
+            line: 0-based line holding the match
+
+        Returns:
+            int: Column of the match start
+        """
+        prefix = self.data[self.offsets[line]:self.match[0]].decode('utf-8', errors='replace')
+        return len(prefix.expandtabs(self.tab_size))
+
+    def gutter_width(self):
+        """
+        Return the width reserved for line numbers.
+
+        Returns:
+            int: Width in pixels
+        """
+        return (len(str(self.line_count())) + 2) * self.char_width
+
+    def resizeEvent(self, event):
+        """
+        Keep the page step in sync with the viewport height.
+        """
+        super().resizeEvent(event)
+        self.verticalScrollBar().setPageStep(self.visible_line_count())
+
+    def mousePressEvent(self, event):
+        """
+        Move the current line to the clicked line.
+        """
+        line = self.verticalScrollBar().value() + event.pos().y() // self.line_height
+        if line < self.line_count():
+            self.set_current_line(line)
+
+    def keyPressEvent(self, event):
+        """
+        Handle navigation keys. All editing keys are ignored (read-only).
+
+        Args:
+            event: Key event to handle
+        """
+        page = self.visible_line_count() - 1
+        moves = {
+            Qt.Key_Up: -1,
+            Qt.Key_Down: 1,
+            Qt.Key_PageUp: -page,
+            Qt.Key_PageDown: page,
+        }
+        if event.key() in moves:
+            self.set_current_line(self.current_line + moves[event.key()])
+        elif event.key() == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+            self.set_current_line(0)
+        elif event.key() == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+            self.set_current_line(self.line_count() - 1)
+        else:
+            super().keyPressEvent(event)
+
+    def set_current_line(self, line):
+        """
+        Move the current line and scroll it into view.
+
+        Args:
+            line: 0-based line number
+        """
+        line = max(0, min(line, self.line_count() - 1))
+        self.current_line = line
+        self.ensure_line_visible(line)
+        self.viewport().update()
+        self.lineChanged.emit(line)
+
+    def ensure_line_visible(self, line):
+        """
+        Scroll vertically so the given line is inside the viewport.
+
+        Args:
+            line: 0-based line number
+        """
+        bar = self.verticalScrollBar()
+        visible = self.visible_line_count() - 1
+        if line < bar.value():
+            bar.setValue(line)
+        elif line >= bar.value() + visible:
+            bar.setValue(line - visible + 1)
+
+    def goto_line(self, line):
+        """
+        Jump to a line, centering it in the viewport.
+
+        Args:
+            line: 1-based line number as entered by the user
+        """
+        line = max(0, min(line - 1, self.line_count() - 1))
+        self.verticalScrollBar().setValue(max(0, line - self.visible_line_count() // 2))
+        self.set_current_line(line)
+
+    def line_for_offset(self, offset):
+        """
+        Map a byte offset to its line number using the offset index.
+
+        Args:
+            offset: Byte offset into the file
+
+        Returns:
+            int: 0-based line number
+        """
+        return bisect_right(self.offsets, offset) - 1
+
+    def find(self, text, flags=QTextDocument.FindFlags(), callback=None):
+        """
+        Search the file for text on a SearchWorker, wrapping around at either
+        end, and select the match when it is found. A search still running
+        is cancelled.
+
+        Args:
+            text: Text to search for
+            flags: QTextDocument.FindFlags (backward, case sensitive, whole words)
+            callback: Called with True if a match was found, False if not,
+                      once the search has finished
+
+        Returns:
+            bool: True if a search was started
+        """
+        if not text or self.data is None or not len(self.data):
+            return False
+
+        encoded = text.encode('utf-8')
+        needle = re.escape(encoded)
+        if flags & QTextDocument.FindWholeWords:
+            needle = rb'\b' + needle + rb'\b'
+        pattern = re.compile(needle, 0 if flags & QTextDocument.FindCaseSensitively else re.IGNORECASE)
+
+        # Continue from the previous match, or from the current line
+        backward = bool(flags & QTextDocument.FindBackward)
+        if self.match:
+            origin = self.match[0] if backward else self.match[0] + self.match[1]
+        else:
+            origin = self.offsets[self.current_line]
+
+        if self.searcher is not None:
+            self.searcher.cancel()  # Superseded; its result is ignored
+        worker = SearchWorker(self.data, pattern, len(encoded), origin, backward, self)
+        worker.finished.connect(lambda: self.on_search_finished(worker, callback))
+        self.searcher = worker
+        worker.start()
+        return True
+
+    def on_search_finished(self, worker, callback):
+        """
+        Select the match of a finished search.
+
+        Args:
+            worker: The finished SearchWorker
+            callback: Callback passed to find(), or None
+        """
+        worker.deleteLater()
+        if worker is not self.searcher:
+            return  # Superseded, or the file was closed
+        self.searcher = None
+        if worker.result is not None:
+            self.match = worker.result
+            self.goto_line(self.line_for_offset(worker.result[0]) + 1)
+        if callback is not None:
+            callback(worker.result is not None)
+
+    def closeEvent(self, event):
+        """
+        Release the memory map when the viewer is closed.
+        """
+        self.close_file()
+        super().closeEvent(event)
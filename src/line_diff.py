@@ -0,0 +1,368 @@
+# line_diff.py
+from itertools import compress
+
+DIFF_COST_LIMIT = 128  # Edit distance after which a diff settles for a good split instead of the best
+
+
+def run_forward(a, b, i, j, limit):
+    """
+    Count the equal items of two sequences going forward from a position.
+    Runs are compared in slices of doubling length, so a long run of equal
+    lines costs a few list comparisons rather than a loop over each line.
+
+    Args:
+        a: First sequence
+        b: Second sequence
+        i: Start in a
+        j: Start in b
+        limit: Most items to count
+
+    Returns:
+        int: Length of the run of a[i + k] == b[j + k]
+    """
+    if limit <= 0 or a[i] != b[j]:
+        return 0
+    known, step = 1, 16
+    while known < limit:
+        end = min(limit, known + step)
+        if a[i + known:i + end] == b[j + known:j + end]:
+            known = end
+            step *= 2
+            continue
+        # The first difference lies in [known, end): narrow it down
+        while end - known > 32:
+            middle = (known + end) // 2
+            if a[i + known:i + middle] == b[j + known:j + middle]:
+                known = middle
+            else:
+                end = middle
+        while a[i + known] == b[j + known]:
+            known += 1
+        return known
+    return known
+
+
+def run_backward(a, b, i, j, limit):
+    """
+    Count the equal items of two sequences going backward from a position.
+
+    Args:
+        a: First sequence
+        b: Second sequence
+        i: End in a, exclusive
+        j: End in b, exclusive
+        limit: Most items to count
+
+    Returns:
+        int: Length of the run of a[i - 1 - k] == b[j - 1 - k]
+    """
+    if limit <= 0 or a[i - 1] != b[j - 1]:
+        return 0
+    known, step = 1, 16
+    while known < limit:
+        end = min(limit, known + step)
+        if a[i - end:i - known] == b[j - end:j - known]:
+            known = end
+            step *= 2
+            continue
+        while end - known > 32:
+            middle = (known + end) // 2
+            if a[i - middle:i - known] == b[j - middle:j - known]:
+                known = middle
+            else:
+                end = middle
+        while a[i - 1 - known] == b[j - 1 - known]:
+            known += 1
+        return known
+    return known
+
+
+def middle_snake(a, b, a_low, a_high, b_low, b_high):
+    """
+    Find where a shortest edit script of two ranges crosses its middle,
+    searching forward from the start and backward from the end at once
+    (Myers' linear-space algorithm). Only the furthest point reached on
+    each diagonal is kept. After DIFF_COST_LIMIT steps the search gives up
+    on the shortest script and returns the point that got furthest.
+    Both ranges must be non-empty and differ in their first and last items.
+
+    Args:
+        a: First sequence
+        b: Second sequence
+        a_low: Start of the range in a
+        a_high: End of the range in a
+        b_low: Start of the range in b
+        b_high: End of the range in b
+
+    Returns:
+        tuple: (x, y) split point; the ranges before and after it are diffed separately
+    """
+    diagonal_min, diagonal_max = a_low - b_high, a_high - b_low
+    forward_middle, backward_middle = a_low - b_low, a_high - b_high
+    odd = (forward_middle - backward_middle) & 1
+    forward = {forward_middle: a_low}  # Diagonal x - y -> furthest x reached from the start
+    backward = {backward_middle: a_high}  # Diagonal -> smallest x reached from the end
+    forward_min = forward_max = forward_middle
+    backward_min = backward_max = backward_middle
+    cost = 0
+    while True:
+        cost += 1
+        # One more step from the start on every reachable diagonal
+        if forward_min > diagonal_min:
+            forward_min -= 1
+            forward[forward_min - 1] = -1
+        else:
+            forward_min += 1
+        if forward_max < diagonal_max:
+            forward_max += 1
+            forward[forward_max + 1] = -1
+        else:
+            forward_max -= 1
+        for diagonal in range(forward_max, forward_min - 1, -2):
+            low, high = forward.get(diagonal - 1, -1), forward.get(diagonal + 1, -1)
+            x = low + 1 if low >= high else high
+            y = x - diagonal
+            run = min(a_high - x, b_high - y)
+            if run > 0:
+                x += run_forward(a, b, x, y, run)
+            forward[diagonal] = x
+            if odd and backward_min <= diagonal <= backward_max and backward[diagonal] <= x:
+                return x, x - diagonal
+
+        # One more step from the end
+        if backward_min > diagonal_min:
+            backward_min -= 1
+            backward[backward_min - 1] = a_high + b_high
+        else:
+            backward_min += 1
+        if backward_max < diagonal_max:
+            backward_max += 1
+            backward[backward_max + 1] = a_high + b_high
+        else:
+            backward_max -= 1
+        for diagonal in range(backward_max, backward_min - 1, -2):
+            low = backward.get(diagonal - 1, a_high + b_high)
+            high = backward.get(diagonal + 1, a_high + b_high)
+            x = low if low < high else high - 1
+            y = x - diagonal
+            run = min(x - a_low, y - b_low)
+            if run > 0:
+                x -= run_backward(a, b, x, y, run)
+            backward[diagonal] = x
+            if not odd and forward_min <= diagonal <= forward_max and x <= forward[diagonal]:
+                return x, x - diagonal
+
+        if cost >= DIFF_COST_LIMIT:
+            # Too costly: split at the point either search got furthest to
+            best_forward, forward_x = -1, a_low
+            for diagonal in range(forward_max, forward_min - 1, -2):
+                x = min(forward[diagonal], a_high)
+                y = x - diagonal
+                if y > b_high:
+                    x, y = b_high + diagonal, b_high
+                if x + y > best_forward:
+                    best_forward, forward_x = x + y, x
+            best_backward, backward_x = a_high + b_high, a_high
+            for diagonal in range(backward_max, backward_min - 1, -2):
+                x = max(a_low, backward[diagonal])
+                y = x - diagonal
+                if y < b_low:
+                    x, y = b_low + diagonal, b_low
+                if x + y < best_backward:
+                    best_backward, backward_x = x + y, x
+            if (a_high + b_high) - best_backward < best_forward - (a_low + b_low):
+                return forward_x, best_forward - forward_x
+            return backward_x, best_backward - backward_x
+
+
+def matching_blocks(a, b):
+    """
+    Find the runs of items two sequences have in common along a shortest
+    (or, for very different sequences, a short) edit script, in linear
+    space. Ranges are split at their middle snake until one side is empty.
+
+    Args:
+        a: First sequence of hashable items
+        b: Second sequence
+
+    Returns:
+        list: (i, j, length) runs with a[i:i + length] == b[j:j + length], ascending
+    """
+    blocks = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        item = stack.pop()
+        if len(item) == 3:
+            blocks.append(item)  # Common suffix of a range whose middle is done
+            continue
+        a_low, a_high, b_low, b_high = item
+        prefix = run_forward(a, b, a_low, b_low, min(a_high - a_low, b_high - b_low))
+        if prefix:
+            blocks.append((a_low, b_low, prefix))
+            a_low += prefix
+            b_low += prefix
+        suffix = run_backward(a, b, a_high, b_high, min(a_high - a_low, b_high - b_low))
+        a_high -= suffix
+        b_high -= suffix
+        if suffix:
+            stack.append((a_high, b_high, suffix))
+        if a_low == a_high or b_low == b_high:
+            continue  # Only insertions or only deletions remain
+        x, y = middle_snake(a, b, a_low, a_high, b_low, b_high)
+        stack.append((x, a_high, y, b_high))
+        stack.append((a_low, x, b_low, y))
+    return blocks
+
+
+def diff_lines(a, b):
+    """
+    Compute a line diff between two lists of lines.
+    Common leading and trailing lines are stripped first, so files that differ
+    in a few places only diff the region between the first and last change.
+    The lines of that region are then replaced by integers, equal lines by
+    the same integer, and lines that occur on one side only are set aside
+    since they cannot match anything. What remains is diffed with Myers'
+    linear-space algorithm, whose time grows with the size times the number
+    of differences, so two large files with few differences diff quickly.
+
+    Args:
+        a: Old lines
+        b: New lines
+
+    Returns:
+        list: Opcodes (tag, i1, i2, j1, j2) as produced by difflib, excluding
+              'equal' ranges. Applying them turns a into b.
+    """
+    # Trim the common prefix and suffix
+    prefix = run_forward(a, b, 0, 0, min(len(a), len(b)))
+    suffix = run_backward(a, b, len(a), len(b), min(len(a), len(b)) - prefix)
+    a_end, b_end = len(a) - suffix, len(b) - suffix
+    if prefix == a_end and prefix == b_end:
+        return []
+
+    # Number the lines, equal lines by the same number, keeping those that
+    # occur on both sides; lines only in b get None
+    a_middle, b_middle = a[prefix:a_end], b[prefix:b_end]
+    numbers = dict(zip(a_middle, range(len(a_middle))))
+    a_numbers = list(map(numbers.__getitem__, a_middle))
+    b_numbers = list(map(numbers.get, b_middle))
+    in_a, in_b = set(a_numbers), set(b_numbers)
+    a_kept = list(compress(range(len(a_numbers)), map(in_b.__contains__, a_numbers)))
+    b_kept = list(compress(range(len(b_numbers)), map(in_a.__contains__, b_numbers)))
+
+    # Map the common runs of the kept lines back to line numbers
+    runs = []
+    for i, j, length in matching_blocks([a_numbers[index] for index in a_kept],
+                                        [b_numbers[index] for index in b_kept]):
+        if a_kept[i + length - 1] - a_kept[i] == length - 1 and b_kept[j + length - 1] - b_kept[j] == length - 1:
+            runs.append((a_kept[i], b_kept[j], length))  # No line set aside inside the run
+            continue
+        for offset in range(length):
+            x, y = a_kept[i + offset], b_kept[j + offset]
+            if runs and runs[-1][0] + runs[-1][2] == x and runs[-1][1] + runs[-1][2] == y:
+                runs[-1] = (runs[-1][0], runs[-1][1], runs[-1][2] + 1)
+            else:
+                runs.append((x, y, 1))
+
+    opcodes = []
+    i = j = 0
+    for x, y, length in runs + [(a_end - prefix, b_end - prefix, 0)]:
+        if i < x or j < y:
+            tag = 'replace' if i < x and j < y else ('delete' if i < x else 'insert')
+            opcodes.append((tag, i + prefix, x + prefix, j + prefix, y + prefix))
+        i, j = x + length, y + length
+    return opcodes
+
+
+def apply_opcodes(a, b, opcodes):
+    """
+    Apply diff opcodes to a list of lines.
+
+    Args:
+        a: Old lines
+        b: New lines the opcodes were computed against
+        opcodes: Non-equal opcodes from diff_lines(a, b)
+
+    Returns:
+        list: The resulting lines (equal to b)
+    """
+    result = list(a)
+    for tag, i1, i2, j1, j2 in reversed(opcodes):
+        result[i1:i2] = b[j1:j2]
+    return result
+
+
+def merge3(base, mine, theirs):
+    """
+    Three-way merge of line lists.
+    Changes made on only one side are taken as they are; identical changes on
+    both sides are taken once. Overlapping different changes produce a
+    conflict block with markers.
+
+    Args:
+        base: Common ancestor lines (the last saved version)
+        mine: Local lines (the editor buffer)
+        theirs: Other lines (the new version on disk)
+
+    Returns:
+        tuple: (merged lines, number of conflicts)
+    """
+    # Hunks as (base start, base end, replacement lines, side)
+    hunks = [(i1, i2, mine[j1:j2], 'mine') for _, i1, i2, j1, j2 in diff_lines(base, mine)]
+    hunks += [(i1, i2, theirs[j1:j2], 'theirs') for _, i1, i2, j1, j2 in diff_lines(base, theirs)]
+    hunks.sort(key=lambda hunk: (hunk[0], hunk[1]))
+
+    merged = []
+    conflicts = 0
+    position = 0  # Next base line not yet copied
+    index = 0
+    while index < len(hunks):
+        # Group hunks whose base ranges overlap or touch
+        start, end = hunks[index][0], hunks[index][1]
+        group = [hunks[index]]
+        index += 1
+        while index < len(hunks) and (hunks[index][0] < end or hunks[index][0] == start):
+            end = max(end, hunks[index][1])
+            group.append(hunks[index])
+            index += 1
+
+        merged.extend(base[position:start])
+        position = end
+
+        sides = {side for _, _, _, side in group}
+        if len(sides) == 1:
+            # Only one side touched this region; hunks of one diff never overlap
+            cursor = start
+            for hunk_start, hunk_end, lines, _ in group:
+                merged.extend(base[cursor:hunk_start])
+                merged.extend(lines)
+                cursor = hunk_end
+            merged.extend(base[cursor:end])
+            continue
+
+        # Rebuild each side's version of the whole region
+        versions = {}
+        for side in ('mine', 'theirs'):
+            cursor = start
+            lines = []
+            for hunk_start, hunk_end, replacement, hunk_side in group:
+                if hunk_side != side:
+                    continue
+                lines.extend(base[cursor:hunk_start])
+                lines.extend(replacement)
+                cursor = hunk_end
+            lines.extend(base[cursor:end])
+            versions[side] = lines
+
+        if versions['mine'] == versions['theirs']:
+            merged.extend(versions['mine'])
+        else:
+            conflicts += 1
+            merged.append('<<<<<<< buffer')
+            merged.extend(versions['mine'])
+            merged.append('=======')
+            merged.extend(versions['theirs'])
+            merged.append('>>>>>>> disk')
+
+    merged.extend(base[position:])
+    return merged, conflicts
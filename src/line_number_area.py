@@ -1,5 +1,5 @@
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import QSize
+from PyQt5.QtCore import QSize, QEvent
 
 
 class LineNumberArea(QWidget):
@@ -18,8 +18,8 @@ class LineNumberArea(QWidget):
 
         Args:
             editor: The parent text editor widget that this line number area
-                   will be attached to. The editor must implement lineNumberAreaWidth()
-                   and lineNumberAreaPaintEvent() methods.
+                   will be attached to. The editor must implement lineNumberAreaWidth(),
+                   lineNumberAreaPaintEvent() and lineNumberAreaToolTip() methods.
         """
         super().__init__(editor)
         self.editor = editor  # Store reference to parent editor for size and paint calculations
@@ -47,4 +47,20 @@ class LineNumberArea(QWidget):
         Args:
             event: QPaintEvent containing the region that needs to be repainted
         """
-        self.editor.lineNumberAreaPaintEvent(event)
\ No newline at end of file
+        self.editor.lineNumberAreaPaintEvent(event)
+
+    def event(self, event):
+        """
+        Delegate tool tip requests to the editor, which knows the problems
+        reported for each line.
+
+        Args:
+            event: Any event sent to the widget
+
+        Returns:
+            bool: True if the event was handled
+        """
+        if event.type() == QEvent.ToolTip:
+            self.editor.lineNumberAreaToolTip(event)
+            return True
+        return super().event(event)
@@ -0,0 +1,503 @@
+# lint_checks.py
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+from collections import namedtuple
+
+from verilog_parser import (BLOCK_PAIRS, KEYWORDS, NET_TYPES, drop_inactive, parse_verilog, skip_group,
+                            strip_directives)
+
+# One reported problem. line and column are 0-based; length 0 means "the word
+# at column". severity is 'error', 'warning' or 'info'; source names the checker.
+Diagnostic = namedtuple('Diagnostic', 'line column length severity message source')
+
+SEVERITY_ORDER = {'error': 0, 'warning': 1, 'info': 2}
+
+# External linters run when their executable is on PATH:
+# name -> (command before the file, include directory flag, output pattern)
+EXTERNAL_LINTERS = {
+    'verilator': (
+        ['verilator', '--lint-only', '-Wall', '-Wno-DECLFILENAME'], '-I',
+        re.compile(r'^%(?P<severity>Error|Warning)[^:]*: (?P<path>[^:]+):(?P<line>\d+):(?:(?P<column>\d+):)?'
+                   r' ?(?P<message>.*)$')),
+    'iverilog': (
+        ['iverilog', '-t', 'null'], '-I',
+        re.compile(r'^(?P<path>[^:]+):(?P<line>\d+):\s*(?:(?P<severity>error|warning|sorry):\s*)?'
+                   r'(?P<message>.*)$')),
+    'slang': (
+        ['slang', '--quiet'], '-I',
+        re.compile(r'^(?P<path>[^:]+):(?P<line>\d+):(?P<column>\d+): (?P<severity>error|warning|note): '
+                   r'(?P<message>.*)$')),
+}
+LINTER_TIMEOUT = 30  # Seconds an external linter may run
+
+CLOSERS = {end: start for start, end in reversed(list(BLOCK_PAIRS.items()))}  # End keyword -> first opener
+GATE_TYPES = frozenset(['and', 'nand', 'or', 'nor', 'xor', 'xnor', 'buf', 'not', 'bufif0', 'bufif1',
+                        'notif0', 'notif1', 'nmos', 'pmos', 'cmos', 'tran', 'tranif0', 'tranif1',
+                        'pullup', 'pulldown'])
+MAX_UNDECLARED_PER_NAME = 3  # Reports of the same undeclared name per module
+
+_connections = {}  # Symbol database path -> connection, per worker process
+
+
+def available_linters(names):
+    """
+    Return the configured external linters that are installed.
+
+    Args:
+        names: Linter names from the configuration
+
+    Returns:
+        list: Names whose executable is on PATH
+    """
+    return [name for name in names if name in EXTERNAL_LINTERS and shutil.which(EXTERNAL_LINTERS[name][0][0])]
+
+
+def run_checks(text, path=None, database=None, linters=(), undeclared=True, inactive=None):
+    """
+    Run all checks on a document snapshot. Executed in a worker process.
+
+    Args:
+        text: Document text
+        path: File path of the document, or None if untitled
+        database: Symbol database used to look up the ports of instantiated
+                  modules declared in other files, or None
+        linters: Names of external linters to run
+        undeclared: Report identifiers that are not declared
+        inactive: Line ranges of `ifdef branches that are not compiled
+
+    Returns:
+        list: Diagnostic tuples sorted by position
+    """
+    diagnostics = check_text(text, database, undeclared, inactive)
+    for name in linters:
+        diagnostics.extend(run_linter(name, text, path))
+    diagnostics.sort(key=lambda d: (d.line, d.column, SEVERITY_ORDER.get(d.severity, 3)))
+    return diagnostics
+
+
+def check_text(text, database=None, undeclared=True, inactive=None):
+    """
+    Built-in syntax and consistency checks.
+
+    Args:
+        text: Source text
+        database: Optional symbol database path for modules in other files
+        undeclared: Report identifiers that are not declared
+        inactive: Line ranges of `ifdef branches that are not compiled; they
+                  are not checked
+
+    Returns:
+        list: Diagnostic tuples
+    """
+    result = parse_verilog(text, inactive=inactive)
+    diagnostics = [Diagnostic(line, column, 0, 'error', message, 'syntax')
+                   for line, column, message in result.errors]
+    tokens = strip_directives(drop_inactive(result.tokens, inactive))
+    # The parser already reports mismatches inside procedural blocks
+    reported = {line for line, _, _ in result.errors}
+    missing = {message.split("'")[1] for _, _, message in result.errors if message.startswith("missing '")}
+    diagnostics.extend(d for d in check_blocks(tokens, missing) if d.line not in reported)
+    diagnostics.extend(check_instances(tokens, result, database))
+    if undeclared:
+        diagnostics.extend(check_undeclared(tokens, result))
+    return diagnostics
+
+
+def check_blocks(tokens, missing=()):
+    """
+    Report begin/end, case/endcase, function/endfunction and similar pairs
+    that do not match.
+
+    Args:
+        tokens: Tokens without preprocessor directives
+        missing: End keywords whose absence the parser already reported
+
+    Returns:
+        list: Diagnostic tuples
+    """
+    diagnostics = []
+    stack = []
+    previous = ''
+    for token in tokens:
+        text = token.text
+        if token.kind != 'identifier':
+            previous = text
+            continue
+        if text in BLOCK_PAIRS and not (text == 'fork' and previous in ('disable', 'wait')) \
+                and not (text in ('function', 'task') and previous in ('import', 'export', 'extern', 'pure')):
+            stack.append(token)
+        elif text in CLOSERS or text in ('join_any', 'join_none'):
+            opener = 'fork' if text.startswith('join') else CLOSERS[text]
+            openers = [keyword for keyword, end in BLOCK_PAIRS.items() if end == BLOCK_PAIRS[opener]]
+            if stack and stack[-1].text in openers:
+                stack.pop()
+            elif any(open_token.text in openers for open_token in stack):
+                # Close the inner blocks that were left open
+                while stack[-1].text not in openers:
+                    unclosed = stack.pop()
+                    diagnostics.append(Diagnostic(unclosed.line, unclosed.column, len(unclosed.text), 'error',
+                                                  f"'{unclosed.text}' is not closed before '{text}'", 'syntax'))
+                stack.pop()
+            else:
+                diagnostics.append(Diagnostic(token.line, token.column, len(text), 'error',
+                                              f"'{text}' without a matching '{opener}'", 'syntax'))
+        elif text in ('endmodule', 'endinterface', 'endprogram'):
+            diagnostics.extend(unclosed_blocks(stack, missing))
+            stack = []
+        previous = text
+    diagnostics.extend(unclosed_blocks(stack, missing))
+    return diagnostics
+
+
+def unclosed_blocks(stack, missing):
+    """
+    Report the blocks left open at the end of a module or file.
+
+    Args:
+        stack: Opening keyword tokens
+        missing: End keywords whose absence the parser already reported
+
+    Returns:
+        list: Diagnostic tuples
+    """
+    return [Diagnostic(token.line, token.column, len(token.text), 'error',
+                       f"'{token.text}' is never closed", 'syntax')
+            for token in stack if BLOCK_PAIRS[token.text] not in missing]
+
+
+def split_connections(tokens, start, end):
+    """
+    Split a parenthesized connection list at its top-level commas.
+
+    Args:
+        tokens: Token list
+        start: Index of the '('
+        end: Index just after the matching ')'
+
+    Returns:
+        list: (first index, end index) of each connection; empty for "()"
+    """
+    segments = []
+    index = start + 1
+    segment_start = index
+    while index < end - 1:
+        text = tokens[index].text
+        if text in ('(', '[', '{', "'{"):
+            index = skip_group(tokens, index)
+            continue
+        if text == ',':
+            segments.append((segment_start, index))
+            segment_start = index + 1
+        index += 1
+    if segments or segment_start < end - 1:
+        segments.append((segment_start, end - 1))
+    return segments
+
+
+def module_interfaces(result, database, names):
+    """
+    Look up the ports and parameters of modules.
+
+    Args:
+        result: ParseResult of the checked file; its modules take precedence
+        database: Optional symbol database path
+        names: Module names to look up
+
+    Returns:
+        dict: Module name -> (list of port names, set of parameter names)
+    """
+    interfaces = {}
+    for symbol in result.symbols:
+        if symbol.kind == 'module' and symbol.name in names:
+            interfaces[symbol.name] = ([], set())
+    for symbol in result.symbols:
+        if symbol.scope in interfaces:
+            if symbol.kind == 'port':
+                interfaces[symbol.scope][0].append(symbol.name)
+            elif symbol.kind == 'parameter':
+                interfaces[symbol.scope][1].add(symbol.name)
+
+    missing = [name for name in names if name not in interfaces]
+    if missing and database and os.path.exists(database):
+        try:
+            connection = _connections.get(database)
+            if connection is None:
+                connection = _connections[database] = sqlite3.connect(database, timeout=1)
+            rows = connection.execute(
+                "SELECT scope, kind, name FROM symbols WHERE kind IN ('port', 'parameter') AND scope IN (%s) "
+                'ORDER BY file_id, line, column' % ','.join('?' * len(missing)), missing).fetchall()
+            known = {scope for (scope,) in connection.execute(
+                "SELECT name FROM symbols WHERE kind = 'module' AND name IN (%s)" % ','.join('?' * len(missing)),
+                missing).fetchall()}
+        except sqlite3.Error:
+            rows, known = [], set()
+        for name in known:
+            interfaces[name] = ([], set())
+        for scope, kind, name in rows:
+            if kind == 'port':
+                interfaces[scope][0].append(name)
+            else:
+                interfaces[scope][1].add(name)
+    return interfaces
+
+
+def check_instances(tokens, result, database=None):
+    """
+    Check module instances against the instantiated modules: the number of
+    positional connections, and the names of named port and parameter
+    connections. Modules that cannot be found are not checked.
+
+    Args:
+        tokens: Tokens without preprocessor directives
+        result: ParseResult of the file
+        database: Optional symbol database path
+
+    Returns:
+        list: Diagnostic tuples
+    """
+    instances = [symbol for symbol in result.symbols if symbol.kind == 'instance']
+    if not instances:
+        return []
+    interfaces = module_interfaces(result, database, {symbol.detail for symbol in instances})
+    positions = {(token.line, token.column): index for index, token in enumerate(tokens)}
+    diagnostics = []
+    for symbol in instances:
+        interface = interfaces.get(symbol.detail)
+        index = positions.get((symbol.line, symbol.column))
+        if interface is None or index is None:
+            continue
+        ports, parameters = interface
+
+        # Parameter overrides: type #(...) name
+        before = index - 1
+        if before > 0 and tokens[before].text == ')':
+            depth = 0
+            while before >= 0:
+                if tokens[before].text == ')':
+                    depth += 1
+                elif tokens[before].text == '(':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                before -= 1
+            if before > 0 and tokens[before - 1].text == '#':
+                end = skip_group(tokens, before)
+                for first, last in split_connections(tokens, before, end):
+                    if tokens[first].text == '.' and first + 1 < last \
+                            and tokens[first + 1].text not in parameters:
+                        name = tokens[first + 1]
+                        diagnostics.append(Diagnostic(name.line, name.column, len(name.text), 'error',
+                                                      f"module '{symbol.detail}' has no parameter '{name.text}'",
+                                                      'instances'))
+
+        # Port connections: name [range] (...)
+        index += 1
+        while index < len(tokens) and tokens[index].text == '[':
+            index = skip_group(tokens, index)
+        if index >= len(tokens) or tokens[index].text != '(':
+            continue
+        segments = split_connections(tokens, index, skip_group(tokens, index))
+        named = [(first, last) for first, last in segments if tokens[first].text == '.']
+        if named:
+            if any(tokens[first + 1].text == '*' for first, last in named if first + 1 < last):
+                continue  # Wildcard connection
+            connected = set()
+            for first, last in named:
+                if first + 1 >= last:
+                    continue
+                name = tokens[first + 1]
+                connected.add(name.text)
+                if name.text not in ports:
+                    diagnostics.append(Diagnostic(name.line, name.column, len(name.text), 'error',
+                                                  f"module '{symbol.detail}' has no port '{name.text}'",
+                                                  'instances'))
+            unconnected = [port for port in ports if port not in connected]
+            if unconnected:
+                diagnostics.append(Diagnostic(symbol.line, symbol.column, len(symbol.name), 'info',
+                                              f"unconnected ports of '{symbol.detail}': " + ', '.join(unconnected),
+                                              'instances'))
+        elif len(segments) > len(ports):
+            diagnostics.append(Diagnostic(symbol.line, symbol.column, len(symbol.name), 'error',
+                                          f"{len(segments)} connections but '{symbol.detail}' has "
+                                          f"{len(ports)} ports", 'instances'))
+        elif len(segments) < len(ports):
+            diagnostics.append(Diagnostic(symbol.line, symbol.column, len(symbol.name), 'warning',
+                                          f"only {len(segments)} of the {len(ports)} ports of "
+                                          f"'{symbol.detail}' are connected", 'instances'))
+    return diagnostics
+
+
+def check_undeclared(tokens, result):
+    """
+    Report identifiers used in a module without being declared in it.
+    Modules with syntax errors are skipped, and so are all modules when the
+    file imports packages, since imported names are not known here. Function and task bodies and specify blocks are not
+    checked.
+
+    Args:
+        tokens: Tokens without preprocessor directives
+        result: ParseResult of the file
+
+    Returns:
+        list: Diagnostic tuples
+    """
+    if any(token.text == 'import' for token in tokens):
+        return []
+    modules = [symbol for symbol in result.symbols
+               if symbol.kind == 'module' and symbol.detail in ('module', 'macromodule')]
+    file_level = {symbol.name for symbol in result.symbols if symbol.scope is None}
+    types = {symbol.detail for symbol in result.symbols if symbol.kind == 'instance'}
+    positions = {(token.line, token.column): index for index, token in enumerate(tokens)}
+    diagnostics = []
+
+    for module in modules:
+        start = positions.get((module.line, module.column))
+        if start is None:
+            continue
+        end = start
+        while end < len(tokens) and tokens[end].text not in ('endmodule', 'endinterface', 'endprogram'):
+            end += 1
+        last_line = tokens[end].line if end < len(tokens) else tokens[-1].line
+        if any(module.line <= line <= last_line for line, _, _ in result.errors):
+            continue  # Names after a syntax error are unreliable
+        declared = file_level | types | {symbol.name for symbol in result.symbols if symbol.scope == module.name}
+        declared |= implicit_declarations(tokens, start, end)
+
+        reported = {}
+        skip_until = None
+        for index in range(start + 1, end):
+            token = tokens[index]
+            text = token.text
+            if skip_until is not None:
+                if text == skip_until:
+                    skip_until = None
+                continue
+            if text in ('function', 'task', 'specify'):
+                skip_until = BLOCK_PAIRS[text]
+                continue
+            if token.kind != 'identifier' or text in KEYWORDS or text in declared:
+                continue
+            previous = tokens[index - 1].text
+            following = tokens[index + 1].text if index + 1 < len(tokens) else ''
+            if previous in ('.', '::') or following == '::':
+                continue
+            count = reported.get(text, 0)
+            if count < MAX_UNDECLARED_PER_NAME:
+                diagnostics.append(Diagnostic(token.line, token.column, len(text), 'warning',
+                                              f"'{text}' is not declared", 'undeclared'))
+            reported[text] = count + 1
+    return diagnostics
+
+
+def implicit_declarations(tokens, start, end):
+    """
+    Collect names that the declaration parser does not record: enum
+    constants, typedef names, block labels and loop variables declared in
+    place.
+
+    Args:
+        tokens: Token list
+        start: First token of the module
+        end: Index of the module's end keyword
+
+    Returns:
+        set: Declared names
+    """
+    names = set()
+    index = start
+    while index < end:
+        text = tokens[index].text
+        following = tokens[index + 1] if index + 1 < end else None
+        if text == 'enum':
+            # Constants: the names after '{' and after each top-level ','
+            while index < end and tokens[index].text != '{':
+                index += 1
+            close = skip_group(tokens, index)
+            expect_name = True
+            index += 1
+            while index < close - 1:
+                text = tokens[index].text
+                if expect_name and tokens[index].kind == 'identifier':
+                    names.add(text)
+                    expect_name = False
+                elif text in ('(', '[', '{'):
+                    index = skip_group(tokens, index)
+                    continue
+                elif text == ',':
+                    expect_name = True
+                index += 1
+            continue
+        if text == 'typedef':
+            statement_end = index
+            while statement_end < end and tokens[statement_end].text != ';':
+                if tokens[statement_end].text in ('{', '(', '['):
+                    statement_end = skip_group(tokens, statement_end)
+                    continue
+                statement_end += 1
+            if tokens[statement_end - 1].kind == 'identifier':
+                names.add(tokens[statement_end - 1].text)
+        elif text == ':' and following is not None and following.kind == 'identifier' \
+                and tokens[index - 1].text in BLOCK_PAIRS or text == ':' and tokens[index - 1].text in \
+                ('end', 'join', 'join_any', 'join_none', 'endgenerate', 'endcase'):
+            if following is not None:
+                names.add(following.text)
+        elif (text in NET_TYPES or text == 'genvar') and following is not None \
+                and following.kind == 'identifier':
+            names.add(following.text)
+        elif text in GATE_TYPES:
+            # Gate instance name: and [(strength)] [#delay] name (...)
+            index += 1
+            if index < end and tokens[index].text == '(':
+                index = skip_group(tokens, index)
+            if index < end and tokens[index].text == '#':
+                index += 1
+                index = skip_group(tokens, index) if tokens[index].text == '(' else index + 1
+            if index + 1 < end and tokens[index].kind == 'identifier' and tokens[index + 1].text in ('(', '['):
+                names.add(tokens[index].text)
+            continue
+        index += 1
+    return names
+
+
+def run_linter(name, text, path):
+    """
+    Run an external linter on a snapshot and collect its messages for the file.
+
+    Args:
+        name: Key of EXTERNAL_LINTERS
+        text: Document text
+        path: Original file path, used for the file name and include directory
+
+    Returns:
+        list: Diagnostic tuples
+    """
+    command, include_flag, pattern = EXTERNAL_LINTERS[name]
+    file_name = os.path.basename(path) if path else 'untitled.v'
+    with tempfile.TemporaryDirectory(prefix='matcha-lint-') as directory:
+        snapshot = os.path.join(directory, file_name)
+        with open(snapshot, 'w') as f:
+            f.write(text)
+        arguments = list(command)
+        if path:
+            arguments.append(include_flag + os.path.dirname(os.path.abspath(path)))
+        arguments.append(snapshot)
+        try:
+            process = subprocess.run(arguments, capture_output=True, text=True, timeout=LINTER_TIMEOUT,
+                                     cwd=os.path.dirname(os.path.abspath(path)) if path else directory)
+        except (OSError, subprocess.SubprocessError):
+            return []
+    diagnostics = []
+    for line in (process.stdout + process.stderr).splitlines():
+        match = pattern.match(line.strip())
+        if match is None or os.path.basename(match.group('path')) != file_name:
+            continue
+        severity = (match.group('severity') or 'error').lower()
+        severity = {'sorry': 'error', 'note': 'info'}.get(severity, severity)
+        column = match.groupdict().get('column')
+        diagnostics.append(Diagnostic(int(match.group('line')) - 1, int(column) - 1 if column else 0, 0,
+                                      severity, match.group('message').strip(), name))
+    return diagnostics
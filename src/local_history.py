@@ -0,0 +1,337 @@
+# local_history.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+HISTORY_DIRECTORY = os.path.join('.matcha', 'history')  # Store location under the project root
+CHUNK_LINES = 256  # Average lines per chunk; a power of two
+MIN_CHUNK_LINES = 32  # No chunk boundary before this many lines
+MAX_CHUNK_LINES = 2048  # Forced chunk boundary after this many lines
+DIGEST_SIZE = 32  # Bytes of a SHA-256 chunk id in a manifest
+GC_GRACE = 3600  # Seconds an unreferenced chunk is kept, for saves in other processes
+GC_INTERVAL = 64  # Versions dropped between two sweeps of the store
+DROPPED_FILE = 'dropped'  # Store file counting the versions dropped since the last sweep
+
+# One saved version of a file. id is its manifest name (the save time in ns).
+Version = namedtuple('Version', 'id time size')
+
+# Records and garbage collection of one process never overlap, so a chunk
+# is not swept between being written and being referenced
+_lock = threading.Lock()
+
+
+def split_chunks(text):
+    """
+    Cut text into chunks at line boundaries chosen by content: a chunk ends
+    after a line whose CRC has its low bits clear. Blank lines never end a
+    chunk: their CRC is 0, and they are far too common. An edit therefore only
+    changes the chunks around it, and the chunks of the rest of the file are
+    the same as in the previous version, however far the edit shifted them.
+
+    Args:
+        text: File text
+
+    Returns:
+        list: Chunk strings; joined they give the text back
+    """
+    lines = text.split('\n')
+    mask = CHUNK_LINES - 1
+    chunks = []
+    start = 0
+    for index, line in enumerate(lines[:-1]):  # The last line ends the last chunk
+        count = index + 1 - start
+        if count >= MAX_CHUNK_LINES or (count >= MIN_CHUNK_LINES and line.strip()
+                                        and not zlib.crc32(line.encode('utf-8', 'surrogatepass')) & mask):
+            chunks.append('\n'.join(lines[start:index + 1]) + '\n')
+            start = index + 1
+    chunks.append('\n'.join(lines[start:]))  # Last line has no line break
+    return chunks
+
+
+class LocalHistory:
+    """
+    Saved versions of the files of one project, kept in HISTORY_DIRECTORY
+    under the project root.
+
+    Each version is cut into content-defined chunks (see split_chunks()).
+    Chunks are stored once, zlib-compressed, under their SHA-256 in
+    objects/, so a save of a huge netlist that differs slightly from the
+    previous one only writes the few chunks that changed. A version is a
+    manifest in versions/<file key>/ listing its chunk ids; listing the
+    versions of a file reads file names and one header line each, and
+    restoring one reads its manifest and chunks.
+
+    Older versions are dropped beyond max_versions per file or max_age days,
+    and chunks no manifest refers to any more are swept once GC_INTERVAL
+    versions were dropped, since a sweep reads the whole store. The count
+    is kept in the store, so sessions that each drop a few versions still
+    add up to a sweep.
+    """
+
+    def __init__(self, root, max_versions=50, max_age=30):
+        """
+        Open the history of a project; the store is created on first record().
+
+        Args:
+            root: Project root directory
+            max_versions: Versions kept per file (0 for no limit)
+            max_age: Days a version is kept (0 for no limit)
+        """
+        self.root = os.path.abspath(root)
+        self.directory = os.path.join(self.root, HISTORY_DIRECTORY)
+        self.max_versions = max_versions
+        self.max_age = max_age
+
+    def file_key(self, path):
+        """
+        Get the directory name of a file's versions.
+
+        Args:
+            path: File path
+
+        Returns:
+            str: Hash of the path relative to the project root
+        """
+        relative = os.path.relpath(os.path.abspath(path), self.root)
+        return hashlib.sha1(relative.replace(os.sep, '/').encode('utf-8')).hexdigest()
+
+    def object_path(self, digest):
+        """
+        Get the file of a chunk.
+
+        Args:
+            digest: Raw SHA-256 of the chunk
+
+        Returns:
+            str: Path under objects/
+        """
+        name = digest.hex()
+        return os.path.join(self.directory, 'objects', name[:2], name[2:])
+
+    def write_file(self, path, data):
+        """
+        Write a store file atomically, creating its directory.
+
+        Args:
+            path: Destination
+            data: Bytes to write
+        """
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def record(self, path, text):
+        """
+        Store a saved version of a file, writing only the chunks the store
+        does not have yet, then apply the retention limits to the file.
+        Nothing is recorded if the text equals the latest version.
+
+        Args:
+            path: Path of the saved file
+            text: Text that was saved
+
+        Returns:
+            Version: The new version, or None if it was unchanged
+
+        Raises:
+            OSError: If the store cannot be written
+        """
+        digests = []
+        with _lock:
+            for chunk in split_chunks(text):
+                data = chunk.encode('utf-8', 'surrogatepass')
+                digest = hashlib.sha256(data).digest()
+                digests.append(digest)
+                object_path = self.object_path(digest)
+                if os.path.exists(object_path):
+                    os.utime(object_path)  # Referenced again: not swept during the grace period
+                else:
+                    self.write_file(object_path, zlib.compress(data))
+
+            chunk_list = b''.join(digests)
+            versions = self.versions(path)
+            if versions and self.read_manifest(path, versions[0].id)[1] == chunk_list:
+                return None
+            now = time.time_ns()
+            if versions and now <= versions[0].id:
+                now = versions[0].id + 1  # Keep ids increasing with a coarse clock
+            header = json.dumps({'path': os.path.relpath(os.path.abspath(path), self.root), 'size': len(text)})
+            self.write_file(self.manifest_path(path, now), header.encode('utf-8') + b'\n' + chunk_list)
+            dropped = self.prune(path)
+            if dropped and self.count_dropped(dropped) >= GC_INTERVAL:
+                self.collect_garbage()
+        return Version(now, now / 1e9, len(text))
+
+    def manifest_path(self, path, version_id):
+        """
+        Get the manifest file of a version.
+
+        Args:
+            path: File path
+            version_id: Version id
+
+        Returns:
+            str: Path under versions/
+        """
+        return os.path.join(self.directory, 'versions', self.file_key(path), f'{version_id}.manifest')
+
+    def read_manifest(self, path, version_id):
+        """
+        Read a version's manifest.
+
+        Args:
+            path: File path
+            version_id: Version id
+
+        Returns:
+            tuple: (header dict, concatenated chunk digests)
+        """
+        with open(self.manifest_path(path, version_id), 'rb') as f:
+            header, _, chunk_list = f.read().partition(b'\n')
+        return json.loads(header), chunk_list
+
+    def versions(self, path):
+        """
+        List the stored versions of a file.
+
+        Args:
+            path: File path
+
+        Returns:
+            list: Version tuples, newest first
+        """
+        directory = os.path.join(self.directory, 'versions', self.file_key(path))
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return []
+        versions = []
+        for name in names:
+            stem, extension = os.path.splitext(name)
+            if extension != '.manifest' or not stem.isdigit():
+                continue
+            try:
+                with open(os.path.join(directory, name), 'rb') as f:
+                    size = json.loads(f.readline()).get('size', 0)
+            except (OSError, ValueError):
+                continue
+            versions.append(Version(int(stem), int(stem) / 1e9, size))
+        versions.sort(reverse=True)
+        return versions
+
+    def restore(self, path, version_id):
+        """
+        Get the text of a stored version.
+
+        Args:
+            path: File path
+            version_id: Version id
+
+        Returns:
+            str: Text of the version
+
+        Raises:
+            OSError: If the version or one of its chunks is missing
+        """
+        _, chunk_list = self.read_manifest(path, version_id)
+        chunks = []
+        for offset in range(0, len(chunk_list), DIGEST_SIZE):
+            with open(self.object_path(chunk_list[offset:offset + DIGEST_SIZE]), 'rb') as f:
+                chunks.append(zlib.decompress(f.read()))
+        return b''.join(chunks).decode('utf-8', 'surrogatepass')
+
+    def prune(self, path):
+        """
+        Drop the versions of a file beyond the retention limits. The newest
+        version is always kept.
+
+        Args:
+            path: File path
+
+        Returns:
+            int: Number of versions dropped
+        """
+        versions = self.versions(path)
+        expired = versions[self.max_versions:] if self.max_versions else []
+        if self.max_age:
+            oldest = time.time() - self.max_age * 86400
+            expired = [version for version in versions[1:] if version.time < oldest or version in expired]
+        for version in expired:
+            try:
+                os.remove(self.manifest_path(path, version.id))
+            except OSError:
+                pass
+        return len(expired)
+
+    def count_dropped(self, count):
+        """
+        Add dropped versions to the count kept in the store.
+
+        Args:
+            count: Versions just dropped
+
+        Returns:
+            int: Versions dropped since the last sweep
+        """
+        path = os.path.join(self.directory, DROPPED_FILE)
+        try:
+            with open(path, 'rb') as f:
+                count += int(f.read())
+        except (OSError, ValueError):
+            pass  # No sweep yet, or a damaged count that restarts from here
+        self.write_file(path, str(count).encode('ascii'))
+        return count
+
+    def collect_garbage(self):
+        """
+        Delete the chunks no manifest refers to, except ones written or
+        reused within GC_GRACE seconds.
+
+        Returns:
+            int: Number of chunks deleted
+        """
+        try:
+            self.write_file(os.path.join(self.directory, DROPPED_FILE), b'0')
+        except OSError:
+            pass  # Counted again from where it was; the sweep itself still runs
+        referenced = set()
+        for root, _, names in os.walk(os.path.join(self.directory, 'versions')):
+            for name in names:
+                if not name.endswith('.manifest'):
+                    continue
+                try:
+                    with open(os.path.join(root, name), 'rb') as f:
+                        chunk_list = f.read().partition(b'\n')[2]
+                except OSError:
+                    continue
+                referenced.update(chunk_list[offset:offset + DIGEST_SIZE]
+                                  for offset in range(0, len(chunk_list), DIGEST_SIZE))
+        removed = 0
+        recent = time.time() - GC_GRACE
+        for root, _, names in os.walk(os.path.join(self.directory, 'objects')):
+            for name in names:
+                object_path = os.path.join(root, name)
+                try:
+                    digest = bytes.fromhex(os.path.basename(root) + name)
+                except ValueError:
+                    continue  # Temporary file
+                try:
+                    if digest not in referenced and os.path.getmtime(object_path) < recent:
+                        os.remove(object_path)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 from PyQt5.QtWidgets import QApplication
 from editor_window import EditorWindow
@@ -45,4 +46,7 @@ if __name__ == '__main__':
     This allows the script to be both imported and run directly while
     avoiding unintended execution of the main() function.
     """
+    # In a frozen (PyInstaller) build the spawned diagnostics and search
+    # workers start this executable; this runs their job instead of main()
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,94 @@
+# marker_scrollbar.py
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtWidgets import QScrollBar, QStyle, QStyleOptionSlider
+
+
+class MarkerScrollBar(QScrollBar):
+    """
+    Vertical scroll bar of an editor that also marks lines of interest
+    (occurrences of a name, changes, ...) along its groove, so their place in
+    the whole document shows at a glance. Markers come in named groups, each
+    a sorted sequence of line numbers with one color. Their pixel rows are
+    computed once per group and scroll bar size, and lines that fall on the
+    same row are drawn once, so thousands of markers paint as cheaply as a
+    few hundred.
+    """
+
+    def __init__(self, editor):
+        """
+        Initialize the scroll bar; install it with editor.setVerticalScrollBar().
+
+        Args:
+            editor: QPlainTextEdit whose lines are marked
+        """
+        super().__init__(Qt.Vertical, editor)
+        self.editor = editor
+        self.groups = {}  # Name -> (line numbers, QColor)
+        self.rows = {}  # Name -> ((groove top, groove height, line count), pixel rows)
+
+    def set_markers(self, name, lines, color):
+        """
+        Replace one group of markers.
+
+        Args:
+            name: Group name, e.g. 'occurrences'
+            lines: Sorted sequence of 0-based line numbers
+            color: Color name of the markers
+        """
+        self.groups[name] = (lines, QColor(color))
+        self.rows.pop(name, None)
+        self.update()
+
+    def clear_markers(self, name):
+        """
+        Remove one group of markers.
+
+        Args:
+            name: Group name
+        """
+        if self.groups.pop(name, None) is not None:
+            self.rows.pop(name, None)
+            self.update()
+
+    def marker_rows(self, name, groove):
+        """
+        Get the distinct pixel rows of a group's markers.
+
+        Args:
+            name: Group name
+            groove: QRect of the scroll bar groove
+
+        Returns:
+            list: y coordinates, ascending
+        """
+        total = max(1, self.editor.blockCount())
+        key = (groove.top(), groove.height(), total)
+        cached = self.rows.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        rows = []
+        for line in self.groups[name][0]:
+            y = groove.top() + line * groove.height() // total
+            if not rows or rows[-1] != y:
+                rows.append(y)
+        self.rows[name] = (key, rows)
+        return rows
+
+    def paintEvent(self, event):
+        """
+        Paint the scroll bar, then the markers over its groove.
+
+        Args:
+            event: Paint event
+        """
+        super().paintEvent(event)
+        if not self.groups:
+            return
+        option = QStyleOptionSlider()
+        self.initStyleOption(option)
+        groove = self.style().subControlRect(QStyle.CC_ScrollBar, option, QStyle.SC_ScrollBarGroove, self)
+        painter = QPainter(self)
+        for name, (lines, color) in self.groups.items():
+            for y in self.marker_rows(name, groove):
+                painter.fillRect(groove.left() + 2, y, groove.width() - 4, 2, color)
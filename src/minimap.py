@@ -0,0 +1,338 @@
+# minimap.py
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QColor, QPainter, QPixmap
+from PyQt5.QtWidgets import QWidget
+
+TILE_ROWS = 128  # Minimap rows rendered into one cached pixmap
+MAX_TILES = 64  # Tiles kept; the ones farthest from the view are dropped first
+ROW_HEIGHT = 2  # Pixels per line in the normal mode
+DENSITY_THRESHOLD = 100000  # Lines above which each row samples several lines
+TEXT_ALPHA = 150  # Opacity of the miniature text
+
+
+class Minimap(QWidget):
+    """
+    Miniature of the whole document beside the editor, one pixel per
+    character, in the colors the highlighter gave each line, with the
+    visible part of the document shaded. Clicking or dragging scrolls the
+    editor there.
+
+    Rows are rendered into pixmap tiles of TILE_ROWS rows that are kept
+    between paints. A tile is marked stale when the highlighter reformats
+    one of its lines, or when lines are inserted or removed above it; stale
+    tiles on screen are redrawn shortly after the edit while the old pixmap
+    is still shown, and stale tiles off screen are dropped. Painting only
+    renders tiles that are missing, so scrolling costs a tile now and then;
+    at most MAX_TILES are kept.
+
+    Files of more than DENSITY_THRESHOLD lines switch to a density mode:
+    each one-pixel row shows one line out of every lines_per_row, a power
+    of two chosen so the whole file fits in the minimap's height, so a tile
+    still renders only TILE_ROWS lines.
+    """
+
+    def __init__(self, editor, width=100):
+        """
+        Attach a minimap to an editor; the editor positions it.
+
+        Args:
+            editor: VerilogEditor with a highlighter
+            width: Width of the minimap in pixels
+        """
+        super().__init__(editor)
+        self.editor = editor
+        self.map_width = width
+        self.tiles = {}  # Tile index -> QPixmap
+        self.stale = set()  # Indexes of tiles whose pixmap is outdated
+        self.line_count = editor.blockCount()
+        self.lines_per_row = 1
+        self.row_height = ROW_HEIGHT
+        self.colors = {}  # Color name -> QColor at the text opacity
+        self.setCursor(Qt.PointingHandCursor)
+
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(50)
+        self.render_timer.timeout.connect(self.render_stale)
+
+        editor.highlighter.blockHighlighted.connect(self.on_block_highlighted)
+        editor.document().contentsChange.connect(self.on_contents_change)
+        editor.verticalScrollBar().valueChanged.connect(self.update)
+        self.update_scale()
+
+    def update_scale(self):
+        """
+        Choose between the normal and the density mode for the current line
+        count and height, dropping every tile if the scale changed.
+        """
+        lines_per_row, row_height = 1, ROW_HEIGHT
+        if self.line_count > DENSITY_THRESHOLD:
+            row_height = 1
+            while self.line_count > lines_per_row * max(1, self.height()):
+                lines_per_row *= 2
+        if (lines_per_row, row_height) != (self.lines_per_row, self.row_height):
+            self.lines_per_row, self.row_height = lines_per_row, row_height
+            self.tiles = {}
+            self.stale = set()
+
+    def tile_of(self, line):
+        """
+        Get the index of the tile showing a line.
+
+        Args:
+            line: Block number
+
+        Returns:
+            int: Tile index
+        """
+        return line // (TILE_ROWS * self.lines_per_row)
+
+    def mark_stale(self, first, last):
+        """
+        Mark the tiles showing a range of lines as outdated.
+
+        Args:
+            first: First tile index
+            last: Last tile index, inclusive
+        """
+        stale = [index for index in self.tiles if first <= index <= last]
+        if stale:
+            self.stale.update(stale)
+            self.render_timer.start()
+
+    def on_block_highlighted(self, number):
+        """
+        Mark the tile of a reformatted line as outdated.
+
+        Args:
+            number: Block number
+        """
+        index = self.tile_of(number)
+        if index in self.tiles and index not in self.stale:
+            self.stale.add(index)
+            self.render_timer.start()
+
+    def on_contents_change(self, position, removed, added):
+        """
+        Mark the tiles below an edit that inserted or removed lines as
+        outdated, since their lines moved.
+
+        Args:
+            position: Position of the edit
+            removed: Characters removed
+            added: Characters added
+        """
+        count = self.editor.blockCount()
+        if count == self.line_count:
+            return
+        self.line_count = count
+        self.update_scale()
+        self.mark_stale(self.tile_of(self.editor.document().findBlock(position).blockNumber()), float('inf'))
+
+    def offset(self):
+        """
+        Get how far the minimap content is scrolled. When the miniature is
+        taller than the widget it scrolls in proportion to the editor.
+
+        Returns:
+            int: Pixels of content above the top of the widget
+        """
+        content = -(-self.line_count // self.lines_per_row) * self.row_height
+        if content <= self.height():
+            return 0
+        scrollbar = self.editor.verticalScrollBar()
+        return int(scrollbar.value() / max(1, scrollbar.maximum()) * (content - self.height()))
+
+    def visible_tiles(self, offset):
+        """
+        Get the tiles covering the widget.
+
+        Args:
+            offset: Result of offset()
+
+        Returns:
+            range: Tile indexes
+        """
+        tile_height = TILE_ROWS * self.row_height
+        last_line = max(0, self.line_count - 1)
+        last = min((offset + self.height()) // tile_height, self.tile_of(last_line))
+        return range(offset // tile_height, last + 1)
+
+    def color(self, name):
+        """
+        Get a text color at the minimap's opacity.
+
+        Args:
+            name: Color name
+
+        Returns:
+            QColor: Translucent color
+        """
+        color = self.colors.get(name)
+        if color is None:
+            color = QColor(name)
+            color.setAlpha(TEXT_ALPHA)
+            self.colors[name] = color
+        return color
+
+    def render_tile(self, index):
+        """
+        Render one tile from the blocks' text and highlight formats.
+
+        Args:
+            index: Tile index
+
+        Returns:
+            QPixmap: The tile
+        """
+        pixmap = QPixmap(self.map_width, TILE_ROWS * self.row_height)
+        pixmap.fill(QColor(self.editor.config.theme.get('background', '#1E1E1E')))
+        painter = QPainter(pixmap)
+        document = self.editor.document()
+        foreground = self.editor.config.theme.get('foreground', '#D4D4D4')
+        tab_size = self.editor.tab_size
+        first_line = index * TILE_ROWS * self.lines_per_row
+        block = document.findBlockByNumber(first_line)
+        for row in range(TILE_ROWS):
+            if not block.isValid():
+                break
+            text = block.text()
+            if text.strip():
+                # Color of each character, default first, then the highlighter's ranges
+                colors = [foreground] * len(text)
+                for format_range in block.layout().formats():
+                    brush = format_range.format.foreground()
+                    if brush.style() != Qt.NoBrush:
+                        name = brush.color().name()
+                        end = min(len(text), format_range.start + format_range.length)
+                        colors[format_range.start:end] = [name] * (end - format_range.start)
+                self.render_line(painter, text, colors, row * self.row_height, tab_size)
+            if self.lines_per_row == 1:
+                block = block.next()
+            else:
+                block = document.findBlockByNumber(first_line + (row + 1) * self.lines_per_row)
+        painter.end()
+        return pixmap
+
+    def render_line(self, painter, text, colors, y, tab_size):
+        """
+        Draw one line as runs of one-pixel characters.
+
+        Args:
+            painter: QPainter on the tile
+            text: Line text
+            colors: Color name of each character
+            y: Top of the row in the tile
+            tab_size: Columns per tab stop
+        """
+        column = 0
+        start = None  # Column where the current run started
+        run_color = None
+        for char, name in zip(text, colors):
+            if column >= self.map_width:
+                break
+            if char.isspace() or name != run_color:
+                if start is not None:
+                    painter.fillRect(start, y, column - start, self.row_height, self.color(run_color))
+                start = None
+            if char == '\t':
+                column += tab_size - column % tab_size
+                continue
+            if not char.isspace() and start is None:
+                start, run_color = column, name
+            column += 1
+        if start is not None:
+            painter.fillRect(start, y, min(column, self.map_width) - start, self.row_height, self.color(run_color))
+
+    def render_stale(self):
+        """
+        Redraw the outdated tiles on screen and drop the others.
+        """
+        visible = set(self.visible_tiles(self.offset()))
+        for index in self.stale:
+            if index in visible:
+                self.tiles[index] = self.render_tile(index)
+            else:
+                self.tiles.pop(index, None)
+        self.stale = set()
+        self.update()
+
+    def paintEvent(self, event):
+        """
+        Draw the cached tiles, rendering missing ones, and shade the part of
+        the document shown in the editor.
+
+        Args:
+            event: Paint event
+        """
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), QColor(self.editor.config.theme.get('background', '#1E1E1E')))
+        offset = self.offset()
+        tile_height = TILE_ROWS * self.row_height
+        for index in self.visible_tiles(offset):
+            pixmap = self.tiles.get(index)
+            if pixmap is None:
+                pixmap = self.tiles[index] = self.render_tile(index)
+            painter.drawPixmap(0, index * tile_height - offset, pixmap)
+        if len(self.tiles) > MAX_TILES:
+            middle = (offset + self.height() // 2) // tile_height
+            for index in sorted(self.tiles, key=lambda index: abs(index - middle))[MAX_TILES:]:
+                del self.tiles[index]
+                self.stale.discard(index)
+
+        # Shade the lines visible in the editor
+        first = self.editor.verticalScrollBar().value()
+        shown = max(1, self.editor.viewport().height() // max(1, self.editor.fontMetrics().lineSpacing()))
+        top = first // self.lines_per_row * self.row_height - offset
+        height = max(4, shown * self.row_height // self.lines_per_row)
+        painter.fillRect(0, top, self.width(), height, QColor(255, 255, 255, 24))
+
+    def resizeEvent(self, event):
+        """
+        Recheck the density scale, which depends on the height.
+
+        Args:
+            event: Resize event
+        """
+        super().resizeEvent(event)
+        self.update_scale()
+
+    def scroll_to(self, y):
+        """
+        Scroll the editor so the line at a minimap position is centered.
+
+        Args:
+            y: Vertical position in the widget
+        """
+        line = (y + self.offset()) // self.row_height * self.lines_per_row
+        shown = self.editor.viewport().height() // max(1, self.editor.fontMetrics().lineSpacing())
+        self.editor.verticalScrollBar().setValue(line - shown // 2)
+
+    def mousePressEvent(self, event):
+        """
+        Scroll the editor to the clicked place.
+
+        Args:
+            event: Mouse event
+        """
+        if event.button() == Qt.LeftButton:
+            self.scroll_to(event.pos().y())
+
+    def mouseMoveEvent(self, event):
+        """
+        Follow a drag with the editor.
+
+        Args:
+            event: Mouse event
+        """
+        if event.buttons() & Qt.LeftButton:
+            self.scroll_to(event.pos().y())
+
+    def wheelEvent(self, event):
+        """
+        Scroll the editor with the mouse wheel over the minimap.
+
+        Args:
+            event: Wheel event
+        """
+        self.editor.wheelEvent(event)
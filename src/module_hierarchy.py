@@ -0,0 +1,464 @@
+# module_hierarchy.py
+import queue
+import sqlite3
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QComboBox, QTreeView
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from symbol_index import open_database
+
+MODULE_ROLE = Qt.UserRole + 1  # Module type of a tree item
+LOCATION_ROLE = Qt.UserRole + 2  # (path, line, column) a tree item opens
+LOADED_ROLE = Qt.UserRole + 3  # True once an item's children have been added
+KEY_ROLE = Qt.UserRole + 4  # Instance name, to recognise an item after a refresh
+
+GRAPH_QUERY = ('SELECT f.path, s.kind, s.name, s.scope, s.detail, s.line, s.column '
+               'FROM symbols s JOIN files f ON f.id = s.file_id '
+               "WHERE s.kind IN ('module', 'instance')")
+
+
+class ModuleGraph:
+    """
+    The module/instance graph of a project.
+    Graphs handed to the GUI are never modified; updates are applied to a
+    copy, and only the entries of the changed file are replaced.
+
+    Attributes:
+        modules: Module name -> (path, line, column) of its declaration
+        instances: Module name -> list of (instance name, module type, path, line, column)
+        files: Path -> set of names of the modules declared in the file
+        counts: Module name -> number of instances below it, at all levels
+    """
+
+    def __init__(self):
+        self.modules = {}
+        self.instances = {}
+        self.files = {}
+        self.counts = {}
+
+    def copy(self):
+        """
+        Return a copy that can be patched without affecting this graph.
+
+        Returns:
+            ModuleGraph: Copy sharing the (unmodified) instance lists
+        """
+        graph = ModuleGraph()
+        graph.modules = dict(self.modules)
+        graph.instances = dict(self.instances)
+        graph.files = dict(self.files)
+        graph.counts = dict(self.counts)
+        return graph
+
+    def add_rows(self, rows):
+        """
+        Add module and instance symbols.
+
+        Args:
+            rows: (path, kind, name, scope, detail, line, column) tuples in
+                  file and source order
+        """
+        for path, kind, name, scope, detail, line, column in rows:
+            if kind == 'module':
+                self.modules[name] = (path, line, column)
+                self.files.setdefault(path, set()).add(name)
+                self.instances[name] = []
+            elif scope is not None:
+                self.instances.setdefault(scope, []).append((name, detail, path, line, column))
+
+    def replace_file(self, path, rows):
+        """
+        Replace everything a file declares.
+
+        Args:
+            path: File path
+            rows: The file's module and instance rows, as for add_rows()
+
+        Returns:
+            set: Names of the modules whose instances may have changed
+        """
+        changed = set(self.files.pop(path, ()))
+        for name in changed:
+            if self.modules.get(name, (path,))[0] == path:
+                self.modules.pop(name, None)
+                self.instances.pop(name, None)
+        self.add_rows(rows)
+        changed |= self.files.get(path, set())
+        return changed
+
+    def count_instances(self):
+        """
+        Compute the number of instances below every module.
+        Works without recursion so deep hierarchies are fine; an instantiation
+        cycle counts the repeated module as a leaf.
+        """
+        counts = {}
+        for root in self.instances:
+            if root in counts:
+                continue
+            visiting = set()
+            stack = [(root, False)]
+            while stack:
+                module, done = stack.pop()
+                children = self.instances.get(module, ())
+                if done:
+                    visiting.discard(module)
+                    counts[module] = sum(1 + counts.get(child[1], 0) for child in children)
+                    continue
+                if module in counts or module in visiting:
+                    continue
+                visiting.add(module)
+                stack.append((module, True))
+                stack.extend((child[1], False) for child in children
+                             if child[1] not in counts and child[1] not in visiting)
+        self.counts = counts
+
+    def tops(self):
+        """
+        Return the modules that no other module instantiates.
+
+        Returns:
+            list: Module names, largest hierarchy first
+        """
+        instantiated = {child[1] for children in self.instances.values() for child in children}
+        tops = [name for name in self.modules if name not in instantiated]
+        tops.sort(key=lambda name: (-self.counts.get(name, 0), name))
+        return tops
+
+
+class HierarchyBuilder(QThread):
+    """
+    Background thread that builds the ModuleGraph from the symbol database.
+    A full build reads all module and instance symbols; after a file is
+    re-indexed only that file's rows are read and patched into a copy of the
+    previous graph.
+    """
+
+    built = pyqtSignal(object, object)  # Emitted with (ModuleGraph, changed module names or None after a full build)
+
+    def __init__(self, parent=None):
+        """
+        Initialize the builder.
+
+        Args:
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.requests = queue.Queue()
+
+    def request_build(self, database):
+        """
+        Queue a full build.
+
+        Args:
+            database: Symbol database file
+        """
+        self.requests.put(('build', database, None))
+
+    def request_file(self, database, path):
+        """
+        Queue an update for one re-indexed file.
+
+        Args:
+            database: Symbol database file
+            path: File path
+        """
+        self.requests.put(('file', database, path))
+
+    def stop(self):
+        """
+        Stop the thread after the current request and wait for it.
+        """
+        self.requests.put(None)
+        self.wait()
+
+    def run(self):
+        """
+        Serve queued requests until stopped.
+        """
+        graph = None
+        database = None
+        connection = None
+        try:
+            while True:
+                request = self.requests.get()
+                if request is None:
+                    break
+                action, wanted, path = request
+                try:
+                    if wanted != database:
+                        if connection is not None:
+                            connection.close()
+                        connection = open_database(wanted)
+                        database = wanted
+                        graph = None
+                    if action == 'build' or graph is None:
+                        graph = ModuleGraph()
+                        graph.add_rows(connection.execute(GRAPH_QUERY + ' ORDER BY f.path, s.line, s.column'))
+                        changed = None
+                    else:
+                        graph = graph.copy()
+                        changed = graph.replace_file(path, connection.execute(
+                            GRAPH_QUERY + ' AND f.path = ? ORDER BY s.line, s.column', (path,)).fetchall())
+                    graph.count_instances()
+                    self.built.emit(graph, changed)
+                except (OSError, sqlite3.Error):
+                    continue
+        finally:
+            if connection is not None:
+                connection.close()
+
+
+class ModuleHierarchy(QWidget):
+    """
+    Instantiation tree of the design, from a chosen top module down to the leaves.
+    Each node shows the instance, its module and how many instances are
+    below it. The graph is built by a HierarchyBuilder thread the first time
+    the view is shown, tree items are created only when a node is expanded,
+    and saving a file re-reads only that file and refreshes only the
+    expanded nodes of the modules it declares.
+    """
+
+    def __init__(self, symbol_index, parent=None):
+        """
+        Initialize the view.
+
+        Args:
+            symbol_index: SymbolIndex of the project
+            parent: Parent widget that will handle navigation requests.
+                   Must implement an open_location(path, line, column) method.
+        """
+        super().__init__(parent)
+        self.parent = parent
+        self.symbol_index = symbol_index
+        self.graph = None  # Latest ModuleGraph
+        self.active = False  # Nothing is built until the view is first shown
+        self.module_names = None  # Module list shown in the top selector
+        self.initUI()
+
+        self.builder = HierarchyBuilder(self)
+        self.builder.built.connect(self.on_built)
+        self.builder.start()
+        self.symbol_index.scanCompleted.connect(self.rebuild)
+        self.symbol_index.fileUpdated.connect(self.on_file_updated)
+
+    def initUI(self):
+        """
+        Create the top module selector and the tree.
+        """
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+
+        self.top_combo = QComboBox()
+        self.top_combo.setEditable(True)
+        self.top_combo.setInsertPolicy(QComboBox.NoInsert)
+        self.top_combo.setToolTip('Top module')
+        self.top_combo.activated.connect(lambda _: self.show_top(self.top_combo.currentText()))
+        layout.addWidget(self.top_combo)
+
+        self.model = QStandardItemModel(self)
+        self.tree = QTreeView()
+        self.tree.setModel(self.model)
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
+        self.tree.expanded.connect(self.on_expanded)
+        self.tree.activated.connect(self.on_activated)
+        layout.addWidget(self.tree)
+
+    def activate(self):
+        """
+        Build the hierarchy the first time the view becomes visible.
+        """
+        if not self.active:
+            self.active = True
+            self.rebuild()
+
+    def rebuild(self):
+        """
+        Rebuild the whole graph, after a project scan.
+        """
+        if self.active and self.symbol_index.database:
+            self.builder.request_build(self.symbol_index.database)
+
+    def on_file_updated(self, path):
+        """
+        Patch the graph after one file was re-indexed.
+
+        Args:
+            path: Re-indexed file
+        """
+        if self.active and self.graph is not None and self.symbol_index.database:
+            self.builder.request_file(self.symbol_index.database, path)
+
+    def on_built(self, graph, changed):
+        """
+        Show a new graph.
+
+        Args:
+            graph: ModuleGraph from the builder
+            changed: Names of modules whose instances changed, or None after
+                     a full build
+        """
+        self.graph = graph
+        names = sorted(graph.modules)
+        if names != self.module_names:
+            self.module_names = names
+            tops = graph.tops()
+            current = self.top_combo.currentText()
+            self.top_combo.blockSignals(True)
+            self.top_combo.clear()
+            self.top_combo.addItems(tops)
+            top_set = set(tops)
+            others = [name for name in names if name not in top_set]
+            if tops and others:
+                self.top_combo.insertSeparator(len(tops))
+            self.top_combo.addItems(others)
+            self.top_combo.setCurrentText(current if current in graph.modules else (tops[0] if tops else ''))
+            self.top_combo.blockSignals(False)
+
+        root = self.model.invisibleRootItem()
+        top = root.child(0)
+        if changed is None or top is None or top.data(MODULE_ROLE) != self.top_combo.currentText():
+            self.show_top(self.top_combo.currentText())
+        else:
+            self.refresh_item(top, changed)
+
+    def show_top(self, name):
+        """
+        Show the hierarchy below a module.
+
+        Args:
+            name: Top module name
+        """
+        self.model.clear()
+        if self.graph is None or name not in self.graph.modules:
+            return
+        path, line, column = self.graph.modules[name]
+        item = self.make_item(name, name, (path, line, column))
+        self.model.appendRow(item)
+        self.tree.expand(item.index())
+
+    def label(self, key, module):
+        """
+        Return the text of a tree item.
+
+        Args:
+            key: Instance name, or the module name for the top item
+            module: Module type
+
+        Returns:
+            str: Label with the instance count of the subtree
+        """
+        count = self.graph.counts.get(module, 0)
+        text = module if key == module else f'{key} : {module}'
+        if module not in self.graph.modules:
+            return text + '  (not found)'
+        return f'{text}  ({count})' if count else text
+
+    def make_item(self, key, module, location):
+        """
+        Create a tree item for an instance. Items of modules with instances
+        get a placeholder child so they can be expanded before their children
+        are created.
+
+        Args:
+            key: Instance name, or the module name for the top item
+            module: Module type
+            location: (path, line, column) to open on activation
+
+        Returns:
+            QStandardItem: The new item
+        """
+        item = QStandardItem(self.label(key, module))
+        item.setEditable(False)
+        item.setData(module, MODULE_ROLE)
+        item.setData(key, KEY_ROLE)
+        item.setData(location, LOCATION_ROLE)
+        item.setToolTip(f'{location[0]}:{location[1] + 1}')
+        self.add_placeholder(item)
+        return item
+
+    def add_placeholder(self, item):
+        """
+        Give an item of a module with instances a placeholder child.
+
+        Args:
+            item: QStandardItem without children
+        """
+        if self.graph.instances.get(item.data(MODULE_ROLE)):
+            placeholder = QStandardItem('Loading...')
+            placeholder.setEnabled(False)
+            placeholder.setEditable(False)
+            item.appendRow(placeholder)
+
+    def populate(self, item):
+        """
+        Create the children of an item from the current graph.
+
+        Args:
+            item: QStandardItem of a module
+        """
+        item.removeRows(0, item.rowCount())
+        children = self.graph.instances.get(item.data(MODULE_ROLE), [])
+        item.appendRows([self.make_item(name, module, (path, line, column))
+                         for name, module, path, line, column in children])
+        item.setData(True, LOADED_ROLE)
+
+    def on_expanded(self, index):
+        """
+        Create an item's children the first time it is expanded.
+
+        Args:
+            index: QModelIndex of the expanded item
+        """
+        item = self.model.itemFromIndex(index)
+        if item is not None and not item.data(LOADED_ROLE):
+            self.populate(item)
+
+    def refresh_item(self, item, changed):
+        """
+        Bring an item and its created descendants up to date with the graph.
+        Children of changed modules are recreated, keeping the expansion of
+        instances that still exist; other items only get new counts.
+
+        Args:
+            item: QStandardItem to refresh
+            changed: Names of modules whose instances changed
+        """
+        module = item.data(MODULE_ROLE)
+        item.setText(self.label(item.data(KEY_ROLE), module))
+        if not item.data(LOADED_ROLE):
+            if module in changed:
+                item.removeRows(0, item.rowCount())
+                self.add_placeholder(item)
+            return
+        if module in changed:
+            expanded = {(child.data(KEY_ROLE), child.data(MODULE_ROLE))
+                        for child in (item.child(row) for row in range(item.rowCount()))
+                        if self.tree.isExpanded(child.index())}
+            self.populate(item)
+            for row in range(item.rowCount()):
+                child = item.child(row)
+                if (child.data(KEY_ROLE), child.data(MODULE_ROLE)) in expanded:
+                    self.tree.expand(child.index())
+            return  # Expanding recreated the expanded children from the new graph
+        for row in range(item.rowCount()):
+            self.refresh_item(item.child(row), changed)
+
+    def on_activated(self, index):
+        """
+        Open the instantiation (or, for the top item, the declaration) of a node.
+
+        Args:
+            index: QModelIndex of the activated item
+        """
+        location = index.data(LOCATION_ROLE)
+        if location is not None:
+            self.parent.open_location(*location)
+
+    def shutdown(self):
+        """
+        Stop the builder thread. Must be called before the application exits.
+        """
+        self.builder.stop()
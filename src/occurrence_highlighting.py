@@ -0,0 +1,238 @@
+# occurrence_highlighting.py
+import re
+from array import array
+from bisect import bisect_left
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QColor, QTextCharFormat, QTextCursor
+from PyQt5.QtWidgets import QTextEdit
+from verilog_parser import KEYWORDS
+
+SCAN_CHUNK = 256 * 1024  # Characters scanned per event loop pass
+
+
+class OccurrenceHighlighter(QObject):
+    """
+    Highlights every occurrence of the identifier under the cursor, outside
+    comments and strings, and marks them on the editor's scroll bar. The
+    document is scanned once the cursor rests, in slices between events so
+    typing and scrolling stay responsive. Occurrences are kept as compact
+    arrays of offsets and line numbers; only the ones inside the viewport
+    become extra selections, and the scroll bar draws the line array, so a
+    name used thousands of times costs no more to show than one used a few
+    times. Any edit drops the occurrences until the cursor rests again.
+    """
+
+    def __init__(self, editor, delay=250):
+        """
+        Attach occurrence highlighting to an editor.
+
+        Args:
+            editor: VerilogEditor with a token cache and a MarkerScrollBar
+            delay: Milliseconds the cursor must rest before scanning
+        """
+        super().__init__(editor)
+        self.editor = editor
+        self.word = None  # Identifier whose occurrences are shown or being scanned
+        self.offsets = array('l')  # Start offset of each occurrence, ascending
+        self.lines = array('l')  # Line of each occurrence
+        self.shown = None  # (first, last) indexes of the occurrences shown as selections
+        self.text = None  # Snapshot being scanned, None when no scan runs
+        self.pattern = None
+        self.position = 0  # Scan progress in the snapshot
+        self.line = 0  # Line at self.scanned
+        self.scanned = 0  # Offset self.line was counted up to
+        self.revision = -1  # TokenCache.edits of the snapshot
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.start_scan)
+        self.step_timer = QTimer(self)
+        self.step_timer.setSingleShot(True)
+        self.step_timer.setInterval(0)
+        self.step_timer.timeout.connect(self.scan_step)
+
+        editor.cursorPositionChanged.connect(self.on_cursor_moved)
+        editor.document().contentsChange.connect(self.on_contents_change)
+        editor.updateRequest.connect(self.on_update_request)
+
+    def word_at_cursor(self):
+        """
+        Find the identifier the cursor is on or just after.
+
+        Returns:
+            str: The identifier, or None for keywords, other tokens and selections
+        """
+        cursor = self.editor.textCursor()
+        if cursor.hasSelection():
+            return None
+        column = cursor.positionInBlock()
+        for token in self.editor.token_cache.tokens(cursor.block()):
+            if token.column > column:
+                break
+            if column <= token.column + len(token.text) and token.kind == 'identifier':
+                if token.text not in KEYWORDS and not token.text.startswith('\\'):
+                    return token.text
+        return None
+
+    def on_cursor_moved(self):
+        """
+        Keep the occurrences while the cursor stays on the same name,
+        otherwise drop them and scan again once the cursor rests.
+        """
+        word = self.word_at_cursor()
+        if word is not None and word == self.word:
+            return
+        self.clear()
+        if word is not None:
+            self.timer.start()
+
+    def on_contents_change(self, position, removed, added):
+        """
+        Drop the occurrences, whose offsets an edit invalidates.
+
+        Args:
+            position: Position of the edit
+            removed: Characters removed
+            added: Characters added
+        """
+        if self.word is not None:
+            self.clear()
+
+    def clear(self):
+        """
+        Stop scanning and remove the highlights and scroll bar markers.
+        """
+        self.timer.stop()
+        self.step_timer.stop()
+        self.text = None
+        self.word = None
+        self.offsets = array('l')
+        self.lines = array('l')
+        if self.shown is not None:
+            self.shown = None
+            self.editor.set_extra_selections('occurrences', [])
+        self.editor.verticalScrollBar().clear_markers('occurrences')
+
+    def start_scan(self):
+        """
+        Start scanning a snapshot of the document for the name under the cursor.
+        """
+        word = self.word_at_cursor()
+        if word is None:
+            return
+        self.word = word
+        self.text = self.editor.toPlainText()
+        self.pattern = re.compile(r'(?<![\w$`\\])' + re.escape(word) + r'(?![\w$])')
+        self.position = 0
+        self.line = 0
+        self.scanned = 0
+        self.revision = self.editor.token_cache.edits
+        self.scan_step()
+
+    def scan_step(self):
+        """
+        Scan the next slice of the snapshot, ending at a line break so no
+        name is cut in two, and show the occurrences found so far.
+        """
+        if self.text is None:
+            return
+        if self.editor.token_cache.edits != self.revision:
+            self.clear()  # The snapshot is stale: scan again once the cursor rests
+            self.timer.start()
+            return
+        text = self.text
+        end = text.find('\n', self.position + SCAN_CHUNK)
+        if end < 0:
+            end = len(text)
+        document = self.editor.document()
+        block = None
+        for match in self.pattern.finditer(text, self.position, end):
+            start = match.start()
+            self.line += text.count('\n', self.scanned, start)
+            self.scanned = start
+            # The snapshot is the document's text, so its tokens tell what the match is in
+            if block is None or block.blockNumber() != self.line:
+                block = document.findBlockByNumber(self.line)
+            if self.in_comment_or_string(block, start - block.position()):
+                continue
+            self.offsets.append(start)
+            self.lines.append(self.line)
+        self.position = end
+        if end < len(text):
+            self.refresh()
+            self.step_timer.start()
+            return
+        self.text = None
+        self.refresh()
+        if len(self.offsets) > 1:
+            self.editor.verticalScrollBar().set_markers(
+                'occurrences', self.lines, self.editor.config.theme.get('occurrence_marker', '#A0A0A0'))
+
+    def in_comment_or_string(self, block, column):
+        """
+        Check whether a column of a block lies in a comment or string.
+
+        Args:
+            block: QTextBlock
+            column: 0-based column in the block
+
+        Returns:
+            bool: True if a comment or string token covers the column
+        """
+        for token in self.editor.token_cache.tokens(block):
+            if token.column > column:
+                break
+            if column < token.column + len(token.text):
+                return token.kind in ('comment', 'string')
+        return False
+
+    def visible_range(self):
+        """
+        Find the indexes of the occurrences inside the viewport.
+
+        Returns:
+            tuple: (first index, index past the last)
+        """
+        editor = self.editor
+        first = editor.firstVisibleBlock()
+        last = editor.cursorForPosition(editor.viewport().rect().bottomLeft()).block()
+        return (bisect_left(self.offsets, first.position()),
+                bisect_left(self.offsets, last.position() + last.length()))
+
+    def refresh(self):
+        """
+        Show the occurrences inside the viewport as extra selections.
+        A name that occurs once is not highlighted.
+        """
+        if self.word is None:
+            return
+        shown = self.visible_range() if len(self.offsets) > 1 or self.text is not None else (0, 0)
+        if shown == self.shown:
+            return
+        self.shown = shown
+        document = self.editor.document()
+        color = QColor(self.editor.config.theme.get('occurrence', '#3A3D41'))
+        selections = []
+        for index in range(*shown):
+            cursor = QTextCursor(document)
+            cursor.setPosition(self.offsets[index])
+            cursor.setPosition(self.offsets[index] + len(self.word), QTextCursor.KeepAnchor)
+            selection = QTextEdit.ExtraSelection()
+            selection.format = QTextCharFormat()
+            selection.format.setBackground(color)
+            selection.cursor = cursor
+            selections.append(selection)
+        self.editor.set_extra_selections('occurrences', selections)
+
+    def on_update_request(self, rect, dy):
+        """
+        Show the occurrences scrolled into view.
+
+        Args:
+            rect: Updated viewport area
+            dy: Vertical scroll distance in pixels
+        """
+        if self.offsets and (dy or rect.contains(self.editor.viewport().rect())):
+            self.refresh()
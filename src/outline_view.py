@@ -0,0 +1,500 @@
+# outline_view.py
+import re
+
+from PyQt5.QtWidgets import QTreeView
+from PyQt5.QtGui import QStandardItemModel, QStandardItem, QTextCursor
+from PyQt5.QtCore import QObject, QTimer
+from verilog_parser import (KEYWORDS, MODULE_KEYWORDS, END_MODULE_KEYWORDS, DIRECTIONS, PARAMETER_KEYWORDS,
+                            PROCESS_KEYWORDS, tokenize)
+
+# Scanner state at the start of a line:
+# (in block comment, module name, declaration context, paren depth of the
+#  declaration, paren depth, bracket depth, in initializer, in generate region,
+#  enclosing function or task keyword)
+INITIAL_STATE = (False, None, None, 0, 0, 0, False, False, None)
+
+OUTLINE_KINDS = ('module', 'port', 'parameter', 'process', 'function', 'task', 'generate')
+
+
+class OutlineEntry:
+    """
+    One outline item found on a line.
+
+    Attributes:
+        kind: One of OUTLINE_KINDS
+        name: Name, or the keyword for unnamed processes and generate regions
+        label: Text shown in the outline
+        column: 0-based column on the line
+        scope: Enclosing module name, or None at file level
+        item: QStandardItem showing the entry, once created
+    """
+
+    __slots__ = ('kind', 'name', 'label', 'column', 'scope', 'item')
+
+    def __init__(self, kind, name, label, column, scope):
+        self.kind = kind
+        self.name = name
+        self.label = label
+        self.column = column
+        self.scope = scope
+        self.item = None
+
+    def key(self):
+        """
+        Return what the outline shows of the entry, ignoring its position.
+
+        Returns:
+            tuple: (kind, label, scope)
+        """
+        return self.kind, self.label, self.scope
+
+
+def process_label(text, column):
+    """
+    Build the outline label of an always/initial block from its line.
+
+    Args:
+        text: Line text
+        column: Column of the keyword
+
+    Returns:
+        str: Label such as "always @(posedge clk) : seq"
+    """
+    label = text[column:].split('//')[0]
+    name = re.search(r'\bbegin\s*:\s*(\w+)', label)
+    label = re.split(r'\bbegin\b', label)[0]
+    label = ' '.join(label.split())
+    if len(label) > 60:
+        label = label[:57] + '...'
+    return f'{label} : {name.group(1)}' if name else label
+
+
+def scan_line(text, state):
+    """
+    Find the outline entries of one line.
+    The scanner is line based and carries a small state from line to line,
+    so a line can be rescanned on its own whenever its start state is known.
+
+    Args:
+        text: Line text
+        state: State at the start of the line (INITIAL_STATE for the first line)
+
+    Returns:
+        tuple: (list of OutlineEntry, state at the start of the next line)
+    """
+    in_comment, module, context, base, depth, brackets, assigning, generate, subroutine = state
+    entries = []
+    offset = 0
+    if in_comment:
+        end = text.find('*/')
+        if end < 0:
+            return entries, state
+        offset = end + 2
+        in_comment = False
+
+    pending = None  # (name, column) of the last name seen in a declaration
+    previous = (None, None)  # Texts of the two tokens before the current one
+
+    def flush():
+        # The last name before a separator is the declared name
+        nonlocal context
+        if pending is None:
+            return
+        name, column = pending
+        if context in ('function', 'task'):
+            entries.append(OutlineEntry(context, name, f'{context} {name}', column, module))
+            context = None
+        elif subroutine is None:
+            if context in DIRECTIONS:
+                entries.append(OutlineEntry('port', name, f'{context} {name}', column, module))
+            elif context in PARAMETER_KEYWORDS:
+                entries.append(OutlineEntry('parameter', name, f'{context} {name}', column, module))
+
+    for token in tokenize(text[offset:] if offset else text):
+        kind, word = token.kind, token.text
+        column = token.column + offset
+        if kind == 'comment':
+            if word.startswith('/*') and (len(word) < 4 or not word.endswith('*/')):
+                in_comment = True  # Continues on the next line
+            continue
+
+        if kind == 'operator':
+            declaring = context in DIRECTIONS or context in PARAMETER_KEYWORDS
+            if word == '(':
+                if context in ('function', 'task'):
+                    flush()
+                    pending = None
+                depth += 1
+            elif word == ')':
+                if declaring and depth == base:
+                    flush()
+                    pending = None
+                    context = None
+                    assigning = False
+                depth = max(depth - 1, 0)
+            elif word in ('[', '{', "'{"):
+                brackets += 1
+            elif word in (']', '}'):
+                brackets = max(brackets - 1, 0)
+            elif word == '=' and declaring and depth == base and not brackets:
+                flush()
+                pending = None
+                assigning = True
+            elif word == ',' and declaring and depth == base and not brackets:
+                flush()
+                pending = None
+                assigning = False
+            elif word == ';':
+                flush()
+                pending = None
+                context = None
+                assigning = False
+                base = depth = brackets = 0
+            previous = (previous[1], word)
+            continue
+
+        if kind == 'identifier':
+            if context == 'module':
+                module = word
+                entries.append(OutlineEntry('module', word, word, column, None))
+                context = None
+            elif word in MODULE_KEYWORDS:
+                context = 'module'
+                assigning = False
+                base = depth = brackets = 0
+                subroutine = None
+            elif word in END_MODULE_KEYWORDS:
+                module = context = subroutine = None
+                assigning = generate = False
+                base = depth = brackets = 0
+            elif word in DIRECTIONS or word in PARAMETER_KEYWORDS:
+                flush()
+                pending = None
+                context = word
+                base = depth
+                assigning = False
+            elif word in PROCESS_KEYWORDS:
+                if subroutine is None:
+                    entries.append(OutlineEntry('process', word, process_label(text, column), column, module))
+            elif word in ('function', 'task'):
+                context = subroutine = word
+                pending = None
+            elif word in ('endfunction', 'endtask'):
+                subroutine = None
+            elif word == 'generate':
+                generate = True
+                entries.append(OutlineEntry('generate', word, word, column, module))
+            elif word == 'endgenerate':
+                generate = False
+            elif word not in KEYWORDS:
+                if generate and previous == ('begin', ':'):
+                    entries.append(OutlineEntry('generate', word, f'begin : {word}', column, module))
+                elif context in ('function', 'task'):
+                    pending = (word, column)
+                elif (context in DIRECTIONS or context in PARAMETER_KEYWORDS) and not brackets \
+                        and not assigning and depth == base:
+                    pending = (word, column)
+        previous = (previous[1], word)
+
+    flush()
+    return entries, (in_comment, module, context, base, depth, brackets, assigning, generate, subroutine)
+
+
+class DocumentOutline(QObject):
+    """
+    Outline of one document, kept current while it is edited.
+    The outline stores each line's entries and its scanner start state.
+    On every contentsChange only the changed lines are rescanned, continuing
+    past them only while the state at the end differs from before (as a
+    syntax highlighter does), and only the tree items of the entries that
+    changed are replaced. The first scan of a large document runs in chunks
+    from the event loop.
+    """
+
+    SCAN_CHUNK = 2000  # Lines scanned per step of the first scan
+
+    def __init__(self, document):
+        """
+        Start building the outline of a document.
+
+        Args:
+            document: QTextDocument to follow
+        """
+        super().__init__(document)
+        self.document = document
+        self.model = QStandardItemModel(self)
+        self.entries = []  # Per scanned line: list of OutlineEntry
+        self.states = [INITIAL_STATE]  # Scanner state at the start of each scanned line, plus one
+        self.line_count = document.blockCount()  # Lines when the last change was handled
+        self.module_item = None  # Item new entries are appended to during the first scan
+
+        self.scan_timer = QTimer(self)
+        self.scan_timer.setSingleShot(True)
+        self.scan_timer.timeout.connect(self.scan_more)
+        self.document.documentLayout()  # contentsChange is only emitted once a layout exists
+        self.document.contentsChange.connect(self.on_contents_change)
+        self.scan_more()
+
+    def scan_more(self):
+        """
+        Continue the first scan where it stopped, appending to the tree.
+        """
+        line = len(self.entries)
+        block = self.document.findBlockByNumber(line)
+        state = self.states[-1]
+        root = self.model.invisibleRootItem()
+        for _ in range(self.SCAN_CHUNK):
+            if not block.isValid():
+                return
+            entries, state = scan_line(block.text(), state)
+            self.entries.append(entries)
+            self.states.append(state)
+            for entry in entries:
+                entry.item = self.make_item(entry)
+                if entry.kind == 'module':
+                    root.appendRow(entry.item)
+                    self.module_item = entry.item
+                elif entry.scope is not None and self.module_item is not None:
+                    self.module_item.appendRow(entry.item)
+                else:
+                    root.appendRow(entry.item)
+            block = block.next()
+        if block.isValid():
+            self.scan_timer.start(0)
+
+    def make_item(self, entry):
+        """
+        Create the tree item of an entry.
+
+        Args:
+            entry: OutlineEntry
+
+        Returns:
+            QStandardItem: The new item
+        """
+        item = QStandardItem(entry.label)
+        item.setEditable(False)
+        item.setToolTip(entry.kind)
+        return item
+
+    def on_contents_change(self, position, removed, added):
+        """
+        Rescan the lines touched by an edit.
+
+        Args:
+            position: Position of the change
+            removed: Number of characters removed
+            added: Number of characters added
+        """
+        count = self.document.blockCount()
+        delta = count - self.line_count
+        self.line_count = count
+        first = self.document.findBlock(position).blockNumber()
+        last = self.document.findBlock(position + added).blockNumber()
+        if last < 0:
+            last = count - 1
+        scanned = len(self.entries)
+        if first < 0 or first >= scanned:
+            return  # Not reached by the first scan yet
+
+        # Rescan the changed lines, then on until a line starts in the same state as before
+        state = self.states[first]
+        new_entries, new_states = [], []
+        block = self.document.findBlockByNumber(first)
+        line = first
+        end = scanned  # First old line that is still valid
+        while block.isValid():
+            new_states.append(state)
+            entries, state = scan_line(block.text(), state)
+            new_entries.append(entries)
+            line += 1
+            block = block.next()
+            if line > last:
+                old = line - delta
+                if old >= scanned:
+                    break  # The first scan will continue from here
+                if old > first and self.states[old] == state:
+                    end = old
+                    break
+
+        old_entries = self.entries[first:end]
+        self.entries[first:end] = new_entries
+        self.states[first:end] = new_states
+        self.states[first + len(new_entries)] = state
+        del self.states[len(self.entries) + 1:]
+        self.update_items(first, old_entries, new_entries)
+
+    def update_items(self, first, old_lines, new_lines):
+        """
+        Replace the tree items of rescanned lines.
+
+        Args:
+            first: First rescanned line
+            old_lines: Entries of the replaced lines
+            new_lines: Entries of the rescanned lines
+        """
+        old = [entry for entries in old_lines for entry in entries]
+        new = [entry for entries in new_lines for entry in entries]
+        if [(entry.kind, entry.scope is None) for entry in old] == \
+                [(entry.kind, entry.scope is None) for entry in new]:
+            # Same tree shape (the usual case while typing): relabel in place
+            for old_entry, new_entry in zip(old, new):
+                new_entry.item = old_entry.item
+                if new_entry.label != old_entry.label:
+                    new_entry.item.setText(new_entry.label)
+            return
+        scopes = {entry.scope for entry in old + new}
+        if len(scopes) > 1 or any(entry.kind == 'module' for entry in old + new) \
+                or self.scan_timer.isActive():
+            self.rebuild()  # Module boundaries moved
+            return
+
+        root = self.model.invisibleRootItem()
+        for entry in old:
+            parent = entry.item.parent() or root
+            parent.removeRow(entry.item.row())
+        if not new:
+            return
+        parent = self.parent_item(first, new[0].scope)
+        row = parent.rowCount()
+        after = first + len(new_lines)
+        for entries in self.entries[after:]:
+            if not entries:
+                continue
+            following = entries[0]
+            if following.item is not None and (following.item.parent() or root) is parent:
+                row = following.item.row()
+                break
+            if parent is not root and following.kind == 'module':
+                break  # Last entries of the module
+        for entry in new:
+            entry.item = self.make_item(entry)
+        parent.insertRows(row, [entry.item for entry in new])
+
+    def parent_item(self, line, scope):
+        """
+        Return the item that entries of a line belong under.
+
+        Args:
+            line: Line number
+            scope: Module name of the entries
+
+        Returns:
+            QStandardItem: Module item, or the model root for file-level entries
+        """
+        if scope is not None:
+            for entries in reversed(self.entries[:line]):
+                for entry in entries:
+                    if entry.kind == 'module':
+                        return entry.item
+        return self.model.invisibleRootItem()
+
+    def rebuild(self):
+        """
+        Recreate the whole tree from the stored entries.
+        """
+        self.model.clear()
+        root = self.model.invisibleRootItem()
+        self.module_item = None
+        for entries in self.entries:
+            for entry in entries:
+                entry.item = self.make_item(entry)
+                if entry.kind == 'module':
+                    root.appendRow(entry.item)
+                    self.module_item = entry.item
+                elif entry.scope is not None and self.module_item is not None:
+                    self.module_item.appendRow(entry.item)
+                else:
+                    root.appendRow(entry.item)
+
+    def location_of(self, item):
+        """
+        Find the line and column of a tree item.
+
+        Args:
+            item: QStandardItem of the outline
+
+        Returns:
+            tuple or None: (line, column)
+        """
+        for line, entries in enumerate(self.entries):
+            for entry in entries:
+                if entry.item is item:
+                    return line, entry.column
+        return None
+
+
+class OutlineView(QTreeView):
+    """
+    Outline dock content for the current editor: modules with their ports,
+    parameters, always/initial blocks, functions, tasks and generate blocks.
+    Clicking an entry moves the cursor to it. Each document gets a
+    DocumentOutline the first time it is shown, which then follows its edits.
+    """
+
+    def __init__(self, parent=None):
+        """
+        Initialize an empty outline.
+
+        Args:
+            parent: Parent widget
+        """
+        super().__init__(parent)
+        self.editor = None
+        self.outline = None
+        self.setHeaderHidden(True)
+        self.setUniformRowHeights(True)
+        self.clicked.connect(self.on_clicked)
+        self.activated.connect(self.on_clicked)
+
+    def set_editor(self, editor):
+        """
+        Show the outline of an editor's document.
+
+        Args:
+            editor: VerilogEditor, or None to clear the view
+        """
+        self.editor = editor
+        if editor is None:
+            self.outline = None
+            self.setModel(None)
+            return
+        if editor.outline is None:
+            editor.outline = DocumentOutline(editor.document())
+            editor.outline.model.rowsInserted.connect(self.on_rows_inserted)
+        self.outline = editor.outline
+        self.setModel(self.outline.model)
+        self.expandToDepth(0)
+
+    def on_rows_inserted(self, parent, first, last):
+        """
+        Keep new modules expanded.
+
+        Args:
+            parent: Parent index of the inserted rows
+            first: First inserted row
+            last: Last inserted row
+        """
+        model = self.model()
+        if not parent.isValid() and model is not None and self.sender() is model:
+            for row in range(first, last + 1):
+                self.expand(model.index(row, 0))
+
+    def on_clicked(self, index):
+        """
+        Move the editor's cursor to a clicked entry.
+
+        Args:
+            index: QModelIndex of the entry
+        """
+        if self.outline is None or self.editor is None:
+            return
+        location = self.outline.location_of(self.outline.model.itemFromIndex(index))
+        if location is None:
+            return
+        block = self.editor.document().findBlockByNumber(location[0])
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + min(location[1], block.length() - 1))
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.editor.setFocus()
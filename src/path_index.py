@@ -0,0 +1,408 @@
+# path_index.py
+import os
+import re
+from bisect import bisect_right
+from heapq import nlargest
+
+from PyQt5.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from project_explorer import compile_patterns, list_directory
+
+SEPARATORS = '/_-. '  # Characters after which a match counts as a word start
+
+
+def fuzzy_pattern(query):
+    """
+    Build a regular expression matching lines that contain the query's
+    characters in order (a subsequence match).
+
+    Args:
+        query: Lowercase search text
+
+    Returns:
+        Pattern: Pattern that starts with a literal, so the regex engine can
+                 skip ahead to candidate positions, and that consumes the rest
+                 of the line, so a scan over newline-joined paths yields at
+                 most one match per path
+    """
+    # [^c\n]*c takes the leftmost c without backtracking into earlier ones
+    rest = ''.join(f'[^{re.escape(c)}\\n]*{re.escape(c)}' for c in query[1:])
+    return re.compile(re.escape(query[0]) + rest + '[^\n]*')
+
+
+def fuzzy_score(query, path):
+    """
+    Score how well a path matches a query.
+    Matches in the file name, on word starts and in consecutive characters
+    rank higher; shorter paths win ties.
+
+    Args:
+        query: Lowercase search text
+        path: Lowercase path using '/' separators
+
+    Returns:
+        float or None: Score, or None if the query is not a subsequence of path
+    """
+    base_start = path.rfind('/') + 1
+    best = None
+    # The first character decides where the rest can match; try a few starts
+    start = path.find(query[0])
+    for _ in range(4):
+        if start < 0:
+            break
+        score = _score_from(query, path, start, base_start)
+        if score is not None and (best is None or score > best):
+            best = score
+        start = path.find(query[0], start + 1)
+    if best is not None and path.startswith(query, base_start):
+        best += 20  # File name starts with the query
+    return best
+
+
+def _score_from(query, path, position, base_start):
+    """
+    Score a greedy match of the query starting at a position.
+
+    Args:
+        query: Lowercase search text
+        path: Lowercase path
+        position: Where the first query character matched
+        base_start: Index where the file name starts
+
+    Returns:
+        float or None: Score, or None if the rest of the query does not match
+    """
+    score = 0.0
+    previous = -2
+    for char in query:
+        position = path.find(char, position)
+        if position < 0:
+            return None
+        if position == previous + 1:
+            score += 5  # Consecutive characters
+        if position == 0 or path[position - 1] in SEPARATORS:
+            score += 8  # Start of a word
+        if position >= base_start:
+            score += 2  # Inside the file name
+        previous = position
+        position += 1
+    return score - len(path) * 0.01
+
+
+def walk_project(root, start, match_name, match_ignored, cancelled=None):
+    """
+    Walk a directory tree, pruning ignored directories before they are entered.
+
+    Args:
+        root: Project root that reported directories are relative to
+        start: Directory to walk (root or a directory below it)
+        match_name: Matcher from compile_patterns for file names to report
+        match_ignored: Matcher from compile_patterns for names to skip
+        cancelled: Optional callable; the walk stops when it returns True
+
+    Yields:
+        tuple: (directory relative to root using '/' separators, [matching file names])
+    """
+    for directory, directories, files in os.walk(start):
+        if cancelled is not None and cancelled():
+            return
+        directories[:] = [name for name in directories if not match_ignored(name)]
+        names = [name for name in files if match_name(name) and not match_ignored(name)]
+        relative = os.path.relpath(directory, root)
+        yield ('' if relative == '.' else relative.replace(os.sep, '/')), names
+
+
+class PathWalker(QThread):
+    """
+    Background thread that walks a directory tree and reports matching files.
+    Ignored directories are pruned before they are entered.
+    """
+
+    found = pyqtSignal(list)  # Emitted with batches of (relative directory, [file names])
+
+    BATCH_SIZE = 500  # Directories per emitted batch
+
+    def __init__(self, root, start, name_filters, ignore_patterns, parent=None):
+        """
+        Initialize the walker.
+
+        Args:
+            root: Project root that reported paths are relative to
+            start: Directory to walk (root or a directory below it)
+            name_filters: Patterns of file names to report
+            ignore_patterns: Patterns of file and directory names to skip
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.root = root
+        self.start_directory = start
+        self.match_name = compile_patterns(name_filters)
+        self.match_ignored = compile_patterns(ignore_patterns)
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Ask the walk to stop at the next directory.
+        """
+        self.cancelled = True
+
+    def run(self):
+        """
+        Walk the tree, emitting directories and their matching files in batches.
+        """
+        batch = []
+        for entry in walk_project(self.root, self.start_directory, self.match_name, self.match_ignored,
+                                  lambda: self.cancelled):
+            batch.append(entry)
+            if len(batch) >= self.BATCH_SIZE:
+                self.found.emit(batch)
+                batch = []
+        if not self.cancelled:
+            self.found.emit(batch)
+
+
+class PathIndex(QObject):
+    """
+    In-memory index of the HDL files under the project root, used by quick-open.
+    Filled once by a background PathWalker and kept current by watching the
+    walked directories; a changed directory is re-listed on its own instead of
+    walking the tree again.
+
+    For searching, all paths are kept lowercased in one newline-joined string,
+    sorted by length. A fuzzy query is first turned into a regular expression
+    and run over that string, which filters the index in C; only the surviving
+    candidates are scored in Python. The scan stops once enough candidates are
+    found, which keeps short, unselective queries cheap, and queries that
+    extend the previous one only re-check the previous candidates.
+    """
+
+    changed = pyqtSignal()  # Emitted when paths were added or removed
+
+    MAX_WATCHED_DIRECTORIES = 4096  # Directory watches are a limited system resource
+    MAX_CANDIDATES = 20000  # Matching paths collected per scan; the shortest are kept
+    MAX_SCORED = 2000  # Candidates scored per query
+    REFRESH_DELAY = 200  # Milliseconds to wait for a burst of directory changes to settle
+
+    def __init__(self, config, parent=None):
+        """
+        Initialize an empty index.
+
+        Args:
+            config: Configuration object with a project section
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.name_filters = config.project.get('name_filters', ['*.v', '*.sv'])
+        self.ignore_patterns = config.project.get('ignore_patterns', [])
+        self.match_name = compile_patterns(self.name_filters)
+        self.match_ignored = compile_patterns(self.ignore_patterns)
+        self.root = None
+        self.directories = {}  # Relative directory -> set of file names
+        self.walkers = []  # Running PathWalker threads
+        self.snapshot = None  # Search structures, rebuilt on demand after changes
+        self.last_query = None  # (query, candidate indices, offset where the scan stopped or None)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.changed_directories = set()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh_changed_directories)
+
+    def set_root(self, root):
+        """
+        Start indexing a new project root.
+
+        Args:
+            root: Project root directory
+        """
+        self.stop_walkers()
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.root = os.path.abspath(root)
+        self.directories = {}
+        self.invalidate()
+        self.walk(self.root)
+
+    def walk(self, start):
+        """
+        Walk a directory on a background thread and add what it finds.
+
+        Args:
+            start: Directory to walk, at or below the root
+        """
+        walker = PathWalker(self.root, start, self.name_filters, self.ignore_patterns, self)
+        walker.found.connect(lambda batch: self.on_found(walker, batch))
+        walker.finished.connect(lambda: self.on_walk_finished(walker))
+        self.walkers.append(walker)
+        walker.start()
+
+    def on_found(self, walker, batch):
+        """
+        Add a batch of walked directories to the index.
+
+        Args:
+            walker: PathWalker that produced the batch
+            batch: List of (relative directory, [file names])
+        """
+        if walker not in self.walkers:
+            return  # Walk of a previous root
+        for directory, names in batch:
+            self.directories[directory] = set(names)
+        room = self.MAX_WATCHED_DIRECTORIES - len(self.watcher.directories())
+        if room > 0:
+            self.watcher.addPaths([os.path.join(self.root, directory) for directory, _ in batch[:room]])
+        self.invalidate()
+
+    def on_walk_finished(self, walker):
+        """
+        Forget a finished walker.
+
+        Args:
+            walker: The PathWalker that finished
+        """
+        if walker in self.walkers:
+            self.walkers.remove(walker)
+        walker.deleteLater()
+
+    def stop_walkers(self):
+        """
+        Cancel all running walks and wait for them to end.
+        """
+        for walker in self.walkers:
+            walker.cancel()
+            walker.wait()
+        self.walkers = []
+
+    def on_directory_changed(self, path):
+        """
+        Schedule a watched directory to be re-listed.
+
+        Args:
+            path: Directory reported by the watcher
+        """
+        self.changed_directories.add(path)
+        self.refresh_timer.start(self.REFRESH_DELAY)
+
+    def refresh_changed_directories(self):
+        """
+        Re-list changed directories. New subdirectories are walked in the
+        background; removed ones are dropped with everything below them.
+        """
+        for path in self.changed_directories:
+            relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+            relative = '' if relative == '.' else relative
+            if relative not in self.directories:
+                continue
+            try:
+                subdirectories, files = list_directory(path, self.match_name, self.match_ignored)
+            except OSError:
+                self.remove_directory(relative)
+                continue
+            self.directories[relative] = set(files)
+            for name in subdirectories:
+                child = relative + '/' + name if relative else name
+                if child not in self.directories:
+                    self.walk(os.path.join(path, name))
+            prefix = relative + '/' if relative else ''
+            for child in [d for d in self.directories if d.startswith(prefix) and d != relative
+                          and '/' not in d[len(prefix):]]:
+                if child[len(prefix):] not in subdirectories:
+                    self.remove_directory(child)
+        self.changed_directories.clear()
+        self.invalidate()
+
+    def remove_directory(self, relative):
+        """
+        Drop a directory and its subdirectories from the index.
+
+        Args:
+            relative: Directory path relative to the root
+        """
+        prefix = relative + '/'
+        for directory in [d for d in self.directories if d == relative or d.startswith(prefix)]:
+            del self.directories[directory]
+            path = os.path.join(self.root, directory)
+            if path in self.watcher.directories():
+                self.watcher.removePath(path)
+
+    def invalidate(self):
+        """
+        Discard the search structures after the set of paths changed.
+        """
+        self.snapshot = None
+        self.last_query = None
+        self.changed.emit()
+
+    def build_snapshot(self):
+        """
+        Build the structures searched by search().
+
+        Returns:
+            tuple: (paths, lowercase paths, joined lowercase text, line start offsets)
+        """
+        if self.snapshot is None:
+            paths = [directory + '/' + name if directory else name
+                     for directory, names in self.directories.items() for name in names]
+            paths.sort(key=lambda path: (len(path), path))
+            lower = [path.lower() for path in paths]
+            starts = []
+            offset = 0
+            for path in lower:
+                starts.append(offset)
+                offset += len(path) + 1
+            self.snapshot = (paths, lower, '\n'.join(lower), starts)
+        return self.snapshot
+
+    def file_count(self):
+        """
+        Return the number of indexed files.
+
+        Returns:
+            int: Number of files
+        """
+        return sum(len(names) for names in self.directories.values())
+
+    def search(self, query, limit=50):
+        """
+        Find the files that best match a fuzzy query.
+
+        Args:
+            query: Search text; whitespace is ignored
+            limit: Maximum number of results
+
+        Returns:
+            list: Absolute paths, best match first
+        """
+        paths, lower, text, starts = self.build_snapshot()
+        query = ''.join(query.lower().split()).replace('\\', '/')
+        if not query:
+            return [os.path.join(self.root, path) for path in paths[:limit]]
+
+        pattern = fuzzy_pattern(query)
+        previous = self.last_query
+        if previous is not None and query.startswith(previous[0]):
+            # Narrowing the previous query: only its candidates can still match
+            # in the part of the text it scanned
+            candidates = [index for index in previous[1] if pattern.search(lower[index])]
+            resume = previous[2]
+        else:
+            candidates = []
+            resume = 0
+        end = None  # Offset where a truncated scan stopped
+        if resume is not None:
+            for match in pattern.finditer(text, resume):
+                candidates.append(bisect_right(starts, match.start()) - 1)
+                if len(candidates) >= self.MAX_CANDIDATES:
+                    end = match.end()
+                    break
+        self.last_query = (query, candidates, end)
+
+        scored = ((fuzzy_score(query, lower[index]), index) for index in candidates[:self.MAX_SCORED])
+        best = nlargest(limit, ((score, -index) for score, index in scored if score is not None))
+        return [os.path.join(self.root, paths[-index]) for _, index in best]
+
+    def shutdown(self):
+        """
+        Stop background walks. Must be called before the application exits.
+        """
+        self.stop_walkers()
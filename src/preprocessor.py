@@ -0,0 +1,305 @@
+# preprocessor.py
+import os
+import re
+import threading
+from collections import namedtuple
+
+# Comments and strings are matched only so that directives inside them are skipped
+DIRECTIVE_PATTERN = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"'
+    r'|`(define|undef|undefineall|ifdef|ifndef|elsif|else|endif|include)\b[ \t]*(\w+|"[^"\n]*"|<[^>\n]*>)?',
+    re.S)
+CONDITIONALS = frozenset(['ifdef', 'ifndef', 'elsif', 'else', 'endif'])
+MAX_INCLUDE_DEPTH = 32  # Deeper nesting is assumed to be an include cycle
+
+# Result of analyzing one file:
+#   inactive: (first line, last line) ranges of disabled `ifdef branches, 0-based and inclusive
+#   macros: macro name -> (path, line) of the definition in effect at the end of the file
+#   includes: resolved paths of all files included directly or indirectly
+Preprocessed = namedtuple('Preprocessed', 'inactive macros includes')
+
+
+def scan_directives(text):
+    """
+    Find the preprocessor directives that affect which code is compiled.
+
+    Args:
+        text: Source text
+
+    Returns:
+        list: (line, directive, argument) tuples in source order; argument is
+              the macro name or include path, or '' if there is none
+    """
+    directives = []
+    line = 0
+    position = 0
+    for match in DIRECTIVE_PATTERN.finditer(text):
+        directive = match.group(1)
+        if directive is None:
+            continue
+        line += text.count('\n', position, match.start())
+        position = match.start()
+        argument = match.group(2) or ''
+        if directive == 'include':
+            argument = argument[1:-1] if argument[:1] in '"<' else ''
+        directives.append((line, directive, argument))
+    return directives
+
+
+class FileEntry:
+    """
+    Cached directives of one file, valid while its size and modification
+    time are unchanged.
+    """
+
+    __slots__ = ('signature', 'directives')
+
+    def __init__(self, signature, directives):
+        """
+        Args:
+            signature: (size, mtime_ns) of the file when it was read
+            directives: Result of scan_directives()
+        """
+        self.signature = signature
+        self.directives = directives
+
+
+class PreprocessorCache:
+    """
+    Model of `include and `define across a project.
+    Each file is read and scanned for directives once and cached until its
+    size or modification time changes, so analyzing many files that share
+    headers, or the same document after every edit, does not re-read the
+    headers. The cache also records which files include which, so the
+    includers of a changed header can be found. Used from the GUI thread and
+    from the indexer thread, so the cache is guarded by a lock.
+    """
+
+    def __init__(self, include_dirs=(), defines=None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            include_dirs: Directories searched for included files after the
+                          including file's own directory
+            defines: Macro names defined for every file, as on a compiler's
+                     command line (a dict of name -> value, or a list of names)
+        """
+        self.include_dirs = list(include_dirs)
+        self.defines = dict.fromkeys(defines or ()) if not isinstance(defines, dict) else dict(defines)
+        self.files = {}  # Absolute path -> FileEntry
+        self.resolved = {}  # Including path -> {include argument: resolved path or None}; the include graph
+        self.lock = threading.Lock()
+
+    def set_include_dirs(self, include_dirs):
+        """
+        Change the include search path. Cached resolutions are dropped.
+
+        Args:
+            include_dirs: List of directories
+        """
+        with self.lock:
+            self.include_dirs = list(include_dirs)
+            self.resolved.clear()
+
+    def invalidate(self, path):
+        """
+        Forget a file, e.g. after it was saved, created or deleted.
+        Include resolutions are dropped too, since a new file may now be
+        found earlier in the search path.
+
+        Args:
+            path: File path
+        """
+        with self.lock:
+            self.files.pop(os.path.abspath(path), None)
+            self.resolved.clear()
+
+    def entry(self, path):
+        """
+        Get the cached directives of a file, reading it if it changed.
+
+        Args:
+            path: Absolute file path
+
+        Returns:
+            FileEntry: Cached entry, or None if the file cannot be read
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            entry = self.files.get(path)
+        if entry is not None and entry.signature == signature:
+            return entry
+        try:
+            with open(path, 'r', errors='replace') as f:
+                text = f.read()
+        except OSError:
+            return None
+        entry = FileEntry(signature, scan_directives(text))
+        with self.lock:
+            self.files[path] = entry
+        return entry
+
+    def resolve(self, name, including_path):
+        """
+        Find the file an `include refers to. Results are cached per including
+        file, which also records the include graph.
+
+        Args:
+            name: Path given in the `include
+            including_path: File containing the `include, or None
+
+        Returns:
+            str: Absolute path, or None if the file is not found
+        """
+        with self.lock:
+            cached = self.resolved.get(including_path, {})
+            if name in cached:
+                return cached[name]
+        directories = [os.path.dirname(including_path)] if including_path else []
+        directories.extend(self.include_dirs)
+        resolved = None
+        if os.path.isabs(name):
+            resolved = name if os.path.isfile(name) else None
+        else:
+            for directory in directories:
+                candidate = os.path.abspath(os.path.join(directory, name))
+                if os.path.isfile(candidate):
+                    resolved = candidate
+                    break
+        with self.lock:
+            self.resolved.setdefault(including_path, {})[name] = resolved
+        return resolved
+
+    def analyze(self, path, text=None):
+        """
+        Work out which `ifdef branches of a file are compiled and which
+        macros it defines, following its includes.
+
+        Args:
+            path: File path, or None for an untitled document
+            text: Current text of the file; read from disk if None
+
+        Returns:
+            Preprocessed: Inactive line ranges, macros and included files
+        """
+        path = os.path.abspath(path) if path else None
+        if text is None:
+            try:
+                with open(path, 'r', errors='replace') as f:
+                    text = f.read()
+            except (OSError, TypeError):
+                text = ''
+        directives = scan_directives(text)
+        line_count = text.count('\n') + 1
+        macros = {name: (None, 0) for name in self.defines}
+        includes = []
+        inactive = []
+        self.evaluate(path, directives, macros, includes, inactive, line_count, [path])
+        return Preprocessed(inactive, macros, includes)
+
+    def evaluate(self, path, directives, macros, includes, inactive, line_count, stack):
+        """
+        Apply a file's directives in order.
+
+        Args:
+            path: File being evaluated
+            directives: Its directives
+            macros: Macro definitions, updated in place
+            includes: Included paths, appended to in place
+            inactive: List receiving the file's inactive line ranges, or None
+                      for included files
+            line_count: Number of lines in the file
+            stack: Paths of the files being evaluated, to stop include cycles
+        """
+        active = True
+        frames = []  # [parent active, a branch was taken, first line of the inactive region]
+        for line, directive, argument in directives:
+            if directive in CONDITIONALS:
+                if directive in ('ifdef', 'ifndef'):
+                    taken = (argument in macros) == (directive == 'ifdef')
+                    frames.append([active, taken, line + 1])
+                    active = active and taken
+                    continue
+                if not frames:
+                    continue  # Unbalanced `else/`endif
+                frame = frames[-1]
+                parent, taken, start = frame
+                if directive == 'endif':
+                    frames.pop()
+                    if parent and not active and inactive is not None and start <= line - 1:
+                        inactive.append((start, line - 1))
+                    active = parent
+                    continue
+                # `elsif or `else
+                enter = not taken and (directive == 'else' or argument in macros)
+                if parent and active:
+                    frame[2] = line + 1  # The taken branch ends here
+                    active = False
+                elif parent and enter:
+                    if inactive is not None and start <= line - 1:
+                        inactive.append((start, line - 1))
+                    active = True
+                    frame[1] = True
+                continue
+            if not active:
+                continue
+            if directive == 'define':
+                macros[argument] = (path, line)
+            elif directive == 'undef':
+                macros.pop(argument, None)
+            elif directive == 'undefineall':
+                macros.clear()
+            elif directive == 'include' and argument:
+                included = self.resolve(argument, path)
+                if included is None or included in stack or len(stack) >= MAX_INCLUDE_DEPTH:
+                    continue
+                if included not in includes:
+                    includes.append(included)
+                included_entry = self.entry(included)
+                if included_entry is not None:
+                    stack.append(included)
+                    self.evaluate(included, included_entry.directives, macros, includes, None, 0, stack)
+                    stack.pop()
+        # Branches still open at the end of the file
+        if inactive is not None:
+            states = [frame[0] for frame in frames[1:]] + [active]
+            for (parent, taken, start), state in zip(frames, states):
+                if parent and not state:
+                    if start < line_count:
+                        inactive.append((start, line_count - 1))
+                    break
+            inactive.sort()
+
+    def includers(self, path, includes=None):
+        """
+        Find the files that include a file, directly or indirectly.
+
+        Args:
+            path: File path
+            includes: Optional (including path, include argument) pairs, e.g.
+                      from the symbol index, for files this cache has not
+                      analyzed; they are resolved through the cache
+
+        Returns:
+            list: Absolute paths of the including files
+        """
+        path = os.path.abspath(path)
+        for source, name in includes or ():
+            self.resolve(name, source)
+        with self.lock:
+            graph = {source: [target for target in names.values() if target]
+                     for source, names in self.resolved.items() if source}
+        found = []
+        targets = [path]
+        while targets:
+            target = targets.pop()
+            for source, included in graph.items():
+                if target in included and source not in found and source != path:
+                    found.append(source)
+                    targets.append(source)
+        return found
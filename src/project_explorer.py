@@ -1,60 +1,317 @@
 # project_explorer.py
-from PyQt5.QtWidgets import QTreeView, QFileSystemModel
-from PyQt5.QtCore import QDir
+import fnmatch
+import os
+import queue
+import re
+
+from PyQt5.QtWidgets import QTreeView
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtCore import Qt, QDir, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+
+PATH_ROLE = Qt.UserRole + 1  # Absolute path of a tree item
+IS_DIR_ROLE = Qt.UserRole + 2  # True for directory items
+LOADED_ROLE = Qt.UserRole + 3  # True once a directory's children have been listed
+
+
+def compile_patterns(patterns):
+    """
+    Compile shell-style patterns into a single matcher.
+    One combined regular expression is much faster than calling fnmatch once
+    per pattern for every entry of a large tree.
+
+    Args:
+        patterns: Patterns such as ['build', '*.o']
+
+    Returns:
+        callable: Function taking a file name and returning a truthy value if
+                  any pattern matches, or None if there are no patterns
+    """
+    if not patterns:
+        return lambda name: None
+    return re.compile('|'.join(fnmatch.translate(pattern) for pattern in patterns)).match
+
+
+def list_directory(path, match_name, match_ignored):
+    """
+    List one directory, skipping ignored entries and files that do not match.
+
+    Args:
+        path: Directory to list
+        match_name: Matcher from compile_patterns for file names to show
+        match_ignored: Matcher from compile_patterns for names to skip
+
+    Returns:
+        tuple: (sorted directory names, sorted file names)
+    """
+    directories, files = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            name = entry.name
+            if match_ignored(name):
+                continue
+            try:
+                if entry.is_dir():
+                    directories.append(name)
+                elif match_name(name):
+                    files.append(name)
+            except OSError:
+                continue  # Broken symlink or entry removed while listing
+    directories.sort(key=str.lower)
+    files.sort(key=str.lower)
+    return directories, files
+
+
+class DirectoryScanner(QThread):
+    """
+    Background thread that lists directories on request.
+    Listing a directory with many entries, or one on a slow network drive,
+    never blocks the GUI thread; results arrive through the listed signal.
+    """
+
+    listed = pyqtSignal(str, list, list)  # Emitted with (path, directory names, file names)
+
+    def __init__(self, name_filters, ignore_patterns, parent=None):
+        """
+        Initialize the scanner.
+
+        Args:
+            name_filters: Patterns of file names to show
+            ignore_patterns: Patterns of file and directory names to skip
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.match_name = compile_patterns(name_filters)
+        self.match_ignored = compile_patterns(ignore_patterns)
+        self.requests = queue.Queue()
+
+    def request(self, path):
+        """
+        Queue a directory to be listed.
+
+        Args:
+            path: Directory path
+        """
+        self.requests.put(path)
+
+    def stop(self):
+        """
+        Stop the thread once the current listing is done and wait for it.
+        """
+        self.requests.put(None)
+        self.wait()
+
+    def run(self):
+        """
+        List queued directories until stopped.
+        """
+        while True:
+            path = self.requests.get()
+            if path is None:
+                break
+            try:
+                directories, files = list_directory(path, self.match_name, self.match_ignored)
+            except OSError:
+                directories, files = [], []  # Removed or unreadable
+            self.listed.emit(path, directories, files)
 
 
 class ProjectExplorer(QTreeView):
     """
     A file system explorer widget specifically designed for HDL projects.
-    Displays a tree view of Verilog (*.v) and SystemVerilog (*.sv) files,
-    allowing easy navigation and file selection within a project directory.
+    Displays a tree view of Verilog and SystemVerilog files, allowing easy
+    navigation and file selection within a project directory.
+
+    Directories are listed by a background DirectoryScanner only when they are
+    expanded, and ignored directories (build and simulation output, version
+    control metadata) are never entered. Expanded directories are watched and
+    re-listed when they change, and only the entries that changed are added
+    to or removed from the tree. The cost of the explorer therefore depends on
+    what is visible, not on the size of the project.
 
     Inherits from QTreeView to provide a hierarchical view of the file system.
     """
 
-    def __init__(self, parent=None):
+    rootChanged = pyqtSignal(str)  # Emitted with the new project root
+
+    REFRESH_DELAY = 200  # Milliseconds to wait for a burst of directory changes to settle
+
+    def __init__(self, parent=None, config=None):
         """
         Initialize the project explorer widget.
 
         Args:
             parent: Parent widget that will handle file opening requests.
                    Must implement a load_file(path) method.
+            config: Configuration object with a project section, or None for defaults
         """
         super().__init__(parent)
         self.parent = parent  # Store parent reference for file opening callbacks
-        self.setup_model()  # Initialize the file system model
+        project = config.project if config is not None else {}
+        self.name_filters = project.get('name_filters', ['*.v', '*.sv'])
+        self.ignore_patterns = project.get('ignore_patterns', [])
+        self.root_path = None
+        self.items = {}  # Directory path -> QStandardItem for directories in the tree
+        self.changed_directories = set()  # Watched directories waiting to be re-listed
+        self.setup_model()  # Initialize the model and background scanner
+        self.set_root_path(project.get('root') or QDir.currentPath())
 
     def setup_model(self):
         """
-        Configure the file system model and view settings.
+        Configure the item model, the background scanner and the watcher.
 
         Sets up:
-        - File system model with HDL file filters
-        - Root directory path
-        - Visible columns
-        - Click handling
+        - Item model filled lazily from scanner results
+        - Directory scanner thread with HDL file filters and ignore patterns
+        - Watcher for expanded directories
+        - Expand and click handling
         """
-        # Create and configure the file system model
-        self.model = QFileSystemModel()
-        # Set the root directory to start browsing from
-        self.model.setRootPath(QDir.currentPath())
-
-        # Configure file filters to show only Verilog files
-        self.model.setNameFilters(['*.v', '*.sv'])  # Show only .v and .sv files
-        self.model.setNameFilterDisables(False)  # Hide (rather than disable) non-matching files
-
-        # Connect model to view and set initial root path
+        self.model = QStandardItemModel(self)
         self.setModel(self.model)
-        self.setRootIndex(self.model.index(QDir.currentPath()))
+        self.setHeaderHidden(True)
+        self.setUniformRowHeights(True)  # Lets the view skip measuring every row
+
+        self.scanner = DirectoryScanner(self.name_filters, self.ignore_patterns, self)
+        self.scanner.listed.connect(self.on_directory_listed)
+        self.scanner.start()
 
-        # Hide all columns except the file name column
-        # This removes size, type, and date modified columns
-        for i in range(1, self.model.columnCount()):
-            self.hideColumn(i)
+        # Only expanded directories are watched, which keeps the number of watches small
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh_changed_directories)
 
-        # Connect file selection handler
+        # Connect expand/collapse and file selection handlers
+        self.expanded.connect(self.on_expanded)
+        self.collapsed.connect(self.on_collapsed)
         self.clicked.connect(self.on_file_clicked)
 
+    def make_item(self, directory, name, is_dir):
+        """
+        Create a tree item for a directory entry.
+        Directories get a placeholder child so they can be expanded before
+        their content is known.
+
+        Args:
+            directory: Parent directory path
+            name: Entry name
+            is_dir: True for directories
+
+        Returns:
+            QStandardItem: The new item
+        """
+        path = os.path.join(directory, name)
+        item = QStandardItem(name)
+        item.setEditable(False)
+        item.setToolTip(path)
+        item.setData(path, PATH_ROLE)
+        item.setData(is_dir, IS_DIR_ROLE)
+        if is_dir:
+            placeholder = QStandardItem('Loading...')
+            placeholder.setEnabled(False)
+            placeholder.setEditable(False)
+            item.appendRow(placeholder)
+            self.items[path] = item
+        return item
+
+    def on_expanded(self, index):
+        """
+        List a directory when it is expanded and start watching it.
+
+        Args:
+            index: QModelIndex of the expanded directory
+        """
+        path = index.data(PATH_ROLE)
+        if path:
+            self.scanner.request(path)  # Also refreshes directories expanded before
+            self.watcher.addPath(path)
+
+    def on_collapsed(self, index):
+        """
+        Stop watching a collapsed directory. Its children are kept and
+        refreshed the next time it is expanded.
+
+        Args:
+            index: QModelIndex of the collapsed directory
+        """
+        path = index.data(PATH_ROLE)
+        if path and path != self.root_path:
+            self.watcher.removePath(path)
+
+    def on_directory_listed(self, path, directories, files):
+        """
+        Bring a directory's children in line with a scanner result.
+        The first listing adds all rows at once; later listings only insert
+        new entries and remove vanished ones, so expansion and selection of
+        unchanged rows are kept.
+
+        Args:
+            path: Listed directory
+            directories: Sorted names of subdirectories
+            files: Sorted names of matching files
+        """
+        item = self.items.get(path)
+        if item is None:
+            return  # Removed from the tree while the listing ran
+        wanted = [(name, True) for name in directories] + [(name, False) for name in files]
+
+        if not item.data(LOADED_ROLE):
+            item.removeRows(0, item.rowCount())  # Placeholder
+            item.appendRows([self.make_item(path, name, is_dir) for name, is_dir in wanted])
+            item.setData(True, LOADED_ROLE)
+            return
+
+        # Remove entries that no longer exist
+        keys = set(wanted)
+        for row in reversed(range(item.rowCount())):
+            child = item.child(row)
+            if (child.text(), child.data(IS_DIR_ROLE)) not in keys:
+                self.forget(child)
+                item.removeRow(row)
+
+        # Remaining rows are in wanted order; insert the new ones between them
+        for row, (name, is_dir) in enumerate(wanted):
+            child = item.child(row)
+            if child is None or (child.text(), child.data(IS_DIR_ROLE)) != (name, is_dir):
+                item.insertRow(row, self.make_item(path, name, is_dir))
+
+    def forget(self, item):
+        """
+        Drop bookkeeping for a directory item and everything below it.
+
+        Args:
+            item: QStandardItem being removed from the tree
+        """
+        path = item.data(PATH_ROLE)
+        if not item.data(IS_DIR_ROLE) or path is None:
+            return
+        prefix = path + os.sep
+        for known in [known for known in self.items if known == path or known.startswith(prefix)]:
+            del self.items[known]
+        stale = [watched for watched in self.watcher.directories()
+                 if watched == path or watched.startswith(prefix)]
+        if stale:
+            self.watcher.removePaths(stale)
+
+    def on_directory_changed(self, path):
+        """
+        Schedule a watched directory to be re-listed.
+
+        Args:
+            path: Directory reported by the watcher
+        """
+        self.changed_directories.add(path)
+        self.refresh_timer.start(self.REFRESH_DELAY)
+
+    def refresh_changed_directories(self):
+        """
+        Re-list the directories that changed since the last refresh.
+        """
+        for path in self.changed_directories:
+            if path in self.items:
+                self.scanner.request(path)
+        self.changed_directories.clear()
+
     def on_file_clicked(self, index):
         """
         Handle file selection in the project explorer.
@@ -65,9 +322,9 @@ class ProjectExplorer(QTreeView):
         Args:
             index: QModelIndex of the clicked item in the tree view
         """
-        path = self.model.filePath(index)
-        if self.model.isDir(index):
-            return  # Ignore directory clicks
+        path = index.data(PATH_ROLE)
+        if not path or index.data(IS_DIR_ROLE):
+            return  # Ignore directory and placeholder clicks
         self.parent.load_file(path)  # Request parent to load the selected file
 
     def set_root_path(self, path):
@@ -77,5 +334,23 @@ class ProjectExplorer(QTreeView):
         Args:
             path: New root directory path to display
         """
-        # Update both the model's root path and the view's root index
-        self.setRootIndex(self.model.setRootPath(path))
\ No newline at end of file
+        path = os.path.abspath(path)
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.model.clear()
+        self.changed_directories.clear()
+
+        self.root_path = path
+        root = self.model.invisibleRootItem()
+        root.setData(path, PATH_ROLE)
+        root.setData(False, LOADED_ROLE)
+        self.items = {path: root}
+        self.scanner.request(path)
+        self.watcher.addPath(path)
+        self.rootChanged.emit(path)
+
+    def shutdown(self):
+        """
+        Stop the background scanner. Must be called before the application exits.
+        """
+        self.scanner.stop()
@@ -0,0 +1,125 @@
+# quick_open.py
+import os
+
+from PyQt5.QtWidgets import QDialog, QLineEdit, QListWidget, QListWidgetItem, QVBoxLayout, QLabel
+from PyQt5.QtCore import Qt, QEvent, QTimer
+
+
+class QuickOpenDialog(QDialog):
+    """
+    "Go to File" popup that fuzzy-matches paths under the project root.
+    Results come from the window's PathIndex and are refreshed on every
+    keystroke; while the index is still being built the list updates as
+    more files are found.
+    """
+
+    MAX_RESULTS = 50  # Rows shown in the result list
+
+    def __init__(self, path_index, parent=None):
+        """
+        Initialize the dialog.
+
+        Args:
+            path_index: PathIndex to search
+            parent: Parent widget that will handle file opening requests.
+                   Must implement a load_file(path) method.
+        """
+        super().__init__(parent)
+        self.path_index = path_index
+        self.setWindowTitle("Go to File")
+        self.resize(600, 400)
+        self.initUI()
+
+        # Re-run the query while the index fills, at most a few times per second
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.update_results)
+        self.path_index.changed.connect(self.on_index_changed)
+
+    def initUI(self):
+        """
+        Create the query input, result list and status line.
+        """
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Type a file name...")
+        self.query_input.textChanged.connect(self.update_results)
+        self.query_input.installEventFilter(self)  # Arrow keys move through the results
+        layout.addWidget(self.query_input)
+
+        self.result_list = QListWidget()
+        self.result_list.itemActivated.connect(self.open_item)
+        layout.addWidget(self.result_list)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+    def show_dialog(self):
+        """
+        Show the dialog with an empty query.
+        """
+        self.query_input.clear()
+        self.update_results()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.query_input.setFocus()
+
+    def on_index_changed(self):
+        """
+        Refresh visible results shortly after the index changed.
+        """
+        if self.isVisible() and not self.refresh_timer.isActive():
+            self.refresh_timer.start(250)
+
+    def update_results(self):
+        """
+        Search the index for the current query and fill the result list.
+        """
+        self.result_list.clear()
+        if self.path_index.root is None:
+            return
+        for path in self.path_index.search(self.query_input.text(), self.MAX_RESULTS):
+            relative = os.path.relpath(os.path.dirname(path), self.path_index.root)
+            item = QListWidgetItem(f"{os.path.basename(path)}    {'' if relative == '.' else relative}")
+            item.setData(Qt.UserRole, path)
+            item.setToolTip(path)
+            self.result_list.addItem(item)
+        if self.result_list.count():
+            self.result_list.setCurrentRow(0)
+        walking = ' (indexing...)' if self.path_index.walkers else ''
+        self.status_label.setText(f"{self.path_index.file_count()} files{walking}")
+
+    def eventFilter(self, obj, event):
+        """
+        Forward navigation keys from the query input to the result list.
+
+        Args:
+            obj: Watched object
+            event: The event
+
+        Returns:
+            bool: True if the event was handled
+        """
+        if obj is self.query_input and event.type() == QEvent.KeyPress:
+            if event.key() in (Qt.Key_Up, Qt.Key_Down, Qt.Key_PageUp, Qt.Key_PageDown):
+                self.result_list.keyPressEvent(event)
+                return True
+            if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+                self.open_item(self.result_list.currentItem())
+                return True
+        return super().eventFilter(obj, event)
+
+    def open_item(self, item):
+        """
+        Open the file of a result row and close the dialog.
+
+        Args:
+            item: QListWidgetItem to open, or None
+        """
+        if item is None:
+            return
+        self.hide()
+        self.parent().load_file(item.data(Qt.UserRole))
@@ -1,8 +1,9 @@
 from PyQt5.QtWidgets import (QWidget, QGridLayout, QLineEdit, QPushButton,
                              QCheckBox, QLabel, QHBoxLayout, QVBoxLayout,
                              QFrame, QGroupBox)
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, pyqtSignal
 from PyQt5.QtGui import QIcon, QPalette, QColor, QFont, QTextDocument
+from large_file_viewer import LargeFileViewer
 
 
 class SearchWidget(QWidget):
@@ -10,8 +11,12 @@ class SearchWidget(QWidget):
     A search and replace widget for the text editor.
     Provides functionality for finding and replacing text with various options.
     Implements a VS Code-like dark theme interface.
+    In structural mode the search text is a structural query, which the
+    window runs across the project instead of searching the editor.
     """
 
+    structuralSearchRequested = pyqtSignal(str)  # Emitted with the query text in structural mode
+
     def __init__(self, editor, config=None):
         """
         Initialize the search widget.
@@ -125,10 +130,10 @@ class SearchWidget(QWidget):
 
         # Replace buttons
         replace_layout = QHBoxLayout()
-        replace_btn = self.create_button("Replace", "Replace", self.replace)
-        replace_all_btn = self.create_button("Replace All", "Replace All", self.replace_all)
-        replace_layout.addWidget(replace_btn)
-        replace_layout.addWidget(replace_all_btn)
+        self.replace_btn = self.create_button("Replace", "Replace", self.replace)
+        self.replace_all_btn = self.create_button("Replace All", "Replace All", self.replace_all)
+        replace_layout.addWidget(self.replace_btn)
+        replace_layout.addWidget(self.replace_all_btn)
 
         # Add replace components to layout
         search_layout.addWidget(replace_container, 1, 0)
@@ -173,8 +178,20 @@ class SearchWidget(QWidget):
             }
         """)
 
+        # Structural mode: the search text is a query over the project's code structure
+        self.structural = QCheckBox("Structural")
+        self.structural.setStyleSheet(self.whole_words.styleSheet())
+        self.structural.setToolTip(
+            "Search the project by code structure, e.g.\n"
+            "  always posedge:clk_a assigns:state\n"
+            "  instance fifo DEPTH>64\n"
+            "A kind (module, instance, always, assign, port, net, parameter, ...) is followed by\n"
+            "a name, key:pattern terms and parameter comparisons; '-' negates a term.")
+        self.structural.toggled.connect(self.set_structural)
+
         options_layout.addWidget(self.case_sensitive)
         options_layout.addWidget(self.whole_words)
+        options_layout.addWidget(self.structural)
         options_layout.addStretch()
 
         # Add options to layout
@@ -237,6 +254,33 @@ class SearchWidget(QWidget):
         btn.clicked.connect(callback)
         return btn
 
+    def set_structural(self, structural):
+        """
+        Switch between text and structural search.
+        Replacing and the text search options do not apply to structural queries.
+
+        Args:
+            structural: True for structural mode
+        """
+        self.structural.setChecked(structural)
+        self.search_input.setPlaceholderText(
+            "Structural query, e.g. instance fifo DEPTH>64" if structural else "Find text...")
+        for widget in (self.replace_input, self.replace_btn, self.replace_all_btn,
+                       self.case_sensitive, self.whole_words):
+            widget.setEnabled(not structural)
+        self.status_label.setText("")
+
+    def set_status(self, message, color="#D4D4D4"):
+        """
+        Show a message in the status label.
+
+        Args:
+            message: Text to show
+            color: Text color
+        """
+        self.status_label.setText(message)
+        self.status_label.setStyleSheet(f"color: {color};")
+
     def focusSearchInput(self):
         """
         Focus the search input field and select its contents.
@@ -250,9 +294,13 @@ class SearchWidget(QWidget):
         Find the next occurrence of the search text.
         Wraps around to the beginning of the document if no match is found forward.
         Updates the status label with the search result.
+        In structural mode, asks for a project search instead.
         """
+        if self.structural.isChecked():
+            self.structuralSearchRequested.emit(self.search_input.text())
+            return
         text = self.search_input.text()
-        if not text:
+        if not text or self.editor is None:
             return
 
         # Set up search flags based on options
@@ -262,6 +310,12 @@ class SearchWidget(QWidget):
         if self.whole_words.isChecked():
             flags |= QTextDocument.FindWholeWords
 
+        if isinstance(self.editor, LargeFileViewer):
+            # The large file viewer searches its memory map on a thread and wraps on its own
+            self.set_status("Searching...")
+            self.editor.find(text, flags, lambda found: self.show_result(found, text))
+            return
+
         cursor = self.editor.textCursor()
         found = self.editor.find(text, flags)
 
@@ -270,23 +324,20 @@ class SearchWidget(QWidget):
             cursor.movePosition(cursor.Start)
             self.editor.setTextCursor(cursor)
             found = self.editor.find(text, flags)
-
-        # Update status
-        if found:
-            self.status_label.setText("")
-            self.last_search = text
-        else:
-            self.status_label.setText("No matches found")
-            self.status_label.setStyleSheet("color: #F48771;")
+        self.show_result(found, text)
 
     def find_previous(self):
         """
         Find the previous occurrence of the search text.
         Wraps around to the end of the document if no match is found backward.
         Updates the status label with the search result.
+        In structural mode, asks for a project search instead.
         """
+        if self.structural.isChecked():
+            self.structuralSearchRequested.emit(self.search_input.text())
+            return
         text = self.search_input.text()
-        if not text:
+        if not text or self.editor is None:
             return
 
         # Set up search flags based on options
@@ -297,6 +348,12 @@ class SearchWidget(QWidget):
         if self.whole_words.isChecked():
             flags |= QTextDocument.FindWholeWords
 
+        if isinstance(self.editor, LargeFileViewer):
+            # The large file viewer searches its memory map on a thread and wraps on its own
+            self.set_status("Searching...")
+            self.editor.find(text, flags, lambda found: self.show_result(found, text))
+            return
+
         cursor = self.editor.textCursor()
         found = self.editor.find(text, flags)
 
@@ -305,8 +362,16 @@ class SearchWidget(QWidget):
             cursor.movePosition(cursor.End)
             self.editor.setTextCursor(cursor)
             found = self.editor.find(text, flags)
+        self.show_result(found, text)
+
+    def show_result(self, found, text):
+        """
+        Update the status label with the outcome of a search.
 
-        # Update status
+        Args:
+            found: True if a match was found
+            text: Text that was searched for
+        """
         if found:
             self.status_label.setText("")
             self.last_search = text
@@ -320,6 +385,8 @@ class SearchWidget(QWidget):
         Only replaces if text is selected (presumably from a find operation).
         Automatically finds the next match after replacing.
         """
+        if self.editor is None or self.editor.isReadOnly():
+            return
         if self.editor.textCursor().hasSelection():
             self.editor.textCursor().insertText(self.replace_input.text())
             self.find_next()
@@ -331,7 +398,7 @@ class SearchWidget(QWidget):
         Updates the status label with the number of replacements made.
         """
         text = self.search_input.text()
-        if not text:
+        if not text or self.editor is None or self.editor.isReadOnly():
             return
 
         count = 0
@@ -0,0 +1,360 @@
+# semantic_highlighting.py
+import queue
+import re
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from code_navigation import connection_target
+from verilog_parser import parse_verilog
+
+# Net types whose names are colored as nets; other declared types are variables
+WIRE_TYPES = frozenset(['wire', 'tri', 'tri0', 'tri1', 'wand', 'wor', 'triand', 'trior', 'trireg',
+                        'uwire', 'supply0', 'supply1'])
+CHUNK_END = re.compile(r'\bend(?:module|interface|program|package)\b[^\n]*\n')
+CACHE_SIZE = 4096  # Classified chunks kept by the worker
+
+
+def symbol_class(symbol):
+    """
+    Map a declaration to the theme color of its uses.
+
+    Args:
+        symbol: Symbol from the parser
+
+    Returns:
+        str: Theme key, or None for symbols that are not colored
+    """
+    if symbol.kind == 'port':
+        return 'ports'
+    if symbol.kind == 'parameter':
+        return 'parameters'
+    if symbol.kind == 'module':
+        return 'module_name'
+    if symbol.kind == 'instance':
+        return 'instance_name'
+    if symbol.kind == 'net':
+        return 'nets' if symbol.detail in WIRE_TYPES else 'variables'
+    return None
+
+
+def classify_chunk(text):
+    """
+    Classify the identifiers and strings of a piece of source, normally one
+    module, from its own declarations.
+
+    Args:
+        text: Source text
+
+    Returns:
+        list: Per line, a tuple of (column, length, theme key) spans
+    """
+    result = parse_verilog(text)
+    lines = [[] for _ in range(text.count('\n') + 1)]
+    modules = sorted((s.line, s.end_line if s.end_line is not None else len(lines), s.name)
+                     for s in result.symbols if s.kind == 'module')
+    scopes = {}  # Module name (None at file level) -> {name: theme key}
+    module_types = set()
+    for symbol in result.symbols:
+        key = symbol_class(symbol)
+        if key is not None:
+            scopes.setdefault(symbol.scope, {})[symbol.name] = key
+        if symbol.kind == 'instance':
+            module_types.add(symbol.detail)
+    file_level = scopes.get(None, {})
+
+    tokens = result.tokens
+    module_index = 0
+    for index, token in enumerate(tokens):
+        if token.kind == 'string':
+            lines[token.line].append((token.column, len(token.text), 'strings'))
+            continue
+        if token.kind != 'identifier':
+            continue
+        while module_index < len(modules) and modules[module_index][1] < token.line:
+            module_index += 1
+        scope = None
+        if module_index < len(modules) and modules[module_index][0] <= token.line:
+            scope = modules[module_index][2]
+
+        if index and tokens[index - 1].text == '.':
+            target = connection_target(tokens, index)
+            key = None if target is None else ('ports' if target[1] == 'port' else 'parameters')
+        else:
+            key = scopes.get(scope, {}).get(token.text) or file_level.get(token.text)
+            if key is None and token.text in module_types:
+                key = 'module_name'
+        if key is not None:
+            lines[token.line].append((token.column, len(token.text), key))
+    return [tuple(spans) for spans in lines]
+
+
+def split_chunks(text):
+    """
+    Split source into pieces that end after each end keyword of a module,
+    interface, program or package. Pieces that did not change can reuse
+    their previous classification.
+
+    Args:
+        text: Source text
+
+    Returns:
+        list: Text pieces, which concatenate to the original text
+    """
+    chunks = []
+    start = 0
+    for match in CHUNK_END.finditer(text):
+        chunks.append(text[start:match.end()])
+        start = match.end()
+    chunks.append(text[start:])
+    return chunks
+
+
+class SemanticWorker(QThread):
+    """
+    Background thread that classifies documents for semantic highlighting.
+    Shared by all editors; only the newest request of each overlay is
+    served. Classifications are cached per module-sized chunk, so after an
+    edit only the edited module is parsed again.
+    """
+
+    classified = pyqtSignal(object, int, object, object)  # (overlay, revision, spans per line, line hashes)
+
+    def __init__(self, parent=None):
+        """
+        Initialize the worker; call start() to run it.
+
+        Args:
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.requests = queue.Queue()
+        self.cache = OrderedDict()  # Chunk text -> spans per line
+
+    def request(self, overlay, revision, text):
+        """
+        Queue a document snapshot.
+
+        Args:
+            overlay: SemanticOverlay that receives the result
+            revision: TokenCache.edits of the snapshot
+            text: Document text
+        """
+        self.requests.put((overlay, revision, text))
+
+    def stop(self):
+        """
+        Stop the thread and wait for it.
+        """
+        self.requests.put(None)
+        self.wait()
+
+    def run(self):
+        """
+        Serve requests until stopped.
+        """
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            # Skip snapshots that a newer one of the same overlay replaced
+            latest = {request[0]: request}
+            stop = False
+            while True:
+                try:
+                    request = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                latest[request[0]] = request
+            for overlay, revision, text in latest.values():
+                spans = self.classify(text)
+                hashes = [hash(line) for line in text.split('\n')]
+                self.classified.emit(overlay, revision, spans, hashes)
+            if stop:
+                break
+
+    def classify(self, text):
+        """
+        Classify a whole document from cached and new chunks.
+
+        Args:
+            text: Document text
+
+        Returns:
+            list: Per line, a tuple of (column, length, theme key) spans
+        """
+        spans = []
+        for chunk in split_chunks(text):
+            chunk_spans = self.cache.get(chunk)
+            if chunk_spans is None:
+                chunk_spans = classify_chunk(chunk)
+                self.cache[chunk] = chunk_spans
+                if len(self.cache) > CACHE_SIZE:
+                    self.cache.popitem(last=False)
+            else:
+                self.cache.move_to_end(chunk)
+            # A chunk ends with a newline, so its last (empty) line starts the next chunk
+            if spans:
+                spans[-1] = spans[-1] + chunk_spans[0]
+                spans.extend(chunk_spans[1:])
+            else:
+                spans.extend(chunk_spans)
+        return spans
+
+
+_worker = None
+
+
+def shared_worker():
+    """
+    Return the worker thread shared by all overlays, starting it on first use.
+
+    Returns:
+        SemanticWorker: Running worker
+    """
+    global _worker
+    if _worker is None:
+        _worker = SemanticWorker()
+        _worker.classified.connect(lambda overlay, revision, spans, hashes:
+                                   overlay.on_classified(revision, spans, hashes))
+        _worker.start()
+    return _worker
+
+
+def stop_shared_worker():
+    """
+    Stop the shared worker, if it was started.
+    """
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+class SemanticOverlay(QObject):
+    """
+    Semantic colors for one editor: ports, parameters, nets, variables,
+    module types, instance names and strings, told apart by the declarations
+    of the file rather than by regular expressions.
+    Classification runs on the shared SemanticWorker after typing pauses;
+    the highlighter asks the overlay for the spans of each block it formats,
+    and results are only pushed into the blocks that are visible, the rest
+    being brought up to date as they scroll into view. Spans are used only
+    for lines whose text is unchanged since the classification.
+    """
+
+    def __init__(self, editor):
+        """
+        Attach an overlay to an editor and classify its document.
+
+        Args:
+            editor: VerilogEditor with a highlighter
+        """
+        super().__init__(editor)
+        self.editor = editor
+        self.spans = []  # Per line spans of the latest classification
+        self.hashes = []  # Per line hash of the text that was classified
+        self.applied = {}  # Block number -> spans the block was last highlighted with
+        self.requested = -1  # TokenCache.edits of the latest snapshot sent to the worker
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(250)
+        self.timer.timeout.connect(self.request)
+        editor.token_cache.edited.connect(self.timer.start)  # Not contentsChanged: refresh() emits it
+        editor.updateRequest.connect(self.on_update_request)
+        self.timer.start()
+
+    def request(self):
+        """
+        Send a snapshot of the document to the worker, unless it was already sent.
+        """
+        revision = self.editor.token_cache.edits
+        if revision != self.requested:
+            self.requested = revision
+            shared_worker().request(self, revision, self.editor.toPlainText())
+
+    def on_classified(self, revision, spans, hashes):
+        """
+        Take a classification and refresh the visible blocks it changes.
+
+        Args:
+            revision: TokenCache.edits of the text that was classified
+            spans: Spans per line
+            hashes: Hash of each classified line
+        """
+        try:
+            self.editor.document()
+        except RuntimeError:
+            return  # Editor closed meanwhile
+        current = self.editor.token_cache.edits
+        self.spans = spans
+        self.hashes = hashes
+        visible = self.visible_blocks()
+        self.applied = {number: self.applied[number] for number in visible if number in self.applied}
+        self.refresh(visible)
+        if revision != current:
+            self.timer.start()  # Edited while classifying
+
+    def spans_for(self, block, text):
+        """
+        Return the spans of a block, if its classification is current.
+        Called by the highlighter for every block it formats.
+
+        Args:
+            block: QTextBlock being highlighted
+            text: Its text
+
+        Returns:
+            tuple: (column, length, theme key) spans, possibly empty
+        """
+        number = block.blockNumber()
+        spans = ()
+        if number < len(self.spans) and self.hashes[number] == hash(text):
+            spans = self.spans[number]
+        self.applied[number] = spans
+        return spans
+
+    def visible_blocks(self):
+        """
+        Return the numbers of the blocks shown in the viewport.
+
+        Returns:
+            range: Block numbers from the first to the last visible block
+        """
+        editor = self.editor
+        first = editor.firstVisibleBlock()
+        last = editor.cursorForPosition(editor.viewport().rect().bottomLeft()).block()
+        return range(first.blockNumber(), last.blockNumber() + 1)
+
+    def refresh(self, numbers):
+        """
+        Rehighlight the given blocks whose spans differ from the ones they show.
+
+        Args:
+            numbers: Block numbers to check
+        """
+        document = self.editor.document()
+        highlighter = self.editor.highlighter
+        for number in numbers:
+            block = document.findBlockByNumber(number)
+            if not block.isValid():
+                break
+            wanted = ()
+            if number < len(self.spans) and self.hashes[number] == hash(block.text()):
+                wanted = self.spans[number]
+            if self.applied.get(number, ()) != wanted or number not in self.applied:
+                highlighter.rehighlightBlock(block)
+
+    def on_update_request(self, rect, dy):
+        """
+        Bring blocks scrolled into view up to date.
+
+        Args:
+            rect: Updated viewport area
+            dy: Vertical scroll distance in pixels
+        """
+        if dy or rect.contains(self.editor.viewport().rect()):
+            self.refresh([number for number in self.visible_blocks() if number not in self.applied])
@@ -0,0 +1,522 @@
+# structural_query.py
+import os
+import re
+from collections import namedtuple
+from fnmatch import fnmatchcase
+
+from lint_checks import split_connections
+from verilog_parser import (KEYWORDS, PROCESS_KEYWORDS, parse_verilog, skip_group, statement_end,
+                            strip_directives)
+
+# One structural element of a file. line and column (0-based) locate its name
+# or keyword; text is the source line, shown in the results. attributes maps a
+# query key to the names the element has for it; parameters maps parameter
+# names to their value text (instance overrides, or a module's defaults).
+Node = namedtuple('Node', 'kind name line column scope text attributes parameters')
+
+# A parsed query: node kinds it selects, (key, pattern, negated) terms and
+# (parameter, operator, value, negated) comparisons
+Query = namedtuple('Query', 'kinds terms comparisons')
+
+# Query kind -> node kinds it selects
+QUERY_KINDS = {
+    'module': ('module',),
+    'instance': ('instance',),
+    'process': tuple(sorted(PROCESS_KEYWORDS)),
+    'always': ('always', 'always_comb', 'always_ff', 'always_latch'),
+    'assign': ('assign',),
+    'port': ('port',),
+    'net': ('net',),
+    'parameter': ('parameter',),
+    'function': ('function',),
+    'task': ('task',),
+}
+QUERY_KINDS.update({keyword: (keyword,) for keyword in PROCESS_KEYWORDS if keyword not in QUERY_KINDS})
+
+# Node kind -> attribute keys a query may test; a bare word tests the first one
+ATTRIBUTE_KEYS = {
+    'module': ('name', 'port', 'param', 'instantiates'),
+    'instance': ('module', 'name', 'in', 'port', 'connects'),
+    'process': ('name', 'in', 'posedge', 'negedge', 'on', 'assigns', 'reads'),
+    'assign': ('assigns', 'in', 'reads'),
+    'port': ('name', 'in', 'dir', 'type', 'width'),
+    'net': ('name', 'in', 'type', 'width'),
+    'parameter': ('name', 'in', 'value'),
+    'function': ('name', 'in'),
+    'task': ('name', 'in'),
+}
+
+TERM_PATTERN = re.compile(r'(-?)(?:([A-Za-z_][\w$]*)(>=|<=|!=|==|=|>|<)(.+)|(\w+):(.+)|(.+))$')
+NUMBER_PATTERN = re.compile(r"(?:\d[\d_]*)?\s*'[sS]?([bBoOdDhH])\s*([0-9a-fA-F_]+)$|(\d[\d_]*)$")
+RADIX = {'b': 2, 'o': 8, 'd': 10, 'h': 16}
+STATEMENT_BREAKS = frozenset([';', ',', 'begin', 'end', 'else', 'fork', 'join', 'join_any', 'join_none',
+                              'endcase', 'do'])
+
+
+def attribute_keys(kind):
+    """
+    Return the attribute keys of a node kind.
+
+    Args:
+        kind: Node kind, e.g. 'instance' or 'always_ff'
+
+    Returns:
+        tuple: Keys a query may use with this kind
+    """
+    return ATTRIBUTE_KEYS['process' if kind in PROCESS_KEYWORDS else kind]
+
+
+def parse_query(text):
+    """
+    Parse a structural query.
+
+    A query is a node kind followed by terms that must all hold:
+        word          the node's main name matches (instances: the module type)
+        key:pattern   one of the node's names for key matches, e.g.
+                      posedge:clk_a, assigns:state, port:rd_*, in:top
+        NAME<op>value parameter NAME compares to value, with op one of
+                      = != > < >= <=; numbers compare by value, e.g. DEPTH>64
+    Patterns are case-sensitive globs. A leading '-' negates a term.
+    Examples:
+        always posedge:clk_a assigns:state
+        instance fifo DEPTH>64
+
+    Args:
+        text: Query text
+
+    Returns:
+        Query: Parsed query
+
+    Raises:
+        ValueError: If the query is empty or uses an unknown kind or key
+    """
+    words = text.split()
+    if not words:
+        raise ValueError('Empty query')
+    kind = words[0]
+    if kind not in QUERY_KINDS:
+        raise ValueError(f"Unknown kind '{kind}'; use one of: {', '.join(sorted(QUERY_KINDS))}")
+    kinds = QUERY_KINDS[kind]
+    keys = attribute_keys(kinds[0])
+    terms = []
+    comparisons = []
+    for word in words[1:]:
+        match = TERM_PATTERN.match(word)
+        negated = bool(match.group(1))
+        if match.group(2):
+            comparisons.append((match.group(2), '=' if match.group(3) == '==' else match.group(3),
+                                match.group(4), negated))
+        elif match.group(5):
+            if match.group(5) not in keys:
+                raise ValueError(f"'{kind}' has no key '{match.group(5)}'; use one of: {', '.join(keys)}")
+            terms.append((match.group(5), match.group(6), negated))
+        elif match.group(7):
+            terms.append((keys[0], match.group(7), negated))
+        else:
+            raise ValueError(f"Incomplete term '{word}'")
+    return Query(frozenset(kinds), tuple(terms), tuple(comparisons))
+
+
+def number_value(text):
+    """
+    Read a Verilog integer literal such as 64, 1_024, 8'd64 or 'h40.
+
+    Args:
+        text: Value text
+
+    Returns:
+        int: Value, or None if the text is not a plain literal
+    """
+    text = (text or '').strip()
+    negative = text.startswith('-')
+    match = NUMBER_PATTERN.match(text.lstrip('-').strip())
+    if match is None:
+        return None
+    if match.group(3) is not None:
+        value = int(match.group(3).replace('_', ''))
+    else:
+        try:
+            value = int(match.group(2).replace('_', ''), RADIX[match.group(1).lower()])
+        except ValueError:
+            return None
+    return -value if negative else value
+
+
+def compare(value, operator, expected):
+    """
+    Compare a parameter value with a query value.
+
+    Args:
+        value: Parameter value text
+        operator: One of = != > < >= <=
+        expected: Value text from the query
+
+    Returns:
+        bool: True if the comparison holds; values that are not numbers can
+              only be tested with = and !=
+    """
+    left, right = number_value(value), number_value(expected)
+    if left is None or right is None:
+        if operator not in ('=', '!='):
+            return False
+        left, right = ' '.join(value.split()), ' '.join(expected.split())
+    if operator == '=':
+        return left == right
+    if operator == '!=':
+        return left != right
+    if operator == '>':
+        return left > right
+    if operator == '<':
+        return left < right
+    if operator == '>=':
+        return left >= right
+    return left <= right
+
+
+def parameter_value(node, name, interfaces):
+    """
+    Find the value a parameter has for a node. Instances use their override,
+    by name or by position, and fall back to the module's default.
+
+    Args:
+        node: Node
+        name: Parameter name
+        interfaces: Module name -> {parameter name: default value} in
+                    declaration order
+
+    Returns:
+        str: Value text, or None if unknown
+    """
+    if name in node.parameters:
+        return node.parameters[name]
+    if node.kind != 'instance':
+        return None
+    defaults = interfaces.get(node.attributes['module'][0], {})
+    position = list(defaults).index(name) if name in defaults else -1
+    if f'#{position}' in node.parameters:
+        return node.parameters[f'#{position}']
+    return defaults.get(name)
+
+
+def matches(query, node, interfaces):
+    """
+    Test a node against a query.
+
+    Args:
+        query: Query from parse_query()
+        node: Node
+        interfaces: Module parameters, as for parameter_value()
+
+    Returns:
+        bool: True if every term holds
+    """
+    if node.kind not in query.kinds:
+        return False
+    for key, pattern, negated in query.terms:
+        found = any(fnmatchcase(value, pattern) for value in node.attributes.get(key, ()))
+        if found == negated:
+            return False
+    for name, operator, expected, negated in query.comparisons:
+        value = parameter_value(node, name, interfaces)
+        if (value is not None and compare(value, operator, expected)) == negated:
+            return False
+    return True
+
+
+def names_in(tokens, start, end):
+    """
+    Collect the identifiers of a token range, in order and without repeats.
+
+    Args:
+        tokens: Token list
+        start: First index
+        end: Index just after the range
+
+    Returns:
+        tuple: Names that are not keywords or system functions
+    """
+    names = {}
+    for token in tokens[start:end]:
+        if token.kind == 'identifier' and token.text not in KEYWORDS and not token.text.startswith('$'):
+            names[token.text] = None
+    return tuple(names)
+
+
+def assignments(tokens, start, end):
+    """
+    Find what a piece of behavioural code assigns and reads.
+    The target of '=' or '<=' is the name before it at statement level; a
+    concatenation target contributes all its names. Indices and everything
+    on the right-hand side or in conditions count as reads.
+
+    Args:
+        tokens: Tokens without preprocessor directives
+        start: First index
+        end: Index just after the code
+
+    Returns:
+        tuple: (assigned names, read names)
+    """
+    targets = {}
+    reads = {}
+    depth = 0
+    target_start = start  # Where the current statement's left-hand side begins
+    in_value = False  # Past the assignment operator of the current statement
+    for index in range(start, end):
+        token = tokens[index]
+        text = token.text
+        if text in ('(', '[', '{', "'{"):
+            depth += 1
+        elif text in (')', ']', '}'):
+            depth -= 1
+            if depth == 0 and text == ')' and not in_value:
+                target_start = index + 1  # After if (...), @(...), for (...) and the like
+        elif depth == 0 and text in ('=', '<=') and not in_value:
+            position = target_start
+            while position < index:
+                if tokens[position].text == '[':
+                    position = skip_group(tokens, position)  # Index expressions are reads
+                    continue
+                if tokens[position].text == '.':
+                    position += 2  # Member of a struct or interface
+                    continue
+                if tokens[position].kind == 'identifier' and tokens[position].text not in KEYWORDS:
+                    targets[tokens[position].text] = None
+                position += 1
+            in_value = True
+        elif depth == 0 and (text in STATEMENT_BREAKS or (text == ':' and not in_value)):
+            in_value = False
+            target_start = index + 1
+        if token.kind == 'identifier' and (in_value or depth > 0) and text not in KEYWORDS \
+                and not text.startswith('$'):
+            reads[text] = None
+    return tuple(targets), tuple(reads)
+
+
+def event_control(tokens, index):
+    """
+    Read the event control of a process, e.g. @(posedge clk or negedge rst_n).
+
+    Args:
+        tokens: Tokens without preprocessor directives
+        index: Index just after the process keyword
+
+    Returns:
+        tuple: (edges dict of 'posedge'/'negedge'/'on' -> names, index after the event control)
+    """
+    edges = {'posedge': [], 'negedge': [], 'on': []}
+    if index >= len(tokens) or tokens[index].text != '@':
+        return edges, index
+    index += 1
+    if index < len(tokens) and tokens[index].text == '(':
+        end = skip_group(tokens, index)
+        segment = []
+        for token in tokens[index + 1:end - 1] + [None]:
+            if token is not None and token.text not in ('or', ','):
+                segment.append(token)
+                continue
+            names = names_in(segment, 0, len(segment))
+            if names:
+                edge = segment[0].text
+                if edge in ('posedge', 'negedge'):
+                    edges[edge].append(names[0])
+                edges['on'].append(names[0])
+            elif any(t.text == '*' for t in segment):
+                edges['on'].append('*')
+            segment = []
+        return edges, end
+    if index < len(tokens) and tokens[index].text == '*':
+        edges['on'].append('*')
+        return edges, index + 1
+    if index < len(tokens):
+        edges['on'].append(tokens[index].text)  # Named event
+        index += 1
+    return edges, index
+
+
+def extract_nodes(text):
+    """
+    Build the structural nodes of a file: modules, instances, processes,
+    continuous assignments and declarations.
+
+    Args:
+        text: Source text
+
+    Returns:
+        list: Node tuples in source order
+    """
+    result = parse_verilog(text)
+    tokens = strip_directives(result.tokens)
+    lines = text.split('\n')
+    positions = {(token.line, token.column): index for index, token in enumerate(tokens)}
+
+    def node(kind, name, token, scope, attributes, parameters=None):
+        line_text = lines[token.line] if token.line < len(lines) else ''
+        return Node(kind, name, token.line, token.column, scope, line_text, attributes, parameters or {})
+
+    nodes = []
+    scopes = {}  # Module name -> {'port': [...], 'param': {...}, 'instantiates': [...]}
+    for symbol in result.symbols:
+        if symbol.kind == 'module':
+            scopes[symbol.name] = {'port': [], 'param': {}, 'instantiates': []}
+    for symbol in result.symbols:
+        members = scopes.get(symbol.scope)
+        if symbol.kind in ('port', 'net', 'parameter', 'function', 'task'):
+            attributes = {'name': (symbol.name,), 'in': (symbol.scope,) if symbol.scope else ()}
+            parameters = None
+            if symbol.kind == 'port':
+                direction, _, net_type = (symbol.detail or '').partition(' ')
+                attributes.update(dir=(direction,), type=(net_type,) if net_type else (), width=(symbol.width,))
+                if members is not None:
+                    members['port'].append(symbol.name)
+            elif symbol.kind == 'net':
+                attributes.update(type=(symbol.detail or '',), width=(symbol.width,))
+            elif symbol.kind == 'parameter':
+                attributes['value'] = (symbol.detail or '',)
+                parameters = {symbol.name: symbol.detail} if symbol.detail is not None else None
+                if members is not None:
+                    members['param'][symbol.name] = symbol.detail
+            nodes.append(Node(symbol.kind, symbol.name, symbol.line, symbol.column, symbol.scope,
+                              lines[symbol.line] if symbol.line < len(lines) else '', attributes,
+                              parameters or {}))
+        elif symbol.kind == 'instance':
+            if members is not None:
+                members['instantiates'].append(symbol.detail)
+            index = positions.get((symbol.line, symbol.column))
+            if index is None:
+                continue
+            nodes.append(instance_node(tokens, index, symbol, lines))
+    for symbol in result.symbols:
+        if symbol.kind == 'module':
+            members = scopes[symbol.name]
+            nodes.append(Node('module', symbol.name, symbol.line, symbol.column, None,
+                              lines[symbol.line] if symbol.line < len(lines) else '',
+                              {'name': (symbol.name,), 'port': tuple(members['port']),
+                               'param': tuple(members['param']), 'instantiates': tuple(members['instantiates'])},
+                              {name: value for name, value in members['param'].items() if value is not None}))
+
+    # Processes and continuous assignments are not declarations; find them in the tokens
+    modules = sorted((s.line, s.end_line if s.end_line is not None else len(lines), s.name)
+                     for s in result.symbols if s.kind == 'module')
+    module_index = 0
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token.text not in PROCESS_KEYWORDS and token.text != 'assign':
+            index += 1
+            continue
+        while module_index < len(modules) and modules[module_index][1] < token.line:
+            module_index += 1
+        scope = None
+        if module_index < len(modules) and modules[module_index][0] <= token.line:
+            scope = modules[module_index][2]
+        scope_names = (scope,) if scope else ()
+        if token.text == 'assign':
+            end = index + 1
+            while end < len(tokens) and tokens[end].text != ';':
+                end = skip_group(tokens, end) if tokens[end].text in ('(', '[', '{', "'{") else end + 1
+            targets, reads = assignments(tokens, index + 1, end)
+            nodes.append(node('assign', targets[0] if targets else '', token, scope,
+                              {'assigns': targets, 'in': scope_names, 'reads': reads}))
+            index = end + 1
+            continue
+        edges, body = event_control(tokens, index + 1)
+        end = statement_end(tokens, index + 1)
+        label = ''
+        if body < len(tokens) and tokens[body].text == 'begin' and body + 2 < len(tokens) \
+                and tokens[body + 1].text == ':':
+            label = tokens[body + 2].text
+        targets, reads = assignments(tokens, body, end)
+        nodes.append(node(token.text, label, token, scope,
+                          {'name': (label,) if label else (), 'in': scope_names, 'posedge': tuple(edges['posedge']),
+                           'negedge': tuple(edges['negedge']), 'on': tuple(edges['on']),
+                           'assigns': targets, 'reads': reads}))
+        index = max(end, index + 1)
+    nodes.sort(key=lambda n: (n.line, n.column))
+    return nodes
+
+
+def instance_node(tokens, index, symbol, lines):
+    """
+    Build the node of a module instance, with its parameter overrides and
+    port connections.
+
+    Args:
+        tokens: Tokens without preprocessor directives
+        index: Index of the instance name
+        symbol: Instance Symbol from the parser
+        lines: Source lines
+
+    Returns:
+        Node: Instance node
+    """
+    parameters = {}
+    before = index - 1
+    if before > 0 and tokens[before].text == ')':
+        depth = 0
+        while before >= 0:
+            if tokens[before].text == ')':
+                depth += 1
+            elif tokens[before].text == '(':
+                depth -= 1
+                if depth == 0:
+                    break
+            before -= 1
+        if before > 0 and tokens[before - 1].text == '#':
+            for position, (first, last) in enumerate(split_connections(tokens, before, skip_group(tokens, before))):
+                if tokens[first].text == '.' and first + 2 < last and tokens[first + 2].text == '(':
+                    parameters[tokens[first + 1].text] = ' '.join(t.text for t in tokens[first + 3:last - 1])
+                elif tokens[first].text != '.':
+                    parameters[f'#{position}'] = ' '.join(t.text for t in tokens[first:last])
+    elif before > 0 and tokens[before - 1].text == '#':
+        parameters['#0'] = tokens[before].text  # Single unparenthesized value: fifo #8 u (...)
+
+    ports = []
+    connects = {}
+    index += 1
+    while index < len(tokens) and tokens[index].text == '[':
+        index = skip_group(tokens, index)
+    if index < len(tokens) and tokens[index].text == '(':
+        for first, last in split_connections(tokens, index, skip_group(tokens, index)):
+            if tokens[first].text == '.' and first + 1 < last:
+                ports.append(tokens[first + 1].text)
+                connects.update(dict.fromkeys(names_in(tokens, first + 2, last)))
+            else:
+                connects.update(dict.fromkeys(names_in(tokens, first, last)))
+    return Node('instance', symbol.name, symbol.line, symbol.column, symbol.scope,
+                lines[symbol.line] if symbol.line < len(lines) else '',
+                {'module': (symbol.detail,), 'name': (symbol.name,), 'in': (symbol.scope,) if symbol.scope else (),
+                 'port': tuple(ports), 'connects': tuple(connects)},
+                parameters)
+
+
+def extract_batch(items):
+    """
+    Extract the nodes of several files; run in a worker process.
+
+    Args:
+        items: List of (path, text) pairs; text None means read the file
+
+    Returns:
+        list: (path, signature, nodes) tuples; signature is the file's
+              (size, mtime_ns) when it was read, or None for given text;
+              nodes is None if the file could not be read
+    """
+    extracted = []
+    for path, text in items:
+        signature = None
+        if text is None:
+            try:
+                stat = os.stat(path)
+                with open(path, 'r', errors='replace') as f:
+                    text = f.read()
+                signature = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                extracted.append((path, None, None))
+                continue
+        try:
+            nodes = extract_nodes(text)
+        except RecursionError:
+            nodes = []
+        extracted.append((path, signature, nodes))
+    return extracted
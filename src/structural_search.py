@@ -0,0 +1,341 @@
+# structural_search.py
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from structural_query import extract_batch, matches
+
+EMIT_INTERVAL = 200  # Cached files matched between two result batches
+
+
+class ParseStore:
+    """
+    Structural nodes of every file searched so far, kept for the session.
+    Files are keyed by path and valid while their size and modification
+    time are unchanged; unsaved documents are keyed by a hash of their text.
+    A repeated search only parses the files that changed since the last one.
+    Searches run on their own threads, so the store is guarded by a lock.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty store.
+        """
+        self.entries = {}  # Path -> (signature, nodes)
+        self.lock = threading.Lock()
+
+    def get(self, path, signature):
+        """
+        Get the nodes of a file if they are current.
+
+        Args:
+            path: File path
+            signature: (size, mtime_ns) of the file, or ('text', hash) of a document
+
+        Returns:
+            list: Nodes, or None if the file must be parsed
+        """
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        return None
+
+    def put(self, path, signature, nodes):
+        """
+        Store the nodes of a file.
+
+        Args:
+            path: File path
+            signature: Signature the nodes are valid for
+            nodes: Node tuples
+        """
+        with self.lock:
+            self.entries[path] = (signature, nodes)
+
+    def forget(self, paths):
+        """
+        Drop files that no longer exist or left the project.
+
+        Args:
+            paths: File paths
+        """
+        with self.lock:
+            for path in paths:
+                self.entries.pop(path, None)
+
+
+class SearchRun(QThread):
+    """
+    One structural search. Cached files are matched right away; the others
+    are parsed in batches on the worker processes, stored, and matched as
+    each batch returns, so results stream in while the search runs.
+    """
+
+    found = pyqtSignal(object)  # List of (path, line, column, line text)
+    progress = pyqtSignal(int, int)  # (files searched, files in total)
+    failed = pyqtSignal(str)  # Error message; the worker pool is unusable
+
+    def __init__(self, query, files, documents, store, pool, database, settings, parent=None):
+        """
+        Initialize the search; call start() to run it.
+
+        Args:
+            query: Query from parse_query()
+            files: Paths of the project files
+            documents: Dict of path -> text of open documents with unsaved changes
+            store: ParseStore shared by all searches
+            pool: ProcessPoolExecutor that parses files
+            database: Symbol database path for module parameter defaults, or None
+            settings: structural_search configuration section
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.query = query
+        self.files = files
+        self.documents = documents
+        self.store = store
+        self.pool = pool
+        self.database = database
+        self.batch_size = max(1, settings.get('batch_size', 16))
+        self.max_results = settings.get('max_results', 5000)
+        self.cancelled = False
+        self.count = 0  # Matches found
+        self.truncated = False  # Stopped at max_results
+
+    def cancel(self):
+        """
+        Stop the search; parsing batches already running still finish.
+        """
+        self.cancelled = True
+
+    def interfaces(self):
+        """
+        Read the parameter defaults of the project's modules from the symbol database.
+
+        Returns:
+            dict: Module name -> {parameter name: default value} in declaration order
+        """
+        interfaces = {}
+        if not self.database or not os.path.exists(self.database):
+            return interfaces
+        try:
+            connection = sqlite3.connect(self.database, timeout=1)
+            try:
+                rows = connection.execute(
+                    "SELECT scope, name, detail FROM symbols WHERE kind = 'parameter' AND scope IS NOT NULL "
+                    'ORDER BY file_id, line, column').fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return interfaces
+        for scope, name, detail in rows:
+            interfaces.setdefault(scope, {})[name] = detail
+        return interfaces
+
+    def match(self, path, nodes, interfaces, batch):
+        """
+        Add the matching nodes of a file to a result batch.
+
+        Args:
+            path: File path
+            nodes: Its nodes
+            interfaces: Module parameter defaults
+            batch: List receiving (path, line, column, line text) tuples
+        """
+        for node in nodes:
+            if self.count >= self.max_results:
+                self.truncated = True
+                return
+            if matches(self.query, node, interfaces):
+                batch.append((path, node.line, node.column, node.text))
+                self.count += 1
+
+    def run(self):
+        """
+        Match cached files, then parse and match the rest.
+        """
+        interfaces = self.interfaces()
+        total = len(self.files) + len(self.documents)
+        done = 0
+        batch = []
+        pending = []  # (path, text or None) to parse
+        signatures = {}  # Path -> signature of a document's text
+        for path in self.files:
+            if self.cancelled:
+                return
+            if self.truncated:
+                break
+            if path in self.documents:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.store.forget([path])
+                done += 1
+                continue
+            nodes = self.store.get(path, (stat.st_size, stat.st_mtime_ns))
+            if nodes is None:
+                pending.append((path, None))
+                continue
+            self.match(path, nodes, interfaces, batch)
+            done += 1
+            if done % EMIT_INTERVAL == 0:
+                self.emit_batch(batch, done, total)
+                batch = []
+        for path, text in self.documents.items():
+            signatures[path] = ('text', hash(text))
+            nodes = self.store.get(path, signatures[path])
+            if nodes is None:
+                pending.append((path, text))
+            else:
+                self.match(path, nodes, interfaces, batch)
+                done += 1
+        self.emit_batch(batch, done, total)
+        if not pending or self.truncated:
+            return
+
+        try:
+            futures = {self.pool.submit(extract_batch, pending[start:start + self.batch_size])
+                       for start in range(0, len(pending), self.batch_size)}
+            while futures and not self.cancelled and not self.truncated:
+                finished, futures = wait(futures, timeout=0.1, return_when=FIRST_COMPLETED)
+                batch = []
+                for future in finished:
+                    for path, signature, nodes in future.result():
+                        done += 1
+                        if nodes is None:
+                            self.store.forget([path])
+                            continue
+                        self.store.put(path, signatures.get(path, signature), nodes)
+                        # Modules parsed now take precedence over the database
+                        for node in nodes:
+                            if node.kind == 'module':
+                                interfaces[node.name] = node.parameters
+                        self.match(path, nodes, interfaces, batch)
+                if finished:
+                    self.emit_batch(batch, done, total)
+            for future in futures:
+                future.cancel()
+        except (BrokenProcessPool, RuntimeError, OSError) as e:
+            self.failed.emit(str(e) or 'a worker process stopped')
+
+    def emit_batch(self, batch, done, total):
+        """
+        Report results and progress, unless the search was cancelled.
+
+        Args:
+            batch: New (path, line, column, line text) tuples
+            done: Files searched so far
+            total: Files to search
+        """
+        if self.cancelled:
+            return
+        if batch:
+            self.found.emit(batch)
+        self.progress.emit(done, total)
+
+
+class StructuralSearch(QObject):
+    """
+    Project-wide search over the structure of the code rather than its
+    characters: modules, instances with their parameters and connections,
+    always blocks with their sensitivity lists and assignments, continuous
+    assignments and declarations (see structural_query.parse_query for the
+    query syntax). Parsing runs in worker processes and its results are kept
+    in a ParseStore, so only files changed since the previous search are
+    parsed again. Starting a search cancels the one running.
+    """
+
+    found = pyqtSignal(object)  # List of (path, line, column, line text) of the running search
+    progress = pyqtSignal(int, int)  # (files searched, files in total)
+    finished = pyqtSignal(int, bool)  # (matches, stopped at the result limit)
+
+    def __init__(self, config, symbol_index, parent=None):
+        """
+        Initialize the search. The worker pool is started on the first search.
+
+        Args:
+            config: EditorConfig with the structural_search section
+            symbol_index: SymbolIndex listing the project files
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.settings = getattr(config, 'structural_search', {})
+        self.symbol_index = symbol_index
+        self.store = ParseStore()
+        self.pool = None
+        self.run = None  # SearchRun whose results are shown
+        self.runs = []  # SearchRun threads still running, including cancelled ones
+
+    def search(self, query, documents=None):
+        """
+        Start searching the project, cancelling the previous search.
+
+        Args:
+            query: Query from parse_query()
+            documents: Dict of path -> text of open documents with unsaved
+                       changes; they are searched instead of the saved files
+        """
+        self.cancel()
+        if self.pool is None:
+            # Spawned rather than forked: the GUI process runs threads
+            self.pool = ProcessPoolExecutor(max(1, self.settings.get('workers', 2)),
+                                            mp_context=multiprocessing.get_context('spawn'))
+        run = SearchRun(query, self.symbol_index.files(), dict(documents or {}), self.store, self.pool,
+                        self.symbol_index.database, self.settings, self)
+        run.found.connect(lambda batch: run is self.run and self.found.emit(batch))
+        run.progress.connect(lambda done, total: run is self.run and self.progress.emit(done, total))
+        run.failed.connect(self.on_failed)
+        run.finished.connect(lambda: self.on_run_finished(run))
+        self.run = run
+        self.runs.append(run)
+        run.start()
+
+    def cancel(self):
+        """
+        Cancel the running search; its remaining results are dropped.
+        """
+        if self.run is not None:
+            self.run.cancel()
+            self.run = None
+
+    def on_run_finished(self, run):
+        """
+        Forget a finished search thread and report the end of the current search.
+
+        Args:
+            run: Finished SearchRun
+        """
+        self.runs.remove(run)
+        if run is self.run:
+            self.run = None
+            self.finished.emit(run.count, run.truncated)
+
+    def on_failed(self, message):
+        """
+        Drop a broken worker pool; the next search starts a new one.
+
+        Args:
+            message: Error message
+        """
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def shutdown(self):
+        """
+        Cancel searches and stop the worker processes. Must be called before
+        the application exits.
+        """
+        self.cancel()
+        for run in list(self.runs):
+            run.cancel()
+            run.wait()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
@@ -0,0 +1,654 @@
+# symbol_index.py
+import hashlib
+import os
+import queue
+import sqlite3
+from array import array
+
+from PyQt5.QtCore import QObject, QThread, QStandardPaths, pyqtSignal
+from project_explorer import compile_patterns
+from path_index import walk_project
+from preprocessor import PreprocessorCache
+from verilog_parser import Symbol, identifier_names, parse_verilog
+
+SCHEMA_VERSION = 3  # Bump when the tables or the parser output change
+
+SCHEMA = '''
+    CREATE TABLE files (
+        id INTEGER PRIMARY KEY,
+        path TEXT UNIQUE NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        hash TEXT NOT NULL
+    );
+    CREATE TABLE symbols (
+        file_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        scope TEXT,
+        detail TEXT,
+        width TEXT,
+        line INTEGER NOT NULL,
+        column INTEGER NOT NULL,
+        end_line INTEGER
+    );
+    CREATE INDEX symbols_name ON symbols (name);
+    CREATE INDEX symbols_scope ON symbols (scope);
+    CREATE INDEX symbols_file ON symbols (file_id);
+    CREATE TABLE names (
+        file_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        positions BLOB NOT NULL
+    );
+    CREATE INDEX names_name ON names (name);
+    CREATE INDEX names_file ON names (file_id);
+'''
+
+
+def default_index_directory():
+    """
+    Return the per-user directory where symbol databases are kept.
+
+    Returns:
+        str: Directory path (not necessarily existing yet)
+    """
+    base = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+    return os.path.join(base or os.path.expanduser('~/.matcha'), 'index')
+
+
+def database_path_for(root, directory=None):
+    """
+    Return the symbol database file of a project root.
+
+    Args:
+        root: Project root directory
+        directory: Index directory, defaults to default_index_directory()
+
+    Returns:
+        str: Database path
+    """
+    name = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest() + '.db'
+    return os.path.join(directory or default_index_directory(), name)
+
+
+def open_database(path):
+    """
+    Open (and if needed create or upgrade) a symbol database.
+    WAL mode lets the GUI read while the indexer thread writes.
+
+    Args:
+        path: Database file path
+
+    Returns:
+        sqlite3.Connection: Open connection
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = sqlite3.connect(path, timeout=10)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    if connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        connection.executescript('DROP TABLE IF EXISTS names; DROP TABLE IF EXISTS symbols; '
+                                 'DROP TABLE IF EXISTS files;')
+        connection.executescript(SCHEMA)
+        connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        connection.commit()
+    return connection
+
+
+def index_file(connection, path, preprocessor=None, force=False):
+    """
+    Bring one file's symbols in the database up to date.
+    Files whose size and modification time are unchanged are skipped without
+    being read; files that were touched but whose content hash is unchanged
+    are not re-parsed.
+
+    Args:
+        connection: Database connection
+        path: Absolute file path
+        preprocessor: PreprocessorCache used to skip `ifdef branches that are
+                      not compiled; without it both branches are indexed
+        force: Re-parse even if the file is unchanged, e.g. because a file
+               it includes changed the active `ifdef branches
+
+    Returns:
+        bool: True if the file was parsed
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        remove_file(connection, path)
+        return False
+    row = connection.execute('SELECT id, size, mtime_ns, hash FROM files WHERE path = ?', (path,)).fetchone()
+    if not force and row is not None and row[1] == stat.st_size and row[2] == stat.st_mtime_ns:
+        return False
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    if not force and row is not None and row[3] == digest:
+        connection.execute('UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?',
+                           (stat.st_size, stat.st_mtime_ns, row[0]))
+        return False
+
+    text = data.decode('utf-8', errors='replace')
+    inactive = preprocessor.analyze(path, text).inactive if preprocessor is not None else None
+    result = parse_verilog(text, inactive=inactive)
+    if row is None:
+        file_id = connection.execute('INSERT INTO files (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)',
+                                     (path, stat.st_size, stat.st_mtime_ns, digest)).lastrowid
+    else:
+        file_id = row[0]
+        connection.execute('UPDATE files SET size = ?, mtime_ns = ?, hash = ? WHERE id = ?',
+                           (stat.st_size, stat.st_mtime_ns, digest, file_id))
+        connection.execute('DELETE FROM symbols WHERE file_id = ?', (file_id,))
+        connection.execute('DELETE FROM names WHERE file_id = ?', (file_id,))
+    connection.executemany(
+        'INSERT INTO symbols (file_id, kind, name, scope, detail, width, line, column, end_line) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(file_id, s.kind, s.name, s.scope, s.detail, s.width, s.line, s.column, s.end_line)
+         for s in result.symbols])
+    # Occurrences of every name, as packed (line, column) pairs, for find-references
+    connection.executemany(
+        'INSERT INTO names (file_id, name, positions) VALUES (?, ?, ?)',
+        [(file_id, name, pack_positions(positions))
+         for name, positions in identifier_names(result.tokens).items()])
+    return True
+
+
+def pack_positions(positions):
+    """
+    Pack (line, column) pairs into a compact blob.
+
+    Args:
+        positions: List of (line, column)
+
+    Returns:
+        bytes: Packed unsigned 32-bit pairs
+    """
+    values = array('I')
+    for line, column in positions:
+        values.append(line)
+        values.append(column)
+    return values.tobytes()
+
+
+def unpack_positions(blob):
+    """
+    Unpack a blob written by pack_positions().
+
+    Args:
+        blob: Packed positions
+
+    Returns:
+        list: (line, column) tuples
+    """
+    values = array('I')
+    values.frombytes(blob)
+    return list(zip(values[::2], values[1::2]))
+
+
+def remove_file(connection, path):
+    """
+    Remove a file and its symbols from the database.
+
+    Args:
+        connection: Database connection
+        path: Absolute file path
+    """
+    row = connection.execute('SELECT id FROM files WHERE path = ?', (path,)).fetchone()
+    if row is not None:
+        connection.execute('DELETE FROM symbols WHERE file_id = ?', (row[0],))
+        connection.execute('DELETE FROM names WHERE file_id = ?', (row[0],))
+        connection.execute('DELETE FROM files WHERE id = ?', (row[0],))
+
+
+class IndexWorker(QThread):
+    """
+    Background thread that keeps a project's symbol database current.
+    Requests are queued: a full scan walks the project and re-parses only the
+    files that changed since the database was written, removing files that no
+    longer exist; single-file requests update one file after a save.
+    """
+
+    progress = pyqtSignal(int, int)  # Emitted with (files checked, files found) during a scan
+    scanFinished = pyqtSignal(str, int)  # Emitted with the root and number of files parsed
+    fileIndexed = pyqtSignal(str)  # Emitted with the path after a single-file update
+
+    COMMIT_INTERVAL = 200  # Files per transaction during a scan
+
+    def __init__(self, name_filters, ignore_patterns, preprocessor=None, parent=None):
+        """
+        Initialize the worker.
+
+        Args:
+            name_filters: Patterns of file names to index
+            ignore_patterns: Patterns of file and directory names to skip
+            preprocessor: PreprocessorCache shared with the GUI thread
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.preprocessor = preprocessor
+        self.match_name = compile_patterns(name_filters)
+        self.match_ignored = compile_patterns(ignore_patterns)
+        self.requests = queue.Queue()
+        self.generation = 0  # Incremented by the GUI to cancel a running scan
+        self.connection = None
+        self.database = None
+
+    def request_scan(self, root, database):
+        """
+        Queue a full scan of a project, cancelling any scan in progress.
+
+        Args:
+            root: Project root directory
+            database: Database file for the project
+        """
+        self.generation += 1
+        self.requests.put(('scan', root, database, self.generation))
+
+    def request_file(self, path, database):
+        """
+        Queue an update of one file.
+
+        Args:
+            path: Absolute file path
+            database: Database file of the project containing it
+        """
+        self.requests.put(('file', path, database, self.generation))
+
+    def stop(self):
+        """
+        Cancel pending work, stop the thread and wait for it.
+        """
+        self.generation += 1
+        self.requests.put(None)
+        self.wait()
+
+    def use_database(self, database):
+        """
+        Switch the worker's connection to another project's database.
+
+        Args:
+            database: Database file path
+        """
+        if database != self.database:
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = open_database(database)
+            self.database = database
+
+    def run(self):
+        """
+        Serve queued requests until stopped.
+        """
+        try:
+            while True:
+                request = self.requests.get()
+                if request is None:
+                    break
+                action, path, database, generation = request
+                if generation != self.generation:
+                    continue  # Superseded by a newer project
+                try:
+                    self.use_database(database)
+                    if action == 'scan':
+                        self.scan(path, generation)
+                    else:
+                        index_file(self.connection, path, self.preprocessor)
+                        self.connection.commit()
+                        self.fileIndexed.emit(path)
+                        for includer in self.index_includers(path):
+                            self.connection.commit()
+                            self.fileIndexed.emit(includer)
+                except (OSError, sqlite3.Error):
+                    continue  # Unreadable file or database; try again on the next request
+        finally:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+                self.database = None
+
+    def include_rows(self):
+        """
+        Return the `include directives recorded in the database.
+
+        Returns:
+            list: (including path, include argument) tuples
+        """
+        return self.connection.execute(
+            "SELECT f.path, s.name FROM symbols s JOIN files f ON f.id = s.file_id "
+            "WHERE s.kind = 'include'").fetchall()
+
+    def index_includers(self, path, includes=None, skip=()):
+        """
+        Re-index the files that include a changed file, since its macros may
+        switch their `ifdef branches.
+
+        Args:
+            path: Changed file
+            includes: Result of include_rows(), queried if None
+            skip: Paths that were already parsed against the new contents
+
+        Returns:
+            list: Paths that were re-parsed
+        """
+        if self.preprocessor is None:
+            return []
+        parsed = []
+        for includer in self.preprocessor.includers(path, self.include_rows() if includes is None else includes):
+            if includer not in skip and index_file(self.connection, includer, self.preprocessor, force=True):
+                parsed.append(includer)
+        return parsed
+
+    def scan(self, root, generation):
+        """
+        Index every matching file under a root.
+
+        Args:
+            root: Project root directory
+            generation: Request generation; the scan stops when it is superseded
+        """
+        cancelled = lambda: generation != self.generation
+        paths = []
+        for directory, names in walk_project(root, root, self.match_name, self.match_ignored, cancelled):
+            base = os.path.join(root, directory)
+            paths.extend(os.path.join(base, name) for name in names)
+
+        parsed = set()
+        for count, path in enumerate(paths, 1):
+            if cancelled():
+                self.connection.commit()
+                return
+            try:
+                if index_file(self.connection, path, self.preprocessor):
+                    parsed.add(path)
+            except OSError:
+                pass
+            if count % self.COMMIT_INTERVAL == 0:
+                self.connection.commit()
+                self.progress.emit(count, len(paths))
+
+        # Unchanged files whose included headers changed since the last scan
+        if self.preprocessor is not None and parsed:
+            includes = self.include_rows()
+            headers = {self.preprocessor.resolve(name, source) for source, name in includes} & parsed
+            for header in headers:
+                if cancelled():
+                    self.connection.commit()
+                    return
+                parsed.update(self.index_includers(header, includes, parsed))
+
+        # Files deleted since the last scan
+        found = set(paths)
+        prefix = os.path.join(root, '')
+        for (path,) in self.connection.execute('SELECT path FROM files').fetchall():
+            if path.startswith(prefix) and path not in found:
+                remove_file(self.connection, path)
+        self.connection.commit()
+        self.progress.emit(len(paths), len(paths))
+        self.scanFinished.emit(root, len(parsed))
+
+
+class SymbolIndex(QObject):
+    """
+    Project-wide symbol database: modules, ports, parameters, nets,
+    instances, functions and tasks of every HDL file under the project root.
+    Stored in SQLite per project, keyed by file path and content hash, so
+    reopening a project only re-parses files that changed. Parsing happens on
+    an IndexWorker thread; queries run on the GUI thread's own connection.
+    """
+
+    updated = pyqtSignal()  # Emitted when symbols were added, changed or removed
+    progress = pyqtSignal(int, int)  # Emitted with (files checked, files found) during a scan
+    scanCompleted = pyqtSignal()  # Emitted when a full scan of the root has finished
+    fileUpdated = pyqtSignal(str)  # Emitted with the path after one file was re-indexed
+
+    def __init__(self, config, parent=None):
+        """
+        Initialize the index. Nothing is scanned until set_root() is called.
+
+        Args:
+            config: Configuration object with a project section
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.directory = config.project.get('index_directory')
+        self.match_name = compile_patterns(config.project.get('name_filters', ['*.v', '*.sv']))
+        self.match_ignored = compile_patterns(config.project.get('ignore_patterns', []))
+        self.root = None
+        self.database = None
+        self.connection = None  # Read connection for the GUI thread
+        self.scanning = False
+
+        # `include/`define model shared by the indexer and the editors' highlighters
+        self.include_dirs = config.project.get('include_dirs', [])
+        self.preprocessor = PreprocessorCache(self.include_dirs, config.project.get('defines', {}))
+
+        self.worker = IndexWorker(config.project.get('name_filters', ['*.v', '*.sv']),
+                                  config.project.get('ignore_patterns', []), self.preprocessor, self)
+        self.worker.progress.connect(self.progress)
+        self.worker.scanFinished.connect(self.on_scan_finished)
+        self.worker.fileIndexed.connect(self.on_file_indexed)
+        self.worker.start()
+
+    def set_root(self, root):
+        """
+        Open the database of a project root and bring it up to date.
+
+        Args:
+            root: Project root directory
+        """
+        self.root = os.path.abspath(root)
+        self.database = database_path_for(self.root, self.directory)
+        # Relative include directories are relative to the project root
+        self.preprocessor.set_include_dirs([os.path.join(self.root, directory) for directory in self.include_dirs])
+        if self.connection is not None:
+            self.connection.close()
+        try:
+            self.connection = open_database(self.database)
+        except (OSError, sqlite3.Error):
+            self.connection = None
+            return
+        self.scanning = True
+        self.worker.request_scan(self.root, self.database)
+        self.updated.emit()  # Symbols from the previous session are usable right away
+
+    def on_scan_finished(self, root, parsed):
+        """
+        Note the end of a scan.
+
+        Args:
+            root: Scanned root
+            parsed: Number of files that were re-parsed
+        """
+        if root == self.root:
+            self.scanning = False
+            self.scanCompleted.emit()
+            self.updated.emit()
+
+    def on_file_indexed(self, path):
+        """
+        Note the end of a single-file update.
+
+        Args:
+            path: Updated file
+        """
+        self.fileUpdated.emit(path)
+        self.updated.emit()
+
+    def update_file(self, path):
+        """
+        Re-index a file after it was saved or changed on disk.
+
+        Args:
+            path: File path; files outside the project or not matching the
+                  name filters are ignored
+        """
+        if not path:
+            return
+        self.preprocessor.invalidate(path)
+        if self.root is None or self.connection is None:
+            return
+        path = os.path.abspath(path)
+        if not path.startswith(os.path.join(self.root, '')) or not self.match_name(os.path.basename(path)):
+            return
+        relative = os.path.relpath(path, self.root).split(os.sep)
+        if any(self.match_ignored(part) for part in relative):
+            return
+        self.worker.request_file(path, self.database)
+
+    def query(self, where, parameters=()):
+        """
+        Select symbols with their file paths.
+
+        Args:
+            where: SQL condition on the symbols table (aliased s)
+            parameters: Query parameters
+
+        Returns:
+            list: (path, Symbol) tuples ordered by path and line
+        """
+        if self.connection is None:
+            return []
+        try:
+            rows = self.connection.execute(
+                'SELECT f.path, s.kind, s.name, s.line, s.column, s.scope, s.detail, s.width, s.end_line '
+                'FROM symbols s JOIN files f ON f.id = s.file_id WHERE ' + where +
+                ' ORDER BY f.path, s.line, s.column', parameters).fetchall()
+        except sqlite3.Error:
+            return []
+        results = []
+        for path, kind, name, line, column, scope, detail, width, end_line in rows:
+            symbol = Symbol(kind, name, line, column, scope, detail, width or '')
+            symbol.end_line = end_line
+            results.append((path, symbol))
+        return results
+
+    def find(self, name, kinds=None, scope=None):
+        """
+        Find symbols by name.
+
+        Args:
+            name: Exact symbol name
+            kinds: Optional list of kinds to restrict to
+            scope: Optional enclosing module name
+
+        Returns:
+            list: (path, Symbol) tuples
+        """
+        where = 's.name = ?'
+        parameters = [name]
+        if kinds:
+            where += ' AND s.kind IN (%s)' % ','.join('?' * len(kinds))
+            parameters += list(kinds)
+        if scope is not None:
+            where += ' AND s.scope = ?'
+            parameters.append(scope)
+        return self.query(where, parameters)
+
+    def occurrences(self, name):
+        """
+        Return every place a name occurs in the project, as of the last index.
+
+        Args:
+            name: Identifier or macro name
+
+        Returns:
+            dict: File path -> list of (line, column)
+        """
+        if self.connection is None:
+            return {}
+        try:
+            rows = self.connection.execute(
+                'SELECT f.path, n.positions FROM names n JOIN files f ON f.id = n.file_id '
+                'WHERE n.name = ?', (name,)).fetchall()
+        except sqlite3.Error:
+            return {}
+        return {path: unpack_positions(blob) for path, blob in rows}
+
+    def modules(self):
+        """
+        Return all module declarations in the project.
+
+        Returns:
+            list: (path, Symbol) tuples
+        """
+        return self.query("s.kind = 'module'")
+
+    def module_ports(self, module):
+        """
+        Return the parameters and ports of a module, for completion.
+
+        Args:
+            module: Module name
+
+        Returns:
+            list: (path, Symbol) tuples in declaration order
+        """
+        return self.query("s.scope = ? AND s.kind IN ('parameter', 'port')", (module,))
+
+    def instances_of(self, module):
+        """
+        Return the places where a module is instantiated.
+
+        Args:
+            module: Module name
+
+        Returns:
+            list: (path, Symbol) tuples whose detail is the module
+        """
+        return self.query("s.kind = 'instance' AND s.detail = ?", (module,))
+
+    def file_symbols(self, path):
+        """
+        Return the indexed symbols of one file.
+
+        Args:
+            path: File path
+
+        Returns:
+            list: (path, Symbol) tuples
+        """
+        return self.query('f.path = ?', (os.path.abspath(path),))
+
+    def files(self):
+        """
+        Return the paths of all indexed files.
+
+        Returns:
+            list: Absolute paths in sorted order
+        """
+        if self.connection is None:
+            return []
+        try:
+            return [path for (path,) in self.connection.execute('SELECT path FROM files ORDER BY path').fetchall()]
+        except sqlite3.Error:
+            return []
+
+    def names(self, prefix, limit=100):
+        """
+        Return distinct symbol names starting with a prefix, for completion.
+
+        Args:
+            prefix: Name prefix
+            limit: Maximum number of names
+
+        Returns:
+            list: Sorted names
+        """
+        if self.connection is None or not prefix:
+            return []
+        # Range condition instead of LIKE so the name index is used
+        rows = self.connection.execute(
+            'SELECT DISTINCT name FROM symbols WHERE name >= ? AND name < ? ORDER BY name LIMIT ?',
+            (prefix, prefix + '\U0010ffff', limit)).fetchall()
+        return [name for (name,) in rows]
+
+    def shutdown(self):
+        """
+        Stop the indexer thread. Must be called before the application exits.
+        """
+        self.worker.stop()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
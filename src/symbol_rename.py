@@ -0,0 +1,193 @@
+# symbol_rename.py
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QThread
+from PyQt5.QtGui import QTextCursor
+from file_saver import write_atomic
+from verilog_parser import KEYWORDS
+
+IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_$]*$')
+MAX_THREADS = 8  # Files read and written at the same time
+
+
+def is_valid_name(name):
+    """
+    Check whether a string can be used as a Verilog identifier.
+
+    Args:
+        name: Proposed name
+
+    Returns:
+        bool: True for a simple identifier that is not a keyword
+    """
+    return bool(IDENTIFIER.match(name)) and name not in KEYWORDS
+
+
+def rename_in_text(text, positions, old_name, new_name):
+    """
+    Replace the occurrences of a name at known positions.
+    Positions whose text is no longer the old name (the file changed since it
+    was indexed) are left alone.
+
+    Args:
+        text: File text
+        positions: List of (line, column) of the name's first character
+        old_name: Current name
+        new_name: Replacement
+
+    Returns:
+        tuple: (new text, number of occurrences replaced)
+    """
+    line_starts = [0]
+    for match in re.finditer('\n', text):
+        line_starts.append(match.end())
+    offsets = []
+    for line, column in positions:
+        if line >= len(line_starts):
+            continue
+        offset = line_starts[line] + column
+        end = offset + len(old_name)
+        if text[offset:end] == old_name and not (end < len(text) and (text[end].isalnum() or text[end] in '_$')):
+            offsets.append(offset)
+    parts = []
+    previous = 0
+    for offset in sorted(set(offsets)):
+        parts.append(text[previous:offset])
+        parts.append(new_name)
+        previous = offset + len(old_name)
+    parts.append(text[previous:])
+    return ''.join(parts), len(set(offsets))
+
+
+def rename_in_document(document, positions, old_name, new_name):
+    """
+    Replace the occurrences of a name in an open document as a single undo step.
+
+    Args:
+        document: QTextDocument
+        positions: List of (line, column) of the name's first character
+        old_name: Current name
+        new_name: Replacement
+
+    Returns:
+        int: Number of occurrences replaced
+    """
+    cursor = QTextCursor(document)
+    count = 0
+    cursor.beginEditBlock()
+    # Back to front, so earlier positions stay valid
+    for line, column in sorted(set(positions), reverse=True):
+        block = document.findBlockByNumber(line)
+        if not block.isValid() or column + len(old_name) > block.length() - 1:
+            continue
+        cursor.setPosition(block.position() + column)
+        cursor.setPosition(block.position() + column + len(old_name), QTextCursor.KeepAnchor)
+        if cursor.selectedText() == old_name:
+            cursor.insertText(new_name)
+            count += 1
+    cursor.endEditBlock()
+    return count
+
+
+class RenameWorker(QThread):
+    """
+    Background thread that renames a symbol in files that are not open.
+    The rename is one transaction: every file is read, edited and written to
+    a temporary file next to it, in parallel; only when all of them are
+    staged are the temporary files renamed over the originals. If anything
+    fails, files already replaced are restored and no file is left changed.
+    """
+
+    def __init__(self, files, old_name, new_name, fsync=False, parent=None):
+        """
+        Initialize the worker.
+
+        Args:
+            files: Dict of path -> list of (line, column) occurrences
+            old_name: Current name
+            new_name: Replacement
+            fsync: Flush the new files to disk before renaming them
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.files = files
+        self.old_name = old_name
+        self.new_name = new_name
+        self.fsync = fsync
+        self.error = None  # Error message if the rename was rolled back
+        self.written = []  # Paths that were changed
+        self.count = 0  # Occurrences replaced
+        self.skipped = 0  # Occurrences whose text no longer matched
+
+    def stage(self, path):
+        """
+        Edit one file into a temporary file beside it.
+
+        Args:
+            path: File to edit
+
+        Returns:
+            tuple: (path, temporary path or None if nothing changed, original text, count)
+        """
+        with open(path, 'r', newline='') as f:
+            original = f.read()
+        text, count = rename_in_text(original, self.files[path], self.old_name, self.new_name)
+        if not count:
+            return path, None, original, 0
+        fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp',
+                                         dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w', newline='') as f:
+                f.write(text)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            shutil.copymode(path, temp_path)  # Preserve permissions of the original
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return path, temp_path, original, count
+
+    def run(self):
+        """
+        Stage all files, then commit or roll back.
+        """
+        staged = []
+        try:
+            with ThreadPoolExecutor(min(MAX_THREADS, max(1, len(self.files)))) as pool:
+                futures = [pool.submit(self.stage, path) for path in self.files]
+                errors = []
+                for future in futures:
+                    try:
+                        staged.append(future.result())
+                    except (OSError, UnicodeDecodeError) as e:
+                        errors.append(str(e))
+            if errors:
+                raise OSError(errors[0])
+
+            replaced = []
+            try:
+                for path, temp_path, original, count in staged:
+                    if temp_path is not None:
+                        os.replace(temp_path, path)
+                        replaced.append((path, original))
+            except OSError:
+                for path, original in replaced:
+                    write_atomic(path, original, self.fsync)
+                raise
+        except OSError as e:
+            self.error = str(e)
+            self.written = []
+            self.count = 0
+        else:
+            self.written = [path for path, temp_path, _, _ in staged if temp_path is not None]
+            self.count = sum(count for _, _, _, count in staged)
+            self.skipped = sum(len(set(self.files[path])) for path in self.files) - self.count
+        finally:
+            for _, temp_path, _, _ in staged:
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.remove(temp_path)
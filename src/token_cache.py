@@ -0,0 +1,403 @@
+# token_cache.py
+from collections import namedtuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QTextBlockUserData
+from verilog_parser import BLOCK_ENDS, BLOCK_PAIRS, END_MODULE_KEYWORDS, MODULE_KEYWORDS, TOKEN_PATTERN
+
+# A token of one line. column is 0-based within the line; whitespace is not kept.
+LineToken = namedtuple('LineToken', 'kind text column')
+
+# Nesting state at the end of a line:
+#   blocks: (indent of the opening line, ifs awaiting an else outside it) of
+#           each open begin/case/fork/function/... block and module body
+#   parens: unclosed ( [ { brackets
+#   statement: indent of the statement a control header (if, else, for,
+#              always @(...), ...) is waiting for, or None
+#   ifs: indents of the if headers of the current statement, innermost last
+#   else_indent: indent an else on the next line aligns with, or None
+#   header: indent of the module header being read, whose body starts at its ';'
+Nesting = namedtuple('Nesting', 'blocks parens statement ifs else_indent header')
+TOP_LEVEL = Nesting((), 0, None, (), None, None)
+
+CLOSING_KEYWORDS = BLOCK_ENDS | END_MODULE_KEYWORDS
+REINDENT_WORDS = CLOSING_KEYWORDS | frozenset(['else', 'begin', ')', ']', '}'])  # First words that move their own line
+CONTROL_WORDS = frozenset(['if', 'else', 'for', 'foreach', 'while', 'repeat', 'always', 'always_ff',
+                           'always_comb', 'always_latch', 'initial', 'final', 'forever', '@', 'do'])
+
+
+def tokenize_line(text, in_comment=False):
+    """
+    Split one line into tokens, continuing a block comment from the previous line.
+
+    Args:
+        text: Line text without the newline
+        in_comment: True if the line starts inside a /* */ comment
+
+    Returns:
+        tuple: (list of LineToken, True if the line ends inside a /* */ comment)
+    """
+    tokens = []
+    position = 0
+    if in_comment:
+        end = text.find('*/')
+        if end < 0:
+            return [LineToken('comment', text, 0)] if text else [], True
+        position = end + 2
+        tokens.append(LineToken('comment', text[:position], 0))
+    ends_in_comment = False
+    for match in TOKEN_PATTERN.finditer(text, position):
+        kind = match.lastgroup
+        if kind == 'space':
+            continue
+        token_text = match.group()
+        tokens.append(LineToken(kind, token_text, match.start()))
+        if kind == 'comment' and token_text.startswith('/*') and (len(token_text) < 4 or not token_text.endswith('*/')):
+            ends_in_comment = True  # The comment pattern stops at the end of the line
+    return tokens, ends_in_comment
+
+
+def tokenize_lines(text):
+    """
+    Tokenize text line by line, as the token cache does for a document.
+
+    Args:
+        text: Source text
+
+    Returns:
+        list: Per line, a list of LineToken
+    """
+    lines = []
+    in_comment = False
+    for line in text.split('\n'):
+        tokens, in_comment = tokenize_line(line, in_comment)
+        lines.append(tokens)
+    return lines
+
+
+def code_tokens(tokens):
+    """
+    Drop the comments of a line's tokens.
+
+    Args:
+        tokens: List of LineToken
+
+    Returns:
+        list: Tokens that are not comments
+    """
+    return [token for token in tokens if token.kind != 'comment']
+
+
+def nesting_step(tokens, state):
+    """
+    Work out the indentation of a line and the nesting state after it.
+
+    Args:
+        tokens: LineToken list of the line
+        state: Nesting at the end of the previous line
+
+    Returns:
+        tuple: (indent level of the line, Nesting at its end)
+    """
+    blocks, parens, statement, ifs, else_indent, header = state
+    base = blocks[-1][0] + 1 if blocks else 0
+    code = code_tokens(tokens)
+    if not code:
+        indent = statement if statement is not None else base
+        return indent + min(parens, 1), state  # Blank lines keep the state
+
+    # Closing words at the start of the line dedent the line itself
+    closed = None
+    index = 0
+    while index < len(code):
+        text = code[index].text
+        if text in CLOSING_KEYWORDS:
+            if blocks:
+                closed = blocks[-1]
+                blocks = blocks[:-1]
+        elif text in (')', ']', '}'):
+            parens = max(0, parens - 1)
+        else:
+            break
+        index += 1
+    first = code[index].text if index < len(code) else ''
+    base = blocks[-1][0] + 1 if blocks else 0
+    if closed is not None:
+        indent = closed[0]  # Aligned with the line that opened the block
+        ifs = closed[1]
+    elif first == 'else' and else_indent is not None:
+        indent = else_indent
+    elif parens:
+        indent = (statement if statement is not None else base) + 1  # Inside brackets
+    elif statement is not None:
+        indent = statement - 1 if first in ('begin', 'fork') else statement
+        if first in ('begin', 'fork') and ifs and ifs[-1] == indent:
+            ifs = ifs[:-1]  # The block is the if's body, so the if moves into the block
+    else:
+        indent = base
+        ifs = ()
+
+    own_if = False
+    last_event = None  # 'open', 'close' or ';': the last block or statement boundary of the line
+    popped = closed
+    for position in range(index, len(code)):
+        text = code[position].text
+        if text in BLOCK_PAIRS:
+            if not (text == 'fork' and position and code[position - 1].text in ('disable', 'wait')):
+                blocks = blocks + ((indent, ifs),)
+                last_event = 'open'
+        elif text in CLOSING_KEYWORDS:
+            if blocks:
+                popped = blocks[-1]
+                blocks = blocks[:-1]
+            last_event = 'close'
+        elif text == 'if' and parens == 0 and (position == index or code[position - 1].text == 'else'):
+            own_if = True
+        elif text in MODULE_KEYWORDS:
+            header = indent
+        elif text in ('(', '[', '{'):
+            parens += 1
+        elif text in (')', ']', '}'):
+            parens = max(0, parens - 1)
+        elif text == ';' and parens == 0:
+            if header is not None:
+                blocks = blocks + ((header, ()),)  # The module body starts after its header
+                header = None
+                last_event = 'open'
+            else:
+                last_event = ';'
+    if closed is not None and last_event is None:
+        last_event = 'close'
+
+    last = code[-1].text
+    if parens:
+        return indent, Nesting(blocks, parens, statement, ifs + ((indent,) if own_if else ()), None, header)
+    if last in CONTROL_WORDS or last == ':' or (last == ')' and first in CONTROL_WORDS):
+        # A control header or case item label: the next line holds its statement
+        return indent, Nesting(blocks, 0, indent + 1, ifs + ((indent,) if own_if else ()), None, header)
+    if last_event == 'open':
+        return indent, Nesting(blocks, 0, None, (), None, header)
+    if last_event == 'close':
+        if popped is None:
+            return indent, Nesting(blocks, 0, None, (), None, header)  # Stray end with no block open
+        # An else after the end belongs to the if that opened the block
+        return indent, Nesting(blocks, 0, None, popped[1], popped[0], header)
+    if last_event == ';':
+        if own_if:
+            return indent, Nesting(blocks, 0, None, ifs, indent, header)  # if (...) statement;
+        if ifs:
+            return indent, Nesting(blocks, 0, None, ifs[:-1], ifs[-1], header)
+        return indent, Nesting(blocks, 0, None, (), None, header)
+    return indent, Nesting(blocks, 0, statement, ifs, None, header)
+
+
+def leading_columns(text, tab_size):
+    """
+    Measure the leading whitespace of a line.
+
+    Args:
+        text: Line text
+        tab_size: Columns per tab stop
+
+    Returns:
+        int: Column of the first non-blank character, or None for a blank line
+    """
+    columns = 0
+    for char in text:
+        if char == '\t':
+            columns += tab_size - columns % tab_size
+        elif char == ' ':
+            columns += 1
+        elif char.isspace():
+            continue
+        else:
+            return columns
+    return None
+
+
+class BlockTokens(QTextBlockUserData):
+    """
+    Tokens of one block, stored as the block's user data.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.tokens = None  # List of LineToken, or None when the block changed
+        self.in_comment = False  # Comment state the tokens were computed with
+        self.ends_in_comment = False  # True if the block ends inside a /* */ comment
+        self.leading = None  # Columns of leading whitespace, None for a blank block
+        self.indent = 0  # Indent level of the block, valid above TokenCache.dirty
+        self.nesting = TOP_LEVEL  # Nesting at the end of the block, valid above TokenCache.dirty
+
+
+class TokenCache(QObject):
+    """
+    Tokens of every line of a document, shared by the highlighter, the
+    formatter and auto-indent so each line is tokenized once per edit.
+    Tokens live in the blocks' user data; contentsChange drops the tokens of
+    the blocks an edit touched, and a block is retokenized on next use, or
+    when the comment state it starts in changed.
+    Create the cache before anything else that reacts to contentsChange of
+    the document (the highlighter in particular), so its tokens are already
+    invalidated when the others run; token_cache_for() does this.
+
+    Each block also stores its indent level and the nesting state at its
+    end. They are valid for the blocks above the first block edited since
+    they were computed, and recomputed from there on demand, so auto-indent
+    after an edit costs a block or two rather than a pass over the file.
+
+    edits counts the changes to the text. QTextDocument.revision() and
+    contentsChanged also move when a highlighter only reformats a block,
+    so anything that needs to know whether the text changed uses edits and
+    the edited signal instead.
+    """
+
+    edited = pyqtSignal()  # Emitted after each change to the text, not for format-only changes
+
+    def __init__(self, document):
+        """
+        Attach a cache to a document.
+
+        Args:
+            document: QTextDocument, which becomes the parent
+        """
+        super().__init__(document)
+        self.setObjectName('token_cache')
+        self.document = document
+        self.dirty = 0  # First block whose nesting state must be recomputed
+        self.tab_size = 4  # Columns per tab stop, for measuring leading whitespace
+        self.edits = 0  # Changes to the text so far
+        document.contentsChange.connect(self.on_contents_change)
+
+    def on_contents_change(self, position, removed, added):
+        """
+        Drop the tokens of the blocks an edit touched and count the edit.
+
+        Args:
+            position: Position of the edit
+            removed: Characters removed
+            added: Characters added
+        """
+        block = self.document.findBlock(position)
+        last = self.document.findBlock(position + added)
+        self.dirty = min(self.dirty, block.blockNumber())
+        while block.isValid():
+            data = block.userData()
+            if isinstance(data, BlockTokens):
+                data.tokens = None
+            if block == last:
+                break
+            block = block.next()
+        if removed or added:
+            self.edits += 1
+            self.edited.emit()
+
+    def data(self, block):
+        """
+        Get the up-to-date token data of a block, tokenizing it and any
+        preceding blocks whose tokens are missing.
+
+        Args:
+            block: QTextBlock of the document
+
+        Returns:
+            BlockTokens: Data of the block
+        """
+        # Find the nearest block above whose tokens can be trusted
+        pending = [block]
+        previous = block.previous()
+        while previous.isValid():
+            data = previous.userData()
+            if isinstance(data, BlockTokens) and data.tokens is not None:
+                break
+            pending.append(previous)
+            previous = previous.previous()
+        in_comment = False
+        if previous.isValid():
+            in_comment = previous.userData().ends_in_comment
+
+        data = None
+        for current in reversed(pending):
+            data = current.userData()
+            if not isinstance(data, BlockTokens):
+                data = BlockTokens()
+                current.setUserData(data)
+            if data.tokens is None or data.in_comment != in_comment:
+                text = current.text()
+                data.tokens, data.ends_in_comment = tokenize_line(text, in_comment)
+                data.in_comment = in_comment
+                data.leading = leading_columns(text, self.tab_size)
+            in_comment = data.ends_in_comment
+        return data
+
+    def tokens(self, block):
+        """
+        Get the tokens of a block.
+
+        Args:
+            block: QTextBlock of the document
+
+        Returns:
+            list: LineToken tuples in line order
+        """
+        return self.data(block).tokens
+
+    def nesting(self, block):
+        """
+        Get the token data of a block with its indent level and nesting
+        state up to date, recomputing them from the first edited block.
+
+        Args:
+            block: QTextBlock of the document
+
+        Returns:
+            BlockTokens: Data of the block
+        """
+        number = block.blockNumber()
+        if number < self.dirty:
+            return self.data(block)
+        current = self.document.findBlockByNumber(self.dirty)
+        state = TOP_LEVEL
+        if current.previous().isValid():
+            state = self.data(current.previous()).nesting
+        while True:
+            data = self.data(current)
+            data.indent, data.nesting = nesting_step(data.tokens, state)
+            state = data.nesting
+            if current == block or not current.next().isValid():
+                break
+            current = current.next()
+        self.dirty = number + 1
+        return data
+
+    def lines(self):
+        """
+        Get the tokens of every line of the document.
+
+        Returns:
+            list: Per line, a list of LineToken
+        """
+        lines = []
+        block = self.document.begin()
+        while block.isValid():
+            lines.append(self.data(block).tokens)
+            block = block.next()
+        return lines
+
+
+def token_cache_for(document):
+    """
+    Get the token cache of a document, creating it on first use.
+
+    Args:
+        document: QTextDocument, or None
+
+    Returns:
+        TokenCache: The document's cache, or None without a document
+    """
+    if document is None:
+        return None
+    cache = document.findChild(TokenCache, 'token_cache')
+    if cache is None:
+        cache = TokenCache(document)
+    return cache
@@ -1,9 +1,16 @@
-from PyQt5.QtWidgets import QPlainTextEdit, QTextEdit, QApplication
-from PyQt5.QtGui import QFont, QPainter, QColor, QTextFormat, QTextCursor, QTextDocument, QPalette
-from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtWidgets import QPlainTextEdit, QTextEdit, QApplication, QToolTip
+from PyQt5.QtGui import (QFont, QPainter, QColor, QTextFormat, QTextCursor, QTextDocument, QPalette,
+                         QTextCharFormat, QPolygon)
+from PyQt5.QtCore import Qt, QRect, QEvent, QLine, QPoint
 from verilog_highlighter import VerilogHighlighter
 from verilog_formatter import format_verilog
 from line_number_area import LineNumberArea
+from semantic_highlighting import SemanticOverlay
+from marker_scrollbar import MarkerScrollBar
+from occurrence_highlighting import OccurrenceHighlighter
+from minimap import Minimap
+from change_gutter import ChangeTracker
+from token_cache import REINDENT_WORDS, code_tokens, token_cache_for
 
 
 class VerilogEditor(QPlainTextEdit):
@@ -26,7 +33,25 @@ class VerilogEditor(QPlainTextEdit):
 
         # Initialize core editor components
         self.setup_editor()  # Set up basic appearance
+        # Per-line tokens shared by highlighting, formatting and auto-indent;
+        # created before the highlighter so edits invalidate tokens first
+        self.token_cache = token_cache_for(self.document())
+        self.tab_size = self.config.editor.get('tab_size', 4) if hasattr(self.config, 'editor') else 4
+        self.token_cache.tab_size = self.tab_size
         self.highlighter = VerilogHighlighter(self.document(), config)  # Syntax highlighting
+        self.outline = None  # DocumentOutline, created when the outline view first shows this document
+        self.minimap = None  # Minimap, unless disabled
+        self.line_labels = None  # Line number shown for each block instead of its own, see setLineLabels()
+        self.largest_label = 0
+
+        # Extra selections from several sources (current line, diagnostics, ...), merged in insertion order
+        self.extra_selection_groups = {}
+
+        # Latest background check results; cursors keep each problem anchored while the text is edited
+        self.diagnostics = []
+        self.diagnostic_cursors = []  # (QTextCursor, Diagnostic) pairs
+        self.diagnostics_revision = -1  # TokenCache.edits the diagnostics were computed for
+        self.diagnostics_path = None  # File path the diagnostics were computed for
 
         # Set up line numbering components
         self.line_number_area = LineNumberArea(self)
@@ -35,9 +60,28 @@ class VerilogEditor(QPlainTextEdit):
         self.cursorPositionChanged.connect(self.highlightCurrentLine)
         self.updateLineNumberAreaWidth(0)
 
+        # Differences from the saved text, shown beside the line numbers; the tab sets the saved text
+        self.changes = ChangeTracker(self)
+
+        # Declaration-based colors, classified on a background thread
+        if not hasattr(self.config, 'editor') or self.config.editor.get('semantic_highlighting', True):
+            self.highlighter.semantic = SemanticOverlay(self)
+
+        # Scroll bar that marks lines, and highlighting of the name under the cursor
+        self.setVerticalScrollBar(MarkerScrollBar(self))
+        self.occurrences = None
+        if not hasattr(self.config, 'editor') or self.config.editor.get('highlight_occurrences', True):
+            self.occurrences = OccurrenceHighlighter(self)
+
+        # Miniature of the document at the right edge
+        if hasattr(self.config, 'editor') and self.config.editor.get('minimap', True):
+            self.minimap = Minimap(self, self.config.editor.get('minimap_width', 100))
+            self.updateLineNumberAreaWidth(0)
+
         # Configure editor behavior settings
         self.auto_indent = self.config.editor.get('auto_indent', True) if hasattr(self.config, 'editor') else True
-        self.setTabStopWidth(self.fontMetrics().horizontalAdvance(' ') * 4)  # Set tab width
+        self.setTabStopWidth(self.fontMetrics().horizontalAdvance(' ') * self.tab_size)  # Set tab width
+        self.indent_guides = self.config.editor.get('indent_guides', True) if hasattr(self.config, 'editor') else True
         self.setLineWrapMode(QPlainTextEdit.NoWrap)  # Disable word wrap
         self.document().setUndoRedoEnabled(True)  # Enable undo/redo
 
@@ -67,19 +111,52 @@ class VerilogEditor(QPlainTextEdit):
             int: Width in pixels needed for line numbers
         """
         digits = 1
-        max_value = max(1, self.blockCount())
+        max_value = max(1, self.blockCount(), self.largest_label + 1)
         while max_value >= 10:
             max_value /= 10
             digits += 1
-        space = 3 + self.fontMetrics().horizontalAdvance('9') * digits
+        space = 3 + self.fontMetrics().horizontalAdvance('9') * digits + self.markerWidth() + self.changeBarWidth()
         return space
 
+    def markerWidth(self):
+        """
+        Width of the diagnostic marker column left of the line numbers.
+
+        Returns:
+            int: Width in pixels
+        """
+        return self.fontMetrics().height() // 2 + 4
+
+    def changeBarWidth(self):
+        """
+        Width of the change marker column right of the line numbers.
+
+        Returns:
+            int: Width in pixels
+        """
+        return 5
+
+    def setLineLabels(self, labels):
+        """
+        Number the blocks with other line numbers, e.g. the lines of the
+        compared files in a diff pane.
+
+        Args:
+            labels: 0-based line number of each block, None to leave a block
+                    unnumbered; or None to number the blocks themselves again
+        """
+        self.line_labels = labels
+        self.largest_label = max((label for label in labels or () if label is not None), default=0)
+        self.updateLineNumberAreaWidth(0)
+        self.line_number_area.update()
+
     def updateLineNumberAreaWidth(self, _):
         """
         Update the editor's left margin to accommodate line numbers.
         Called when the number of lines changes.
         """
-        self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
+        right = self.minimap.map_width if self.minimap is not None else 0
+        self.setViewportMargins(self.lineNumberAreaWidth(), 0, right, 0)
 
     def updateLineNumberArea(self, rect, dy):
         """
@@ -104,6 +181,10 @@ class VerilogEditor(QPlainTextEdit):
         super().resizeEvent(event)
         cr = self.contentsRect()
         self.line_number_area.setGeometry(QRect(cr.left(), cr.top(), self.lineNumberAreaWidth(), cr.height()))
+        if self.minimap is not None:
+            viewport = self.viewport().geometry()
+            self.minimap.setGeometry(QRect(viewport.right() + 1, viewport.top(),
+                                           self.minimap.map_width, viewport.height()))
 
     def lineNumberAreaPaintEvent(self, event):
         """
@@ -125,17 +206,111 @@ class VerilogEditor(QPlainTextEdit):
         top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
         bottom = top + self.blockBoundingRect(block).height()
 
+        markers = self.diagnosticMarkers()
+        size = self.markerWidth() - 4
+        bar = self.changeBarWidth()
+        bar_left = self.line_number_area.width() - bar + 1
+        last = self.cursorForPosition(self.viewport().rect().bottomLeft()).blockNumber()
+        changes = self.changes.markers(block_number, last)
+        painter.setRenderHint(QPainter.Antialiasing)
+
         while block.isValid() and top <= event.rect().bottom():
             if block.isVisible() and bottom >= event.rect().top():
                 number = str(block_number + 1)
+                if self.line_labels is not None:
+                    label = self.line_labels[block_number] if block_number < len(self.line_labels) else None
+                    number = str(label + 1) if label is not None else ''
                 painter.setPen(fg_color)
-                painter.drawText(0, int(top), self.line_number_area.width(),
+                painter.drawText(0, int(top), self.line_number_area.width() - bar,
                                  self.fontMetrics().height(), Qt.AlignRight, number)
+                change = changes.get(block_number)
+                if change == 'deleted':
+                    # Lines removed above this one: a wedge on its top edge
+                    painter.setPen(Qt.NoPen)
+                    painter.setBrush(QColor(self.config.theme.get('deleted', '#94151B')))
+                    painter.drawPolygon(QPolygon([QPoint(bar_left - 1, int(top) - 3), QPoint(bar_left + bar, int(top)),
+                                                  QPoint(bar_left - 1, int(top) + 3)]))
+                elif change is not None:
+                    painter.fillRect(bar_left, int(top), bar - 2, int(bottom - top),
+                                     QColor(self.config.theme.get(change, '#1B81A8')))
+                if block_number in markers:
+                    # Dot in the severity's color for the worst problem on the line
+                    painter.setPen(Qt.NoPen)
+                    painter.setBrush(QColor(self.config.theme.get(markers[block_number], '#F14C4C')))
+                    painter.drawEllipse(2, int(top) + (self.fontMetrics().height() - size) // 2, size, size)
             block = block.next()
             top = bottom
             bottom = top + self.blockBoundingRect(block).height()
             block_number += 1
 
+    def paintEvent(self, event):
+        """
+        Paint the text, then the indent guides of the visible blocks.
+
+        Args:
+            event: Paint event of the viewport
+        """
+        super().paintEvent(event)
+        if self.indent_guides:
+            self.paintIndentGuides(event)
+
+    def paintIndentGuides(self, event):
+        """
+        Draw a vertical line at each indentation level of the visible blocks.
+        Levels come from the leading whitespace the token cache keeps for
+        each block, measured only when a block changes, so painting does no
+        text scanning however deep the nesting. Blank lines continue the
+        guides of the lines around them.
+
+        Args:
+            event: Paint event of the viewport
+        """
+        step = self.fontMetrics().horizontalAdvance(' ') * self.tab_size
+        left = self.contentOffset().x() + self.document().documentMargin()
+        bottom_edge = event.rect().bottom()
+        lines = []
+        block = self.firstVisibleBlock()
+        previous = self.nearbyLeading(block, forward=False)  # Leading columns of the last non-blank block
+        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+        while block.isValid() and top <= bottom_edge:
+            height = self.blockBoundingRect(block).height()
+            if block.isVisible() and top + height >= event.rect().top():
+                leading = self.token_cache.data(block).leading
+                if leading is None:
+                    leading = min(previous, self.nearbyLeading(block))
+                else:
+                    previous = leading
+                for level in range(leading // self.tab_size):
+                    x = int(left + level * step)
+                    lines.append(QLine(x, int(top), x, int(top + height) - 1))
+            block = block.next()
+            top += height
+        if lines:
+            painter = QPainter(self.viewport())
+            painter.setPen(QColor(self.config.theme.get('indent_guide', '#404040')))
+            painter.drawLines(lines)
+
+    def nearbyLeading(self, block, forward=True, limit=100):
+        """
+        Find the leading whitespace of the next or previous non-blank block.
+
+        Args:
+            block: QTextBlock to start from
+            forward: Look at the blocks below rather than above
+            limit: Blocks to look at before giving up
+
+        Returns:
+            int: Leading columns, 0 if no non-blank block is near
+        """
+        for _ in range(limit):
+            block = block.next() if forward else block.previous()
+            if not block.isValid():
+                break
+            leading = self.token_cache.data(block).leading
+            if leading is not None:
+                return leading
+        return 0
+
     def highlightCurrentLine(self):
         """
         Highlight the line containing the text cursor.
@@ -151,7 +326,127 @@ class VerilogEditor(QPlainTextEdit):
                 selection.cursor = self.textCursor()
                 selection.cursor.clearSelection()
                 extra_selections.append(selection)
-            self.setExtraSelections(extra_selections)
+            self.set_extra_selections('current_line', extra_selections)
+
+    def set_extra_selections(self, name, selections):
+        """
+        Replace one group of extra selections and show all groups.
+        QPlainTextEdit keeps a single list, so each feature owns a named
+        group and the list is rebuilt from the groups.
+
+        Args:
+            name: Group name, e.g. 'current_line' or 'diagnostics'
+            selections: List of QTextEdit.ExtraSelection
+        """
+        self.extra_selection_groups[name] = selections
+        self.setExtraSelections([selection for group in self.extra_selection_groups.values()
+                                 for selection in group])
+
+    def set_diagnostics(self, diagnostics, revision=-1, path=None):
+        """
+        Show check results as squiggly underlines and gutter markers.
+
+        Args:
+            diagnostics: Diagnostic tuples from lint_checks, sorted by position
+            revision: TokenCache.edits the diagnostics were computed for
+            path: File path the diagnostics were computed for
+        """
+        settings = getattr(self.config, 'diagnostics', {})
+        self.diagnostics = diagnostics
+        self.diagnostics_revision = revision
+        self.diagnostics_path = path
+        self.diagnostic_cursors = []
+        document = self.document()
+        selections = []
+        for diagnostic in diagnostics[:settings.get('max_markers', 1000)]:
+            block = document.findBlockByNumber(diagnostic.line)
+            if not block.isValid():
+                continue
+            cursor = QTextCursor(block)
+            column = min(diagnostic.column, max(0, block.length() - 1))
+            cursor.setPosition(block.position() + column)
+            if diagnostic.length:
+                cursor.setPosition(min(block.position() + column + diagnostic.length,
+                                       block.position() + block.length() - 1), QTextCursor.KeepAnchor)
+            else:
+                cursor.select(QTextCursor.WordUnderCursor)
+                if not cursor.hasSelection():
+                    # Nothing to underline at the end of a line: mark the last character
+                    cursor.movePosition(QTextCursor.Left, QTextCursor.KeepAnchor)
+            self.diagnostic_cursors.append((cursor, diagnostic))
+
+            selection = QTextEdit.ExtraSelection()
+            selection.format = QTextCharFormat()
+            selection.format.setUnderlineStyle(QTextCharFormat.WaveUnderline)
+            selection.format.setUnderlineColor(QColor(self.config.theme.get(diagnostic.severity, '#F14C4C')))
+            selection.cursor = cursor
+            selections.append(selection)
+        self.set_extra_selections('diagnostics', selections)
+        self.line_number_area.update()
+
+    def diagnosticMarkers(self):
+        """
+        Find the worst problem severity of each line with problems.
+
+        Returns:
+            dict: Block number -> 'error', 'warning' or 'info'
+        """
+        rank = {'error': 0, 'warning': 1, 'info': 2}
+        markers = {}
+        for cursor, diagnostic in self.diagnostic_cursors:
+            block_number = cursor.block().blockNumber()
+            current = markers.get(block_number)
+            if current is None or rank.get(diagnostic.severity, 3) < rank.get(current, 3):
+                markers[block_number] = diagnostic.severity
+        return markers
+
+    def diagnosticsAt(self, block_number, position=None):
+        """
+        Collect the messages of problems on a line, or under a position.
+
+        Args:
+            block_number: Line to look at
+            position: Document position; if given, only problems whose range
+                      contains it are returned
+
+        Returns:
+            list: Message strings
+        """
+        messages = []
+        for cursor, diagnostic in self.diagnostic_cursors:
+            if cursor.block().blockNumber() != block_number:
+                continue
+            if position is None or cursor.selectionStart() <= position <= cursor.selectionEnd():
+                messages.append(f'{diagnostic.severity}: {diagnostic.message} [{diagnostic.source}]')
+        return messages
+
+    def lineNumberAreaToolTip(self, event):
+        """
+        Show the problems of the line under the mouse in the gutter.
+
+        Args:
+            event: QHelpEvent from the line number area
+        """
+        block = self.cursorForPosition(event.pos()).block()
+        messages = self.diagnosticsAt(block.blockNumber())
+        if messages:
+            QToolTip.showText(event.globalPos(), '\n'.join(messages), self.line_number_area)
+        else:
+            QToolTip.hideText()
+
+    def viewportEvent(self, event):
+        """
+        Show the problems under the mouse as a tool tip.
+        """
+        if event.type() == QEvent.ToolTip:
+            cursor = self.cursorForPosition(event.pos())
+            messages = self.diagnosticsAt(cursor.blockNumber(), cursor.position())
+            if messages:
+                QToolTip.showText(event.globalPos(), '\n'.join(messages), self.viewport())
+            else:
+                QToolTip.hideText()
+            return True
+        return super().viewportEvent(event)
 
     def getLineIndentation(self, text):
         """
@@ -173,19 +468,87 @@ class VerilogEditor(QPlainTextEdit):
                 break
         return indent
 
-    def shouldAddExtraIndent(self, text):
+    def indentUnit(self):
         """
-        Determine if an extra indentation level should be added.
-        Checks for keywords and constructs that typically require indentation.
+        Get the text of one indentation level from the formatting settings.
+
+        Returns:
+            str: A tab, or tab_size spaces
+        """
+        formatting = getattr(self.config, 'formatting', {})
+        if formatting.get('use_tabs', True):
+            return '\t'
+        return ' ' * formatting.get('tab_size', 4)
+
+    def reindentBlock(self, cursor):
+        """
+        Set the leading whitespace of the cursor's line to the indent level
+        its nesting depth calls for. The depth comes from the token cache,
+        which only recomputes the lines from the first edited one, so this
+        does not rescan the file on every keystroke.
 
         Args:
-            text: The line of text to analyze
+            cursor: QTextCursor on the line; it keeps its place in the text
+        """
+        block = cursor.block()
+        text = block.text()
+        current = self.getLineIndentation(text)
+        wanted = self.indentUnit() * self.token_cache.nesting(block).indent
+        if current == wanted:
+            return
+        column = cursor.positionInBlock()
+        edit = QTextCursor(block)
+        edit.setPosition(block.position() + len(current), QTextCursor.KeepAnchor)
+        edit.insertText(wanted)
+        cursor.setPosition(block.position() + len(wanted) + max(0, column - len(current)))
+
+    def reindentAfterTyping(self):
+        """
+        Move the current line to its indent level once a word that changes
+        it (end, endcase, endmodule, else, begin, a closing bracket...) is
+        typed at its start, or once further typing turns such a word into
+        another one. The change joins the typing's undo step.
+        """
+        cursor = self.textCursor()
+        if cursor.hasSelection():
+            return
+        tokens = code_tokens(self.token_cache.tokens(cursor.block()))
+        if not tokens or tokens[0].column + len(tokens[0].text) != cursor.positionInBlock():
+            return
+        word = tokens[0].text
+        if word not in REINDENT_WORDS and word[:-1] not in REINDENT_WORDS:
+            return
+        cursor.joinPreviousEditBlock()
+        self.reindentBlock(cursor)
+        cursor.endEditBlock()
+        self.setTextCursor(cursor)
+
+    def gotoChange(self, forward=True):
+        """
+        Move the cursor to the next or previous change from the saved text.
+
+        Args:
+            forward: Go down rather than up
+
+        Returns:
+            bool: True if there is a change to go to
+        """
+        line = self.changes.next_change(self.textCursor().blockNumber(), forward)
+        if line is None:
+            return False
+        block = self.document().findBlockByNumber(min(line, self.blockCount() - 1))
+        self.setTextCursor(QTextCursor(block))
+        self.centerCursor()
+        return True
+
+    def revertChange(self):
+        """
+        Restore the saved lines of the change at the cursor.
 
         Returns:
-            bool: True if extra indentation should be added
+            bool: True if a change was reverted
         """
-        text = text.strip()
-        return text.endswith('begin') or text.endswith('(')
+        return self.changes.revert(self.textCursor().blockNumber())
 
     def keyPressEvent(self, event):
         """
@@ -195,7 +558,9 @@ class VerilogEditor(QPlainTextEdit):
         Args:
             event: Key event to handle
         """
-        if event.key() == Qt.Key_Return:
+        if self.isReadOnly():
+            super().keyPressEvent(event)  # Navigation only; the handlers below edit through cursors
+        elif event.key() == Qt.Key_Return:
             self.handleReturn()
         elif event.key() == Qt.Key_Tab:
             self.handleTab()
@@ -207,6 +572,8 @@ class VerilogEditor(QPlainTextEdit):
             super().keyPressEvent(event)
         else:
             super().keyPressEvent(event)
+            if self.auto_indent and event.text() and event.text().isprintable():
+                self.reindentAfterTyping()
 
     def cut_line(self):
         """
@@ -245,22 +612,18 @@ class VerilogEditor(QPlainTextEdit):
     def handleReturn(self):
         """
         Handle Return key press with smart indentation.
-        Maintains current indentation level and adds extra indent when needed.
+        Indents the new line by the nesting depth of the code above it:
+        one level more after begin, case, a module header or an open
+        bracket, and one level more for the single statement after an
+        if, else, for or always header.
         """
         cursor = self.textCursor()
         cursor.beginEditBlock()
-
-        block = cursor.block()
-        text = block.text()
-
-        current_indent = self.getLineIndentation(text)
         cursor.insertText('\n')
-        cursor.insertText(current_indent)
-
-        if self.shouldAddExtraIndent(text):
-            cursor.insertText('\t')
-
+        if self.auto_indent:
+            self.reindentBlock(cursor)
         cursor.endEditBlock()
+        self.setTextCursor(cursor)
 
     def handleTab(self):
         """
@@ -307,7 +670,7 @@ class VerilogEditor(QPlainTextEdit):
         scrollbar = self.verticalScrollBar()
         scroll_pos = scrollbar.value()
 
-        formatted_text = format_verilog(self.toPlainText())
+        formatted_text = format_verilog(self.toPlainText(), self.token_cache.lines())
         self.setPlainText(formatted_text)
 
         scrollbar.setValue(scroll_pos)
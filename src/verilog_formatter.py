@@ -1,19 +1,27 @@
 import re
 
+from token_cache import code_tokens, tokenize_lines
 
-def format_verilog(text):
+
+def format_verilog(text, line_tokens=None):
     """
     Format Verilog code with proper indentation and alignment.
     Handles module declarations, port lists, begin/end blocks, and comments.
+    Keywords are recognized from tokens, so words in comments and strings,
+    or names that merely start with a keyword, do not change indentation.
 
     Args:
         text: String containing unformatted Verilog code
+        line_tokens: Optional per-line LineToken lists of text, e.g. from the
+                     document's token cache; computed if not given
 
     Returns:
         str: Formatted Verilog code with consistent indentation and spacing
     """
     # Split input into lines for processing
     lines = text.split('\n')
+    if line_tokens is None or len(line_tokens) != len(lines):
+        line_tokens = tokenize_lines(text)
     formatted_lines = []
     indent_level = 0  # Track current indentation level
     in_module = False  # Track if we're inside a module declaration
@@ -30,20 +38,23 @@ def format_verilog(text):
             formatted_lines.append('\t' if in_module else '')
             continue
 
-        # Split line into code and comment parts
+        # Split line into code and comment parts at the first line comment
         # Preserve comments while formatting code
         code_part = line
         comment_part = ''
-        if '//' in line:
-            parts = line.split('//', 1)
-            code_part = parts[0]
-            comment_part = '//' + parts[1]
+        for token in line_tokens[i]:
+            if token.kind == 'comment' and token.text.startswith('//'):
+                code_part = line[:token.column]
+                comment_part = line[token.column:]
+                break
 
         # Remove leading/trailing whitespace from code
         stripped_code = code_part.strip()
+        words = [token.text for token in code_tokens(line_tokens[i])]
+        first_word = words[0] if words else ''
 
         # Handle module declaration start
-        if stripped_code.startswith('module'):
+        if first_word == 'module':
             in_module = True
             formatted_lines.append(stripped_code)
             continue
@@ -55,12 +66,12 @@ def format_verilog(text):
             continue
 
         # Adjust indentation level for unindenting keywords
-        if any(stripped_code.startswith(keyword) for keyword in unindent_keywords):
+        if first_word in unindent_keywords:
             indent_level = max(0, indent_level - 1)
 
         # Special handling for else statements
         # Reduce indent level to match the corresponding if statement
-        if stripped_code.startswith('else'):
+        if first_word == 'else':
             indent_level = max(0, indent_level - 1)
 
         # Calculate proper indentation
@@ -83,9 +94,10 @@ def format_verilog(text):
 
         formatted_lines.append(formatted_line)
 
-        # Check for keywords that increase indentation
-        if any(keyword in stripped_code for keyword in indent_keywords):
-            indent_level += 1
+        # Blocks opened on this line, less those it also closes after its first word
+        opened = sum(1 for word in words if word in indent_keywords)
+        closed = sum(1 for word in words[1:] if word in unindent_keywords)
+        indent_level = max(0, indent_level + opened - closed)
 
     # Join formatted lines back into text
     formatted_text = '\n'.join(formatted_lines)
@@ -1,5 +1,6 @@
-from PyQt5.QtCore import QRegExp
-from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QFont, QColor
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QFont, QColor, QTextCursor
+from token_cache import token_cache_for, tokenize_line
 
 
 class VerilogHighlighter(QSyntaxHighlighter):
@@ -12,8 +13,13 @@ class VerilogHighlighter(QSyntaxHighlighter):
     - Numbers in various formats
     - Comments (single-line and multi-line)
     - Operators and special characters
+    - `ifdef branches that are not compiled, shown greyed out
+    Lines are formatted from the document's shared token cache, so a line
+    is tokenized once per edit for highlighting, formatting and auto-indent.
     """
 
+    blockHighlighted = pyqtSignal(int)  # Number of a block whose formats were (re)computed
+
     def __init__(self, parent=None, config=None):
         """
         Initialize the Verilog syntax highlighter.
@@ -22,13 +28,30 @@ class VerilogHighlighter(QSyntaxHighlighter):
             parent: Parent QTextDocument
             config: Configuration object containing theme colors
         """
+        # Created first, so its tokens are invalidated before this highlighter reformats
+        token_cache = token_cache_for(parent)
         super().__init__(parent)
         self.config = config or {}
-        self.highlighting_rules = []  # List to store (pattern, format) pairs
+        self.token_cache = token_cache  # None without a document (large file viewer)
+        self.word_formats = {}  # Keyword -> format
+        self.kind_formats = {}  # Token kind -> format
 
         self.init_formats()  # Initialize text formats
         self.init_rules()  # Set up highlighting rules
 
+        # Inactive `ifdef branches, from the shared preprocessor model
+        self.preprocessor = None  # PreprocessorCache, set by set_preprocessor()
+        self.path = None  # File path used to resolve `include
+        self.inactive_lines = []  # (first line, last line) ranges of the last analysis
+        self.inactive = []  # The same ranges as (start, end) cursors, which follow edits
+        self.included = []  # Files whose macros affect this document
+        self.analyzed_revision = -1  # TokenCache.edits of the text last analyzed
+        self.semantic = None  # SemanticOverlay supplying declaration-based colors, if enabled
+        self.preprocess_timer = QTimer(self)
+        self.preprocess_timer.setSingleShot(True)
+        self.preprocess_timer.setInterval(300)
+        self.preprocess_timer.timeout.connect(self.update_inactive)
+
     def init_formats(self):
         """
         Initialize text formats for different syntax elements.
@@ -64,25 +87,26 @@ class VerilogHighlighter(QSyntaxHighlighter):
         self.operator_format = QTextCharFormat()
         self.operator_format.setForeground(QColor(self.config.theme.get('operators', "#D4D4D4")))
 
+        # Formats for the semantic overlay, keyed by theme color name
+        self.semantic_formats = {}
+        for key, default in (('module_name', "#9CDCFE"), ('instance_name', "#4FC1FF"),
+                             ('parameters', "#4FC1FF"), ('ports', "#9CDCFE"), ('strings', "#CE9178"),
+                             ('nets', "#B8D7A3"), ('variables', "#DCDCAA")):
+            semantic_format = QTextCharFormat()
+            semantic_format.setForeground(QColor(self.config.theme.get(key, default)))
+            self.semantic_formats[key] = semantic_format
+
+        # Format for code in `ifdef branches that are not compiled
+        self.inactive_format = QTextCharFormat()
+        self.inactive_format.setForeground(QColor(self.config.theme.get('inactive_code', "#6B6B6B")))
+
     def init_rules(self):
         """
-        Initialize syntax highlighting rules using regular expressions.
-        Each rule consists of a QRegExp pattern and its corresponding format.
-        Rules are processed in order, so more specific rules should come first.
+        Initialize the highlighting rules.
+        Words are formatted by their text and other tokens by their kind;
+        module names and instance declarations are found from the tokens
+        around them in token_ranges().
         """
-        # Bracket highlighting (all types of brackets)
-        self.highlighting_rules.append((
-            QRegExp(r'[\[\]{}()]'),
-            self.operator_format
-        ))
-
-        # Module names and instance names
-        # Uses lookahead to avoid including parentheses
-        self.highlighting_rules.append((
-            QRegExp(r'module\s+(\w+)|(\w+)\s+\w+\s*(?=\()'),
-            self.keyword_format
-        ))
-
         # Language keywords
         keywords = [
             'module', 'endmodule', 'timescale',  # Module-related
@@ -94,55 +118,53 @@ class VerilogHighlighter(QSyntaxHighlighter):
             'parameter', 'localparam'  # Parameters
         ]
         for keyword in keywords:
-            pattern = QRegExp('\\b' + keyword + '\\b')  # Word boundaries
-            self.highlighting_rules.append((pattern, self.keyword_format))
+            self.word_formats[keyword] = self.keyword_format
 
         # Port direction keywords
-        port_keywords = ['input', 'output', 'inout']
-        for keyword in port_keywords:
-            pattern = QRegExp('\\b' + keyword + '\\b')
-            self.highlighting_rules.append((pattern, self.port_format))
+        for keyword in ['input', 'output', 'inout']:
+            self.word_formats[keyword] = self.port_format
 
         # Data type keywords
-        type_keywords = ['wire', 'reg', 'integer', 'real']
-        for keyword in type_keywords:
-            pattern = QRegExp('\\b' + keyword + '\\b')
-            self.highlighting_rules.append((pattern, self.type_format))
+        for keyword in ['wire', 'reg', 'integer', 'real']:
+            self.word_formats[keyword] = self.type_format
 
         # Special keywords
-        special_keywords = ['posedge', 'negedge', 'or']
-        for keyword in special_keywords:
-            pattern = QRegExp('\\b' + keyword + '\\b')
-            self.highlighting_rules.append((pattern, self.special_format))
-
-        # Operators (arithmetic, logical, comparison)
-        operators = [
-            '=', '==', '!=', '<=', '>=',  # Assignment and comparison
-            '&&', r'\|\|',  # Logical AND/OR
-            r'\+', '-', r'\*', '/',  # Arithmetic
-            r'\^', r'\&', r'\|', '~',  # Bitwise
-            '<<', '>>'  # Shifts
-        ]
-        for operator in operators:
-            pattern = QRegExp(operator)
-            self.highlighting_rules.append((pattern, self.operator_format))
-
-        # Number formats
-        number_patterns = [
-            r'\b\d+\'[bB][01_]+\b',  # Binary (e.g., 4'b1010)
-            r'\b\d+\'[hH][0-9a-fA-F_]+\b',  # Hexadecimal (e.g., 8'hAB)
-            r'\b\d+\'[dD][0-9_]+\b',  # Decimal with base (e.g., 10'd42)
-            r'\b\d+\b',  # Simple decimal
-            r'\b[0-9]+\.[0-9]+\b'  # Floating point
-        ]
-        for pattern in number_patterns:
-            self.highlighting_rules.append((QRegExp(pattern), self.number_format))
+        for keyword in ['posedge', 'negedge', 'or']:
+            self.word_formats[keyword] = self.special_format
+
+        # Operators and brackets, numbers in all bases, and comments
+        self.kind_formats['operator'] = self.operator_format
+        self.kind_formats['number'] = self.number_format
+        self.kind_formats['comment'] = self.comment_format
+
+    def token_ranges(self, tokens):
+        """
+        Compute the formats of a line's tokens.
+
+        Args:
+            tokens: LineToken list of the line
 
-        # Single-line comments
-        self.highlighting_rules.append((
-            QRegExp(r'//[^\n]*'),
-            self.comment_format
-        ))
+        Returns:
+            list: (start, length, QTextCharFormat) runs in line order
+        """
+        ranges = []
+        count = len(tokens)
+        for index, token in enumerate(tokens):
+            if token.kind != 'identifier':
+                format = self.kind_formats.get(token.kind)
+            else:
+                format = self.word_formats.get(token.text)
+                if format is None:
+                    # Module names, and 'type name (' of instances
+                    if index and tokens[index - 1].text == 'module' \
+                            or (index + 2 < count and tokens[index + 1].kind == 'identifier'
+                                and tokens[index + 2].text == '(') \
+                            or (index and index + 1 < count and tokens[index - 1].kind == 'identifier'
+                                and tokens[index + 1].text == '(' and tokens[index - 1].text not in self.word_formats):
+                        format = self.keyword_format
+            if format is not None:
+                ranges.append((token.column, len(token.text), format))
+        return ranges
 
     def highlightBlock(self, text):
         """
@@ -152,47 +174,134 @@ class VerilogHighlighter(QSyntaxHighlighter):
         Args:
             text: Text block to highlight
         """
-        # Handle multi-line comments first
-        self.handle_multiline_comments(text)
+        block = self.currentBlock()
+        self.blockHighlighted.emit(block.blockNumber())
+        if self.token_cache is not None:
+            data = self.token_cache.data(block)
+            tokens, ends_in_comment = data.tokens, data.ends_in_comment
+        else:
+            tokens, ends_in_comment = tokenize_line(text, self.previousBlockState() == 1)
+        self.setCurrentBlockState(1 if ends_in_comment else 0)  # 1: the next block starts in a comment
+
+        spans = self.semantic.spans_for(block, text) if self.semantic is not None else ()
+
+        # Inactive branches are greyed out as a whole; the comment state above still carries over
+        if self.inactive and self.is_inactive(block):
+            self.setFormat(0, len(text), self.inactive_format)
+            return
 
-        # Apply all other highlighting rules
-        for pattern, format in self.highlighting_rules:
-            expression = QRegExp(pattern)
-            index = expression.indexIn(text)
-            while index >= 0:
-                length = expression.matchedLength()
-                # Skip highlighting if inside multi-line comment
-                if not self.is_in_multiline_comment(index, length):
-                    self.setFormat(index, length, format)
-                index = expression.indexIn(text, index + length)
+        for start, length, format in self.token_ranges(tokens):
+            self.setFormat(start, length, format)
 
-    def handle_multiline_comments(self, text):
+        # Declaration-based colors override the token rules
+        for column, length, key in spans:
+            if not self.is_in_multiline_comment(column, length):
+                self.setFormat(column, length, self.semantic_formats[key])
+
+    def set_preprocessor(self, preprocessor, path):
         """
-        Process multi-line comments in the text block.
-        Handles both start and end of multi-line comments,
-        maintaining state between blocks.
+        Grey out inactive `ifdef branches using a preprocessor model.
 
         Args:
-            text: Text block to process
+            preprocessor: PreprocessorCache, or None to stop
+            path: File path of the document, or None if untitled
         """
-        start = '/*'
-        end = '*/'
+        # Edits to the text only: rehighlighting also emits contentsChanged
+        if self.preprocessor is None and preprocessor is not None:
+            self.token_cache.edited.connect(self.schedule_preprocess)
+        elif self.preprocessor is not None and preprocessor is None:
+            self.token_cache.edited.disconnect(self.schedule_preprocess)
+        self.preprocessor = preprocessor
+        self.path = path
+        if preprocessor is None:
+            self.set_inactive_lines([])
+        else:
+            self.update_inactive()
 
-        # Determine comment start position
-        start_index = text.find(start) if self.previousBlockState() != 1 else 0
+    def schedule_preprocess(self):
+        """
+        Analyze the document again once typing pauses.
+        """
+        if self.token_cache.edits != self.analyzed_revision:
+            self.preprocess_timer.start()
 
-        while start_index >= 0:
-            end_index = text.find(end, start_index)
-            if end_index == -1:
-                # Comment continues to next block
-                self.setFormat(start_index, len(text) - start_index, self.comment_format)
-                self.setCurrentBlockState(1)  # Mark block as ending in comment
-                break
-            else:
-                # Comment ends in this block
-                length = end_index - start_index + len(end)
-                self.setFormat(start_index, length, self.comment_format)
-                start_index = text.find(start, start_index + length)
+    def update_inactive(self):
+        """
+        Analyze the document's directives and regrey the lines whose state changed.
+        """
+        if self.preprocessor is None:
+            return
+        self.analyzed_revision = self.token_cache.edits
+        result = self.preprocessor.analyze(self.path, self.document().toPlainText())
+        self.included = result.includes
+        self.set_inactive_lines(result.inactive)
+
+    def set_inactive_lines(self, ranges):
+        """
+        Replace the inactive line ranges and rehighlight the affected lines.
+
+        Args:
+            ranges: Sorted (first line, last line) ranges, inclusive
+        """
+        # Lines greyed out now; the cursors give their current numbers after edits
+        before = {line for start, end in self.inactive for line in range(start.blockNumber(), end.blockNumber() + 1)}
+        after = {line for first, last in ranges for line in range(first, last + 1)}
+        document = self.document()
+        self.inactive_lines = ranges
+        self.inactive = []
+        for first, last in ranges:
+            start = QTextCursor(document.findBlockByNumber(first))
+            block = document.findBlockByNumber(last)
+            end = QTextCursor(block)
+            end.movePosition(QTextCursor.EndOfBlock)
+            self.inactive.append((start, end))
+        for line in sorted(before ^ after):
+            block = document.findBlockByNumber(line)
+            if block.isValid():
+                self.rehighlightBlock(block)
+
+    def current_inactive_lines(self):
+        """
+        Return the inactive line ranges, adjusted for edits made since the
+        last analysis.
+
+        Returns:
+            list: (first line, last line) ranges, inclusive
+        """
+        return [(start.blockNumber(), end.blockNumber()) for start, end in self.inactive]
+
+    def is_inactive(self, block):
+        """
+        Check whether a block lies in an inactive `ifdef branch.
+
+        Args:
+            block: QTextBlock
+
+        Returns:
+            bool: True if the block is greyed out
+        """
+        position = block.position()
+        for start, end in self.inactive:
+            if start.block().position() <= position <= end.position():
+                return True
+        return False
+
+    def line_format_ranges(self, text, in_comment=False):
+        """
+        Compute highlighting for a single line of text without a QTextDocument.
+        Applies the same rules as highlightBlock, so views that render text
+        themselves (such as the large file viewer) match the editor.
+
+        Args:
+            text: Line of text to highlight
+            in_comment: True if the line starts inside a multi-line comment
+
+        Returns:
+            tuple: (list of (start, length, QTextCharFormat) runs,
+                    True if the line ends inside a multi-line comment)
+        """
+        tokens, ends_in_comment = tokenize_line(text, in_comment)
+        return self.token_ranges(tokens), ends_in_comment
 
     def is_in_multiline_comment(self, position, length):
         """
@@ -0,0 +1,718 @@
+# verilog_parser.py
+import re
+from collections import namedtuple
+
+# A lexical token. kind is one of the TOKEN_KINDS names, start is the offset
+# in the source text, line and column are 0-based.
+Token = namedtuple('Token', 'kind text start line column')
+
+TOKEN_KINDS = [
+    ('comment', r'//[^\n]*|/\*.*?(?:\*/|\Z)'),
+    ('string', r'"(?:\\.|[^"\\\n])*"?'),
+    ('directive', r'`[A-Za-z_]\w*'),
+    ('system', r'\$[A-Za-z_][\w$]*'),
+    ('number', r"(?:\d[\d_]*)?'[sS]?[bBoOdDhH]\s*[0-9a-fA-FxXzZ?_]+|'[01xXzZ]"
+               r"|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?"),
+    ('identifier', r'[A-Za-z_][\w$]*|\\\S+'),
+    ('operator', r'<<<=|>>>=|<<<|>>>|===|!==|==\?|!=\?|<<=|>>=|\+=|-=|\*=|/=|&=|\|=|\^='
+                 r'|<<|>>|<=|>=|==|!=|&&|\|\||\*\*|->|::|\+\+|--|~&|~\||~\^|\^~|\+:|-:|\'\{'
+                 r'|[-+*/%&|^~!<>=?:;,.#@()\[\]{}\']'),
+    ('newline', r'\n'),
+    ('space', r'[ \t\r\f]+'),
+    ('error', r'.'),
+]
+TOKEN_PATTERN = re.compile('|'.join(f'(?P<{kind}>{pattern})' for kind, pattern in TOKEN_KINDS), re.S)
+
+# Reserved words of Verilog-2005 and the commonly used SystemVerilog additions
+KEYWORDS = frozenset('''
+    always always_comb always_ff always_latch and assign automatic begin bit buf bufif0 bufif1
+    byte case casex casez cell cmos config deassign default defparam design disable edge else end
+    endcase endconfig endfunction endgenerate endinterface endmodule endpackage endprimitive
+    endprogram endspecify endtable endtask enum event final for force forever fork function generate
+    genvar highz0 highz1 if ifnone import incdir include initial inout input instance int integer
+    interface join join_any join_none large liblist library localparam logic longint macromodule
+    medium module modport nand negedge nmos nor noshowcancelled not notif0 notif1 or output package
+    packed parameter pmos posedge primitive program pull0 pull1 pulldown pullup
+    pulsestyle_ondetect pulsestyle_onevent rcmos real realtime reg release repeat return rnmos
+    rpmos rtran rtranif0 rtranif1 scalared showcancelled shortint signed small specify specparam
+    string strong0 strong1 struct supply0 supply1 table task time tran tranif0 tranif1 tri tri0
+    tri1 triand trior trireg typedef union unique unsigned use uwire vectored void wait wand weak0
+    weak1 while wire wor xnor xor
+'''.split())
+
+MODULE_KEYWORDS = frozenset(['module', 'macromodule', 'interface', 'program'])
+END_MODULE_KEYWORDS = frozenset(['endmodule', 'endinterface', 'endprogram'])
+DIRECTIONS = frozenset(['input', 'output', 'inout'])
+NET_TYPES = frozenset(['wire', 'reg', 'logic', 'bit', 'byte', 'int', 'integer', 'longint', 'shortint',
+                       'real', 'realtime', 'time', 'tri', 'tri0', 'tri1', 'triand', 'trior', 'trireg',
+                       'wand', 'wor', 'uwire', 'supply0', 'supply1', 'genvar', 'event', 'string'])
+NET_MODIFIERS = frozenset(['signed', 'unsigned', 'var', 'vectored', 'scalared', 'const', 'static',
+                           'automatic'])
+PARAMETER_KEYWORDS = frozenset(['parameter', 'localparam', 'specparam'])
+PROCESS_KEYWORDS = frozenset(['always', 'always_comb', 'always_ff', 'always_latch', 'initial', 'final'])
+SKIPPED_STATEMENTS = frozenset(['assign', 'defparam', 'import', 'typedef', 'assert', 'assume', 'cover'])
+BLOCK_PAIRS = {'begin': 'end', 'fork': 'join', 'case': 'endcase', 'casex': 'endcase',
+               'casez': 'endcase', 'function': 'endfunction', 'task': 'endtask',
+               'generate': 'endgenerate', 'specify': 'endspecify', 'table': 'endtable',
+               'primitive': 'endprimitive', 'config': 'endconfig', 'package': 'endpackage'}
+BLOCK_ENDS = frozenset(BLOCK_PAIRS.values()) | frozenset(['join_any', 'join_none'])
+SKIPPED_KINDS = frozenset(['comment', 'space', 'newline'])
+STATEMENT_ENDS = frozenset([';']) | END_MODULE_KEYWORDS
+COMPILER_DIRECTIVES = frozenset(['define', 'undef', 'undefineall', 'ifdef', 'ifndef', 'elsif', 'else',
+                                 'endif', 'include', 'timescale', 'default_nettype', 'line', 'pragma',
+                                 'celldefine', 'endcelldefine', 'resetall', 'unconnected_drive',
+                                 'nounconnected_drive', '__FILE__', '__LINE__'])
+
+
+class Symbol:
+    """
+    A named declaration found in a source file.
+
+    Attributes:
+        kind: 'module', 'port', 'parameter', 'net', 'instance', 'function',
+              'task', 'define' or 'include'
+        name: Declared name (for instances the instance name, for includes the file)
+        line: 0-based line of the name
+        column: 0-based column of the name
+        scope: Name of the enclosing module, or None at file level
+        detail: Extra information: port direction, net type, parameter value,
+                or the instantiated module for instances
+        width: Packed range such as '[7:0]', or '' if scalar
+        end_line: Last line of a module, or None for other symbols
+    """
+
+    __slots__ = ('kind', 'name', 'line', 'column', 'scope', 'detail', 'width', 'end_line')
+
+    def __init__(self, kind, name, line, column, scope=None, detail=None, width=''):
+        self.kind = kind
+        self.name = name
+        self.line = line
+        self.column = column
+        self.scope = scope
+        self.detail = detail
+        self.width = width
+        self.end_line = None
+
+    def __repr__(self):
+        return f'Symbol({self.kind!r}, {self.name!r}, line={self.line}, scope={self.scope!r})'
+
+
+class ParseResult:
+    """
+    Declarations found in one source file.
+
+    Attributes:
+        symbols: All Symbol objects in source order
+        errors: Problems found while parsing, as (line, column, message)
+        tokens: All tokens of the file except comments and whitespace,
+                including preprocessor directives and macro uses
+    """
+
+    def __init__(self):
+        self.symbols = []
+        self.errors = []
+        self.tokens = []
+
+    def of_kind(self, kind):
+        """
+        Return the symbols of one kind.
+
+        Args:
+            kind: Symbol kind, e.g. 'module'
+
+        Returns:
+            list: Matching Symbol objects in source order
+        """
+        return [symbol for symbol in self.symbols if symbol.kind == kind]
+
+    @property
+    def modules(self):
+        return self.of_kind('module')
+
+
+def identifier_names(tokens):
+    """
+    Collect the occurrences of every name in a token list.
+    Macro uses count as occurrences of the macro name.
+
+    Args:
+        tokens: Tokens from tokenize()
+
+    Returns:
+        dict: Name -> list of (line, column)
+    """
+    names = {}
+    for token in tokens:
+        if token.kind == 'identifier':
+            if token.text in KEYWORDS:
+                continue
+            name, column = token.text, token.column
+        elif token.kind == 'directive' and token.text[1:] not in COMPILER_DIRECTIVES:
+            name, column = token.text[1:], token.column + 1
+        else:
+            continue
+        positions = names.get(name)
+        if positions is None:
+            names[name] = [(token.line, column)]
+        else:
+            positions.append((token.line, column))
+    return names
+
+
+def tokenize(text, line=0, keep=False):
+    """
+    Split Verilog source into tokens.
+
+    Args:
+        text: Source text
+        line: Line number of the first line of text
+        keep: Also return comment, whitespace and newline tokens
+
+    Returns:
+        list: Token tuples in source order
+    """
+    tokens = []
+    append = tokens.append
+    line_start = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        start = match.start()
+        if keep or kind not in SKIPPED_KINDS:
+            append(Token(kind, match.group(), start, line, start - line_start))
+        if kind == 'newline':
+            line += 1
+            line_start = start + 1
+        elif kind == 'comment' or kind == 'string':
+            newlines = match.group().count('\n')
+            if newlines:
+                line += newlines
+                line_start = match.group().rfind('\n') + start + 1
+    return tokens
+
+
+def strip_directives(tokens, result=None):
+    """
+    Remove preprocessor directives from a token list.
+    `define bodies (including backslash-continued lines) are dropped, and
+    macro uses with arguments lose their argument list. Both branches of
+    conditionals are kept.
+
+    Args:
+        tokens: Tokens from tokenize()
+        result: ParseResult that receives 'define' and 'include' symbols
+
+    Returns:
+        list: Tokens without directives
+    """
+    output = []
+    index = 0
+    count = len(tokens)
+    while index < count:
+        token = tokens[index]
+        if token.kind != 'directive':
+            output.append(token)
+            index += 1
+            continue
+
+        name = token.text[1:]
+        index += 1
+        if name in ('define', 'undef', 'timescale', 'default_nettype', 'line', 'pragma',
+                    'celldefine', 'endcelldefine', 'resetall', 'unconnected_drive',
+                    'nounconnected_drive'):
+            if name == 'define' and index < count and tokens[index].line == token.line \
+                    and result is not None:
+                macro = tokens[index]
+                result.symbols.append(Symbol('define', macro.text, macro.line, macro.column))
+            # Skip the rest of the line, following backslash continuations
+            line = token.line
+            while index < count and tokens[index].line <= line:
+                if tokens[index].text == '\\' and (index + 1 >= count or tokens[index + 1].line > line):
+                    line += 1
+                index += 1
+        elif name == 'include':
+            if index < count and tokens[index].kind == 'string':
+                if result is not None:
+                    included = tokens[index]
+                    result.symbols.append(Symbol('include', included.text.strip('"'),
+                                                 included.line, included.column))
+                index += 1
+        elif name in ('ifdef', 'ifndef', 'elsif', 'undefineall'):
+            if index < count and tokens[index].line == token.line:
+                index += 1  # Macro name
+        elif name in ('else', 'endif'):
+            pass
+        elif index < count and tokens[index].text == '(' and tokens[index].start == token.start + len(token.text):
+            index = skip_group(tokens, index)  # Macro call with arguments
+        # Other macro uses expand to unknown text and are simply dropped
+    return output
+
+
+def skip_group(tokens, index):
+    """
+    Skip a bracketed group starting at an opening bracket.
+
+    Args:
+        tokens: Token list
+        index: Index of '(', '[' or '{'
+
+    Returns:
+        int: Index just after the matching closing bracket
+    """
+    depth = 0
+    count = len(tokens)
+    while index < count:
+        text = tokens[index].text
+        if text in ('(', '[', '{', "'{"):
+            depth += 1
+        elif text in (')', ']', '}'):
+            depth -= 1
+            if depth <= 0:
+                return index + 1
+        index += 1
+    return index
+
+
+class _Parser:
+    """
+    Recursive-descent parser for the declaration structure of Verilog.
+    Expressions and behavioural code are skipped; only what is needed for
+    navigation is extracted: modules, ports, parameters, nets, instances,
+    functions and tasks.
+    """
+
+    def __init__(self, tokens, result):
+        self.tokens = tokens
+        self.count = len(tokens)
+        self.result = result
+
+    def text(self, index):
+        return self.tokens[index].text if index < self.count else ''
+
+    def is_name(self, index):
+        if index >= self.count:
+            return False
+        token = self.tokens[index]
+        return token.kind == 'identifier' and token.text not in KEYWORDS
+
+    def add(self, kind, token, scope, detail=None, width=''):
+        symbol = Symbol(kind, token.text, token.line, token.column, scope, detail, width)
+        self.result.symbols.append(symbol)
+        return symbol
+
+    def error(self, index, message):
+        token = self.tokens[min(index, self.count - 1)] if self.count else Token('error', '', 0, 0, 0)
+        self.result.errors.append((token.line, token.column, message))
+
+    def skip_to(self, index, texts):
+        """Skip to the first top-level token in texts (not inside brackets)."""
+        while index < self.count:
+            text = self.tokens[index].text
+            if text in texts:
+                return index
+            if text in ('(', '[', '{', "'{"):
+                index = skip_group(self.tokens, index)
+            else:
+                index += 1
+        return index
+
+    def skip_past_semicolon(self, index):
+        """Skip to just after the next top-level ';', stopping at the module end."""
+        index = self.skip_to(index, STATEMENT_ENDS)
+        return index + 1 if self.text(index) == ';' else index
+
+    def skip_label(self, index):
+        """Skip an optional ': label' after begin/end and similar keywords."""
+        if self.text(index) == ':' and self.is_name(index + 1):
+            return index + 2
+        return index
+
+    def parse(self):
+        index = 0
+        while index < self.count:
+            text = self.tokens[index].text
+            if text in MODULE_KEYWORDS:
+                index = self.parse_module(index)
+            else:
+                index += 1
+
+    def parse_module(self, index):
+        keyword = self.tokens[index]
+        index += 1
+        if self.text(index) in ('automatic', 'static'):
+            index += 1
+        if not self.is_name(index):
+            self.error(index, f"expected a name after '{keyword.text}'")
+            return index
+        module = self.add('module', self.tokens[index], None, keyword.text)
+        scope = module.name
+        index += 1
+
+        # Package imports in the header
+        while self.text(index) == 'import':
+            index = self.skip_to(index, (';',)) + 1
+
+        ports = {}  # Port name -> Symbol, for non-ANSI declarations in the body
+        if self.text(index) == '#' and self.text(index + 1) == '(':
+            end = skip_group(self.tokens, index + 1) - 1
+            self.parse_list(index + 2, end, scope, 'parameter', ports)
+            index = end + 1
+        if self.text(index) == '(':
+            end = skip_group(self.tokens, index) - 1
+            self.parse_list(index + 1, end, scope, 'port', ports)
+            index = end + 1
+        if self.text(index) == ';':
+            index += 1
+        else:
+            self.error(index, f"expected ';' after the header of {keyword.text} '{scope}'")
+
+        while index < self.count:
+            text = self.tokens[index].text
+            if text in END_MODULE_KEYWORDS:
+                module.end_line = self.tokens[index].line
+                return self.skip_label(index + 1)
+            if text in MODULE_KEYWORDS:
+                break  # Missing end keyword
+            index = self.parse_item(index, scope, ports)
+
+        self.error(index, f"missing 'end{keyword.text}' for '{scope}'")
+        module.end_line = self.tokens[min(index, self.count) - 1].line
+        return index
+
+    def parse_list(self, index, end, scope, kind, ports):
+        """
+        Parse a comma-separated parameter or port list of a module header.
+        Directions, types and ranges carry over to following bare names, as
+        in ANSI port lists.
+        """
+        direction = 'parameter' if kind == 'parameter' else None
+        net_type = None
+        width = ''
+        while index < end:
+            segment_end = self.skip_to(index, (',', ')'))
+            segment_end = min(segment_end, end)
+            name_token = None
+            declared = False
+            position = index
+            while position < segment_end:
+                token = self.tokens[position]
+                text = token.text
+                if text in DIRECTIONS or text in PARAMETER_KEYWORDS:
+                    direction = text
+                    net_type = None
+                    width = ''
+                    declared = True
+                elif text in NET_TYPES or text in NET_MODIFIERS or text == 'type':
+                    net_type = text if text in NET_TYPES else net_type
+                    declared = True
+                elif text == '[':
+                    after = skip_group(self.tokens, position)
+                    if name_token is None:
+                        width = ''.join(t.text for t in self.tokens[position:after])
+                    position = after
+                    continue
+                elif text == '=':
+                    value = ' '.join(t.text for t in self.tokens[position + 1:segment_end])
+                    break
+                elif text == '.' or text == '(':
+                    position = skip_group(self.tokens, position) if text == '(' else position + 1
+                    continue
+                elif self.is_name(position):
+                    if name_token is not None:
+                        net_type = name_token.text  # Previous name was a user-defined type
+                        declared = True
+                    name_token = token
+                position += 1
+            else:
+                value = None
+
+            if name_token is not None:
+                if kind == 'parameter' or direction in PARAMETER_KEYWORDS:
+                    self.add('parameter', name_token, scope, value, width)
+                else:
+                    if not declared and direction is None:
+                        detail = None  # Non-ANSI: direction comes from the body
+                    else:
+                        detail = direction or 'inout'
+                        if net_type:
+                            detail += ' ' + net_type
+                    ports[name_token.text] = self.add('port', name_token, scope, detail, width)
+            index = segment_end + 1
+
+    def parse_declaration(self, index, scope, ports):
+        """
+        Parse a port, net or parameter declaration up to its ';'.
+        """
+        keyword = self.tokens[index].text
+        direction = keyword if keyword in DIRECTIONS else None
+        kind = 'parameter' if keyword in PARAMETER_KEYWORDS else ('port' if direction else 'net')
+        net_type = keyword if keyword in NET_TYPES or keyword not in KEYWORDS else None
+        width = ''
+        index += 1
+
+        # Type, modifiers and packed range
+        while index < self.count:
+            text = self.tokens[index].text
+            if text in NET_TYPES:
+                net_type = text
+            elif text in NET_MODIFIERS or text in ('strong0', 'strong1', 'weak0', 'weak1', 'type'):
+                pass
+            elif text == '[':
+                end = skip_group(self.tokens, index)
+                width += ''.join(t.text for t in self.tokens[index:end])
+                index = end
+                continue
+            elif text == '#' or (text == '(' and kind == 'net'):
+                index = skip_group(self.tokens, index + 1 if text == '#' else index)  # Delay or strength
+                continue
+            elif self.is_name(index) and self.is_name(index + 1):
+                net_type = text  # User-defined type
+            else:
+                break
+            index += 1
+
+        # Declared names
+        while index < self.count:
+            if not self.is_name(index):
+                self.error(index, f"expected a name in '{keyword}' declaration")
+                return self.skip_to(index, (';',)) + 1
+            name_token = self.tokens[index]
+            index += 1
+            while self.text(index) == '[':
+                index = skip_group(self.tokens, index)  # Unpacked dimensions
+            value = None
+            if self.text(index) == '=':
+                value_end = self.skip_to(index + 1, (',', ';'))
+                value = ' '.join(t.text for t in self.tokens[index + 1:value_end])
+                index = value_end
+
+            if kind == 'port':
+                detail = direction + (' ' + net_type if net_type else '')
+                existing = ports.get(name_token.text)
+                if existing is not None and existing.detail is None:
+                    existing.detail = detail  # Non-ANSI port declared in the body
+                    existing.width = width
+                else:
+                    ports[name_token.text] = self.add('port', name_token, scope, detail, width)
+            elif kind == 'parameter':
+                self.add('parameter', name_token, scope, value, width)
+            elif name_token.text in ports:
+                port = ports[name_token.text]  # 'output reg' split over two declarations
+                if port.detail and net_type and ' ' not in port.detail:
+                    port.detail += ' ' + net_type
+            else:
+                self.add('net', name_token, scope, net_type, width)
+
+            if self.text(index) == ',':
+                index += 1
+                continue
+            break
+        if self.text(index) == ';':
+            return index + 1
+        self.error(index, f"expected ';' after '{keyword}' declaration")
+        return self.skip_to(index, (';',)) + 1
+
+    def parse_instance(self, index, scope):
+        """
+        Parse a module instantiation: type [#(...)] name [range] (...), ... ;
+        """
+        module_type = self.tokens[index].text
+        index += 1
+        if self.text(index) == '#':
+            index += 1
+            index = skip_group(self.tokens, index) if self.text(index) == '(' else index + 1
+        while self.is_name(index):
+            name_token = self.tokens[index]
+            index += 1
+            while self.text(index) == '[':
+                index = skip_group(self.tokens, index)
+            if self.text(index) != '(':
+                break
+            index = skip_group(self.tokens, index)
+            self.add('instance', name_token, scope, module_type)
+            if self.text(index) != ',':
+                break
+            index += 1
+        if self.text(index) == ';':
+            return index + 1
+        self.error(index, f"expected ';' after instance of '{module_type}'")
+        return self.skip_to(index, (';',)) + 1
+
+    def parse_subroutine(self, index, scope):
+        """
+        Record a function or task and skip its body.
+        """
+        keyword = self.tokens[index].text
+        end_keyword = BLOCK_PAIRS[keyword]
+        index += 1
+        name_token = None
+        while index < self.count and self.text(index) not in ('(', ';'):
+            if self.text(index) == '[':
+                index = skip_group(self.tokens, index)
+                continue
+            if self.is_name(index):
+                name_token = self.tokens[index]
+            index += 1
+        if name_token is not None:
+            self.add(keyword, name_token, scope)
+        while index < self.count and self.text(index) != end_keyword:
+            if self.text(index) in END_MODULE_KEYWORDS:
+                self.error(index, f"missing '{end_keyword}'")
+                return index
+            index += 1
+        return self.skip_label(index + 1)
+
+    def skip_statement(self, index):
+        """
+        Skip one behavioural statement, including nested blocks.
+        """
+        text = self.text(index)
+        if text in ('@', '#'):
+            index += 1
+            if self.text(index) in ('(', '['):
+                index = skip_group(self.tokens, index)
+            else:
+                index += 1  # Delay value or event name
+                if self.text(index) == '.':
+                    index += 2
+            return self.skip_statement(index)
+        if text in ('begin', 'fork'):
+            return self.skip_block(index)
+        if text in ('case', 'casex', 'casez'):
+            return self.skip_block(index)
+        if text in ('unique', 'priority', 'unique0'):
+            return self.skip_statement(index + 1)
+        if text == 'if':
+            index = skip_group(self.tokens, index + 1)
+            index = self.skip_statement(index)
+            if self.text(index) == 'else':
+                index = self.skip_statement(index + 1)
+            return index
+        if text in ('for', 'while', 'repeat', 'foreach'):
+            return self.skip_statement(skip_group(self.tokens, index + 1))
+        if text == 'forever':
+            return self.skip_statement(index + 1)
+        if text == 'wait':
+            index = skip_group(self.tokens, index + 1)
+            return self.skip_statement(index) if self.text(index) != ';' else index + 1
+        if text == ';':
+            return index + 1
+        return self.skip_past_semicolon(index)
+
+    def skip_block(self, index):
+        """
+        Skip from a block keyword to just after its matching end keyword.
+        """
+        stack = [BLOCK_PAIRS[self.text(index)]]
+        index = self.skip_label(index + 1)
+        while index < self.count and stack:
+            text = self.text(index)
+            if text in BLOCK_PAIRS and text not in ('function', 'task', 'generate'):
+                stack.append(BLOCK_PAIRS[text])
+            elif text in BLOCK_ENDS:
+                if text == stack[-1] or (stack[-1] == 'join' and text in ('join_any', 'join_none')):
+                    stack.pop()
+                else:
+                    self.error(index, f"'{text}' does not match '{stack[-1]}'")
+                    stack.pop()
+            elif text in END_MODULE_KEYWORDS or text in MODULE_KEYWORDS:
+                self.error(index, f"missing '{stack[-1]}'")
+                return index
+            index += 1
+        return self.skip_label(index)
+
+    def parse_item(self, index, scope, ports):
+        """
+        Parse one module item and return the index after it.
+        """
+        token = self.tokens[index]
+        text = token.text
+        if text in DIRECTIONS or text in NET_TYPES or text in PARAMETER_KEYWORDS:
+            return self.parse_declaration(index, scope, ports)
+        if text in ('function', 'task'):
+            return self.parse_subroutine(index, scope)
+        if text in PROCESS_KEYWORDS:
+            return self.skip_statement(index + 1)
+        if text in SKIPPED_STATEMENTS:
+            return self.skip_to(index, (';',)) + 1
+        if text in ('generate', 'endgenerate', 'else'):
+            return index + 1
+        if text == 'begin':
+            return self.skip_label(index + 1)  # Generate block: its items are parsed
+        if text == 'end':
+            return self.skip_label(index + 1)
+        if text in ('for', 'if', 'case'):
+            # Generate loop or condition: skip the header, parse the body's items
+            index = skip_group(self.tokens, index + 1)
+            return index
+        if text in BLOCK_PAIRS and text not in ('begin', 'fork'):
+            return self.skip_block(index)
+        if self.is_name(index):
+            following = self.text(index + 1)
+            if following == '#' or (self.is_name(index + 1) and self.text(index + 2) in ('(', '[')):
+                return self.parse_instance(index, scope)
+            if self.is_name(index + 1):
+                # Declaration with a user-defined type, e.g. 'state_t state;'
+                return self.parse_declaration(index, scope, ports)
+        return self.skip_past_semicolon(index)
+
+
+def statement_end(tokens, index):
+    """
+    Find the end of the behavioural statement starting at a token, e.g. the
+    body of an always block, including nested blocks.
+
+    Args:
+        tokens: Tokens without preprocessor directives
+        index: Index of the statement's first token
+
+    Returns:
+        int: Index just after the statement
+    """
+    return _Parser(tokens, ParseResult()).skip_statement(index)
+
+
+def drop_inactive(tokens, inactive):
+    """
+    Remove the tokens of `ifdef branches that are not compiled.
+
+    Args:
+        tokens: Tokens in source order
+        inactive: Sorted (first line, last line) ranges, inclusive
+
+    Returns:
+        list: Tokens outside the ranges
+    """
+    if not inactive:
+        return tokens
+    output = []
+    ranges = iter(inactive)
+    first, last = next(ranges)
+    for token in tokens:
+        while token.line > last:
+            first, last = next(ranges, (float('inf'), float('inf')))
+        if token.line < first:
+            output.append(token)
+    return output
+
+
+def parse_verilog(text, line=0, inactive=None):
+    """
+    Extract declarations from Verilog or SystemVerilog source.
+
+    Args:
+        text: Source text
+        line: Line number of the first line of text, when parsing part of a file
+        inactive: Line ranges of `ifdef branches that are not compiled, from
+                  PreprocessorCache.analyze(); their declarations are skipped.
+                  Without them both branches of every conditional are parsed.
+
+    Returns:
+        ParseResult: Modules, ports, parameters, nets, instances, functions,
+                     tasks, macro definitions and includes, plus parse errors
+    """
+    result = ParseResult()
+    result.tokens = tokenize(text, line)
+    tokens = strip_directives(drop_inactive(result.tokens, inactive), result)
+    _Parser(tokens, result).parse()
+    result.symbols.sort(key=lambda symbol: (symbol.line, symbol.column))
+    return result
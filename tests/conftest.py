@@ -0,0 +1,62 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+# The application modules live flat in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')  # Widgets without a display
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    """
+    The QApplication the widget tests run in.
+    """
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def config(tmp_path):
+    """
+    Default configuration with journals kept in a temporary directory.
+    """
+    from config import EditorConfig
+    config = EditorConfig()
+    config.file['journal_directory'] = str(tmp_path / 'journal')
+    return config
+
+
+@pytest.fixture
+def indexed_project(qapp, config, tmp_path):
+    """
+    Write Verilog files into a project directory and index them.
+
+    Returns:
+        callable: files (dict of relative path -> text) -> (SymbolIndex, root)
+    """
+    from PyQt5.QtCore import QEventLoop, QTimer
+    from symbol_index import SymbolIndex
+    config.project['index_directory'] = str(tmp_path / 'index')
+    indexes = []
+
+    def index_files(files):
+        root = tmp_path / 'project'
+        for name, text in files.items():
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_text(text)
+        index = SymbolIndex(config)
+        indexes.append(index)
+        loop = QEventLoop()
+        index.scanCompleted.connect(loop.quit)
+        QTimer.singleShot(10000, loop.quit)
+        index.set_root(str(root))
+        loop.exec_()
+        assert not index.scanning
+        return index, str(root)
+
+    yield index_files
+    for index in indexes:
+        index.shutdown()
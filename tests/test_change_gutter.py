@@ -0,0 +1,41 @@
+# test_change_gutter.py
+import random
+
+from change_gutter import rediff
+
+
+def check_hunks(base, lines, hunks):
+    """
+    Check that hunks are ordered, non-empty and turn the saved lines into the buffer.
+    """
+    rebuilt = []
+    base_position = 0
+    for hunk in hunks:
+        assert hunk.base_start >= base_position
+        rebuilt += base[base_position:hunk.base_start]
+        assert len(rebuilt) == hunk.start  # Lines between hunks are equal
+        assert hunk.end > hunk.start or hunk.base_end > hunk.base_start
+        assert hunk.kind == ('added' if hunk.base_end == hunk.base_start else
+                             'deleted' if hunk.end == hunk.start else 'modified')
+        rebuilt += lines[hunk.start:hunk.end]
+        base_position = hunk.base_end
+    rebuilt += base[base_position:]
+    assert rebuilt == lines
+
+
+def test_rediff_after_random_edits():
+    rng = random.Random(43)
+    words = ['a', 'b', 'c', 'd', '']
+    base = [rng.choice(words) for _ in range(300)]
+    lines = list(base)
+    hunks = rediff(base, lines, None, 0, 0, 0)
+    assert hunks == []
+    for _ in range(500):
+        first = rng.randrange(len(lines) + 1)
+        old_end = min(len(lines), first + rng.randrange(5))
+        middle = [rng.choice(words) for _ in range(rng.randrange(5))]
+        if rng.random() < 0.2:
+            middle = base[first:first + len(middle)]  # Edits back to the saved text
+        lines = lines[:first] + middle + lines[old_end:]
+        hunks = rediff(base, lines, hunks, first, old_end, first + len(middle))
+        check_hunks(base, lines, hunks)
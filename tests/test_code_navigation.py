@@ -0,0 +1,28 @@
+# test_code_navigation.py
+import os
+
+from code_navigation import CodeNavigator
+
+FIFO = """module fifo #(parameter DEPTH = 4) (input clk);
+endmodule
+"""
+
+TOP = """module top (input clk);
+    fifo #(
+        .DEPTH(8)
+    ) u_f (
+        .clk(clk)
+    );
+    other #(.DEPTH(2)) u_o (.clk(clk));
+endmodule
+"""
+
+
+def test_multi_line_parameter_override_is_a_reference(indexed_project):
+    index, root = indexed_project({'fifo.v': FIFO, 'top.v': TOP, 'other.v': 'module other; endmodule\n'})
+    fifo = os.path.join(root, 'fifo.v')
+    top = os.path.join(root, 'top.v')
+    name, locations = CodeNavigator(index).references(fifo, FIFO, FIFO.index('DEPTH'))
+    assert name == 'DEPTH'
+    # The override of other's DEPTH on the line of its instance name is not one
+    assert locations == [(fifo, 0, FIFO.index('DEPTH')), (top, 2, 9)]
@@ -0,0 +1,41 @@
+# test_document_tabs.py
+from document_tabs import DocumentTab, DocumentTabs
+
+
+def test_suspend_keeps_edits_whose_modified_flag_was_cleared(qapp, config, tmp_path):
+    path = tmp_path / 'top.v'
+    path.write_text('module top;\nwire   a;\nendmodule\n')
+    tabs = DocumentTabs(config)
+    tab = DocumentTab(tabs, str(path))
+    tab.load_text(path.read_text(), str(path))
+    tabs.add_tab(tab)
+
+    tab.editor.appendPlainText('wire b;')
+    tab.editor.format_verilog()  # setPlainText() clears the modified flag
+    edited = tab.editor.toPlainText()
+
+    tab.suspend()
+    tab.restore()
+    assert tab.editor.toPlainText() == edited
+    assert tab.is_modified()
+    tab.close()
+
+
+def test_suspend_keeps_tabs_with_undo_history(qapp, config, tmp_path):
+    path = tmp_path / 'top.v'
+    path.write_text('module top;\nendmodule\n')
+    tabs = DocumentTabs(config)
+    tab = DocumentTab(tabs, str(path))
+    tab.load_text(path.read_text(), str(path))
+    tabs.add_tab(tab)
+
+    tab.suspend()  # Nothing to lose yet
+    assert tab.is_suspended()
+    tab.restore()
+
+    tab.editor.appendPlainText('wire b;')
+    tab.suspend()
+    assert not tab.is_suspended()
+    tab.editor.undo()
+    assert tab.editor.toPlainText() == 'module top;\nendmodule\n'
+    tab.close()
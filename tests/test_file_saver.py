@@ -0,0 +1,38 @@
+# test_file_saver.py
+import os
+import stat
+
+import pytest
+
+from file_saver import UMASK, write_atomic
+
+posix_only = pytest.mark.skipif(os.name != 'posix', reason='POSIX permissions and symlinks')
+
+
+@posix_only
+def test_new_file_gets_default_permissions(tmp_path):
+    path = tmp_path / 'new.v'
+    write_atomic(str(path), 'module m; endmodule\n')
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~UMASK
+
+
+@posix_only
+def test_existing_file_keeps_its_permissions(tmp_path):
+    path = tmp_path / 'old.v'
+    path.write_text('old\n')
+    os.chmod(path, 0o640)
+    write_atomic(str(path), 'new\n')
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert path.read_text() == 'new\n'
+
+
+@posix_only
+def test_symlink_is_followed(tmp_path):
+    target = tmp_path / 'real.v'
+    target.write_text('old\n')
+    link = tmp_path / 'link.v'
+    link.symlink_to(target)
+    write_atomic(str(link), 'new\n', backup_directory='.backup')
+    assert link.is_symlink()
+    assert target.read_text() == 'new\n'
+    assert (tmp_path / '.backup' / 'real.v.bak').read_text() == 'old\n'
@@ -0,0 +1,88 @@
+# test_large_file_viewer.py
+import re
+
+import pytest
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtGui import QTextDocument
+
+import large_file_viewer
+from large_file_viewer import LargeFileViewer
+
+LINES = ['wire a; // not a /* comment',
+         'assign s = "/* not one either";',
+         '/* a comment',
+         '   spanning',
+         '   lines */ wire b;',
+         'wire c; /* one line */',
+         '/* unterminated',
+         'wire d;']
+
+
+def wait_for(worker):
+    """
+    Run the event loop until a worker thread has finished and reported.
+    """
+    if worker is not None and not worker.isFinished():
+        loop = QEventLoop()
+        worker.finished.connect(loop.quit)
+        QTimer.singleShot(10000, loop.quit)
+        loop.exec_()
+    QEventLoop().processEvents()
+
+
+@pytest.fixture
+def viewer(qapp, config, tmp_path, monkeypatch):
+    monkeypatch.setattr(large_file_viewer.LineIndexer, 'CHUNK_SIZE', 16)  # Many small windows
+    viewer = LargeFileViewer(config=config)
+
+    def open_text(text):
+        path = tmp_path / 'big.v'
+        path.write_bytes(text.encode('utf-8'))
+        viewer.open_file(str(path))
+        wait_for(viewer.indexer)
+        wait_for(viewer.comment_scanner)
+        return viewer
+
+    yield open_text
+    viewer.close_file()
+
+
+def test_lines_start_in_comments(viewer):
+    view = viewer('\n'.join(LINES) + '\n')
+    assert [view.starts_in_comment(line) for line in range(len(LINES))] == \
+        [False, False, False, True, True, False, False, True]
+
+
+def find(view, text, flags=QTextDocument.FindFlags()):
+    """
+    Run a viewer search to the end.
+
+    Returns:
+        tuple or None: (line, offset) of the match
+    """
+    results = []
+    assert view.find(text, flags, results.append)
+    wait_for(view.searcher)
+    assert len(results) == 1
+    return (view.current_line, view.match[0]) if results[0] else None
+
+
+def test_find_wraps_both_ways(viewer):
+    text = ''.join(f'wire w{i};\n' for i in range(50)) + 'wire target;\n'
+    view = viewer(text)
+    offsets = [m.start() for m in re.finditer(rb'\bw1\b', text.encode())]
+    assert find(view, 'w1', QTextDocument.FindWholeWords) == (1, offsets[0])
+    assert find(view, 'w1', QTextDocument.FindWholeWords) == (1, offsets[0])  # Only one: wraps to it
+    assert find(view, 'TARGET') == (50, text.index('target'))
+    assert find(view, 'wire', QTextDocument.FindBackward) == (50, text.rindex('wire'))
+    assert find(view, 'missing') is None
+
+
+def test_find_whole_word_at_window_edges(viewer):
+    text = 'ab abc xab ab\n' * 20
+    view = viewer(text)
+    expected = [m.start() for m in re.finditer(r'\bab\b', text)]
+    found = []
+    for _ in expected:
+        found.append(find(view, 'ab', QTextDocument.FindWholeWords | QTextDocument.FindCaseSensitively)[1])
+    assert found == expected
@@ -0,0 +1,43 @@
+# test_local_history.py
+import os
+
+import local_history
+from local_history import LocalHistory, split_chunks
+
+
+def object_count(history):
+    """
+    Count the chunk files in a history store.
+    """
+    return sum(len(names) for _, _, names in os.walk(os.path.join(history.directory, 'objects')))
+
+
+def test_record_and_restore(tmp_path):
+    history = LocalHistory(str(tmp_path))
+    path = str(tmp_path / 'a.v')
+    text = ''.join(f'assign w{i} = {i};\n' for i in range(5000))
+    first = history.record(path, text)
+    assert history.record(path, text) is None  # Unchanged
+    second = history.record(path, text.replace('w2500 ', 'x2500 '))
+    assert [version.id for version in history.versions(path)] == [second.id, first.id]
+    assert history.restore(path, first.id) == text
+
+
+def test_unreferenced_chunks_are_swept_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_history, 'GC_INTERVAL', 3)
+    monkeypatch.setattr(local_history, 'GC_GRACE', -60)  # Everything is old enough
+    path = str(tmp_path / 'a.v')
+    counts = []
+    for number in range(5):
+        history = LocalHistory(str(tmp_path), max_versions=1)  # A new session each time
+        history.record(path, f'version {number}\n')
+        counts.append(object_count(history))
+    # Dropped versions' chunks stay until the third drop, then go at once
+    assert counts == [1, 2, 3, 1, 2]
+
+
+def test_blank_lines_do_not_end_chunks():
+    text = ''.join(f'assign w{i} = {i};\n\n' for i in range(20000))
+    chunks = split_chunks(text)
+    assert ''.join(chunks) == text
+    assert len(text.split('\n')) / len(chunks) > local_history.CHUNK_LINES / 2
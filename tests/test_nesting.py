@@ -0,0 +1,49 @@
+# test_nesting.py
+import pytest
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtTest import QTest
+from token_cache import TOP_LEVEL, nesting_step, tokenize_lines
+from verilog_editor import VerilogEditor
+
+
+def indents(text):
+    """
+    Indent level of each line of a text, as auto-indent computes it.
+    """
+    state = TOP_LEVEL
+    levels = []
+    for tokens in tokenize_lines(text):
+        level, state = nesting_step(tokens, state)
+        levels.append(level)
+    return levels
+
+
+def test_stray_trailing_end_does_not_crash():
+    assert indents('q <= d; end\nx = 1;') == [0, 0]
+    assert indents('a; end') == [0]
+
+
+@pytest.mark.parametrize('text, levels', [
+    ("always @(posedge clk) begin\nq <= d;\nend\nassign y = q;", [0, 1, 0, 0]),
+    ("if (a)\nx = 1;\nelse\nx = 2;\ny = 3;", [0, 1, 0, 1, 0]),
+    ("if (a) begin\nx = 1;\nend else begin\nx = 2;\nend", [0, 1, 0, 1, 0]),
+    ("if (a)\nif (b)\nx = 1;\nelse\nx = 2;\nelse\nx = 3;", [0, 1, 2, 1, 2, 0, 1]),
+    ("module m (\ninput a,\noutput b\n);\nwire c;\nendmodule", [0, 1, 1, 0, 1, 0]),
+    ("case (s)\n0: y = a;\n1:\ny = b;\nendcase", [0, 1, 1, 2, 0]),
+    ("begin\n/* end\nend */\nx = 1;\nend", [0, 1, 1, 1, 0]),
+])
+def test_indent_levels(text, levels):
+    assert indents(text) == levels
+
+
+def test_return_and_closing_word_reindent(qapp, config):
+    config.formatting['use_tabs'] = False
+    config.formatting['tab_size'] = 2
+    editor = VerilogEditor(config=config)
+    QTest.keyClicks(editor, 'always @(*) begin')
+    QTest.keyClick(editor, Qt.Key_Return)
+    QTest.keyClicks(editor, 'y = a;')
+    QTest.keyClick(editor, Qt.Key_Return)
+    QTest.keyClicks(editor, 'end')
+    assert editor.toPlainText() == 'always @(*) begin\n  y = a;\nend'
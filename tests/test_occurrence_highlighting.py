@@ -0,0 +1,48 @@
+# test_occurrence_highlighting.py
+import occurrence_highlighting
+from verilog_editor import VerilogEditor
+
+TEXT = """wire count;  // count of words
+/* the count
+   count */
+initial $display("count=%d", count);
+"""
+
+
+def test_occurrences_skip_comments_and_strings(qapp, config):
+    editor = VerilogEditor(config=config)
+    editor.setPlainText(TEXT)
+    cursor = editor.textCursor()
+    cursor.setPosition(TEXT.index('count'))
+    editor.setTextCursor(cursor)
+    editor.occurrences.start_scan()
+    assert editor.occurrences.text is None  # Scan finished
+    assert list(editor.occurrences.offsets) == [TEXT.index('count'), TEXT.rindex('count')]
+    assert list(editor.occurrences.lines) == [0, 3]
+
+
+def test_scan_survives_rehighlighting(qapp, config, monkeypatch):
+    monkeypatch.setattr(occurrence_highlighting, 'SCAN_CHUNK', 1000)
+    editor = VerilogEditor(config=config)
+    editor.setPlainText('count = count;\n' * 3000)  # Many scan slices
+    cursor = editor.textCursor()
+    cursor.setPosition(0)
+    editor.setTextCursor(cursor)
+    occurrences = editor.occurrences
+    occurrences.start_scan()
+    while occurrences.text is not None:
+        editor.highlighter.rehighlightBlock(editor.document().firstBlock())
+        occurrences.scan_step()
+    assert len(occurrences.offsets) == 6000
+
+
+def test_stale_scan_restarts(qapp, config, monkeypatch):
+    monkeypatch.setattr(occurrence_highlighting, 'SCAN_CHUNK', 1000)
+    editor = VerilogEditor(config=config)
+    editor.setPlainText('count = count;\n' * 3000)
+    occurrences = editor.occurrences
+    occurrences.start_scan()
+    editor.token_cache.edits += 1  # As if the text changed without a contentsChange
+    occurrences.scan_step()
+    assert occurrences.text is None and occurrences.word is None
+    assert occurrences.timer.isActive()
@@ -0,0 +1,66 @@
+# test_symbol_rename.py
+import os
+
+from code_navigation import CodeNavigator
+from symbol_rename import RenameWorker
+
+FIFO = """module fifo #(parameter DEPTH = 4) (input clk);
+    reg [DEPTH-1:0] count;
+endmodule
+"""
+
+TOP = """module top (input clk);
+    fifo #(
+        .DEPTH(8)
+    ) u_f (
+        .clk(clk)
+    );
+endmodule
+"""
+
+
+def rename_files(locations):
+    """
+    Group reference locations by file, as the rename command does.
+    """
+    files = {}
+    for path, line, column in locations:
+        files.setdefault(path, []).append((line, column))
+    return files
+
+
+def test_rename_parameter_updates_multi_line_override(indexed_project):
+    index, root = indexed_project({'fifo.v': FIFO, 'top.v': TOP})
+    fifo = os.path.join(root, 'fifo.v')
+    top = os.path.join(root, 'top.v')
+    name, locations = CodeNavigator(index).references(fifo, FIFO, FIFO.index('DEPTH'))
+    worker = RenameWorker(rename_files(locations), name, 'SIZE')
+    worker.run()
+    assert worker.error is None
+    with open(fifo) as f:
+        assert f.read() == FIFO.replace('DEPTH', 'SIZE')
+    with open(top) as f:
+        assert f.read() == TOP.replace('DEPTH', 'SIZE')
+
+
+def test_failed_commit_rolls_back_every_file(tmp_path, monkeypatch):
+    first = tmp_path / 'a.v'
+    second = tmp_path / 'b.v'
+    first.write_text('wire old;\n')
+    second.write_text('assign x = old;\n')
+    replace = os.replace
+
+    def failing_replace(source, destination):
+        if destination == str(second) and source.endswith('.tmp'):
+            raise OSError('disk full')
+        replace(source, destination)
+
+    monkeypatch.setattr(os, 'replace', failing_replace)
+    worker = RenameWorker({str(first): [(0, 5)], str(second): [(0, 11)]}, 'old', 'new')
+    worker.run()
+    assert worker.error == 'disk full'
+    assert worker.written == [] and worker.count == 0
+    # The file renamed before the failure is restored, and no temporary file is left
+    assert first.read_text() == 'wire old;\n'
+    assert second.read_text() == 'assign x = old;\n'
+    assert sorted(os.listdir(tmp_path)) == ['a.v', 'b.v']
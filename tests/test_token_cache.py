@@ -0,0 +1,65 @@
+# test_token_cache.py
+import random
+
+from PyQt5.QtGui import QTextCursor, QTextDocument
+from PyQt5.QtWidgets import QPlainTextDocumentLayout
+from token_cache import TOP_LEVEL, nesting_step, token_cache_for, tokenize_lines
+from verilog_editor import VerilogEditor
+
+PIECES = ['begin', 'end', 'if (a)', 'else', 'x = 1;', '/*', '*/', '// c', '"s"', '(', ')', 'case (s)',
+          'endcase', 'module m;', 'endmodule', '\n', '\n', '\n', ' ']
+
+
+def fresh_indents(lines):
+    """
+    Indent level of each line, computed from the top.
+    """
+    state = TOP_LEVEL
+    levels = []
+    for tokens in lines:
+        level, state = nesting_step(tokens, state)
+        levels.append(level)
+    return levels
+
+
+def test_incremental_tokens_match_fresh_tokenization(qapp):
+    rng = random.Random(43)
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))  # Without a layout, no contentsChange
+    cache = token_cache_for(document)
+    document.setPlainText('\n'.join(rng.choice(PIECES) for _ in range(200)))
+    for _ in range(300):
+        # Replace a random span with a few random pieces
+        length = document.characterCount() - 1
+        start = rng.randrange(length + 1)
+        cursor = QTextCursor(document)
+        cursor.setPosition(start)
+        cursor.setPosition(min(length, start + rng.randrange(20)), QTextCursor.KeepAnchor)
+        cursor.insertText(' '.join(rng.choice(PIECES) for _ in range(rng.randrange(4))))
+
+        fresh = tokenize_lines(document.toPlainText())
+        if rng.random() < 0.5:
+            block = document.findBlockByNumber(rng.randrange(document.blockCount()))
+            assert cache.nesting(block).indent == fresh_indents(fresh)[block.blockNumber()]
+        assert cache.lines() == fresh
+    block = document.lastBlock()
+    cache.nesting(block)
+    levels = []
+    block = document.begin()
+    while block.isValid():
+        levels.append(cache.nesting(block).indent)
+        block = block.next()
+    assert levels == fresh_indents(fresh)
+
+
+def test_rehighlighting_is_not_an_edit(qapp, config):
+    editor = VerilogEditor(config=config)
+    editor.setPlainText('wire a;\nwire b;\n')
+    cache = editor.token_cache
+    edits = cache.edits
+    revision = editor.document().revision()
+    editor.highlighter.rehighlightBlock(editor.document().findBlockByNumber(1))
+    assert editor.document().revision() != revision  # Qt counts it as a change
+    assert cache.edits == edits
+    QTextCursor(editor.document()).insertText('x')
+    assert cache.edits == edits + 1
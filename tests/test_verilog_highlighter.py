@@ -0,0 +1,22 @@
+# test_verilog_highlighter.py
+from PyQt5.QtGui import QTextCursor
+from preprocessor import PreprocessorCache
+from verilog_editor import VerilogEditor
+
+
+def test_regreying_does_not_schedule_another_analysis(qapp, config):
+    editor = VerilogEditor(config=config)
+    editor.setPlainText('`ifdef X\nwire a;\n`endif\nwire b;\n' * 50)
+    highlighter = editor.highlighter
+    highlighter.set_preprocessor(PreprocessorCache([], {}), None)
+    qapp.processEvents()
+    highlighter.preprocess_timer.stop()
+
+    cursor = QTextCursor(editor.document())
+    cursor.insertText('`define X\n')  # Every branch becomes active
+    assert highlighter.preprocess_timer.isActive()
+    highlighter.preprocess_timer.stop()
+    highlighter.update_inactive()
+    assert highlighter.current_inactive_lines() == []
+    qapp.processEvents()
+    assert not highlighter.preprocess_timer.isActive()